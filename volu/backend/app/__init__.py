@@ -3,26 +3,89 @@ from flask_cors import CORS
 from dotenv import load_dotenv
 import os
 
-def create_app():
+def create_app(testing=False):
     load_dotenv()
 
     app = Flask(__name__)
+    app.config["TESTING"] = testing
+
+    # Encodes ObjectId/UUID/datetime and renames _id -> id in every JSON response
+    from app.utils.json_provider import BSONJSONProvider
+    app.json = BSONJSONProvider(app)
     app.url_map.strict_slashes = False  # 👈 Prevents automatic 308 redirects for trailing slashes
 
     CORS(app, origins=os.getenv("FRONTEND_URL", "http://localhost:3000"),
          supports_credentials=True,
          methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"])
 
+    # Memory-map the offline ZIP centroid table once, before the first request
+    from app.utils.geo import get_zip_centroids
+    get_zip_centroids()
+
     # Register blueprints
     from app.routes.notifications import notifications_bp
     from app.routes.participation import participation_bp
     from app.routes.user_profile import user_profile_bp
     from app.routes.events import events_bp
+    from app.routes.matching import matching_bp
 
     app.register_blueprint(notifications_bp, url_prefix="/api/notifications")
     app.register_blueprint(participation_bp, url_prefix="/api/participation")
     app.register_blueprint(user_profile_bp)
     app.register_blueprint(events_bp, url_prefix="/api/events")
+    app.register_blueprint(matching_bp, url_prefix="/api/matching")
+
+    # Mongo client settings come from app.config (falling back to the environment);
+    # the client itself is created on first use
+    from app.database import client_factory
+    client_factory.init_app(app)
+
+    # Per-request timing and Mongo command tracing, exported at /metrics
+    from app.utils import metrics
+    metrics.init_app(app)
+
+    from app.utils.mongo_monitoring import pool_metrics
+    app.add_url_rule("/api/db/pool-stats", "pool_stats", lambda: pool_metrics.snapshot())
+
+    from app.utils.cache import cache_stats
+    app.add_url_rule("/api/cache/stats", "cache_stats", lambda: cache_stats())
+
+    from app.cli import db_cli, reminders_cli, delivery_cli, rollups_cli, scans_cli
+    app.cli.add_command(db_cli)
+    app.cli.add_command(reminders_cli)
+    app.cli.add_command(delivery_cli)
+    app.cli.add_command(rollups_cli)
+    app.cli.add_command(scans_cli)
+
+    # Migrations can delete duplicate records, so they run from `flask db migrate` unless opted in here
+    if not testing and os.getenv("DB_MIGRATE_ON_STARTUP", "false").lower() == "true":
+        from app.database import migrate
+        try:
+            migrate()
+        except Exception as e:
+            app.logger.warning("Database migration skipped: %s", e)
+
+    # Event reminders can run in every web process (claims are atomic) or in a
+    # separate `flask reminders run` worker
+    if not testing and os.getenv("REMINDER_WORKER", "false").lower() == "true":
+        from app.services import reminders
+        reminders.start_scheduler()
+
+    # Email/SMS outbox worker; like reminders it can also run as `flask delivery run`
+    if not testing and os.getenv("DELIVERY_WORKER", "false").lower() == "true":
+        from app.services import delivery
+        delivery.start_worker()
+
+    # Periodic full rebuild of the impact rollups (`flask rollups reconcile` runs one now)
+    reconcile_hours = os.getenv("ROLLUP_RECONCILE_HOURS")
+    if not testing and reconcile_hours:
+        from app.services import org_stats
+        org_stats.start_reconciler(float(reconcile_hours) * 3600)
+
+    # Folds check-in/check-out scans into participation hours (`flask scans run` as a separate worker)
+    if not testing and os.getenv("SCAN_COMPACTOR", "false").lower() == "true":
+        from app.services import scans
+        scans.start_compactor()
 
     return app
 
@@ -0,0 +1,65 @@
+from contextlib import asynccontextmanager
+from dotenv import load_dotenv
+from fastapi import FastAPI, Request
+from fastapi.middleware.cors import CORSMiddleware
+import os
+
+from app.asgi.responses import error
+
+def create_asgi_app(db=None):
+    """ASGI counterpart of create_app() on AsyncMongoClient.
+
+    Serves the events, participation, notifications and user-profile routes with
+    the same paths and response bodies as the Flask blueprints. ``db`` is an
+    async database handle; by default the shared AsyncMongoClient's "volu"
+    database, opened on first use.
+
+        uvicorn asgi:app --port 3001
+    """
+    load_dotenv()
+
+    @asynccontextmanager
+    async def lifespan(app):
+        # Same opt-ins as create_app(); the workers run on the sync client in their own threads
+        from app.services import certificates, delivery, org_stats, reminders, scans
+        if os.getenv("REMINDER_WORKER", "false").lower() == "true":
+            reminders.start_scheduler()
+        if os.getenv("DELIVERY_WORKER", "false").lower() == "true":
+            delivery.start_worker()
+        if os.getenv("ROLLUP_RECONCILE_HOURS"):
+            org_stats.start_reconciler(float(os.getenv("ROLLUP_RECONCILE_HOURS")) * 3600)
+        if os.getenv("SCAN_COMPACTOR", "false").lower() == "true":
+            scans.start_compactor()
+        yield
+        reminders.stop_scheduler()
+        delivery.stop_worker()
+        org_stats.stop_reconciler()
+        scans.stop_compactor()
+        certificates.shutdown_executor()
+        from app.asgi.database import close_async_client
+        await close_async_client()
+
+    app = FastAPI(lifespan=lifespan, openapi_url=None)
+    if db is None:
+        from app.asgi.database import get_async_db
+        db = get_async_db()
+    app.state.db = db
+
+    app.add_middleware(CORSMiddleware,
+                       allow_origins=[os.getenv("FRONTEND_URL", "http://localhost:3000")],
+                       allow_credentials=True,
+                       allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
+                       allow_headers=["*"])
+
+    from app.asgi import events, notifications, participation, user_profile
+    app.include_router(notifications.router)
+    app.include_router(participation.router)
+    app.include_router(user_profile.router)
+    app.include_router(events.router)
+
+    # Flask answers unhandled errors with a 500; keep the JSON error shape the routes use
+    @app.exception_handler(Exception)
+    async def unhandled(request: Request, exc: Exception):
+        return error(str(exc), 500)
+
+    return app
@@ -0,0 +1,20 @@
+from pymongo import AsyncMongoClient
+from app.database import client_factory
+
+# AsyncMongoClient for the ASGI app, created on first use so that importing the
+# ASGI modules never opens connections. It takes its URI, pool and timeout
+# settings from the same factory as the synchronous client.
+
+_client = None
+
+def get_async_db():
+    global _client
+    if _client is None:
+        _client = AsyncMongoClient(client_factory.uri(), **client_factory.client_options())
+    return _client[client_factory.database_name()]
+
+async def close_async_client():
+    global _client
+    if _client is not None:
+        await _client.close()
+        _client = None
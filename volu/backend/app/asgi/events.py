@@ -0,0 +1,304 @@
+from datetime import datetime
+from bson import ObjectId
+from fastapi import APIRouter, Request
+from pymongo import ReturnDocument
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import StreamingResponse
+from app.asgi.notifications import notify_event_volunteers
+from app.asgi.responses import JSONResponse, cached_json, error, message
+from app.routes.events import (
+    STREAM_BATCH_SIZE, HAS_CAPACITY, WAITLIST_EMPTY, WAITLIST_OPEN, SCHEDULE_CONFLICT,
+    conflict_check_requested, event_filters, has_room, event_projection, event_cache_key, not_signed_up
+)
+from app.database import for_lists
+from app.services import event_index, org_stats, participation_stats, reminders, schedule
+from app.utils.cache import invalidate
+from app.utils.json_provider import dumps
+
+# Async port of app/routes/events.py; same paths, status codes and bodies
+router = APIRouter(prefix="/api/events")
+
+
+def events(request):
+    return request.app.state.db["events"]
+
+async def apply_event_change(request, before, after):
+    db = request.app.state.db
+    delta = org_stats.event_delta(before, after)
+    if delta:
+        await db["org_stats"].update_one({"_id": org_stats.ORG_ID}, org_stats.org_update(delta))
+    if participation_stats.rescheduled(before, after):
+        await move_event_month(db, after["_id"], participation_stats.month_key(after.get("startDate")))
+
+# Async participation_stats.move_event_month() plus the org side of the same changes
+async def move_event_month(db, event_id, month):
+    query = participation_stats.stale_month_query(event_id, month)
+    records = await db["participation"].find(query, participation_stats.MONTH_FIELDS).to_list(None)
+    if not records:
+        return
+    await db["participation"].update_many(
+        {"_id": {"$in": [record["_id"] for record in records]}}, {"$set": {"eventMonth": month}}
+    )
+    changes = participation_stats.month_moves(records, month)
+    ops = participation_stats.rollup_updates(changes)
+    if ops:
+        await db["participation_stats"].bulk_write(ops, ordered=False)
+    delta, _ = org_stats.records_delta(changes)
+    if delta:
+        await db["org_stats"].update_one({"_id": org_stats.ORG_ID}, org_stats.org_update(delta))
+
+def notify_requested(request):
+    return request.query_params.get("notify", "true").lower() != "false"
+
+async def request_body(request):
+    try:
+        return await request.json()
+    except ValueError:
+        return None
+
+async def request_user_id(request):
+    data = await request_body(request)
+    return data.get("userId") if isinstance(data, dict) else None
+
+
+async def schedule_reminders(request, event):
+    ops, tasks = reminders.schedule_writes(event)
+    await request.app.state.db["scheduled_tasks"].bulk_write(ops, ordered=True)
+    reminders.wake(tasks)
+
+def stream_events(cursor, fmt):
+    async def generate():
+        if fmt == "ndjson":
+            async for event in cursor:
+                yield dumps(event) + "\n"
+            return
+        yield "["
+        first = True
+        async for event in cursor:
+            yield ("" if first else ",") + dumps(event)
+            first = False
+        yield "]"
+
+    media_type = "application/x-ndjson" if fmt == "ndjson" else "application/json"
+    return StreamingResponse(generate(), media_type=media_type)
+
+async def list_events(request, query):
+    args = request.query_params
+    cursor = for_lists(events(request)).find(event_filters(query, args), event_projection(args))
+    fmt = args.get("stream")
+    if fmt in ("json", "ndjson"):
+        return stream_events(cursor.batch_size(STREAM_BATCH_SIZE), fmt)
+    return JSONResponse(await cursor.to_list(None))
+
+@router.get("/")
+async def get_all_events(request: Request):
+    return await list_events(request, {})
+
+@router.get("/search")
+async def search_events(request: Request):
+    try:
+        params = event_index.search_params(request.query_params)
+    except ValueError as e:
+        return error(str(e), 400)
+    try:
+        # The first search (or one after the index expires) loads every event with the sync client
+        index = await run_in_threadpool(event_index.get_index)
+        return JSONResponse(index.search(**params))
+    except Exception as e:
+        return error(str(e), 500)
+
+@router.get("/search/stats")
+async def get_search_stats(request: Request):
+    index = await run_in_threadpool(event_index.get_index)
+    return JSONResponse(index.stats())
+
+@router.get("/created-by/{user_id}")
+async def get_events_created_by_user(request: Request, user_id: str):
+    return await list_events(request, {"createdBy": user_id})
+
+@router.get("/{event_id}")
+async def get_event_by_id(request: Request, event_id: str):
+    try:
+        async def load():
+            return await events(request).find_one({"_id": ObjectId(event_id)})
+
+        response = await cached_json(request, event_cache_key(event_id), load)
+        if response is None:
+            return error("Event not found", 404)
+        return response
+    except Exception as e:
+        return error(str(e), 500)
+
+@router.post("/")
+async def create_event(request: Request):
+    data = await request.json()
+    event = {
+        "createdBy": data.get("createdBy", "admin"),
+        "createdAt": datetime.utcnow(),
+        "updatedAt": datetime.utcnow(),
+        "currentVolunteers": 0,
+        **data
+    }
+    await events(request).insert_one(event)
+    await schedule_reminders(request, event)
+    await apply_event_change(request, None, event)
+    event_index.on_event_saved(event)
+    return JSONResponse(event, status_code=201)
+
+@router.put("/{event_id}")
+async def update_event(request: Request, event_id: str):
+    data = await request.json()
+    previous = await events(request).find_one_and_update(
+        {"_id": ObjectId(event_id)},
+        {"$set": {**data, "updatedAt": datetime.utcnow()}},
+        projection={"startDate": 1, "maxVolunteers": 1}
+    )
+    if not previous:
+        return error("Event not found", 404)
+    invalidate(event_cache_key(event_id))
+    updated_event = await events(request).find_one({"_id": ObjectId(event_id)})
+    if "maxVolunteers" in data:
+        updated_event = await fill_from_waitlist(events(request), updated_event)
+    await apply_event_change(request, previous, updated_event)
+    event_index.on_event_saved(updated_event)
+    schedule.on_event_changed(updated_event)
+    if "startDate" in data or "startTime" in data:
+        await schedule_reminders(request, updated_event)
+    if notify_requested(request):
+        await notify_event_volunteers(
+            request.app.state.db, event_id, "EVENT_UPDATE", "Event updated",
+            f"{updated_event.get('name', 'An event')} has been updated.",
+            event=updated_event
+        )
+    return JSONResponse(updated_event)
+
+@router.delete("/{event_id}")
+async def delete_event(request: Request, event_id: str):
+    deleted = await events(request).find_one_and_delete({"_id": ObjectId(event_id)})
+    if not deleted:
+        return error("Event not found", 404)
+    invalidate(event_cache_key(event_id))
+    await request.app.state.db["scheduled_tasks"].update_many(*reminders.cancellation(event_id))
+    await apply_event_change(request, deleted, None)
+    event_index.on_event_deleted(event_id)
+    schedule.on_event_deleted(event_id)
+    if notify_requested(request):
+        await notify_event_volunteers(
+            request.app.state.db, event_id, "EVENT_CANCELLATION", "Event cancelled",
+            f"{deleted.get('name', 'An event')} has been cancelled.",
+            event=deleted
+        )
+    return message("Event deleted")
+
+@router.post("/{event_id}/register")
+async def register_for_event(request: Request, event_id: str):
+    user_id = await request_user_id(request)
+    collection = events(request)
+    event_oid = ObjectId(event_id)
+    if user_id and conflict_check_requested(await request_body(request)):
+        event = await collection.find_one({"_id": event_oid}, schedule.WINDOW_PROJECTION)
+        # Loading the volunteer's interval tree uses the synchronous client
+        conflicts = await run_in_threadpool(schedule.get_index().conflicts, user_id, event) if event else []
+        if conflicts:
+            return JSONResponse({"error": SCHEDULE_CONFLICT, "conflicts": conflicts}, status_code=409)
+    register = {"$inc": {"currentVolunteers": 1}}
+    if user_id:
+        register["$push"] = {"registeredVolunteers": user_id}
+
+    for _ in range(3):
+        updated_event = await collection.find_one_and_update(
+            {"_id": event_oid, "$and": [HAS_CAPACITY, WAITLIST_EMPTY], **not_signed_up(user_id)},
+            register,
+            return_document=ReturnDocument.AFTER
+        )
+        if updated_event:
+            invalidate(event_cache_key(event_id))
+            schedule.on_registered(user_id, updated_event)
+            return JSONResponse({**updated_event, "registrationStatus": "registered"})
+        if not user_id:
+            break
+
+        waitlisted = await collection.find_one_and_update(
+            {"_id": event_oid, **WAITLIST_OPEN, **not_signed_up(user_id)},
+            {"$push": {"waitlist": {"userId": user_id, "joinedAt": datetime.utcnow()}}},
+            return_document=ReturnDocument.AFTER
+        )
+        if waitlisted:
+            invalidate(event_cache_key(event_id))
+            return JSONResponse({**waitlisted, "registrationStatus": "waitlisted",
+                                 "waitlistPosition": len(waitlisted["waitlist"])}, status_code=202)
+
+        signed_up = await collection.find_one(
+            {"_id": event_oid, "$or": [{"registeredVolunteers": user_id}, {"waitlist.userId": user_id}]},
+            {"_id": 1}
+        )
+        if signed_up:
+            return error("Already registered or waitlisted for this event", 409)
+        if not await collection.find_one({"_id": event_oid}, {"_id": 1}):
+            break
+
+    if not user_id and await collection.find_one({"_id": event_oid}, {"_id": 1}):
+        return error("Event is full", 409)
+    return error("Event not found", 404)
+
+@router.post("/{event_id}/unregister")
+async def unregister_from_event(request: Request, event_id: str):
+    user_id = await request_user_id(request)
+    collection = events(request)
+    event_oid = ObjectId(event_id)
+
+    if user_id:
+        left_waitlist = await collection.find_one_and_update(
+            {"_id": event_oid, "waitlist.userId": user_id},
+            {"$pull": {"waitlist": {"userId": user_id}}},
+            return_document=ReturnDocument.AFTER
+        )
+        if left_waitlist:
+            invalidate(event_cache_key(event_id))
+            return JSONResponse({**left_waitlist, "registrationStatus": "removed"})
+
+    query = {"_id": event_oid, "currentVolunteers": {"$gt": 0}}
+    update = {"$inc": {"currentVolunteers": -1}}
+    if user_id:
+        query["registeredVolunteers"] = user_id
+        update["$pull"] = {"registeredVolunteers": user_id}
+    updated_event = await collection.find_one_and_update(query, update, return_document=ReturnDocument.AFTER)
+    if not updated_event:
+        return error("Event not found or no volunteers to remove", 404)
+
+    schedule.on_unregistered(user_id, event_id)
+    promoted = await promote_from_waitlist(collection, updated_event) if updated_event.get("waitlist") else None
+    invalidate(event_cache_key(event_id))
+    if promoted:
+        schedule.on_registered(promoted[1], promoted[0])
+        body = {**promoted[0], "promotedVolunteer": promoted[1]}
+    else:
+        body = updated_event
+    return JSONResponse({**body, "registrationStatus": "removed"})
+
+async def fill_from_waitlist(collection, event):
+    while event.get("waitlist") and has_room(event):
+        promoted = await promote_from_waitlist(collection, event)
+        if not promoted:
+            break
+        event = promoted[0]
+    return event
+
+async def promote_from_waitlist(collection, event):
+    for _ in range(3):
+        waitlist = event.get("waitlist") or []
+        if not waitlist:
+            return None
+        head = waitlist[0]["userId"]
+        promoted = await collection.find_one_and_update(
+            {"_id": event["_id"], "waitlist.0.userId": head, **HAS_CAPACITY},
+            {"$pop": {"waitlist": -1}, "$inc": {"currentVolunteers": 1},
+             "$push": {"registeredVolunteers": head}},
+            return_document=ReturnDocument.AFTER
+        )
+        if promoted:
+            return promoted, head
+        event = await collection.find_one({"_id": event["_id"]}, {"waitlist": {"$slice": 1}})
+        if not event:
+            return None
+    return None
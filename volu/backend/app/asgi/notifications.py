@@ -0,0 +1,230 @@
+import asyncio
+from datetime import datetime
+from bson import ObjectId
+from fastapi import APIRouter, Request
+from pymongo import ReturnDocument, UpdateOne
+from starlette.responses import StreamingResponse
+from app.asgi.responses import JSONResponse, error, message
+from app.database import for_lists
+from app.routes.notifications import HEARTBEAT_SECONDS, sse_message
+from app.services import delivery
+from app.services.notification_fanout import FANOUT_BATCH_SIZE, build_notification, id_filter, publish_notifications
+from app.services.notification_hub import get_hub, HubFull
+
+# Async port of app/routes/notifications.py and the notification_fanout writers
+router = APIRouter(prefix="/api/notifications")
+
+
+async def adjust_unread(db, deltas):
+    ops = [
+        UpdateOne({"userId": user_id}, {"$inc": {"unread": delta}}, upsert=delta > 0)
+        for user_id, delta in deltas.items()
+        if user_id and delta
+    ]
+    if ops:
+        await db["notification_counters"].bulk_write(ops, ordered=False)
+        hub = get_hub()
+        for user_id in deltas:
+            if user_id and hub.has_subscribers(user_id):
+                hub.publish(user_id, "unread", {"count": await unread_count(db, user_id)})
+
+async def unread_count(db, user_id):
+    counter = await db["notification_counters"].find_one({"userId": user_id}, {"unread": 1})
+    return max(counter.get("unread", 0), 0) if counter else 0
+
+async def notify_users(db, user_ids, title, message, type="GENERAL_ANNOUNCEMENT", priority=None, metadata=None):
+    now = datetime.utcnow()
+    recipients = list(dict.fromkeys(u for u in user_ids if u))
+    docs = [build_notification(u, title, message, type, priority, metadata, now) for u in recipients]
+    for start in range(0, len(docs), FANOUT_BATCH_SIZE):
+        batch = docs[start:start + FANOUT_BATCH_SIZE]
+        await db["notifications"].insert_many(batch, ordered=False)
+        publish_notifications(batch)
+        await adjust_unread(db, {doc["userId"]: 1 for doc in batch})
+        await enqueue_delivery(db, batch)
+    return docs
+
+async def enqueue_delivery(db, notifications):
+    user_ids = list({n["userId"] for n in notifications})
+    users = await db["users"].find({"userId": {"$in": user_ids}}, delivery.USER_FIELDS).to_list(None)
+    docs = delivery.outbox_documents(notifications, {u["userId"]: u for u in users})
+    for start in range(0, len(docs), delivery.OUTBOX_INSERT_BATCH_SIZE):
+        await db["outbox"].insert_many(docs[start:start + delivery.OUTBOX_INSERT_BATCH_SIZE], ordered=False)
+    if docs:
+        delivery.wake()
+
+async def notify_event_volunteers(db, event_id, type, title, message, event=None, priority=None):
+    if event is None and ObjectId.is_valid(str(event_id)):
+        event = await db["events"].find_one({"_id": ObjectId(str(event_id))}, {"registeredVolunteers": 1})
+    user_ids = list((event or {}).get("registeredVolunteers") or [])
+    user_ids += await db["participation"].distinct(
+        "userId", {"eventId": str(event_id), "status": {"$ne": "Cancelled"}}
+    )
+    return await notify_users(db, user_ids, title, message, type, priority, {"eventId": str(event_id)})
+
+
+def user_scope(request):
+    user_id = request.query_params.get("userId")
+    return {"userId": user_id} if user_id else {}
+
+@router.get("/")
+async def get_notifications(request: Request):
+    query = user_scope(request)
+    if request.query_params.get("unreadOnly") == "true":
+        query["isRead"] = False
+    notifications = await for_lists(request.app.state.db["notifications"]).find(query).sort("createdAt", -1).to_list(None)
+    return JSONResponse(notifications)
+
+@router.get("/unread-count")
+async def get_unread_count(request: Request):
+    user_id = request.query_params.get("userId")
+    if not user_id:
+        return error("Missing userId", 400)
+    return JSONResponse(await unread_count(request.app.state.db, user_id))
+
+@router.post("/mark-as-read/{notification_id}")
+async def mark_as_read(request: Request, notification_id: str):
+    db = request.app.state.db
+    notification = await db["notifications"].find_one_and_update(
+        {**id_filter(notification_id), "isRead": False},
+        {"$set": {"isRead": True, "readAt": datetime.utcnow().isoformat()}},
+        projection={"userId": 1},
+        return_document=ReturnDocument.BEFORE
+    )
+    if notification is None:
+        if await db["notifications"].count_documents(id_filter(notification_id), limit=1) == 0:
+            return error("Notification not found", 404)
+    else:
+        await adjust_unread(db, {notification.get("userId"): -1})
+    return message("Notification marked as read")
+
+@router.post("/mark-all-as-read")
+async def mark_all_as_read(request: Request):
+    db = request.app.state.db
+    user_id = request.query_params.get("userId")
+    if not user_id:
+        return error("Missing userId", 400)
+    result = await db["notifications"].update_many(
+        {"userId": user_id, "isRead": False},
+        {"$set": {"isRead": True, "readAt": datetime.utcnow().isoformat()}}
+    )
+    await adjust_unread(db, {user_id: -result.modified_count})
+    return message("All notifications marked as read", updated=result.modified_count)
+
+@router.delete("/delete/{notification_id}")
+async def delete_notification(request: Request, notification_id: str):
+    db = request.app.state.db
+    notification = await db["notifications"].find_one_and_delete(
+        id_filter(notification_id), projection={"userId": 1, "isRead": 1}
+    )
+    if notification is None:
+        return error("Notification not found", 404)
+    if not notification.get("isRead"):
+        await adjust_unread(db, {notification.get("userId"): -1})
+    return message("Notification deleted")
+
+@router.post("/event/{event_id}")
+async def notify_event(request: Request, event_id: str):
+    try:
+        data = await request.json()
+        if not data.get("message"):
+            return error("Missing message", 400)
+        docs = await notify_event_volunteers(
+            request.app.state.db, event_id,
+            data.get("type", "EVENT_UPDATE"),
+            data.get("title", "Event update"),
+            data["message"],
+            priority=data.get("priority")
+        )
+        return message("Notifications sent", 201, recipients=len(docs))
+    except Exception as e:
+        return error(str(e), 500)
+
+@router.get("/stream")
+async def stream_notifications(request: Request):
+    user_id = request.query_params.get("userId")
+    if not user_id:
+        return error("Missing userId", 400)
+    last_event_id = request.headers.get("last-event-id") or request.query_params.get("lastEventId")
+    db = request.app.state.db
+
+    hub = get_hub()
+    try:
+        subscription = hub.subscribe(user_id)
+    except HubFull:
+        return JSONResponse({"error": "Too many open notification streams"}, status_code=503,
+                            headers={"Retry-After": "30"})
+
+    # Publishers run on any thread; wake this loop instead of blocking a worker thread
+    loop = asyncio.get_running_loop()
+    ready = asyncio.Event()
+    subscription.waker = lambda: loop.call_soon_threadsafe(ready.set)
+
+    async def generate():
+        try:
+            yield f"retry: {int(HEARTBEAT_SECONDS * 1000)}\n\n"
+            if last_event_id:
+                missed = hub.replay(user_id, last_event_id)
+                if missed is None:
+                    yield sse_message(None, "reset", {})
+                else:
+                    for event in missed:
+                        yield sse_message(*event)
+            yield sse_message(None, "unread", {"count": await unread_count(db, user_id)})
+            while True:
+                # Clear before polling so a push between the two still wakes the wait
+                ready.clear()
+                event = subscription.next_event(0)
+                if event is not None:
+                    yield sse_message(*event)
+                    continue
+                try:
+                    await asyncio.wait_for(ready.wait(), HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": heartbeat\n\n"
+        finally:
+            hub.unsubscribe(subscription)
+
+    return StreamingResponse(generate(), media_type="text/event-stream", headers={
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no",
+    })
+
+@router.get("/stream/stats")
+async def stream_stats():
+    return JSONResponse(get_hub().stats())
+
+@router.get("/outbox/stats")
+async def outbox_stats(request: Request):
+    counts = {}
+    cursor = await request.app.state.db["outbox"].aggregate(
+        [{"$group": {"_id": {"status": "$status", "channel": "$channel"}, "n": {"$sum": 1}}}]
+    )
+    async for row in cursor:
+        counts.setdefault(row["_id"]["channel"], {})[row["_id"]["status"]] = row["n"]
+    return JSONResponse(counts)
+
+@router.get("/outbox/dead")
+async def outbox_dead_letters(request: Request):
+    try:
+        limit = int(request.query_params.get("limit", 100))
+        cursor = request.app.state.db["outbox"].find({"status": "dead"}).sort("deadAt", -1).limit(limit)
+        return JSONResponse(await cursor.to_list(None))
+    except Exception as e:
+        return error(str(e), 500)
+
+@router.post("/outbox/dead/requeue")
+async def requeue_dead_letters(request: Request):
+    try:
+        data = await request.json()
+    except ValueError:
+        data = {}
+    query = {"status": "dead"}
+    if isinstance(data, dict) and data.get("ids"):
+        query["_id"] = {"$in": list(data["ids"])}
+    result = await request.app.state.db["outbox"].update_many(
+        query, {"$set": {"status": "pending", "attempts": 0, "nextAttemptAt": datetime.utcnow()}}
+    )
+    if result.modified_count:
+        delivery.wake()
+    return JSONResponse({"requeued": result.modified_count})
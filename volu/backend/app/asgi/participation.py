@@ -0,0 +1,369 @@
+from datetime import datetime
+from bson import ObjectId
+from fastapi import APIRouter, Request
+from starlette.responses import Response
+from pymongo import ReturnDocument
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+from starlette.concurrency import run_in_threadpool
+from werkzeug.http import parse_etags
+from app.asgi.responses import JSONResponse, error, message
+from app.database import for_lists
+from app.routes.participation import CERTIFICATE_CACHE_CONTROL, participation_counts
+from app.services import certificates, org_stats, participation_bulk, participation_includes, participation_stats, scans
+from app.utils.pagination import KEYSET_SORT, encode_cursor, keyset_filter, page_limit, page_offset
+
+# Async port of app/routes/participation.py. Rollups are read and patched with
+# the same pure helpers as participation_stats, over the async collections.
+router = APIRouter(prefix="/api/participation")
+
+
+async def page_history(request, query, default_include=""):
+    db, args = request.app.state.db, request.query_params
+    include = participation_includes.parse_include(args.get("include"), default_include)
+    collection = for_lists(db["participation"])
+    limit = page_limit(args)
+    total_mode = args.get("total", "estimated")
+    cursor = args.get("cursor")
+
+    if cursor is not None:
+        docs = await collection.find(keyset_filter(query, cursor or None)).sort(KEYSET_SORT).limit(limit + 1).to_list(None)
+        next_cursor = None
+        if len(docs) > limit:
+            docs = docs[:limit]
+            next_cursor = encode_cursor(docs[-1])
+        body = {"limit": limit, "nextCursor": next_cursor, "hasMore": next_cursor is not None}
+    else:
+        offset = page_offset(args)
+        docs = await collection.find(query).skip(offset).limit(limit).to_list(None)
+        body = {"limit": limit, "offset": offset}
+
+    body["history"] = await participation_includes.embed_async(docs, include, participation_includes.async_loaders(request))
+    if total_mode == "exact":
+        body["totalCount"] = await collection.count_documents(query)
+    elif total_mode != "none":
+        body["totalCount"] = await participation_counts.count_async(collection, query)
+    return body
+
+async def history_response(request, query, default_include=""):
+    try:
+        if request.query_params.get("status"):
+            query["status"] = request.query_params["status"]
+        return JSONResponse(await page_history(request, query, default_include))
+    except ValueError as e:
+        return error(str(e), 400)
+    except Exception as e:
+        return error(str(e), 500)
+
+@router.get("/all")
+async def get_all_participation(request: Request):
+    return await history_response(request, {})
+
+@router.get("/my")
+async def get_my_participation(request: Request):
+    user_id = request.query_params.get("userId")
+    if not user_id:
+        return error("Missing userId", 400)
+    return await history_response(request, {"userId": user_id})
+
+@router.get("/event/{event_id}")
+async def get_event_participation(request: Request, event_id: str):
+    return await history_response(request, {"eventId": event_id}, default_include="event,user")
+
+@router.get("/my-history")
+async def get_my_participation_history(request: Request):
+    return await get_my_participation(request)
+
+
+async def event_month(db, event_id):
+    if not ObjectId.is_valid(str(event_id)):
+        return None
+    event = await db["events"].find_one({"_id": ObjectId(str(event_id))}, {"startDate": 1})
+    return participation_stats.month_key(event.get("startDate")) if event else None
+
+async def apply_change(db, user_id, before, after):
+    delta = participation_stats.rollup_delta(before, after)
+    if delta:
+        await db["participation_stats"].update_one(
+            {"userId": user_id}, {"$inc": delta, "$set": {"updatedAt": datetime.utcnow()}}
+        )
+    org_delta = org_stats.record_delta(before, after)
+    if org_delta:
+        await db["org_stats"].update_one({"_id": org_stats.ORG_ID}, org_stats.org_update(org_delta))
+    if "verifiedHours" in org_delta:
+        # The leaderboard merge may rebuild a rollup with the synchronous client
+        await run_in_threadpool(org_stats.update_leaderboard, [user_id])
+
+async def rebuild_rollup(db, user_id):
+    cursor = await db["participation"].aggregate(participation_stats._pipeline(user_id))
+    result = next(iter(await cursor.to_list(None)), None)
+    rollup = participation_stats.rollup_from_facets(user_id, result)
+    now = datetime.utcnow()
+    await db["participation_stats"].replace_one(
+        {"userId": user_id}, {**rollup, "rebuiltAt": now, "updatedAt": now}, upsert=True
+    )
+    return rollup
+
+async def get_rollup(db, user_id):
+    rollup = await db["participation_stats"].find_one({"userId": user_id}, {"_id": 0})
+    return rollup if rollup is not None else await rebuild_rollup(db, user_id)
+
+@router.post("/record")
+async def record_participation(request: Request):
+    try:
+        db = request.app.state.db
+        data = await request.json()
+        user_id = data.get("userId")
+        event_id = data.get("eventId")
+        status = data.get("status")
+
+        if not user_id or not event_id or not status:
+            return error("Missing required fields", 400)
+
+        now = datetime.utcnow()
+        updates = {"status": status, "updatedAt": now}
+        if data.get("hoursLogged") is not None:
+            updates["hoursLogged"] = float(data["hoursLogged"])
+        inserted = {"createdAt": now, "eventMonth": await event_month(db, event_id)}
+
+        async def upsert():
+            return await db["participation"].find_one_and_update(
+                {"userId": user_id, "eventId": event_id},
+                {"$set": updates, "$setOnInsert": inserted},
+                upsert=True,
+                return_document=ReturnDocument.BEFORE
+            )
+        try:
+            previous = await upsert()
+        except DuplicateKeyError:
+            previous = await upsert()
+        await apply_change(db, user_id, previous, {**(previous or inserted), **updates})
+
+        return message("Participation recorded")
+    except Exception as e:
+        return error(str(e), 500)
+
+@router.post("/log-feedback")
+async def log_feedback(request: Request):
+    try:
+        data = await request.json()
+        user_id = data.get("userId")
+        event_id = data.get("eventId")
+        if not user_id or not event_id:
+            return error("Missing userId or eventId", 400)
+
+        result = await request.app.state.db["participation"].update_one(
+            {"userId": user_id, "eventId": event_id},
+            {"$set": {"feedback": data.get("feedback"), "updatedAt": datetime.utcnow()}}
+        )
+        if result.modified_count == 0:
+            return error("Participation record not found", 404)
+        return message("Feedback logged")
+    except Exception as e:
+        return error(str(e), 500)
+
+# The bulk writers stay on the synchronous service; one request is one bulk_write
+async def bulk_response(entries, ordered):
+    if not isinstance(entries, list) or not entries:
+        return error("Missing entries", 400)
+    if len(entries) > participation_bulk.MAX_BULK_ENTRIES:
+        return error(f"At most {participation_bulk.MAX_BULK_ENTRIES} entries per request", 400)
+
+    results = await run_in_threadpool(participation_bulk.apply_bulk, entries, ordered)
+    summary = {}
+    for r in results:
+        summary[r["result"]] = summary.get(r["result"], 0) + 1
+    ok = all(r["result"] in ("inserted", "updated") for r in results)
+    return JSONResponse({"results": results, "summary": summary}, status_code=200 if ok else 207)
+
+@router.post("/record/bulk")
+async def record_participation_bulk(request: Request):
+    try:
+        data = await request.json() or {}
+        return await bulk_response(data.get("entries"), bool(data.get("ordered", False)))
+    except Exception as e:
+        return error(str(e), 500)
+
+@router.post("/log-feedback/bulk")
+async def log_feedback_bulk(request: Request):
+    try:
+        data = await request.json() or {}
+        entries = data.get("entries")
+        if isinstance(entries, list):
+            entries = [
+                {"userId": e.get("userId"), "eventId": e.get("eventId"), "feedback": e.get("feedback")}
+                if isinstance(e, dict) else e
+                for e in entries
+            ]
+        return await bulk_response(entries, bool(data.get("ordered", False)))
+    except Exception as e:
+        return error(str(e), 500)
+
+async def json_body(request):
+    try:
+        return await request.json() or {}
+    except ValueError:
+        return {}
+
+async def scan_response(request, kind):
+    data = await json_body(request)
+    try:
+        scan = scans.scan_document(data, kind, key=request.headers.get("idempotency-key"))
+    except ValueError as e:
+        return error(str(e), 400)
+    try:
+        await request.app.state.db["scans"].insert_one(scan)
+        inserted = True
+    except DuplicateKeyError:
+        inserted = False
+    if inserted:
+        scans.wake()
+    time_field = "checkInTime" if kind == "in" else "checkOutTime"
+    return JSONResponse({
+        "message": "Scan recorded" if inserted else "Scan already recorded",
+        "scanId": scan["_id"],
+        "duplicate": not inserted,
+        "userId": scan["userId"],
+        "eventId": scan["eventId"],
+        time_field: scan["at"],
+    }, status_code=202 if inserted else 200)
+
+@router.post("/check-in")
+async def check_in(request: Request):
+    try:
+        return await scan_response(request, "in")
+    except Exception as e:
+        return error(str(e), 500)
+
+@router.post("/check-out")
+async def check_out(request: Request):
+    try:
+        return await scan_response(request, "out")
+    except Exception as e:
+        return error(str(e), 500)
+
+@router.post("/scans")
+async def record_scans(request: Request):
+    try:
+        items = (await json_body(request)).get("scans")
+        if not isinstance(items, list) or not items:
+            return error("Missing scans", 400)
+        if len(items) > scans.MAX_SCANS_PER_BATCH:
+            return error(f"At most {scans.MAX_SCANS_PER_BATCH} scans per request", 400)
+
+        docs, results = scans.batch_documents(items)
+        duplicates, failed = set(), {}
+        if docs:
+            try:
+                await request.app.state.db["scans"].insert_many(docs, ordered=False)
+            except BulkWriteError as e:
+                duplicates, failed = scans.duplicate_indexes(e)
+            scans.wake()
+        results = scans.mark_inserted(results, duplicates, failed)
+        summary = {}
+        for r in results:
+            summary[r["result"]] = summary.get(r["result"], 0) + 1
+        ok = all(r["result"] in ("accepted", "duplicate") for r in results)
+        return JSONResponse({"results": results, "summary": summary}, status_code=202 if ok else 207)
+    except Exception as e:
+        return error(str(e), 500)
+
+# Generation waits on the process pool from a threadpool thread, off the event loop
+@router.post("/certificate/{event_id}")
+async def generate_certificate(request: Request, event_id: str):
+    try:
+        user_id = (await json_body(request)).get("userId")
+        result = await run_in_threadpool(certificates.generate, event_id, user_id)
+        if result is None:
+            return error("No verified hours for this event", 404)
+        generated, summary = result
+        if user_id:
+            return JSONResponse(generated[0])
+        return JSONResponse({"certificates": generated, "summary": summary})
+    except Exception as e:
+        return error(str(e), 500)
+
+async def certificates_response(request, user_id):
+    if not user_id:
+        return error("Missing userId", 400)
+    db = request.app.state.db
+    records = await db["participation"].find(certificates.verified_query(userId=user_id),
+                                             certificates.RECORD_FIELDS).to_list(None)
+    keys = [certificates.record_key(r) for r in records]
+    docs = []
+    if keys:
+        docs = await db["certificates"].find({"_id": {"$in": keys}}, certificates.SUMMARY_FIELDS) \
+            .sort("createdAt", -1).to_list(None)
+    return JSONResponse([certificates.certificate_summary(d) for d in docs])
+
+@router.get("/certificates")
+async def get_certificates(request: Request):
+    return await certificates_response(request, request.query_params.get("userId"))
+
+@router.get("/certificates/file/{key}")
+async def download_certificate(request: Request, key: str):
+    headers = {"Cache-Control": CERTIFICATE_CACHE_CONTROL, "ETag": f'"{key}"'}
+    if parse_etags(request.headers.get("if-none-match")).contains(key):
+        return Response(status_code=304, headers=headers)
+    doc = await request.app.state.db["certificates"].find_one({"_id": key}, {"pdf": 1, "eventId": 1})
+    if not doc:
+        return error("Certificate not found", 404)
+    headers["Content-Disposition"] = f'inline; filename="certificate-{doc["eventId"]}.pdf"'
+    return Response(bytes(doc["pdf"]), media_type="application/pdf", headers=headers)
+
+@router.get("/certificates/{user_id}")
+async def get_user_certificates(request: Request, user_id: str):
+    return await certificates_response(request, user_id)
+
+@router.get("/statistics")
+async def get_statistics(request: Request):
+    try:
+        db = request.app.state.db
+        user_id = request.query_params.get("userId")
+        if not user_id:
+            return error("Missing userId", 400)
+
+        if request.query_params.get("source") == "aggregate":
+            rollup = await rebuild_rollup(db, user_id)
+        else:
+            rollup = await get_rollup(db, user_id)
+        stats = participation_stats.format_statistics(rollup)
+
+        return JSONResponse({
+            "totalHours": stats["totalHours"],
+            "eventsAttended": stats["eventsAttended"],
+            "upcomingEvents": stats["upcomingEvents"],
+            "newNotifications": 0,
+            "statusCounts": stats["statusCounts"],
+            "eventsByMonth": stats["eventsByMonth"],
+            "hoursByMonth": stats["hoursByMonth"]
+        })
+    except Exception as e:
+        return error(str(e), 500)
+
+
+async def get_org_stats(db):
+    org = await db["org_stats"].find_one({"_id": org_stats.ORG_ID})
+    if org is None:
+        await run_in_threadpool(org_stats.reconcile)
+        org = await db["org_stats"].find_one({"_id": org_stats.ORG_ID})
+    return org
+
+@router.get("/dashboard")
+async def get_dashboard(request: Request):
+    try:
+        args = request.query_params
+        months = args.get("months")
+        top = min(int(args.get("top", 10)), org_stats.LEADERBOARD_SIZE)
+        org = await get_org_stats(request.app.state.db)
+        return JSONResponse(org_stats.format_dashboard(org, int(months) if months else None, top))
+    except Exception as e:
+        return error(str(e), 500)
+
+@router.get("/leaderboard")
+async def get_leaderboard(request: Request):
+    try:
+        limit = min(int(request.query_params.get("limit", 10)), org_stats.LEADERBOARD_SIZE)
+        org = await get_org_stats(request.app.state.db)
+        return JSONResponse({"leaderboard": (org.get("leaderboard") or [])[:limit], "updatedAt": org.get("updatedAt")})
+    except Exception as e:
+        return error(str(e), 500)
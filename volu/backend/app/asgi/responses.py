@@ -0,0 +1,36 @@
+from starlette.responses import Response
+from werkzeug.http import parse_etags
+from app.utils.cache import get_cache, make_etag
+from app.utils.json_provider import dumps, dumps_bytes
+
+
+class JSONResponse(Response):
+    """Encodes with the same provider as the Flask app, so both return identical bodies."""
+    media_type = "application/json"
+
+    def render(self, content):
+        return dumps_bytes(content)
+
+def error(message, status_code):
+    return JSONResponse({"error": message}, status_code=status_code)
+
+def message(text, status_code=200, **extra):
+    return JSONResponse({"message": text, **extra}, status_code=status_code)
+
+async def cached_json(request, key, loader):
+    """Async counterpart of app.utils.cache.cached_json (same cache, keys and ETags)."""
+    cache = get_cache()
+    entry = cache.get(key)
+    if entry is None:
+        generation = cache.generation
+        payload = await loader()
+        if payload is None:
+            return None
+        body = dumps(payload)
+        entry = (body, make_etag(body))
+        cache.set(key, entry, generation)
+    body, etag = entry
+    headers = {"ETag": f'"{etag}"', "Cache-Control": "no-cache"}
+    if parse_etags(request.headers.get("if-none-match")).contains(etag):
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type="application/json", headers=headers)
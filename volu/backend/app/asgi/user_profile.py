@@ -0,0 +1,61 @@
+from fastapi import APIRouter, Request
+from app.asgi.responses import JSONResponse, cached_json, message
+from app.routes.user_profile import profile_cache_key
+from app.services import matching, schedule, volunteer_index
+from app.utils.cache import invalidate
+
+# Async port of app/routes/user_profile.py
+router = APIRouter(prefix="/api/user-profile")
+
+# PUT path -> (profile field, index hook, response message)
+SECTIONS = {
+    "personal-info": ("personalInfo", None, "Personal info updated"),
+    "skills": ("skills", volunteer_index.on_skills_updated, "Skills updated"),
+    "preferences": ("preferences", volunteer_index.on_preferences_updated, "Preferences updated"),
+    "availability": ("availability", schedule.on_availability_updated, "Availability updated"),
+    "account-settings": ("accountSettings", None, "Account settings updated"),
+}
+
+# Fields derived from a section and saved in the same write
+DERIVED = {
+    "availability": {"availabilityMask": schedule.availability_document},
+}
+
+
+async def profile_changed(user_id):
+    # Only flags the matching matrix; the next matching read rebuilds it
+    matching.mark_stale()
+    invalidate(profile_cache_key(user_id))
+
+@router.get("/{user_id}")
+async def get_user_profile(request: Request, user_id: str):
+    async def load():
+        return await request.app.state.db["users"].find_one({"userId": user_id})
+
+    response = await cached_json(request, profile_cache_key(user_id), load)
+    return response if response is not None else JSONResponse({})
+
+@router.put("/{user_id}/{section}")
+async def update_section(request: Request, user_id: str, section: str):
+    if section not in SECTIONS:
+        return JSONResponse({"detail": "Not Found"}, status_code=404)
+    field, hook, text = SECTIONS[section]
+    data = await request.json()
+    derived = {name: derive(data) for name, derive in DERIVED.get(field, {}).items()}
+    await request.app.state.db["users"].update_one(
+        {"userId": user_id},
+        {"$set": {field: data, **derived}},
+        upsert=True
+    )
+    if hook:
+        hook(user_id, data)
+    await profile_changed(user_id)
+    return message(text)
+
+@router.delete("/{user_id}")
+async def delete_user_account(request: Request, user_id: str):
+    await request.app.state.db["users"].delete_one({"userId": user_id})
+    volunteer_index.on_user_deleted(user_id)
+    schedule.on_user_deleted(user_id)
+    await profile_changed(user_id)
+    return message("User deleted")
@@ -0,0 +1,111 @@
+import click
+from flask.cli import AppGroup
+
+db_cli = AppGroup("db", help="Database index and migration commands.")
+
+@db_cli.command("migrate")
+def migrate_command():
+    """Apply pending migrations and create missing indexes."""
+    from app.database import migrate
+    ran = migrate()
+    click.echo(f"Applied migrations: {', '.join(ran) if ran else 'none pending'}")
+    click.echo("Indexes are up to date")
+
+@db_cli.command("check")
+def check_command():
+    """Explain each route query shape and flag collection scans."""
+    from app.database import check_query_plans
+    failures = 0
+    for row in check_query_plans():
+        status = "COLLSCAN" if row["collscan"] else "ok"
+        failures += row["collscan"]
+        click.echo(f"{status:9} {row['collection']:20} {row['query']}")
+    if failures:
+        raise SystemExit(1)
+
+
+reminders_cli = AppGroup("reminders", help="Scheduled event reminder commands.")
+
+@reminders_cli.command("run")
+def run_reminders_command():
+    """Run the reminder scheduler in the foreground."""
+    from app.services.reminders import ReminderScheduler
+    scheduler = ReminderScheduler()
+    click.echo(f"Reminder worker {scheduler.worker_id} started")
+    try:
+        scheduler.run_forever()
+    except KeyboardInterrupt:
+        click.echo(f"Stopped: {scheduler.stats}")
+
+@reminders_cli.command("backfill")
+def backfill_reminders_command():
+    """Schedule reminders for upcoming events that have none."""
+    from app.services.reminders import backfill
+    click.echo(f"Scheduled {backfill()} reminders")
+
+
+delivery_cli = AppGroup("delivery", help="Email/SMS outbox commands.")
+
+@delivery_cli.command("run")
+@click.option("--threads", default=4, show_default=True, help="Sending threads.")
+def run_delivery_command(threads):
+    """Deliver queued email/SMS messages in the foreground."""
+    from app.services.delivery import DeliveryWorker
+    worker = DeliveryWorker(threads=threads)
+    click.echo(f"Delivery worker {worker.worker_id} started")
+    try:
+        worker.run_forever()
+    except KeyboardInterrupt:
+        worker.stop()
+        click.echo(f"Stopped: {worker.stats}")
+
+@delivery_cli.command("dead")
+@click.option("--limit", default=20, show_default=True)
+def dead_letters_command(limit):
+    """List the most recent dead-lettered messages."""
+    from app.services.delivery import dead_letters
+    for message in dead_letters(limit):
+        click.echo(f"{message['_id']}  {message['channel']:5}  {message['to']}  {message.get('lastError')}")
+
+@delivery_cli.command("requeue")
+def requeue_delivery_command():
+    """Move every dead-lettered message back to the queue."""
+    from app.services.delivery import requeue_dead
+    click.echo(f"Requeued {requeue_dead()} messages")
+
+
+rollups_cli = AppGroup("rollups", help="Participation and impact rollup commands.")
+
+@rollups_cli.command("reconcile")
+def reconcile_rollups_command():
+    """Rebuild every per-user rollup and the org dashboard totals from participation."""
+    from app.services.org_stats import reconcile
+    summary = reconcile()
+    click.echo(f"Rebuilt {summary['users']} user rollups from {summary['records']} records "
+               f"and {summary['events']} events in {summary['seconds']}s")
+
+
+scans_cli = AppGroup("scans", help="Check-in/check-out scan commands.")
+
+@scans_cli.command("run")
+def run_scans_command():
+    """Compact scans into participation hours in the foreground."""
+    from app.services.scans import ScanCompactor
+    compactor = ScanCompactor(poll_seconds=5)
+    click.echo("Scan compactor started")
+    try:
+        compactor.run_forever()
+    except KeyboardInterrupt:
+        click.echo(f"Stopped: {compactor.stats}")
+
+@scans_cli.command("compact")
+def compact_scans_command():
+    """Compact every pending scan now."""
+    from app.services.scans import compact
+    total = 0
+    while True:
+        compacted = compact()
+        total += compacted
+        if not compacted:
+            break
+    click.echo(f"Compacted {total} scans")
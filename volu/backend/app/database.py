@@ -1,27 +1,413 @@
-from pymongo import MongoClient
+from bson import ObjectId
+from pymongo import MongoClient, IndexModel, ASCENDING, DESCENDING, ReadPreference
+from datetime import datetime
 from dotenv import load_dotenv
 import os
+import threading
 
 # Load environment variables from .env file
 load_dotenv()
 
-# Get MongoDB URI from environment
-MONGO_URI = os.getenv("DATABASE_URL")
-if not MONGO_URI:
-    raise Exception("DATABASE_URL not found in .env")
+# Client settings, read from the Flask config or the environment (DATABASE_URL
+# is the connection string). Pool and timeout values are passed to MongoClient
+# as-is; unset ones keep PyMongo's defaults.
+CLIENT_OPTIONS = {
+    "MONGO_MAX_POOL_SIZE": ("maxPoolSize", int),
+    "MONGO_MIN_POOL_SIZE": ("minPoolSize", int),
+    "MONGO_MAX_IDLE_TIME_MS": ("maxIdleTimeMS", int),
+    "MONGO_WAIT_QUEUE_TIMEOUT_MS": ("waitQueueTimeoutMS", int),
+    "MONGO_CONNECT_TIMEOUT_MS": ("connectTimeoutMS", int),
+    "MONGO_SOCKET_TIMEOUT_MS": ("socketTimeoutMS", int),
+    "MONGO_SERVER_SELECTION_TIMEOUT_MS": ("serverSelectionTimeoutMS", int),
+    "MONGO_APP_NAME": ("appname", str),
+}
+CONFIG_KEYS = ("DATABASE_URL", "MONGO_DB_NAME", "MONGO_LIST_READ_PREFERENCE", *CLIENT_OPTIONS)
+
+READ_PREFERENCES = {
+    "primary": ReadPreference.PRIMARY,
+    "primaryPreferred": ReadPreference.PRIMARY_PREFERRED,
+    "secondary": ReadPreference.SECONDARY,
+    "secondaryPreferred": ReadPreference.SECONDARY_PREFERRED,
+    "nearest": ReadPreference.NEAREST,
+}
+
+
+class ClientFactory:
+    """Owns the process's MongoClient.
+
+    The client is created on first use, so importing a module never connects,
+    and re-created in a forked child (a MongoClient must not be shared across
+    fork). init_app() loads settings from the app config; use_client() swaps
+    in another client, e.g. mongomock in tests.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._client = None
+        self._pid = None
+        self.config = {}
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=self._forget)
+
+    def init_app(self, app):
+        config = {key: app.config[key] for key in CONFIG_KEYS if app.config.get(key) is not None}
+        self.configure(**config)
+        app.extensions["mongo"] = self
+
+    def configure(self, **config):
+        with self._lock:
+            self.config.update(config)
+            self.close()
+
+    def setting(self, key, default=None):
+        value = self.config.get(key)
+        return value if value is not None else os.getenv(key, default)
+
+    def client_options(self):
+        """Keyword arguments for MongoClient/AsyncMongoClient from the current settings."""
+        from app.utils.mongo_monitoring import command_metrics, pool_metrics
+        # Notifications use uuid.UUID ids, which need an explicit UUID representation
+        options = {"uuidRepresentation": "standard", "event_listeners": [pool_metrics, command_metrics]}
+        for key, (option, cast) in CLIENT_OPTIONS.items():
+            value = self.setting(key)
+            if value not in (None, ""):
+                options[option] = cast(value)
+        return options
+
+    def uri(self):
+        uri = self.setting("DATABASE_URL")
+        if not uri:
+            raise Exception("DATABASE_URL not found in .env")
+        return uri
+
+    def database_name(self):
+        return self.setting("MONGO_DB_NAME", "volu")
+
+    def get_client(self):
+        client = self._client
+        if client is not None and self._pid == os.getpid():
+            return client
+        with self._lock:
+            if self._client is None or self._pid != os.getpid():
+                self._client = MongoClient(self.uri(), **self.client_options())
+                self._pid = os.getpid()
+            return self._client
+
+    def use_client(self, client):
+        with self._lock:
+            self.close()
+            self._client, self._pid = client, os.getpid()
+
+    def get_database(self):
+        return self.get_client()[self.database_name()]
+
+    def list_read_preference(self):
+        name = self.setting("MONGO_LIST_READ_PREFERENCE")
+        return READ_PREFERENCES[name] if name else None
+
+    def close(self):
+        with self._lock:
+            if self._client is not None and self._pid == os.getpid():
+                self._client.close()
+            self._client = self._pid = None
+
+    def _forget(self):
+        # In the child the inherited client's sockets belong to the parent; drop it unclosed
+        self._client = self._pid = None
+
+
+client_factory = ClientFactory()
+
+def get_client():
+    return client_factory.get_client()
+
+def get_database():
+    return client_factory.get_database()
+
+
+class LazyDatabase:
+    """Stands in for the Database until first use."""
+
+    def __getitem__(self, name):
+        return get_database()[name]
+
+    def __getattr__(self, name):
+        return getattr(get_database(), name)
+
+
+class LazyCollection:
+    """Stands in for a Collection; resolves through client_factory on every use."""
+
+    def __init__(self, name):
+        self.name = name
+
+    def _collection(self):
+        return get_database()[self.name]
+
+    def __getattr__(self, attr):
+        return getattr(self._collection(), attr)
+
+    def __getitem__(self, name):
+        return self._collection()[name]
+
+    def __repr__(self):
+        return f"LazyCollection({self.name!r})"
+
+
+def for_lists(collection):
+    """``collection`` with MONGO_LIST_READ_PREFERENCE applied, for list endpoints that tolerate lag."""
+    preference = client_factory.list_read_preference()
+    return collection.with_options(read_preference=preference) if preference else collection
 
-# Initialize MongoDB client
-client = MongoClient(MONGO_URI)
 
 # Access your MongoDB database
-db = client["volu"]
+db = LazyDatabase()
 
 # Define and export collections
-participation_collection = db["participation"]
-event_collection = db["events"]
-user_collection = db["users"]
-notifications_collection = db["notifications"]
+participation_collection = LazyCollection("participation")
+event_collection = LazyCollection("events")
+user_collection = LazyCollection("users")
+notifications_collection = LazyCollection("notifications")
+participation_stats_collection = LazyCollection("participation_stats")
+notification_counters_collection = LazyCollection("notification_counters")
+scheduled_task_collection = LazyCollection("scheduled_tasks")
+outbox_collection = LazyCollection("outbox")
+org_stats_collection = LazyCollection("org_stats")
+scan_collection = LazyCollection("scans")
+certificate_collection = LazyCollection("certificates")
+
+# Declarative index registry: collection name -> indexes the routes rely on.
+# ensure_indexes() is idempotent; Mongo skips indexes that already exist.
+INDEXES = {
+    "participation": [
+        IndexModel([("userId", ASCENDING), ("eventId", ASCENDING)], name="userId_eventId_unique", unique=True),
+        IndexModel([("eventId", ASCENDING), ("status", ASCENDING)], name="eventId_status"),
+        IndexModel([("eventId", ASCENDING), ("createdAt", DESCENDING), ("_id", DESCENDING)], name="eventId_createdAt_id"),
+        # Keyset pagination on (createdAt, _id) for each list filter
+        IndexModel([("createdAt", DESCENDING), ("_id", DESCENDING)], name="createdAt_id"),
+        IndexModel([("status", ASCENDING), ("createdAt", DESCENDING), ("_id", DESCENDING)], name="status_createdAt_id"),
+        IndexModel([("userId", ASCENDING), ("createdAt", DESCENDING), ("_id", DESCENDING)], name="userId_createdAt_id"),
+        IndexModel([("userId", ASCENDING), ("status", ASCENDING), ("createdAt", DESCENDING), ("_id", DESCENDING)],
+                   name="userId_status_createdAt_id"),
+    ],
+    "participation_stats": [
+        IndexModel([("userId", ASCENDING)], name="userId_unique", unique=True),
+        # Leaderboard refills walk this index from the top
+        IndexModel([("verifiedHours", DESCENDING), ("userId", ASCENDING)], name="verifiedHours_userId"),
+    ],
+    "users": [
+        IndexModel([("userId", ASCENDING)], name="userId_unique", unique=True),
+    ],
+    "events": [
+        IndexModel([("createdBy", ASCENDING)], name="createdBy"),
+        IndexModel([("startDate", ASCENDING)], name="startDate"),
+        IndexModel([("status", ASCENDING), ("startDate", ASCENDING)], name="status_startDate"),
+        IndexModel([("city", ASCENDING), ("startDate", ASCENDING)], name="city_startDate"),
+        # Schedule conflict checks load each volunteer's registrations through this multikey index
+        IndexModel([("registeredVolunteers", ASCENDING)], name="registeredVolunteers"),
+    ],
+    "notifications": [
+        IndexModel([("userId", ASCENDING), ("isRead", ASCENDING), ("createdAt", DESCENDING)],
+                   name="userId_isRead_createdAt"),
+        IndexModel([("userId", ASCENDING), ("createdAt", DESCENDING)], name="userId_createdAt"),
+        IndexModel([("isRead", ASCENDING), ("createdAt", DESCENDING)], name="isRead_createdAt"),
+        IndexModel([("createdAt", DESCENDING)], name="createdAt"),
+    ],
+    "notification_counters": [
+        IndexModel([("userId", ASCENDING)], name="userId_unique", unique=True),
+    ],
+    "scheduled_tasks": [
+        # The reminder worker only ever reads the due window of this index
+        IndexModel([("status", ASCENDING), ("scheduledFor", ASCENDING)], name="status_scheduledFor"),
+        IndexModel([("eventId", ASCENDING)], name="eventId"),
+    ],
+    "outbox": [
+        IndexModel([("status", ASCENDING), ("nextAttemptAt", ASCENDING)], name="status_nextAttemptAt"),
+        IndexModel([("status", ASCENDING), ("deadAt", DESCENDING)], name="status_deadAt"),
+    ],
+    "scans": [
+        # Only the scans still waiting for the compactor are kept in this index
+        IndexModel([("at", ASCENDING)], name="pending_at", partialFilterExpression={"compacted": False}),
+        IndexModel([("userId", ASCENDING), ("eventId", ASCENDING), ("at", ASCENDING)], name="userId_eventId_at"),
+    ],
+    "certificates": [
+        # Certificates are fetched by content key (_id); this one prunes superseded versions
+        IndexModel([("eventId", ASCENDING), ("userId", ASCENDING)], name="eventId_userId"),
+    ],
+}
+
+def ensure_indexes(database=None):
+    database = database if database is not None else db
+    created = {}
+    for name, indexes in INDEXES.items():
+        created[name] = database[name].create_indexes(indexes)
+    return created
+
+
+# Data migrations run once each, in order, and are recorded in the migrations collection
+def _duplicate_groups(database, name, key):
+    """Lists of _ids sharing ``key`` (a $group _id expression), for groups with more than one document."""
+    return [group["ids"] for group in database[name].aggregate([
+        {"$group": {"_id": key, "ids": {"$push": "$_id"}, "n": {"$sum": 1}}},
+        {"$match": {"n": {"$gt": 1}}},
+    ], allowDiskUse=True)]
+
+def _merge_duplicates(database, name, migration_id, groups, sort):
+    """Keep the first document of each group in ``sort`` order and fill its missing fields from the others.
+
+    The removed documents are copied to migration_archive rather than dropped.
+    Returns the key documents of every group that changed.
+    """
+    merged = []
+    for ids in groups:
+        survivor, *duplicates = database[name].find({"_id": {"$in": ids}}).sort(sort)
+        missing = {}
+        for doc in duplicates:
+            for field, value in doc.items():
+                if field != "_id" and value is not None and survivor.get(field) is None:
+                    missing.setdefault(field, value)
+        if missing:
+            database[name].update_one({"_id": survivor["_id"]}, {"$set": missing})
+        now = datetime.utcnow()
+        database["migration_archive"].insert_many([
+            {"migration": migration_id, "collection": name, "keptId": survivor["_id"], "document": doc, "archivedAt": now}
+            for doc in duplicates
+        ])
+        database[name].delete_many({"_id": {"$in": [doc["_id"] for doc in duplicates]}})
+        merged.append(survivor)
+    return merged
+
+def _dedupe_participation(database):
+    # The unique (userId, eventId) index cannot be built while duplicates exist; keep the newest
+    groups = _duplicate_groups(database, "participation", {"userId": "$userId", "eventId": "$eventId"})
+    merged = _merge_duplicates(database, "participation", "0001_dedupe_participation", groups,
+                               [("updatedAt", DESCENDING), ("_id", DESCENDING)])
+    if merged:
+        # The removed rows were counted in the rollups; both rebuild from participation on their next read
+        database["participation_stats"].delete_many({"userId": {"$in": list({doc.get("userId") for doc in merged})}})
+        database["org_stats"].delete_many({})
+    return sum(len(ids) - 1 for ids in groups)
+
+def _dedupe_users(database):
+    # Profile sections upsert on userId and so wrote to the oldest document; keep it
+    groups = _duplicate_groups(database, "users", "$userId")
+    _merge_duplicates(database, "users", "0002_dedupe_users", groups, [("_id", ASCENDING)])
+    return sum(len(ids) - 1 for ids in groups)
+
+def _backfill_event_month(database):
+    # Statistics bucket records by eventMonth; older records only had it on a never-written `event` sub-document
+    from app.services.participation_stats import month_key
+    event_ids = database["participation"].distinct("eventId", {"eventMonth": None})
+    oids = [ObjectId(e) for e in event_ids if ObjectId.is_valid(str(e))]
+    updated = 0
+    for event in database["events"].find({"_id": {"$in": oids}}, {"startDate": 1}):
+        month = month_key(event.get("startDate"))
+        if month:
+            updated += database["participation"].update_many(
+                {"eventId": str(event["_id"]), "eventMonth": None}, {"$set": {"eventMonth": month}}
+            ).modified_count
+    return updated
+
+def _backfill_availability_masks(database):
+    # Profiles saved before availability masks existed get one derived from their availability section
+    from app.services.schedule import availability_document
+    updated = 0
+    for user in database["users"].find({"availability": {"$ne": None}, "availabilityMask": None},
+                                       {"availability": 1}):
+        updated += database["users"].update_one(
+            {"_id": user["_id"]}, {"$set": {"availabilityMask": availability_document(user["availability"])}}
+        ).modified_count
+    return updated
+
+def _backfill_unread_counters(database):
+    # Counters only started with per-user notifications; recount every inbox so older unread ones show up
+    from app.services.notification_fanout import reset_unread
+    user_ids = set(database["notifications"].distinct("userId")) | set(database["notification_counters"].distinct("userId"))
+    for user_id in user_ids:
+        if user_id:
+            reset_unread(user_id, database)
+    return len(user_ids)
+
+MIGRATIONS = [
+    ("0001_dedupe_participation", _dedupe_participation),
+    ("0002_dedupe_users", _dedupe_users),
+    ("0003_backfill_event_month", _backfill_event_month),
+    ("0004_availability_masks", _backfill_availability_masks),
+    ("0005_backfill_unread_counters", _backfill_unread_counters),
+]
+
+def run_migrations(database=None):
+    database = database if database is not None else db
+    applied = {m["_id"] for m in database["migrations"].find({}, {"_id": 1})}
+    ran = []
+    for migration_id, migrate in MIGRATIONS:
+        if migration_id in applied:
+            continue
+        result = migrate(database)
+        database["migrations"].insert_one({"_id": migration_id, "appliedAt": datetime.utcnow(), "result": result})
+        ran.append(migration_id)
+    return ran
+
+def migrate(database=None):
+    ran = run_migrations(database)
+    ensure_indexes(database)
+    return ran
 
 
+# Query shapes issued by the routes, checked with explain() for collection scans
+QUERY_SHAPES = [
+    ("participation.my", "participation", {"userId": "u"}, [("createdAt", -1), ("_id", -1)]),
+    ("participation.my.status", "participation", {"userId": "u", "status": "Attended"}, [("createdAt", -1), ("_id", -1)]),
+    ("participation.all", "participation", {}, [("createdAt", -1), ("_id", -1)]),
+    ("participation.all.status", "participation", {"status": "Attended"}, [("createdAt", -1), ("_id", -1)]),
+    ("participation.record", "participation", {"userId": "u", "eventId": "e"}, None),
+    ("participation.statistics", "participation", {"userId": "u"}, None),
+    ("participation.event", "participation", {"eventId": "e", "status": {"$ne": "Cancelled"}}, None),
+    ("participation.roster", "participation", {"eventId": "e"}, [("createdAt", -1), ("_id", -1)]),
+    ("participation_stats.user", "participation_stats", {"userId": "u"}, None),
+    ("participation_stats.leaderboard", "participation_stats", {"verifiedHours": {"$gt": 0}},
+     [("verifiedHours", -1), ("userId", 1)]),
+    ("users.profile", "users", {"userId": "u"}, None),
+    ("events.created_by", "events", {"createdBy": "u"}, None),
+    ("events.status", "events", {"status": "Active"}, [("startDate", 1)]),
+    ("events.schedule", "events", {"registeredVolunteers": {"$in": ["u"]}}, None),
+    ("notifications.unread", "notifications", {"isRead": False}, [("createdAt", -1)]),
+    ("notifications.user", "notifications", {"userId": "u"}, [("createdAt", -1)]),
+    ("notifications.user.unread", "notifications", {"userId": "u", "isRead": False}, [("createdAt", -1)]),
+    ("notification_counters.user", "notification_counters", {"userId": "u"}, None),
+    ("notifications.list", "notifications", {}, [("createdAt", -1)]),
+    ("scheduled_tasks.due", "scheduled_tasks", {"status": {"$in": ["pending", "claimed"]}, "scheduledFor": {"$lte": "t"}},
+     [("scheduledFor", 1)]),
+    ("scheduled_tasks.event", "scheduled_tasks", {"eventId": "e"}, None),
+    ("outbox.due", "outbox", {"status": "pending", "nextAttemptAt": {"$lte": "t"}}, [("nextAttemptAt", 1)]),
+    ("outbox.dead", "outbox", {"status": "dead"}, [("deadAt", -1)]),
+    ("scans.pending", "scans", {"compacted": False}, [("at", 1)]),
+    ("scans.pairs", "scans", {"userId": {"$in": ["u"]}, "eventId": {"$in": ["e"]}}, None),
+    ("participation.certificates.event", "participation", {"eventId": "e", "status": "Attended", "hoursVerified": True}, None),
+    ("participation.certificates.user", "participation", {"userId": "u", "status": "Attended", "hoursVerified": True}, None),
+    ("certificates.prune", "certificates", {"eventId": "e", "userId": {"$in": ["u"]}}, None),
+]
 
+def find_collscans(plan):
+    """Return the stage names of every COLLSCAN in an explain() plan tree."""
+    found = []
+    if isinstance(plan, dict):
+        if plan.get("stage") == "COLLSCAN":
+            found.append(plan.get("stage"))
+        for value in plan.values():
+            found.extend(find_collscans(value))
+    elif isinstance(plan, list):
+        for value in plan:
+            found.extend(find_collscans(value))
+    return found
 
+def check_query_plans(database=None):
+    database = database if database is not None else db
+    report = []
+    for name, collection, query, sort in QUERY_SHAPES:
+        cursor = database[collection].find(query)
+        if sort:
+            cursor = cursor.sort(sort)
+        plan = cursor.explain().get("queryPlanner", {}).get("winningPlan", {})
+        report.append({"query": name, "collection": collection, "collscan": bool(find_collscans(plan))})
+    return report
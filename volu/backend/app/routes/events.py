@@ -1,29 +1,107 @@
-from flask import Blueprint, request, jsonify
-from datetime import datetime
+from flask import Blueprint, request, jsonify, Response, current_app, stream_with_context
+from datetime import datetime, timedelta
 from bson import ObjectId
-from app.database import event_collection
+from pymongo import ReturnDocument
+from app.database import event_collection, for_lists
+from app.utils.dates import parse_date
+from app.services import event_index, notification_fanout, org_stats, reminders, schedule
+from app.utils.cache import cached_json, invalidate
 
 events_bp = Blueprint("events", __name__, url_prefix="/api/events")
 
-# Helper to convert MongoDB ObjectId to string
-def serialize_event(event):
-    event["_id"] = str(event["_id"])
-    return event
+STREAM_BATCH_SIZE = 500
+
+# Optional list filters: ?from=&to= (startDate range), ?status=, ?city=
+def event_filters(query=None, args=None):
+    args = request.args if args is None else args
+    query = dict(query or {})
+    if args.get("status"):
+        query["status"] = args["status"]
+    if args.get("city"):
+        query["city"] = args["city"]
+
+    start = parse_date(args.get("from"))
+    end = parse_date(args.get("to"))
+    if start or end:
+        # startDate is saved as the frontend's ISO string or as a datetime, so match both
+        as_string, as_date = {}, {}
+        if start:
+            as_string["$gte"] = start.strftime("%Y-%m-%d")
+            as_date["$gte"] = start
+        if end:
+            next_day = end + timedelta(days=1)
+            as_string["$lt"] = next_day.strftime("%Y-%m-%d")
+            as_date["$lt"] = next_day
+        query["$or"] = [{"startDate": as_string}, {"startDate": as_date}]
+    return query
+
+# ?fields=name,startDate,... so list views can skip description and images
+def event_projection(args=None):
+    args = request.args if args is None else args
+    fields = [f.strip() for f in args.get("fields", "").split(",") if f.strip()]
+    return {f: 1 for f in fields} or None
+
+def stream_events(cursor, fmt):
+    encode = current_app.json.dumps
+
+    def generate():
+        if fmt == "ndjson":
+            for event in cursor:
+                yield encode(event) + "\n"
+            return
+        yield "["
+        first = True
+        for event in cursor:
+            yield ("" if first else ",") + encode(event)
+            first = False
+        yield "]"
+
+    mimetype = "application/x-ndjson" if fmt == "ndjson" else "application/json"
+    return Response(stream_with_context(generate()), mimetype=mimetype)
+
+# Shared by the list endpoints; ?stream=json|ndjson writes documents as the cursor yields them
+def list_events(query):
+    cursor = for_lists(event_collection).find(event_filters(query), event_projection())
+    fmt = request.args.get("stream")
+    if fmt in ("json", "ndjson"):
+        return stream_events(cursor.batch_size(STREAM_BATCH_SIZE), fmt)
+    return jsonify(list(cursor)), 200
 
 @events_bp.route("/", methods=["GET"])
 def get_all_events():
-    events = list(event_collection.find())
-    return jsonify([serialize_event(e) for e in events]), 200
+    return list_events({})
+
+# ?q= full-text (prefix and typo tolerant), facet filters (?eventType=&urgency=&status=&requiredSkills=&city=,
+# comma-separated values match any), ?from=&to= start dates, ?sort=relevance|date, ?limit=&offset=.
+# Served from the in-memory event index only.
+@events_bp.route("/search", methods=["GET"])
+def search_events():
+    try:
+        params = event_index.search_params(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    try:
+        return jsonify(event_index.get_index().search(**params)), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@events_bp.route("/search/stats", methods=["GET"])
+def get_search_stats():
+    return jsonify(event_index.get_index().stats()), 200
+
+def event_cache_key(event_id):
+    return f"event:{event_id}"
 
 @events_bp.route("/<string:event_id>", methods=["GET"])
 def get_event_by_id(event_id):
     try:
-        event = event_collection.find_one({"_id": ObjectId(event_id)})
-        if not event:
-            return jsonify({"error": "Event not found"}), 404
+        def load():
+            return event_collection.find_one({"_id": ObjectId(event_id)})
 
-        event["_id"] = str(event["_id"])
-        return jsonify(event), 200
+        response = cached_json(event_cache_key(event_id), load)
+        if response is None:
+            return jsonify({"error": "Event not found"}), 404
+        return response
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -38,7 +116,9 @@ def create_event():
         **data
     }
     result = event_collection.insert_one(event)
-    event["_id"] = str(result.inserted_id)
+    reminders.schedule_event_reminders(event)
+    org_stats.apply_event_change(None, event)
+    event_index.on_event_saved(event)
     return jsonify(event), 201
 
 @events_bp.route("/<event_id>", methods=["PUT"])
@@ -48,46 +128,201 @@ def update_event(event_id):
         **data,
         "updatedAt": datetime.utcnow()
     }
-    result = event_collection.update_one(
+    previous = event_collection.find_one_and_update(
         {"_id": ObjectId(event_id)},
-        {"$set": update_data}
+        {"$set": update_data},
+        projection={"startDate": 1, "maxVolunteers": 1}
     )
-    if result.matched_count:
+    if previous:
+        invalidate(event_cache_key(event_id))
         updated_event = event_collection.find_one({"_id": ObjectId(event_id)})
-        return jsonify(serialize_event(updated_event)), 200
+        if "maxVolunteers" in data:
+            updated_event = fill_from_waitlist(updated_event)
+        org_stats.apply_event_change(previous, updated_event)
+        event_index.on_event_saved(updated_event)
+        schedule.on_event_changed(updated_event)
+        if "startDate" in data or "startTime" in data:
+            reminders.schedule_event_reminders(updated_event)
+        if notify_requested():
+            notification_fanout.notify_event_volunteers(
+                event_id, "EVENT_UPDATE", "Event updated",
+                f"{updated_event.get('name', 'An event')} has been updated.",
+                event=updated_event
+            )
+        return jsonify(updated_event), 200
     return jsonify({"error": "Event not found"}), 404
 
 @events_bp.route("/<event_id>", methods=["DELETE"])
 def delete_event(event_id):
-    result = event_collection.delete_one({"_id": ObjectId(event_id)})
-    if result.deleted_count:
+    deleted = event_collection.find_one_and_delete({"_id": ObjectId(event_id)})
+    if deleted:
+        invalidate(event_cache_key(event_id))
+        reminders.cancel_event_reminders(event_id)
+        org_stats.apply_event_change(deleted, None)
+        event_index.on_event_deleted(event_id)
+        schedule.on_event_deleted(event_id)
+        if notify_requested():
+            notification_fanout.notify_event_volunteers(
+                event_id, "EVENT_CANCELLATION", "Event cancelled",
+                f"{deleted.get('name', 'An event')} has been cancelled.",
+                event=deleted
+            )
         return jsonify({"message": "Event deleted"}), 200
     return jsonify({"error": "Event not found"}), 404
 
+# Updates and deletes notify signed-up volunteers unless ?notify=false
+def notify_requested():
+    return request.args.get("notify", "true").lower() != "false"
+
+# Events without maxVolunteers have unlimited capacity. New sign-ups only take a
+# spot while nobody is waiting, so freed spots go to the waitlist first (FIFO).
+HAS_CAPACITY = {"$or": [
+    {"maxVolunteers": None},
+    {"$expr": {"$lt": [{"$ifNull": ["$currentVolunteers", 0]}, "$maxVolunteers"]}},
+]}
+WAITLIST_EMPTY = {"waitlist.0": {"$exists": False}}
+WAITLIST_OPEN = {"maxVolunteers": {"$ne": None}, "$or": [
+    {"waitlist.0": {"$exists": True}},
+    {"$expr": {"$gte": [{"$ifNull": ["$currentVolunteers", 0]}, "$maxVolunteers"]}},
+]}
+
+def not_signed_up(user_id):
+    if not user_id:
+        return {}
+    return {"registeredVolunteers": {"$ne": user_id}, "waitlist.userId": {"$ne": user_id}}
+
+def request_user_id():
+    return (request.get_json(silent=True) or {}).get("userId")
+
+SCHEDULE_CONFLICT = "Overlaps another event you are registered for"
+
+# A sign-up is refused if it overlaps the volunteer's other registrations, unless the body has allowConflict
+def conflict_check_requested(data):
+    return not (isinstance(data, dict) and data.get("allowConflict") is True)
+
 @events_bp.route("/<event_id>/register", methods=["POST"])
 def register_for_event(event_id):
-    result = event_collection.update_one(
-        {"_id": ObjectId(event_id)},
-        {"$inc": {"currentVolunteers": 1}}
-    )
-    if result.matched_count:
-        updated_event = event_collection.find_one({"_id": ObjectId(event_id)})
-        return jsonify(serialize_event(updated_event)), 200
+    user_id = request_user_id()
+    event_oid = ObjectId(event_id)
+    if user_id and conflict_check_requested(request.get_json(silent=True)):
+        event = event_collection.find_one({"_id": event_oid}, schedule.WINDOW_PROJECTION)
+        conflicts = schedule.get_index().conflicts(user_id, event) if event else []
+        if conflicts:
+            return jsonify({"error": SCHEDULE_CONFLICT, "conflicts": conflicts}), 409
+
+    register = {"$inc": {"currentVolunteers": 1}}
+    if user_id:
+        register["$push"] = {"registeredVolunteers": user_id}
+
+    # A few attempts cover a spot opening between the register and waitlist writes
+    for _ in range(3):
+        # Single conditional write: takes a spot only if one is left
+        updated_event = event_collection.find_one_and_update(
+            {"_id": event_oid, "$and": [HAS_CAPACITY, WAITLIST_EMPTY], **not_signed_up(user_id)},
+            register,
+            return_document=ReturnDocument.AFTER
+        )
+        if updated_event:
+            invalidate(event_cache_key(event_id))
+            schedule.on_registered(user_id, updated_event)
+            return jsonify({**updated_event, "registrationStatus": "registered"}), 200
+        if not user_id:
+            break
+
+        waitlisted = event_collection.find_one_and_update(
+            {"_id": event_oid, **WAITLIST_OPEN, **not_signed_up(user_id)},
+            {"$push": {"waitlist": {"userId": user_id, "joinedAt": datetime.utcnow()}}},
+            return_document=ReturnDocument.AFTER
+        )
+        if waitlisted:
+            invalidate(event_cache_key(event_id))
+            position = len(waitlisted["waitlist"])
+            return jsonify({**waitlisted, "registrationStatus": "waitlisted",
+                            "waitlistPosition": position}), 202
+
+        # Both writes missed: find out why (missing event, already signed up, or a race)
+        signed_up = event_collection.find_one(
+            {"_id": event_oid, "$or": [{"registeredVolunteers": user_id}, {"waitlist.userId": user_id}]},
+            {"_id": 1}
+        )
+        if signed_up:
+            return jsonify({"error": "Already registered or waitlisted for this event"}), 409
+        if not event_collection.find_one({"_id": event_oid}, {"_id": 1}):
+            break
+
+    if not user_id and event_collection.find_one({"_id": event_oid}, {"_id": 1}):
+        return jsonify({"error": "Event is full"}), 409
     return jsonify({"error": "Event not found"}), 404
 
 @events_bp.route("/<event_id>/unregister", methods=["POST"])
 def unregister_from_event(event_id):
-    event = event_collection.find_one({"_id": ObjectId(event_id)})
-    if event and event.get("currentVolunteers", 0) > 0:
-        event_collection.update_one(
-            {"_id": ObjectId(event_id)},
-            {"$inc": {"currentVolunteers": -1}}
+    user_id = request_user_id()
+    event_oid = ObjectId(event_id)
+
+    if user_id:
+        # Leaving the waitlist does not free a spot
+        left_waitlist = event_collection.find_one_and_update(
+            {"_id": event_oid, "waitlist.userId": user_id},
+            {"$pull": {"waitlist": {"userId": user_id}}},
+            return_document=ReturnDocument.AFTER
         )
-        updated_event = event_collection.find_one({"_id": ObjectId(event_id)})
-        return jsonify(serialize_event(updated_event)), 200
-    return jsonify({"error": "Event not found or no volunteers to remove"}), 404
+        if left_waitlist:
+            invalidate(event_cache_key(event_id))
+            return jsonify({**left_waitlist, "registrationStatus": "removed"}), 200
+
+    query = {"_id": event_oid, "currentVolunteers": {"$gt": 0}}
+    update = {"$inc": {"currentVolunteers": -1}}
+    if user_id:
+        query["registeredVolunteers"] = user_id
+        update["$pull"] = {"registeredVolunteers": user_id}
+    updated_event = event_collection.find_one_and_update(query, update, return_document=ReturnDocument.AFTER)
+    if not updated_event:
+        return jsonify({"error": "Event not found or no volunteers to remove"}), 404
+
+    schedule.on_unregistered(user_id, event_id)
+    promoted = promote_from_waitlist(updated_event) if updated_event.get("waitlist") else None
+    invalidate(event_cache_key(event_id))
+    if promoted:
+        schedule.on_registered(promoted[1], promoted[0])
+        body = {**promoted[0], "promotedVolunteer": promoted[1]}
+    else:
+        body = updated_event
+    return jsonify({**body, "registrationStatus": "removed"}), 200
+
+# FIFO: the head of the waitlist takes the freed spot in one conditional write.
+# Matching on the head's userId makes the write a no-op if the head changed meanwhile.
+def promote_from_waitlist(event):
+    for _ in range(3):
+        waitlist = event.get("waitlist") or []
+        if not waitlist:
+            return None
+        head = waitlist[0]["userId"]
+        promoted = event_collection.find_one_and_update(
+            {"_id": event["_id"], "waitlist.0.userId": head, **HAS_CAPACITY},
+            {"$pop": {"waitlist": -1}, "$inc": {"currentVolunteers": 1},
+             "$push": {"registeredVolunteers": head}},
+            return_document=ReturnDocument.AFTER
+        )
+        if promoted:
+            return promoted, head
+        event = event_collection.find_one({"_id": event["_id"]}, {"waitlist": {"$slice": 1}})
+        if not event:
+            return None
+    return None
+
+def has_room(event):
+    return event.get("maxVolunteers") is None or (event.get("currentVolunteers") or 0) < event["maxVolunteers"]
+
+# Raising maxVolunteers frees spots that only the waitlist may take (new sign-ups queue behind it)
+def fill_from_waitlist(event):
+    while event.get("waitlist") and has_room(event):
+        promoted = promote_from_waitlist(event)
+        if not promoted:
+            break
+        event = promoted[0]
+    return event
 
 @events_bp.route("/created-by/<user_id>", methods=["GET"])
 def get_events_created_by_user(user_id):
-    events = list(event_collection.find({"createdBy": user_id}))
-    return jsonify([serialize_event(e) for e in events]), 200
+    return list_events({"createdBy": user_id})
+
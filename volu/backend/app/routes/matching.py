@@ -0,0 +1,89 @@
+from flask import Blueprint, request, jsonify
+from bson import ObjectId
+from app.database import event_collection
+from app.services import matching, schedule, volunteer_index
+
+matching_bp = Blueprint("matching", __name__, url_prefix="/api/matching")
+
+@matching_bp.route("/event/<event_id>", methods=["GET"])
+def get_matches_for_event(event_id):
+    try:
+        limit = int(request.args.get("limit", 20))
+        min_score = float(request.args.get("minScore", matching.MIN_MATCH_SCORE))
+
+        event = event_collection.find_one({"_id": ObjectId(event_id)})
+        if not event:
+            return jsonify({"error": "Event not found"}), 404
+
+        if request.args.get("refresh") == "true":
+            matching.get_matrix(rebuild=True)
+
+        matches = matching.find_matches_for_event(event, limit=limit, min_score=min_score)
+        return jsonify(matches), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@matching_bp.route("/refresh", methods=["POST"])
+def refresh_matrix():
+    matrix = matching.get_matrix(rebuild=True)
+    return jsonify({"volunteers": len(matrix), "builtAt": matrix.built_at.isoformat()}), 200
+
+# "Volunteers needed" lookup: who has the event's skills/causes, straight from the index
+@matching_bp.route("/event/<event_id>/candidates", methods=["GET"])
+def get_candidates_for_event(event_id):
+    try:
+        match = request.args.get("match", "any")
+        event = event_collection.find_one(
+            {"_id": ObjectId(event_id)}, {"requiredSkills": 1, "causes": 1}
+        )
+        if not event:
+            return jsonify({"error": "Event not found"}), 404
+
+        skills = event.get("requiredSkills") or []
+        causes = []
+        if request.args.get("includeCauses") == "true":
+            causes = event.get("causes") or []
+        candidates = volunteer_index.get_index().candidate_ids(skills=skills, causes=causes, match=match)
+        return jsonify({"eventId": event_id, "count": len(candidates), "volunteerIds": candidates}), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@matching_bp.route("/event/<event_id>/nearby", methods=["GET"])
+def get_volunteers_near_event(event_id):
+    try:
+        radius = request.args.get("radius")
+        event = event_collection.find_one(
+            {"_id": ObjectId(event_id)}, {"zip": 1, "city": 1, "state": 1}
+        )
+        if not event:
+            return jsonify({"error": "Event not found"}), 404
+
+        nearby = matching.get_matrix().volunteers_near(event, float(radius) if radius else None)
+        return jsonify(nearby), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+# "Who is free": availability masks cover every hour of the event and nothing else is booked then
+@matching_bp.route("/event/<event_id>/available", methods=["GET"])
+def get_available_volunteers(event_id):
+    try:
+        event = event_collection.find_one(
+            {"_id": ObjectId(event_id)}, {**schedule.WINDOW_PROJECTION, "registeredVolunteers": 1}
+        )
+        if not event:
+            return jsonify({"error": "Event not found"}), 404
+
+        if request.args.get("refresh") == "true":
+            schedule.get_availability(rebuild=True)
+        available = schedule.free_volunteers(event)
+        return jsonify({"eventId": event_id, "count": len(available), "volunteerIds": available}), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@matching_bp.route("/schedule/stats", methods=["GET"])
+def get_schedule_stats():
+    return jsonify({**schedule.get_index().stats(), "availability": len(schedule.get_availability())}), 200
+
+@matching_bp.route("/index/stats", methods=["GET"])
+def get_index_stats():
+    return jsonify(volunteer_index.get_index().stats()), 200
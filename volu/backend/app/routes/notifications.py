@@ -1,53 +1,169 @@
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, jsonify, request, Response
 from datetime import datetime
-import uuid
-from app.database import notifications_collection  # Import the collection
+import os
+from pymongo import ReturnDocument
+from app.database import notifications_collection, for_lists  # Import the collections
+from app.services import delivery, notification_fanout
+from app.services.notification_hub import get_hub, HubFull
+from app.utils.json_provider import dumps
 
 notifications_bp = Blueprint("notifications", __name__, url_prefix="/api/notifications")
 
+# The list is scoped to one inbox with ?userId=; the unread badge and
+# mark-all-as-read always need it.
+def user_scope():
+    user_id = request.args.get("userId")
+    return {"userId": user_id} if user_id else {}
+
 @notifications_bp.route("/", methods=["GET"])
 def get_notifications():
     unread_only = request.args.get("unreadOnly") == "true"
-    query = {"isRead": False} if unread_only else {}
-    notifications = list(notifications_collection.find(query).sort("createdAt", -1))
-
-    for n in notifications:
-        n["id"] = str(n["_id"])
-        del n["_id"]
-
+    query = user_scope()
+    if unread_only:
+        query["isRead"] = False
+    notifications = list(for_lists(notifications_collection).find(query).sort("createdAt", -1))
     return jsonify(notifications), 200
 
 @notifications_bp.route("/unread-count", methods=["GET"])
 def get_unread_count():
-    count = notifications_collection.count_documents({"isRead": False})
-    return jsonify(count), 200
+    user_id = request.args.get("userId")
+    if not user_id:
+        return jsonify({"error": "Missing userId"}), 400
+    # Counter document: O(1) regardless of inbox size
+    return jsonify(notification_fanout.unread_count(user_id)), 200
 
 @notifications_bp.route("/mark-as-read/<notification_id>", methods=["POST"])
 def mark_as_read(notification_id):
-    result = notifications_collection.update_one(
-        {"_id": uuid.UUID(notification_id)},
-        {"$set": {"isRead": True, "readAt": datetime.utcnow().isoformat()}}
+    notification = notifications_collection.find_one_and_update(
+        {**notification_fanout.id_filter(notification_id), "isRead": False},
+        {"$set": {"isRead": True, "readAt": datetime.utcnow().isoformat()}},
+        projection={"userId": 1},
+        return_document=ReturnDocument.BEFORE
     )
 
-    if result.matched_count == 0:
-        return jsonify({"error": "Notification not found"}), 404
+    if notification is None:
+        # Already read, or missing
+        if notifications_collection.count_documents(notification_fanout.id_filter(notification_id), limit=1) == 0:
+            return jsonify({"error": "Notification not found"}), 404
+    else:
+        notification_fanout.adjust_unread({notification.get("userId"): -1})
 
     return jsonify({"message": "Notification marked as read"}), 200
 
 @notifications_bp.route("/mark-all-as-read", methods=["POST"])
 def mark_all_as_read():
-    notifications_collection.update_many(
-        {"isRead": False},
+    user_id = request.args.get("userId")
+    if not user_id:
+        return jsonify({"error": "Missing userId"}), 400
+    result = notifications_collection.update_many(
+        {"userId": user_id, "isRead": False},
         {"$set": {"isRead": True, "readAt": datetime.utcnow().isoformat()}}
     )
-    return jsonify({"message": "All notifications marked as read"}), 200
+    # Decrement by what was actually flipped so concurrent inserts still count
+    notification_fanout.adjust_unread({user_id: -result.modified_count})
+    return jsonify({"message": "All notifications marked as read", "updated": result.modified_count}), 200
 
 @notifications_bp.route("/delete/<notification_id>", methods=["DELETE"])
 def delete_notification(notification_id):
-    result = notifications_collection.delete_one({"_id": uuid.UUID(notification_id)})
+    notification = notifications_collection.find_one_and_delete(
+        notification_fanout.id_filter(notification_id),
+        projection={"userId": 1, "isRead": 1}
+    )
 
-    if result.deleted_count == 0:
+    if notification is None:
         return jsonify({"error": "Notification not found"}), 404
 
+    if not notification.get("isRead"):
+        notification_fanout.adjust_unread({notification.get("userId"): -1})
+
     return jsonify({"message": "Notification deleted"}), 200
 
+@notifications_bp.route("/event/<event_id>", methods=["POST"])
+def notify_event(event_id):
+    try:
+        data = request.get_json(silent=True) or {}
+        if not data.get("message"):
+            return jsonify({"error": "Missing message"}), 400
+        docs = notification_fanout.notify_event_volunteers(
+            event_id,
+            data.get("type", "EVENT_UPDATE"),
+            data.get("title", "Event update"),
+            data["message"],
+            priority=data.get("priority")
+        )
+        return jsonify({"message": "Notifications sent", "recipients": len(docs)}), 201
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+HEARTBEAT_SECONDS = float(os.getenv("NOTIFICATION_STREAM_HEARTBEAT_SECONDS", "15"))
+
+def sse_message(event_id, event_type, data):
+    lines = [f"id: {event_id}"] if event_id else []
+    lines.append(f"event: {event_type}")
+    lines.append(f"data: {dumps(data)}")
+    return "\n".join(lines) + "\n\n"
+
+@notifications_bp.route("/stream", methods=["GET"])
+def stream_notifications():
+    """Server-Sent Events: pushes new notifications and unread-count changes for one user."""
+    user_id = request.args.get("userId")
+    if not user_id:
+        return jsonify({"error": "Missing userId"}), 400
+    last_event_id = request.headers.get("Last-Event-ID") or request.args.get("lastEventId")
+
+    hub = get_hub()
+    try:
+        subscription = hub.subscribe(user_id)
+    except HubFull:
+        return jsonify({"error": "Too many open notification streams"}), 503, {"Retry-After": "30"}
+
+    def generate():
+        try:
+            yield f"retry: {int(HEARTBEAT_SECONDS * 1000)}\n\n"
+            if last_event_id:
+                missed = hub.replay(user_id, last_event_id)
+                if missed is None:
+                    # Gap we cannot fill: client should refetch the list
+                    yield sse_message(None, "reset", {})
+                else:
+                    for event in missed:
+                        yield sse_message(*event)
+            yield sse_message(None, "unread", {"count": notification_fanout.unread_count(user_id)})
+            while True:
+                event = subscription.next_event(HEARTBEAT_SECONDS)
+                yield ": heartbeat\n\n" if event is None else sse_message(*event)
+        finally:
+            hub.unsubscribe(subscription)
+
+    return Response(generate(), mimetype="text/event-stream", headers={
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no",
+    })
+
+@notifications_bp.route("/stream/stats", methods=["GET"])
+def stream_stats():
+    return jsonify(get_hub().stats()), 200
+
+# Email/SMS outbox: counts per channel and status, the dead-letter set, and requeueing it
+@notifications_bp.route("/outbox/stats", methods=["GET"])
+def outbox_stats():
+    try:
+        return jsonify(delivery.outbox_stats()), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@notifications_bp.route("/outbox/dead", methods=["GET"])
+def outbox_dead_letters():
+    try:
+        return jsonify(delivery.dead_letters(int(request.args.get("limit", 100)))), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@notifications_bp.route("/outbox/dead/requeue", methods=["POST"])
+def requeue_dead_letters():
+    try:
+        ids = (request.get_json(silent=True) or {}).get("ids")
+        return jsonify({"requeued": delivery.requeue_dead(ids)}), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
@@ -1,35 +1,55 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request, jsonify, current_app
 from datetime import datetime
 from bson import ObjectId
-from app.database import participation_collection, event_collection
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from app.database import participation_collection, event_collection, for_lists
+from app.services import (certificates, org_stats, participation_includes, participation_stats, participation_bulk,
+                          scans)
+from app.utils.pagination import CountCache, fetch_page, page_limit, page_offset
 
 participation_bp = Blueprint("participation", __name__)
 
-# Convert MongoDB document to JSON-friendly format
-def serialize_participation(p):
-    p["_id"] = str(p["_id"])
-    if "eventId" in p:
-        p["eventId"] = str(p["eventId"])
-    if "userId" in p:
-        p["userId"] = str(p["userId"])
-    return p
+# Totals for list pages are cached briefly instead of re-counted on every page
+participation_counts = CountCache(ttl_seconds=30)
+
+# Shared by the list endpoints: ?cursor= pages on (createdAt, _id), otherwise offset/limit.
+# ?total=exact|estimated|none controls how totalCount is computed and
+# ?include=event,user embeds the related documents.
+def page_history(query, default_include=""):
+    include = participation_includes.parse_include(request.args.get("include"), default_include)
+    limit = page_limit(request.args)
+    total_mode = request.args.get("total", "estimated")
+    cursor = request.args.get("cursor")
+    collection = for_lists(participation_collection)
+
+    if cursor is not None:
+        docs, next_cursor = fetch_page(collection, query, limit, cursor or None)
+        body = {"limit": limit, "nextCursor": next_cursor, "hasMore": next_cursor is not None}
+    else:
+        offset = page_offset(request.args)
+        docs = collection.find(query).skip(offset).limit(limit)
+        body = {"limit": limit, "offset": offset}
+
+    body["history"] = participation_includes.embed(list(docs), include)
+    if total_mode == "exact":
+        body["totalCount"] = participation_collection.count_documents(query)
+    elif total_mode != "none":
+        body["totalCount"] = participation_counts.count(participation_collection, query)
+    return body
 
 @participation_bp.route("/all", methods=["GET"])
 def get_all_participation():
     try:
-        limit = int(request.args.get("limit", 20))
-        offset = int(request.args.get("offset", 0))
         status = request.args.get("status")
 
         query = {}
         if status:
             query["status"] = status
 
-        cursor = participation_collection.find(query).skip(offset).limit(limit)
-        history = [serialize_participation(doc) for doc in cursor]
-        total = participation_collection.count_documents(query)
-
-        return jsonify({"history": history, "totalCount": total, "limit": limit, "offset": offset}), 200
+        return jsonify(page_history(query)), 200
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -41,18 +61,29 @@ def get_my_participation():
             return jsonify({"error": "Missing userId"}), 400
 
         status = request.args.get("status")
-        limit = int(request.args.get("limit", 20))
-        offset = int(request.args.get("offset", 0))
 
         query = { "userId": user_id }
         if status:
             query["status"] = status
 
-        cursor = participation_collection.find(query).skip(offset).limit(limit)
-        history = [serialize_participation(doc) for doc in cursor]
-        total = participation_collection.count_documents(query)
+        return jsonify(page_history(query)), 200
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+# Event roster; records embed their event and volunteer unless ?include= says otherwise
+@participation_bp.route("/event/<event_id>", methods=["GET"])
+def get_event_participation(event_id):
+    try:
+        query = {"eventId": event_id}
+        status = request.args.get("status")
+        if status:
+            query["status"] = status
 
-        return jsonify({"history": history, "totalCount": total, "limit": limit, "offset": offset}), 200
+        return jsonify(page_history(query, default_include="event,user")), 200
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -67,27 +98,28 @@ def record_participation():
         if not user_id or not event_id or not status:
             return jsonify({"error": "Missing required fields"}), 400
 
-        existing = participation_collection.find_one({
-            "userId": user_id,
-            "eventId": event_id
-        })
-
-        if existing:
-            participation_collection.update_one(
-                {"_id": existing["_id"]},
-                {"$set": {
-                    "status": status,
-                    "updatedAt": datetime.utcnow()
-                }}
+        now = datetime.utcnow()
+        updates = {"status": status, "updatedAt": now}
+        if data.get("hoursLogged") is not None:
+            updates["hoursLogged"] = float(data["hoursLogged"])
+        inserted = {"createdAt": now, "eventMonth": participation_stats.event_month(event_id)}
+
+        # BEFORE image tells the rollup what this record used to count as
+        def upsert():
+            return participation_collection.find_one_and_update(
+                {"userId": user_id, "eventId": event_id},
+                {"$set": updates, "$setOnInsert": inserted},
+                upsert=True,
+                return_document=ReturnDocument.BEFORE
             )
-        else:
-            participation_collection.insert_one({
-                "userId": user_id,
-                "eventId": event_id,
-                "status": status,
-                "createdAt": datetime.utcnow(),
-                "updatedAt": datetime.utcnow()
-            })
+        try:
+            previous = upsert()
+        except DuplicateKeyError:
+            # Lost an insert race on the unique (userId, eventId) index; the row exists now
+            previous = upsert()
+        current = {**(previous or inserted), **updates}
+        participation_stats.apply_change(user_id, previous, current)
+        org_stats.apply_record_changes([(user_id, previous, current)])
 
         return jsonify({"message": "Participation recorded"}), 200
     except Exception as e:
@@ -116,6 +148,149 @@ def log_feedback():
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+# Shared by the bulk endpoints: validates the batch and reports per-item results
+# (207 when any item was not applied)
+def bulk_response(entries, ordered):
+    if not isinstance(entries, list) or not entries:
+        return jsonify({"error": "Missing entries"}), 400
+    if len(entries) > participation_bulk.MAX_BULK_ENTRIES:
+        return jsonify({"error": f"At most {participation_bulk.MAX_BULK_ENTRIES} entries per request"}), 400
+
+    results = participation_bulk.apply_bulk(entries, ordered=ordered)
+    summary = {}
+    for r in results:
+        summary[r["result"]] = summary.get(r["result"], 0) + 1
+    ok = all(r["result"] in ("inserted", "updated") for r in results)
+    return jsonify({"results": results, "summary": summary}), 200 if ok else 207
+
+# Batch close-out: {"entries": [{userId, eventId, status?, hoursLogged?, hoursVerified?, feedback?}], "ordered": false}
+@participation_bp.route("/record/bulk", methods=["POST"])
+def record_participation_bulk():
+    try:
+        data = request.json or {}
+        return bulk_response(data.get("entries"), bool(data.get("ordered", False)))
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+# Feedback-only batch; like /log-feedback, entries never create records
+@participation_bp.route("/log-feedback/bulk", methods=["POST"])
+def log_feedback_bulk():
+    try:
+        data = request.json or {}
+        entries = data.get("entries")
+        if isinstance(entries, list):
+            entries = [
+                {"userId": e.get("userId"), "eventId": e.get("eventId"), "feedback": e.get("feedback")}
+                if isinstance(e, dict) else e
+                for e in entries
+            ]
+        return bulk_response(entries, bool(data.get("ordered", False)))
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+# Check-in/check-out only append to the scan log (202); the compactor turns
+# scans into hoursLogged. A retried scan (same scanId, Idempotency-Key header
+# or identical timestamp) answers 200 with duplicate: true.
+def scan_response(kind):
+    data = request.get_json(silent=True) or {}
+    try:
+        scan = scans.scan_document(data, kind, key=request.headers.get("Idempotency-Key"))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    inserted = scans.record_scan(scan)
+    time_field = "checkInTime" if kind == "in" else "checkOutTime"
+    return jsonify({
+        "message": "Scan recorded" if inserted else "Scan already recorded",
+        "scanId": scan["_id"],
+        "duplicate": not inserted,
+        "userId": scan["userId"],
+        "eventId": scan["eventId"],
+        time_field: scan["at"],
+    }), 202 if inserted else 200
+
+@participation_bp.route("/check-in", methods=["POST"])
+def check_in():
+    try:
+        return scan_response("in")
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@participation_bp.route("/check-out", methods=["POST"])
+def check_out():
+    try:
+        return scan_response("out")
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+# Offline sync from scanning devices: {"scans": [{scanId?, userId, eventId, kind: "in"|"out", at}]}
+@participation_bp.route("/scans", methods=["POST"])
+def record_scans():
+    try:
+        items = (request.get_json(silent=True) or {}).get("scans")
+        if not isinstance(items, list) or not items:
+            return jsonify({"error": "Missing scans"}), 400
+        if len(items) > scans.MAX_SCANS_PER_BATCH:
+            return jsonify({"error": f"At most {scans.MAX_SCANS_PER_BATCH} scans per request"}), 400
+
+        results = scans.record_scans(items)
+        summary = {}
+        for r in results:
+            summary[r["result"]] = summary.get(r["result"], 0) + 1
+        ok = all(r["result"] in ("accepted", "duplicate") for r in results)
+        return jsonify({"results": results, "summary": summary}), 202 if ok else 207
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+# Certificates for verified hours: {"userId"} for one volunteer, or an empty body
+# for every volunteer with verified hours at the event. Rendering happens in a
+# process pool; certificates that already exist are returned as they are.
+@participation_bp.route("/certificate/<event_id>", methods=["POST"])
+def generate_certificate(event_id):
+    try:
+        user_id = (request.get_json(silent=True) or {}).get("userId")
+        result = certificates.generate(event_id, user_id)
+        if result is None:
+            return jsonify({"error": "No verified hours for this event"}), 404
+        generated, summary = result
+        if user_id:
+            return jsonify(generated[0]), 200
+        return jsonify({"certificates": generated, "summary": summary}), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@participation_bp.route("/certificates", methods=["GET"])
+@participation_bp.route("/certificates/<user_id>", methods=["GET"])
+def get_certificates(user_id=None):
+    try:
+        user_id = user_id or request.args.get("userId")
+        if not user_id:
+            return jsonify({"error": "Missing userId"}), 400
+        return jsonify(certificates.list_certificates(user_id)), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+# The URL names the content, so browsers may keep it forever; the key is also the ETag
+CERTIFICATE_CACHE_CONTROL = "private, max-age=31536000, immutable"
+
+@participation_bp.route("/certificates/file/<key>", methods=["GET"])
+def download_certificate(key):
+    try:
+        # A matching ETag is answered without reading the stored PDF
+        if request.if_none_match.contains(key):
+            response = Response(status=304, headers={"Cache-Control": CERTIFICATE_CACHE_CONTROL})
+        else:
+            doc = certificates.certificate_pdf(key)
+            if not doc:
+                return jsonify({"error": "Certificate not found"}), 404
+            response = Response(bytes(doc["pdf"]), mimetype="application/pdf", headers={
+                "Cache-Control": CERTIFICATE_CACHE_CONTROL,
+                "Content-Disposition": f'inline; filename="certificate-{doc["eventId"]}.pdf"',
+            })
+        response.set_etag(key)
+        return response
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
 @participation_bp.route("/statistics", methods=["GET"])
 def get_statistics():
     try:
@@ -123,56 +298,47 @@ def get_statistics():
         if not user_id:
             return jsonify({"error": "Missing userId"}), 400
 
-        total_hours = 0
-        attended_count = 0
-        upcoming_count = 0
-        status_counts = {}
-        events_by_month = {}
-        hours_by_month = {}
-
-        now = datetime.utcnow()
-        records = participation_collection.find({"userId": user_id})
-
-        for rec in records:
-            status = rec.get("status", "Unknown")
-            status_counts[status] = status_counts.get(status, 0) + 1
-
-            if status == "Attended":
-                attended_count += 1
-                total_hours += rec.get("hoursLogged", 0)
-            elif status == "Confirmed":
-                upcoming_count += 1
-
-            event = rec.get("event", {})
-            start_date_str = event.get("startDate")
-            if start_date_str:
-                try:
-                    start_date = datetime.fromisoformat(start_date_str)
-                except Exception:
-                    try:
-                        start_date = datetime.strptime(start_date_str, "%Y-%m-%d")
-                    except:
-                        continue  # skip if date parsing fails
-
-                month_key = start_date.strftime("%b %Y")  # e.g., 'Mar 2025'
-                events_by_month[month_key] = events_by_month.get(month_key, 0) + 1
-                hours_by_month[month_key] = hours_by_month.get(month_key, 0) + rec.get("hoursLogged", 0)
+        if request.args.get("source") == "aggregate":
+            rollup = participation_stats.rebuild_rollup(user_id)
+        else:
+            rollup = participation_stats.get_rollup(user_id)
+        stats = participation_stats.format_statistics(rollup)
 
         # Placeholder for new notifications until implemented
         new_notifications = 0
 
         return jsonify({
-            "totalHours": total_hours,
-            "eventsAttended": attended_count,
-            "upcomingEvents": upcoming_count,
+            "totalHours": stats["totalHours"],
+            "eventsAttended": stats["eventsAttended"],
+            "upcomingEvents": stats["upcomingEvents"],
             "newNotifications": new_notifications,
-            "statusCounts": status_counts,
-            "eventsByMonth": events_by_month,
-            "hoursByMonth": hours_by_month
+            "statusCounts": stats["statusCounts"],
+            "eventsByMonth": stats["eventsByMonth"],
+            "hoursByMonth": stats["hoursByMonth"]
         }), 200
 
     except Exception as e:
-        print("Error in /statistics:", str(e))
+        current_app.logger.exception("Error in /statistics")
+        return jsonify({"error": str(e)}), 500
+
+
+# Org-wide numbers for the admin dashboard, served from the precomputed org_stats document
+@participation_bp.route("/dashboard", methods=["GET"])
+def get_dashboard():
+    try:
+        months = request.args.get("months")
+        top = min(int(request.args.get("top", 10)), org_stats.LEADERBOARD_SIZE)
+        return jsonify(org_stats.format_dashboard(org_stats.get_org_stats(), int(months) if months else None, top)), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@participation_bp.route("/leaderboard", methods=["GET"])
+def get_leaderboard():
+    try:
+        limit = min(int(request.args.get("limit", 10)), org_stats.LEADERBOARD_SIZE)
+        org = org_stats.get_org_stats()
+        return jsonify({"leaderboard": (org.get("leaderboard") or [])[:limit], "updatedAt": org.get("updatedAt")}), 200
+    except Exception as e:
         return jsonify({"error": str(e)}), 500
 
     
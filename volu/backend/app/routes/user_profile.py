@@ -1,19 +1,18 @@
 from flask import Blueprint, request, jsonify
 from bson import ObjectId
 from app.database import user_collection
+from app.services import matching, schedule, volunteer_index
+from app.utils.cache import cached_json, invalidate
 
 user_profile_bp = Blueprint("user_profile", __name__, url_prefix="/api/user-profile")
 
-# Helper to serialize MongoDB document
-def serialize_user(user_doc):
-    if user_doc:
-        user_doc["_id"] = str(user_doc["_id"])
-    return user_doc
+def profile_cache_key(user_id):
+    return f"user:{user_id}"
 
 @user_profile_bp.route("/<user_id>", methods=["GET"])
 def get_user_profile(user_id):
-    user = user_collection.find_one({"userId": user_id})
-    return jsonify(serialize_user(user) if user else {}), 200
+    response = cached_json(profile_cache_key(user_id), lambda: user_collection.find_one({"userId": user_id}))
+    return response if response is not None else (jsonify({}), 200)
 
 @user_profile_bp.route("/<user_id>/personal-info", methods=["PUT"])
 def update_personal_info(user_id):
@@ -23,6 +22,8 @@ def update_personal_info(user_id):
         {"$set": {"personalInfo": data}},
         upsert=True
     )
+    matching.mark_stale()
+    invalidate(profile_cache_key(user_id))
     return jsonify({"message": "Personal info updated"}), 200
 
 @user_profile_bp.route("/<user_id>/skills", methods=["PUT"])
@@ -33,6 +34,9 @@ def update_skills(user_id):
         {"$set": {"skills": data}},
         upsert=True
     )
+    volunteer_index.on_skills_updated(user_id, data)
+    matching.mark_stale()
+    invalidate(profile_cache_key(user_id))
     return jsonify({"message": "Skills updated"}), 200
 
 @user_profile_bp.route("/<user_id>/preferences", methods=["PUT"])
@@ -43,6 +47,9 @@ def update_preferences(user_id):
         {"$set": {"preferences": data}},
         upsert=True
     )
+    volunteer_index.on_preferences_updated(user_id, data)
+    matching.mark_stale()
+    invalidate(profile_cache_key(user_id))
     return jsonify({"message": "Preferences updated"}), 200
 
 @user_profile_bp.route("/<user_id>/availability", methods=["PUT"])
@@ -50,9 +57,12 @@ def update_availability(user_id):
     data = request.get_json()
     user_collection.update_one(
         {"userId": user_id},
-        {"$set": {"availability": data}},
+        {"$set": {"availability": data, "availabilityMask": schedule.availability_document(data)}},
         upsert=True
     )
+    schedule.on_availability_updated(user_id, data)
+    matching.mark_stale()
+    invalidate(profile_cache_key(user_id))
     return jsonify({"message": "Availability updated"}), 200
 
 @user_profile_bp.route("/<user_id>/account-settings", methods=["PUT"])
@@ -63,10 +73,16 @@ def update_account_settings(user_id):
         {"$set": {"accountSettings": data}},
         upsert=True
     )
+    matching.mark_stale()
+    invalidate(profile_cache_key(user_id))
     return jsonify({"message": "Account settings updated"}), 200
 
 @user_profile_bp.route("/<user_id>", methods=["DELETE"])
 def delete_user_account(user_id):
     user_collection.delete_one({"userId": user_id})
+    volunteer_index.on_user_deleted(user_id)
+    schedule.on_user_deleted(user_id)
+    matching.mark_stale()
+    invalidate(profile_cache_key(user_id))
     return jsonify({"message": "User deleted"}), 200
 
@@ -0,0 +1,159 @@
+import hashlib
+import json
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from bson import ObjectId
+from pymongo.errors import BulkWriteError
+from app.database import certificate_collection, event_collection, participation_collection
+from app.services.participation_includes import load_users
+from app.utils.dates import parse_date
+from app.utils.pdf import render_certificate
+
+# Volunteer certificates, rendered as PDFs in a process pool so the CPU work
+# never holds a web worker's thread, and stored content-addressed:
+#   {_id: sha256(userId, eventId, verified hours, template version), userId,
+#    eventId, hours, templateVersion, title, description, pdf, size, createdAt}
+# Only verified-hours or template changes produce a new key; anything else
+# (a renamed event, a second download) is served from the stored document and
+# the key doubles as its ETag. Superseded certificates are pruned when their
+# replacement is stored.
+
+TEMPLATE_VERSION = "1"
+# 0 renders in the calling thread
+CERTIFICATE_WORKERS = int(os.getenv("CERTIFICATE_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+RECORD_FIELDS = {"userId": 1, "eventId": 1, "hoursLogged": 1}
+SUMMARY_FIELDS = {"pdf": 0}
+
+
+def verified_query(**query):
+    return {**query, "status": "Attended", "hoursVerified": True}
+
+def certificate_key(user_id, event_id, hours, template_version=None):
+    payload = json.dumps([str(user_id), str(event_id), round(float(hours), 2), template_version or TEMPLATE_VERSION])
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+def record_key(record):
+    return certificate_key(record["userId"], record["eventId"], record.get("hoursLogged") or 0)
+
+def certificate_fields(record, event, user):
+    """What render_certificate draws for one participation record."""
+    start = parse_date((event or {}).get("startDate"))
+    return {
+        "volunteerName": (user or {}).get("name") or record["userId"],
+        "eventName": (event or {}).get("name") or "Volunteer service",
+        "eventDate": start.strftime("%B %d, %Y") if start else None,
+        "hours": round(float(record.get("hoursLogged") or 0), 2),
+    }
+
+def certificate_summary(doc):
+    """A stored certificate in the frontend's VolunteerAchievement shape."""
+    return {
+        "id": doc["_id"],
+        "userId": doc["userId"],
+        "type": "certificate",
+        "title": doc["title"],
+        "description": doc.get("description"),
+        "issuedAt": doc["createdAt"],
+        "imageUrl": f"/api/participation/certificates/file/{doc['_id']}",
+        "metadata": {"eventId": doc["eventId"], "hours": doc["hours"], "templateVersion": doc["templateVersion"]},
+        "createdAt": doc["createdAt"],
+        "updatedAt": doc["createdAt"],
+    }
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+def get_executor():
+    global _executor
+    if CERTIFICATE_WORKERS <= 0:
+        return None
+    with _executor_lock:
+        if _executor is None:
+            # spawn: forking a process that already runs worker threads is unsafe
+            _executor = ProcessPoolExecutor(max_workers=CERTIFICATE_WORKERS,
+                                            mp_context=multiprocessing.get_context("spawn"))
+        return _executor
+
+def shutdown_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=True)
+            _executor = None
+
+def render_many(fields):
+    executor = get_executor()
+    if executor is None:
+        return [render_certificate(f) for f in fields]
+    chunksize = max(1, len(fields) // (CERTIFICATE_WORKERS * 4))
+    return list(executor.map(render_certificate, fields, chunksize=chunksize))
+
+
+def store(records, event, now=None):
+    """Render and store certificates for ``records`` (all of one event)."""
+    now = now or datetime.utcnow()
+    users = load_users([r["userId"] for r in records])
+    fields = [certificate_fields(r, event, users.get(r["userId"])) for r in records]
+    docs = []
+    for record, record_fields, pdf in zip(records, fields, render_many(fields)):
+        docs.append({
+            "_id": record_key(record),
+            "userId": record["userId"],
+            "eventId": record["eventId"],
+            "hours": record_fields["hours"],
+            "templateVersion": TEMPLATE_VERSION,
+            "title": f"Certificate of Service: {record_fields['eventName']}",
+            "description": f"{record_fields['hours']:g} verified hours",
+            "pdf": pdf,
+            "size": len(pdf),
+            "createdAt": now,
+        })
+    try:
+        certificate_collection.insert_many(docs, ordered=False)
+    except BulkWriteError as e:
+        # A concurrent request stored the same content first
+        if any(err.get("code") != 11000 for err in e.details.get("writeErrors", [])):
+            raise
+    certificate_collection.delete_many({
+        "eventId": records[0]["eventId"],
+        "userId": {"$in": [r["userId"] for r in records]},
+        "_id": {"$nin": [d["_id"] for d in docs]},
+    })
+    return docs
+
+def generate(event_id, user_id=None):
+    """(certificates, summary) for one volunteer, or every volunteer with verified hours at the event.
+
+    Returns None when nobody qualifies.
+    """
+    query = verified_query(eventId=event_id)
+    if user_id:
+        query["userId"] = user_id
+    records = list(participation_collection.find(query, RECORD_FIELDS))
+    if not records:
+        return None
+    keys = [record_key(r) for r in records]
+    stored = {d["_id"]: d for d in certificate_collection.find({"_id": {"$in": keys}}, SUMMARY_FIELDS)}
+    missing = [r for r, key in zip(records, keys) if key not in stored]
+    if missing:
+        event = event_collection.find_one({"_id": ObjectId(event_id)}) if ObjectId.is_valid(event_id) else None
+        for doc in store(missing, event):
+            stored[doc["_id"]] = doc
+    certificates = [certificate_summary(stored[key]) for key in keys]
+    return certificates, {"generated": len(missing), "cached": len(records) - len(missing)}
+
+def list_certificates(user_id):
+    """The volunteer's current certificates; ones superseded by an hours change are left out."""
+    keys = [record_key(r) for r in participation_collection.find(verified_query(userId=user_id), RECORD_FIELDS)]
+    if not keys:
+        return []
+    docs = certificate_collection.find({"_id": {"$in": keys}}, SUMMARY_FIELDS).sort("createdAt", -1)
+    return [certificate_summary(d) for d in docs]
+
+def certificate_pdf(key):
+    return certificate_collection.find_one({"_id": key}, {"pdf": 1, "eventId": 1})
@@ -0,0 +1,370 @@
+import logging
+import os
+import random
+import smtplib
+import socket
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from email.message import EmailMessage
+from pymongo import UpdateOne
+from app.database import outbox_collection, user_collection
+
+# Email/SMS delivery for notifications. Writers only insert outbox documents
+#   {_id, notificationId, userId, channel, to, subject, body, status, attempts,
+#    nextAttemptAt, lastError, claimedBy, claimedUntil, sentAt}
+# (status: pending|sending|sent|dead); DeliveryWorker claims due messages,
+# sends them per channel in batches on a thread pool (each thread keeps its
+# SMTP connection open between batches) and reschedules failures with
+# exponential backoff and full jitter. Permanent failures, and messages that
+# run out of attempts, become status "dead" (the dead-letter set) and can be
+# requeued once the cause is fixed.
+
+logger = logging.getLogger("app.delivery")
+
+MAX_ATTEMPTS = 6
+BACKOFF_BASE_SECONDS = 30
+BACKOFF_CAP_SECONDS = 3600
+DELIVERY_BATCH_SIZE = 50
+OUTBOX_INSERT_BATCH_SIZE = 1000
+LEASE = timedelta(minutes=5)
+
+# What users get by email unless their account settings say otherwise; SMS is opt-in
+DEFAULT_NOTIFICATION_TYPES = ["EVENT_ASSIGNMENT", "EVENT_UPDATE", "EVENT_REMINDER", "EVENT_CANCELLATION"]
+USER_FIELDS = {"userId": 1, "personalInfo.email": 1, "personalInfo.phone": 1, "email": 1, "accountSettings": 1}
+
+
+def recipient_channels(user, notification_type):
+    """[(channel, address)] a notification of ``notification_type`` should go out on for ``user``."""
+    info = user.get("personalInfo") if isinstance(user.get("personalInfo"), dict) else {}
+    settings = user.get("accountSettings") if isinstance(user.get("accountSettings"), dict) else {}
+    if notification_type not in (settings.get("notificationTypes") or DEFAULT_NOTIFICATION_TYPES):
+        return []
+    channels = []
+    email = info.get("email") or user.get("email")
+    if email and settings.get("emailNotifications", True):
+        channels.append(("email", email))
+    if info.get("phone") and settings.get("smsNotifications", False):
+        channels.append(("sms", info["phone"]))
+    return channels
+
+def outbox_documents(notifications, users, now=None):
+    """Outbox messages for ``notifications`` given the recipients' user documents ({userId: user})."""
+    now = now or datetime.utcnow()
+    docs = []
+    for notification in notifications:
+        user = users.get(notification["userId"])
+        if not user:
+            continue
+        for channel, address in recipient_channels(user, notification.get("type")):
+            docs.append({
+                "_id": str(uuid.uuid4()),
+                "notificationId": notification["_id"],
+                "userId": notification["userId"],
+                "channel": channel,
+                "to": address,
+                "subject": notification.get("title", ""),
+                "body": notification.get("message", ""),
+                "status": "pending",
+                "attempts": 0,
+                "nextAttemptAt": now,
+                "createdAt": now,
+            })
+    return docs
+
+def enqueue(notifications):
+    """Queue email/SMS copies of freshly written notifications; one user lookup per call."""
+    user_ids = list({n["userId"] for n in notifications if n.get("userId")})
+    if not user_ids:
+        return 0
+    users = {u["userId"]: u for u in user_collection.find({"userId": {"$in": user_ids}}, USER_FIELDS)}
+    docs = outbox_documents(notifications, users)
+    for start in range(0, len(docs), OUTBOX_INSERT_BATCH_SIZE):
+        outbox_collection.insert_many(docs[start:start + OUTBOX_INSERT_BATCH_SIZE], ordered=False)
+    if docs:
+        wake()
+    return len(docs)
+
+
+def backoff_seconds(attempts, rng=random):
+    """Full-jitter exponential backoff: uniform over [0, min(cap, base * 2**(attempts - 1))]."""
+    return rng.uniform(0, min(BACKOFF_CAP_SECONDS, BACKOFF_BASE_SECONDS * 2 ** max(attempts - 1, 0)))
+
+
+class SMTPChannel:
+    """Sends email over SMTP; each worker thread keeps one connection open across batches."""
+    name = "email"
+
+    def __init__(self, host, port=25, username=None, password=None, starttls=False,
+                 sender="VolU <noreply@volu.org>", timeout=10):
+        self.host = host
+        self.port = int(port)
+        self.username = username
+        self.password = password
+        self.starttls = starttls
+        self.sender = sender
+        self.timeout = timeout
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._open = set()
+        self.connections_opened = 0
+
+    @classmethod
+    def from_env(cls):
+        return cls(os.getenv("SMTP_HOST"), os.getenv("SMTP_PORT", "25"),
+                   os.getenv("SMTP_USERNAME"), os.getenv("SMTP_PASSWORD"),
+                   os.getenv("SMTP_STARTTLS", "false").lower() == "true",
+                   os.getenv("EMAIL_FROM", "VolU <noreply@volu.org>"))
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+            if self.starttls:
+                conn.starttls()
+            if self.username:
+                conn.login(self.username, self.password or "")
+            self._local.conn = conn
+            with self._lock:
+                self._open.add(conn)
+                self.connections_opened += 1
+        return conn
+
+    def _drop_connection(self):
+        conn = getattr(self._local, "conn", None)
+        self._local.conn = None
+        if conn is not None:
+            self._close(conn)
+
+    def _close(self, conn):
+        with self._lock:
+            self._open.discard(conn)
+        try:
+            conn.quit()
+        except (smtplib.SMTPException, OSError):
+            conn.close()
+
+    def _message(self, message):
+        email = EmailMessage()
+        email["From"] = self.sender
+        email["To"] = message["to"]
+        email["Subject"] = message["subject"]
+        email["Message-ID"] = f"<{message['_id']}@volu>"
+        email.set_content(message["body"])
+        return email
+
+    def send_batch(self, messages):
+        """Send each message; returns [(message, error or None, permanent)]."""
+        results = []
+        for message in messages:
+            for attempt in range(2):
+                try:
+                    self._connection().send_message(self._message(message))
+                    results.append((message, None, False))
+                    break
+                except smtplib.SMTPRecipientsRefused as e:
+                    # 4xx replies (mailbox busy, greylisting) are worth another attempt later
+                    codes = [code for code, _ in e.recipients.values()]
+                    error = "; ".join(f"{code} {reply.decode(errors='replace')}" for code, reply in e.recipients.values())
+                    results.append((message, error, all(code >= 500 for code in codes)))
+                    break
+                except smtplib.SMTPResponseException as e:
+                    if e.smtp_code >= 500:
+                        results.append((message, f"{e.smtp_code} {e.smtp_error!r}", True))
+                        break
+                    self._drop_connection()
+                    if attempt:
+                        results.append((message, f"{e.smtp_code} {e.smtp_error!r}", False))
+                except (smtplib.SMTPException, OSError) as e:
+                    # A reused connection may have been closed by the server; retry once on a new one
+                    self._drop_connection()
+                    if attempt:
+                        results.append((message, str(e) or type(e).__name__, False))
+        return results
+
+    def close(self):
+        """Close every thread's connection (call once the worker's pool has shut down)."""
+        with self._lock:
+            connections = list(self._open)
+        for conn in connections:
+            self._close(conn)
+
+
+class LogChannel:
+    """Writes messages to the log; used for channels without a provider (SMS, or email without SMTP_HOST)."""
+
+    def __init__(self, name):
+        self.name = name
+
+    def send_batch(self, messages):
+        for message in messages:
+            logger.info("%s to %s: %s - %s", self.name, message["to"], message["subject"], message["body"])
+        return [(message, None, False) for message in messages]
+
+    def close(self):
+        pass
+
+def default_channels():
+    email = SMTPChannel.from_env() if os.getenv("SMTP_HOST") else LogChannel("email")
+    return {"email": email, "sms": LogChannel("sms")}
+
+
+class DeliveryWorker:
+    def __init__(self, channels=None, threads=4, batch_size=DELIVERY_BATCH_SIZE, poll_seconds=5,
+                 worker_id=None, clock=datetime.utcnow, rng=None):
+        self.channels = channels if channels is not None else default_channels()
+        self.threads = threads
+        self.batch_size = batch_size
+        self.poll_seconds = poll_seconds
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self.clock = clock
+        self.rng = rng or random.Random()
+        self.stats = {"claimed": 0, "sent": 0, "retried": 0, "dead": 0}
+        self._pool = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="delivery")
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def claim(self, now, limit):
+        """Atomically take up to ``limit`` due messages, including ones whose lease expired."""
+        due = {"nextAttemptAt": {"$lte": now},
+               "$or": [{"status": "pending"}, {"status": "sending", "claimedUntil": {"$lt": now}}]}
+        ids = [m["_id"] for m in outbox_collection.find(due, {"_id": 1}).sort("nextAttemptAt", 1).limit(limit)]
+        if not ids:
+            return []
+        token = uuid.uuid4().hex
+        outbox_collection.update_many(
+            {"_id": {"$in": ids}, **due},
+            {"$set": {"status": "sending", "claimedBy": self.worker_id, "claimToken": token,
+                      "claimedUntil": now + LEASE},
+             "$inc": {"attempts": 1}}
+        )
+        messages = list(outbox_collection.find({"_id": {"$in": ids}, "claimToken": token}))
+        self.stats["claimed"] += len(messages)
+        return messages
+
+    def run_once(self, now=None):
+        """Deliver one round of due messages; returns how many were claimed."""
+        now = now or self.clock()
+        messages = self.claim(now, self.threads * self.batch_size)
+        by_channel = {}
+        for message in messages:
+            by_channel.setdefault(message["channel"], []).append(message)
+
+        futures = []
+        results = []
+        for name, channel_messages in by_channel.items():
+            channel = self.channels.get(name)
+            if channel is None:
+                results += [(m, f"No channel configured for {name}", True) for m in channel_messages]
+                continue
+            for start in range(0, len(channel_messages), self.batch_size):
+                futures.append(self._pool.submit(self._send, channel, channel_messages[start:start + self.batch_size]))
+        for future in futures:
+            results += future.result()
+        self.record(results, now)
+        return len(messages)
+
+    def _send(self, channel, messages):
+        try:
+            return channel.send_batch(messages)
+        except Exception as e:
+            logger.exception("%s batch of %d failed", channel.name, len(messages))
+            return [(m, str(e), False) for m in messages]
+
+    def record(self, results, now):
+        ops = []
+        for message, error, permanent in results:
+            done = {"$unset": {"claimToken": "", "claimedUntil": ""}}
+            if error is None:
+                update = {"status": "sent", "sentAt": now}
+                self.stats["sent"] += 1
+            elif permanent or message["attempts"] >= MAX_ATTEMPTS:
+                update = {"status": "dead", "deadAt": now, "lastError": error}
+                self.stats["dead"] += 1
+                logger.warning("Dead-lettered %s message %s to %s: %s", message["channel"], message["_id"],
+                               message["to"], error)
+            else:
+                retry_at = now + timedelta(seconds=backoff_seconds(message["attempts"], self.rng))
+                update = {"status": "pending", "nextAttemptAt": retry_at, "lastError": error}
+                self.stats["retried"] += 1
+            ops.append(UpdateOne({"_id": message["_id"], "claimedBy": self.worker_id}, {"$set": update, **done}))
+        if ops:
+            outbox_collection.bulk_write(ops, ordered=False)
+
+    def run_forever(self):
+        while not self._stop.is_set():
+            try:
+                if self.run_once() == self.threads * self.batch_size:
+                    continue  # a full round: more are probably waiting
+            except Exception:
+                logger.exception("Delivery round failed")
+            self._wake.wait(self.poll_seconds)
+            self._wake.clear()
+
+    def wake(self):
+        self._wake.set()
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self.run_forever, name="delivery-worker", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout=5):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        self._pool.shutdown(wait=True)
+        for channel in self.channels.values():
+            channel.close()
+
+
+def outbox_stats():
+    counts = {}
+    for row in outbox_collection.aggregate([{"$group": {"_id": {"status": "$status", "channel": "$channel"},
+                                                         "n": {"$sum": 1}}}]):
+        counts.setdefault(row["_id"]["channel"], {})[row["_id"]["status"]] = row["n"]
+    return counts
+
+def dead_letters(limit=100):
+    return list(outbox_collection.find({"status": "dead"}).sort("deadAt", -1).limit(limit))
+
+def requeue_dead(ids=None):
+    """Give dead messages (all, or the given ids) a fresh set of attempts."""
+    query = {"status": "dead"}
+    if ids:
+        query["_id"] = {"$in": list(ids)}
+    result = outbox_collection.update_many(query, {"$set": {"status": "pending", "attempts": 0,
+                                                            "nextAttemptAt": datetime.utcnow()}})
+    if result.modified_count:
+        wake()
+    return result.modified_count
+
+
+_worker = None
+
+def get_worker():
+    return _worker
+
+def start_worker(**kwargs):
+    global _worker
+    if _worker is None:
+        _worker = DeliveryWorker(**kwargs)
+    return _worker.start()
+
+def stop_worker():
+    global _worker
+    if _worker is not None:
+        _worker.stop()
+        _worker = None
+
+def wake():
+    """Start this process's worker on new messages now instead of at its next poll."""
+    worker = _worker
+    if worker is not None:
+        worker.wake()
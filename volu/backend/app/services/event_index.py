@@ -0,0 +1,317 @@
+import heapq
+import math
+import os
+import re
+import threading
+from bisect import bisect_left, insort
+from collections import Counter
+from datetime import datetime, timedelta
+from app.database import event_collection
+from app.utils.dates import parse_date
+
+# In-process search over events. Text from name, location/city and description
+# goes into an inverted index (term -> {doc: field weight}) with a sorted
+# vocabulary for prefix matches and a trigram map for misspellings. Facet
+# values are kept as integer bitmaps over dense doc ids, and start dates as a
+# sorted list for range queries. The route write hooks patch the index in
+# place; other processes pick up changes when their copy reaches
+# EVENT_INDEX_MAX_AGE_SECONDS.
+
+EVENT_INDEX_MAX_AGE_SECONDS = int(os.getenv("EVENT_INDEX_MAX_AGE_SECONDS", "600"))
+
+FIELD_WEIGHTS = {"name": 3.0, "location": 2.0, "city": 2.0, "description": 1.0}
+FACETS = ("eventType", "urgency", "status", "requiredSkills", "city")
+# Stored per event and returned by searches; registration counters change too
+# often to be served from here, so clients read those from /api/events/<id>
+SUMMARY_FIELDS = ("name", "description", "location", "city", "state", "zip", "startDate", "endDate", "startTime",
+                  "endTime", "eventType", "urgency", "status", "requiredSkills", "maxVolunteers", "createdBy")
+EVENT_PROJECTION = {field: 1 for field in SUMMARY_FIELDS}
+
+STOP_WORDS = {"a", "an", "and", "at", "for", "in", "of", "on", "or", "the", "to", "with"}
+MAX_PREFIX_TERMS = 50
+MIN_FUZZY_LENGTH = 4
+MIN_TRIGRAM_SIMILARITY = 0.3
+PREFIX_QUALITY = 0.6
+FUZZY_QUALITY = 0.5
+MAX_PAGE_SIZE = 100
+
+
+def tokenize(text):
+    if not isinstance(text, str):
+        return []
+    return [t for t in re.findall(r"[a-z0-9]+", text.lower()) if t not in STOP_WORDS]
+
+def trigrams(term):
+    padded = f"${term}$"
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def facet_values(event, facet):
+    value = event.get(facet)
+    values = value if isinstance(value, list) else [value]
+    return {v.strip().lower(): v.strip() for v in values if isinstance(v, str) and v.strip()}
+
+def bit_ids(bits):
+    """Positions of the set bits, ascending."""
+    return [i for i, bit in enumerate(bin(bits)[:1:-1]) if bit == "1"]
+
+def id_bits(doc_ids):
+    """Bitmap with the given positions set, built in one pass instead of one big-int OR per id."""
+    doc_ids = list(doc_ids)
+    if not doc_ids:
+        return 0
+    buffer = bytearray(max(doc_ids) // 8 + 1)
+    for doc_id in doc_ids:
+        buffer[doc_id >> 3] |= 1 << (doc_id & 7)
+    return int.from_bytes(buffer, "little")
+
+
+class EventIndex:
+    """Full-text, facet and start-date index over event summaries."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._ids = {}
+        self._event_ids = []
+        self._docs = {}
+        self._doc_terms = {}
+        self._postings = {}
+        self._vocabulary = []
+        self._trigrams = {}
+        self._facets = {}
+        self._facet_labels = {}
+        self._dates = []
+        self._live = 0
+        self.built_at = datetime.utcnow()
+        self.searches = 0
+
+    @classmethod
+    def from_documents(cls, events):
+        index = cls()
+        for event in events:
+            index.add(event)
+        return index
+
+    def __len__(self):
+        return len(self._docs)
+
+    def _doc_id(self, event_id):
+        doc_id = self._ids.get(event_id)
+        if doc_id is None:
+            doc_id = len(self._event_ids)
+            self._ids[event_id] = doc_id
+            self._event_ids.append(event_id)
+        return doc_id
+
+    # Adding an event that is already indexed replaces it
+    def add(self, event):
+        event_id = str(event["_id"])
+        with self._lock:
+            self._remove(event_id)
+            doc_id = self._doc_id(event_id)
+            summary = {"_id": event["_id"], **{f: event[f] for f in SUMMARY_FIELDS if f in event}}
+            start = parse_date(event.get("startDate"))
+            self._docs[doc_id] = (summary, start)
+            self._live |= 1 << doc_id
+
+            weights = {}
+            for field, weight in FIELD_WEIGHTS.items():
+                for term in tokenize(event.get(field)):
+                    weights[term] = weights.get(term, 0) + weight
+            for term, weight in weights.items():
+                if term not in self._postings:
+                    self._postings[term] = {}
+                    insort(self._vocabulary, term)
+                    for gram in trigrams(term):
+                        self._trigrams.setdefault(gram, set()).add(term)
+                self._postings[term][doc_id] = weight
+            self._doc_terms[doc_id] = list(weights)
+
+            for facet in FACETS:
+                for key, label in facet_values(event, facet).items():
+                    self._facets[(facet, key)] = self._facets.get((facet, key), 0) | (1 << doc_id)
+                    self._facet_labels.setdefault((facet, key), label)
+            if start is not None:
+                insort(self._dates, (start, doc_id))
+
+    def remove(self, event_id):
+        with self._lock:
+            self._remove(str(event_id))
+
+    def _remove(self, event_id):
+        doc_id = self._ids.get(event_id)
+        if doc_id is None or doc_id not in self._docs:
+            return
+        _, start = self._docs.pop(doc_id)
+        mask = ~(1 << doc_id)
+        self._live &= mask
+        for term in self._doc_terms.pop(doc_id, ()):
+            postings = self._postings[term]
+            postings.pop(doc_id, None)
+            if not postings:
+                del self._postings[term]
+                del self._vocabulary[bisect_left(self._vocabulary, term)]
+                for gram in trigrams(term):
+                    self._trigrams[gram].discard(term)
+        for key in [k for k, bits in self._facets.items() if bits >> doc_id & 1]:
+            self._facets[key] &= mask
+            if not self._facets[key]:
+                del self._facets[key]
+                self._facet_labels.pop(key, None)
+        if start is not None:
+            del self._dates[bisect_left(self._dates, (start, doc_id))]
+
+    def _matching_terms(self, token):
+        """{term: match quality} for one query token: exact, then prefix, then trigram-similar terms."""
+        matches = {}
+        if token in self._postings:
+            matches[token] = 1.0
+        if len(token) >= 2:
+            start = bisect_left(self._vocabulary, token)
+            for term in self._vocabulary[start:start + MAX_PREFIX_TERMS + 1]:
+                if not term.startswith(token):
+                    break
+                matches.setdefault(term, PREFIX_QUALITY)
+        if not matches and len(token) >= MIN_FUZZY_LENGTH:
+            grams = trigrams(token)
+            shared = Counter(term for gram in grams for term in self._trigrams.get(gram, ()))
+            for term, count in shared.items():
+                similarity = count / (len(grams) + len(trigrams(term)) - count)
+                if similarity >= MIN_TRIGRAM_SIMILARITY:
+                    matches[term] = FUZZY_QUALITY * similarity
+        return matches
+
+    def _text_scores(self, query):
+        """{doc_id: score} for docs matching every query token, or None for an empty query."""
+        tokens = list(dict.fromkeys(tokenize(query)))
+        if not tokens:
+            return None
+        total = max(len(self._docs), 1)
+        scores = None
+        for token in tokens:
+            token_scores = {}
+            for term, quality in self._matching_terms(token).items():
+                postings = self._postings[term]
+                idf = math.log(1 + total / len(postings))
+                for doc_id, weight in postings.items():
+                    score = quality * weight * idf
+                    if score > token_scores.get(doc_id, 0):
+                        token_scores[doc_id] = score
+            if scores is None:
+                scores = token_scores
+            else:
+                scores = {d: s + token_scores[d] for d, s in scores.items() if d in token_scores}
+            if not scores:
+                return {}
+        return scores
+
+    def _facet_bits(self, facet, values):
+        bits = 0
+        for value in values:
+            bits |= self._facets.get((facet, value.strip().lower()), 0)
+        return bits
+
+    def _date_bits(self, start, end):
+        low = 0 if start is None else bisect_left(self._dates, (start, -1))
+        high = len(self._dates) if end is None else bisect_left(self._dates, (end, -1))
+        return id_bits(doc_id for _, doc_id in self._dates[low:high])
+
+    def search(self, query="", filters=None, start=None, end=None, sort=None, limit=20, offset=0):
+        """Ranked, paginated events matching the text query, facet filters and start-date range.
+
+        ``filters`` maps a facet to accepted values (any of them matches);
+        ``end`` is exclusive. Facet counts for each facet ignore that facet's
+        own filter, so the client can show the alternatives.
+        """
+        filters = {f: v for f, v in (filters or {}).items() if f in FACETS and v}
+        with self._lock:
+            self.searches += 1
+            scores = self._text_scores(query)
+            base = self._live
+            if scores is not None:
+                base = id_bits(scores)
+            if start is not None or end is not None:
+                base &= self._date_bits(start, end)
+            facet_bits = {f: self._facet_bits(f, v) for f, v in filters.items()}
+
+            matched = base
+            for bits in facet_bits.values():
+                matched &= bits
+            counts = {}
+            for facet in FACETS:
+                scope = base
+                for other, bits in facet_bits.items():
+                    if other != facet:
+                        scope &= bits
+                counts[facet] = {
+                    self._facet_labels[key]: (bits & scope).bit_count()
+                    for key, bits in self._facets.items() if key[0] == facet and bits & scope
+                }
+
+            doc_ids = bit_ids(matched)
+            far_future = datetime.max
+            if scores is not None and sort != "date":
+                key = lambda d: (-scores[d], self._docs[d][1] or far_future)
+            else:
+                key = lambda d: (self._docs[d][1] or far_future, d)
+            # Only the requested page needs ordering
+            page = heapq.nsmallest(offset + limit, doc_ids, key=key)[offset:]
+            results = []
+            for doc_id in page:
+                summary = dict(self._docs[doc_id][0])
+                if scores is not None:
+                    summary["score"] = round(scores[doc_id], 4)
+                results.append(summary)
+        return {"results": results, "total": len(doc_ids), "limit": limit, "offset": offset, "facets": counts}
+
+    def stats(self):
+        with self._lock:
+            return {
+                "events": len(self._docs),
+                "terms": len(self._postings),
+                "postings": sum(len(p) for p in self._postings.values()),
+                "trigrams": len(self._trigrams),
+                "facetValues": len(self._facets),
+                "dated": len(self._dates),
+                "searches": self.searches,
+                "builtAt": self.built_at,
+            }
+
+
+_index = None
+_index_lock = threading.Lock()
+
+def get_index(rebuild=False):
+    global _index
+    with _index_lock:
+        expired = _index is not None and \
+            (datetime.utcnow() - _index.built_at).total_seconds() >= EVENT_INDEX_MAX_AGE_SECONDS
+        if _index is None or rebuild or expired:
+            _index = EventIndex.from_documents(event_collection.find({}, EVENT_PROJECTION))
+        return _index
+
+def reset_index():
+    global _index
+    with _index_lock:
+        _index = None
+
+def search_params(args):
+    """search() keyword arguments from request query parameters; raises ValueError."""
+    end = parse_date(args.get("to"))
+    return {
+        "query": args.get("q", ""),
+        "filters": {f: [v for v in args.get(f, "").split(",") if v.strip()] for f in FACETS},
+        "start": parse_date(args.get("from")),
+        "end": end + timedelta(days=1) if end else None,
+        "sort": args.get("sort"),
+        "limit": max(1, min(int(args.get("limit", 20)), MAX_PAGE_SIZE)),
+        "offset": max(0, int(args.get("offset", 0))),
+    }
+
+# Write hooks for the events routes; a never-built index has nothing to patch
+def on_event_saved(event):
+    if _index is not None and event:
+        _index.add(event)
+
+def on_event_deleted(event_id):
+    if _index is not None:
+        _index.remove(event_id)
@@ -0,0 +1,143 @@
+class _Node:
+    __slots__ = ("item", "value", "max_end", "height", "left", "right")
+
+    def __init__(self, item, value):
+        self.item = item
+        self.value = value
+        self.max_end = item[1]
+        self.height = 1
+        self.left = None
+        self.right = None
+
+
+def _height(node):
+    return node.height if node else 0
+
+def _update(node):
+    node.height = 1 + max(_height(node.left), _height(node.right))
+    node.max_end = node.item[1]
+    if node.left and node.left.max_end > node.max_end:
+        node.max_end = node.left.max_end
+    if node.right and node.right.max_end > node.max_end:
+        node.max_end = node.right.max_end
+    return node
+
+def _rotate_right(node):
+    top = node.left
+    node.left = top.right
+    top.right = _update(node)
+    return _update(top)
+
+def _rotate_left(node):
+    top = node.right
+    node.right = top.left
+    top.left = _update(node)
+    return _update(top)
+
+def _rebalance(node):
+    _update(node)
+    balance = _height(node.left) - _height(node.right)
+    if balance > 1:
+        if _height(node.left.left) < _height(node.left.right):
+            node.left = _rotate_left(node.left)
+        return _rotate_right(node)
+    if balance < -1:
+        if _height(node.right.right) < _height(node.right.left):
+            node.right = _rotate_right(node.right)
+        return _rotate_left(node)
+    return node
+
+
+class IntervalTree:
+    """Half-open ``[start, end)`` intervals tagged with a key, in an AVL tree
+    ordered by (start, end, key) where every node also keeps the largest end in
+    its subtree.
+
+    Inserts and removals are O(log n); ``overlaps`` answers in O(log n) and
+    ``overlapping`` in O(log n + k) by skipping every subtree whose largest end
+    is at or before the query start. ``discard`` drops all intervals of a key.
+    """
+
+    def __init__(self, intervals=()):
+        self._root = None
+        self._keys = {}
+        for start, end, key, value in intervals:
+            self.add(start, end, key, value)
+
+    def __len__(self):
+        return sum(len(items) for items in self._keys.values())
+
+    def __contains__(self, key):
+        return key in self._keys
+
+    def add(self, start, end, key, value=None):
+        if not start < end:
+            raise ValueError("Interval must end after it starts")
+        item = (start, end, key)
+        if item in self._keys.get(key, ()):
+            return
+        self._root = self._insert(self._root, item, value)
+        self._keys.setdefault(key, []).append(item)
+
+    def _insert(self, node, item, value):
+        if node is None:
+            return _Node(item, value)
+        if item < node.item:
+            node.left = self._insert(node.left, item, value)
+        else:
+            node.right = self._insert(node.right, item, value)
+        return _rebalance(node)
+
+    def discard(self, key):
+        """Remove every interval added under ``key``; returns how many there were."""
+        items = self._keys.pop(key, [])
+        for item in items:
+            self._root = self._delete(self._root, item)
+        return len(items)
+
+    def _delete(self, node, item):
+        if node is None:
+            return None
+        if item < node.item:
+            node.left = self._delete(node.left, item)
+        elif item > node.item:
+            node.right = self._delete(node.right, item)
+        else:
+            if node.left is None or node.right is None:
+                return node.left or node.right
+            successor = node.right
+            while successor.left:
+                successor = successor.left
+            node.item, node.value = successor.item, successor.value
+            node.right = self._delete(node.right, successor.item)
+        return _rebalance(node)
+
+    def overlaps(self, start, end):
+        """Whether any interval overlaps ``[start, end)``."""
+        node = self._root
+        while node:
+            if node.item[0] < end and node.item[1] > start:
+                return True
+            # Only the left subtree can hold an overlap if its largest end reaches past start
+            node = node.left if node.left and node.left.max_end > start else node.right
+        return False
+
+    def overlapping(self, start, end):
+        """[(start, end, key, value)] for every interval overlapping ``[start, end)``, by start."""
+        found = []
+        stack, node = [], self._root
+        while stack or node:
+            if node is not None and node.max_end > start:
+                stack.append(node)
+                node = node.left
+                continue
+            if not stack:
+                break
+            node = stack.pop()
+            item_start, item_end, key = node.item
+            if item_start >= end:
+                break
+            if item_end > start:
+                found.append((item_start, item_end, key, node.value))
+            node = node.right
+        return found
@@ -0,0 +1,351 @@
+import threading
+from datetime import datetime
+import numpy as np
+from app.database import user_collection, participation_collection
+from app.utils.dates import parse_date, parse_time
+from app.utils.geo import get_zip_centroids, haversine_miles
+from app.services.radius_index import RadiusIndex
+
+# Scoring weights for different matching criteria (same as the TS matchingService)
+MATCH_WEIGHTS = {
+    "skills": 0.35,
+    "location": 0.25,
+    "availability": 0.2,
+    "causes": 0.15,
+    "preferences": 0.05,
+}
+
+MIN_MATCH_SCORE = 0.4
+DEFAULT_PREFERRED_DISTANCE = 25.0
+
+DAYS_OF_WEEK = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+
+# Start hour ranges (inclusive, exclusive) for each availability time slot
+TIME_SLOTS = {
+    "morning": (8, 12),
+    "afternoon": (12, 17),
+    "evening": (17, 21),
+}
+SLOT_BITS = {name: 1 << i for i, name in enumerate(TIME_SLOTS)}
+
+FREQUENCY_CODES = {"one_time": 1, "recurring": 2, "flexible": 3}
+
+# Fields needed to build the matrix, so we never pull whole profiles
+USER_PROJECTION = {
+    "userId": 1,
+    "name": 1,
+    "email": 1,
+    "personalInfo": 1,
+    "skills": 1,
+    "preferences": 1,
+    "availability": 1,
+    "accountSettings.profileVisibility": 1,
+}
+
+
+def _section(doc, key):
+    value = doc.get(key)
+    return value if isinstance(value, dict) else {}
+
+# Skills are saved either as a bare list or as the SkillsData object
+def skill_names(user):
+    skills = user.get("skills")
+    if isinstance(skills, dict):
+        skills = skills.get("skills")
+    if not isinstance(skills, list):
+        return []
+    return [s for s in skills if isinstance(s, str)]
+
+def cause_names(user):
+    causes = _section(user, "preferences").get("causes")
+    if not isinstance(causes, list):
+        return []
+    return [c for c in causes if isinstance(c, str)]
+
+def _preferred_distance(preferences):
+    try:
+        return float(str(preferences.get("preferredDistance")).split()[0])
+    except (TypeError, ValueError, IndexError):
+        return DEFAULT_PREFERRED_DISTANCE
+
+def _day_key(value):
+    parsed = parse_date(value)
+    return parsed.date() if parsed else None
+
+
+class VolunteerMatrix:
+    """Array-backed snapshot of every volunteer's matching attributes.
+
+    Row i of every array describes volunteer ``user_ids[i]``; skills and
+    causes are boolean incidence matrices over a shared lowercase vocabulary.
+    """
+
+    def __init__(self, users):
+        users = [u for u in users if u.get("userId")]
+        n = len(users)
+
+        self.user_ids = [u["userId"] for u in users]
+        self.row_of = {user_id: i for i, user_id in enumerate(self.user_ids)}
+        self.names = []
+        self.emails = []
+        self.skill_labels = []
+        self.cause_labels = []
+
+        self.skill_vocab = {}
+        self.cause_vocab = {}
+        skill_rows = []
+        cause_rows = []
+        for user in users:
+            skill_rows.append([self._term(self.skill_vocab, s) for s in skill_names(user)])
+            cause_rows.append([self._term(self.cause_vocab, c) for c in cause_names(user)])
+
+        self.skills = np.zeros((n, max(len(self.skill_vocab), 1)), dtype=bool)
+        self.causes = np.zeros((n, max(len(self.cause_vocab), 1)), dtype=bool)
+        for i, cols in enumerate(skill_rows):
+            self.skills[i, cols] = True
+        for i, cols in enumerate(cause_rows):
+            self.causes[i, cols] = True
+        self.cause_counts = np.array([len(set(cols)) for cols in cause_rows], dtype=np.int32)
+
+        self.zips = np.empty(n, dtype=object)
+        self.has_location = np.zeros(n, dtype=bool)
+        self.preferred_distance = np.full(n, DEFAULT_PREFERRED_DISTANCE)
+
+        self.has_availability = np.zeros(n, dtype=bool)
+        self.day_mask = np.zeros(n, dtype=np.uint8)
+        self.slot_mask = np.zeros(n, dtype=np.uint8)
+        self.notice_days = np.full(n, -1, dtype=np.int32)
+        self.blackouts = {}
+
+        self.has_preferences = np.zeros(n, dtype=bool)
+        self.remote_only = np.zeros(n, dtype=bool)
+        self.frequency = np.zeros(n, dtype=np.int8)
+        self.visible = np.ones(n, dtype=bool)
+
+        for i, user in enumerate(users):
+            info = _section(user, "personalInfo")
+            self.names.append(info.get("fullName") or user.get("name") or "Unknown")
+            self.emails.append(info.get("email") or user.get("email"))
+            self.skill_labels.append(skill_names(user))
+            self.cause_labels.append(cause_names(user))
+
+            zip_code = str(info.get("zip") or "")[:5]
+            self.zips[i] = zip_code
+            self.has_location[i] = bool(info.get("city") and info.get("state") and zip_code)
+
+            availability = user.get("availability")
+            if isinstance(availability, dict):
+                self.has_availability[i] = True
+                for day in availability.get("availableDays") or []:
+                    if isinstance(day, str) and day.lower() in DAYS_OF_WEEK:
+                        self.day_mask[i] |= 1 << DAYS_OF_WEEK.index(day.lower())
+                for slot in availability.get("availableTimeSlots") or []:
+                    if isinstance(slot, str):
+                        self.slot_mask[i] |= SLOT_BITS.get(slot.lower(), 0)
+                try:
+                    self.notice_days[i] = int(str(availability.get("minimumNoticePeriod")).split()[0])
+                except (TypeError, ValueError, IndexError):
+                    pass
+                for value in availability.get("blackoutDates") or []:
+                    day = _day_key(value)
+                    if day:
+                        self.blackouts.setdefault(day, []).append(i)
+
+            preferences = user.get("preferences")
+            if isinstance(preferences, dict):
+                self.has_preferences[i] = True
+                self.remote_only[i] = bool(preferences.get("remoteOpportunities"))
+                self.frequency[i] = FREQUENCY_CODES.get(preferences.get("frequency"), -1 if preferences.get("frequency") else 0)
+                self.preferred_distance[i] = _preferred_distance(preferences)
+
+            if _section(user, "accountSettings").get("profileVisibility") is False:
+                self.visible[i] = False
+
+        self.lats, self.lons = get_zip_centroids().locate_many([_section(u, "personalInfo") for u in users])
+        self._radius_index = None
+        self.built_at = datetime.utcnow()
+
+    def __len__(self):
+        return len(self.user_ids)
+
+    @staticmethod
+    def _term(vocab, name):
+        key = name.strip().lower()
+        if key not in vocab:
+            vocab[key] = len(vocab)
+        return vocab[key]
+
+    def _columns(self, vocab, names):
+        return [vocab[n.strip().lower()] for n in names if isinstance(n, str) and n.strip().lower() in vocab]
+
+    # --- per-criterion scores, each a float array with one entry per volunteer ---
+
+    def skill_scores(self, required):
+        required = {s.strip().lower() for s in required if isinstance(s, str)}
+        if not required:
+            return np.ones(len(self))
+        cols = self._columns(self.skill_vocab, required)
+        return self.skills[:, cols].sum(axis=1) / len(required)
+
+    @property
+    def radius_index(self):
+        if self._radius_index is None:
+            self._radius_index = RadiusIndex(self.lats, self.lons)
+        return self._radius_index
+
+    def location_scores(self, event):
+        if event.get("isVirtual"):
+            return np.ones(len(self)), np.zeros(len(self))
+        # Volunteers whose ZIP is not in the centroid table only match on a shared ZIP
+        event_zip = str(event.get("zip") or "")[:5]
+        fallback = np.where(self.zips == event_zip, 0.0, np.inf) if event_zip else np.full(len(self), np.inf)
+        point = get_zip_centroids().locate(event)
+        if point:
+            distance = haversine_miles(point[0], point[1], self.lats, self.lons)
+            distance = np.where(np.isnan(distance), fallback, distance)
+        else:
+            distance = fallback
+        scores = np.clip(1 - distance / np.maximum(self.preferred_distance, 1), 0, 1)
+        scores = np.where(self.has_location, scores, 0.1)
+        return scores, np.where(self.has_location, distance, 999.0)
+
+    def availability_scores(self, event, now=None):
+        scores = np.ones(len(self))
+        start = parse_date(event.get("startDate"))
+        if start:
+            for row in set(self.blackouts.get(start.date(), ())):
+                scores[row] -= 0.5
+            day_bit = np.uint8(1 << start.weekday())
+            scores -= np.where((self.day_mask != 0) & ((self.day_mask & day_bit) == 0), 0.3, 0)
+
+            days_until = ((start - (now or datetime.utcnow())).total_seconds()) // 86400
+            scores -= np.where((self.notice_days >= 0) & (days_until < self.notice_days), 0.2, 0)
+
+        start_minutes = parse_time(event.get("startTime"))
+        if start_minutes is not None:
+            hour = start_minutes // 60
+            event_slot = next((SLOT_BITS[name] for name, (lo, hi) in TIME_SLOTS.items() if lo <= hour < hi), 0)
+            scores -= np.where((self.slot_mask != 0) & ((self.slot_mask & event_slot) == 0), 0.2, 0)
+
+        scores = np.clip(scores, 0, 1)
+        return np.where(self.has_availability, scores, 0.5)
+
+    def cause_scores(self, event_causes):
+        cols = self._columns(self.cause_vocab, {c.strip().lower() for c in event_causes if isinstance(c, str)})
+        if not event_causes:
+            return np.full(len(self), 0.5)
+        matched = self.causes[:, cols].sum(axis=1)
+        scores = matched / np.maximum(self.cause_counts, 1)
+        return np.where(self.cause_counts > 0, scores, 0.5)
+
+    def preference_scores(self, event):
+        scores = np.ones(len(self))
+        if not event.get("isVirtual"):
+            scores -= np.where(self.remote_only, 0.2, 0)
+        event_frequency = FREQUENCY_CODES.get(event.get("eventType"), 0)
+        mismatch = (self.frequency != 0) & (self.frequency != FREQUENCY_CODES["flexible"]) & (self.frequency != event_frequency)
+        scores -= np.where(mismatch, 0.2, 0)
+        scores = np.clip(scores, 0, 1)
+        return np.where(self.has_preferences, scores, 0.5)
+
+    def volunteers_near(self, event, radius_miles=None):
+        """Volunteers within ``radius_miles`` of the event, or within their own preferredDistance."""
+        point = get_zip_centroids().locate(event)
+        if point is None or not len(self):
+            return []
+        search_radius = radius_miles if radius_miles is not None else float(self.preferred_distance.max())
+        rows, distances = self.radius_index.within(point[0], point[1], search_radius)
+        keep = self.visible[rows]
+        if radius_miles is None:
+            keep &= distances <= self.preferred_distance[rows]
+        return [{"volunteerId": self.user_ids[row], "distance": round(float(d), 2)}
+                for row, d in zip(rows[keep], distances[keep])]
+
+    def score(self, event, exclude=(), now=None):
+        parts = {
+            "skills": self.skill_scores(event.get("requiredSkills") or []),
+            "availability": self.availability_scores(event, now=now),
+            "causes": self.cause_scores(event.get("causes") or []),
+            "preferences": self.preference_scores(event),
+        }
+        parts["location"], distance = self.location_scores(event)
+
+        total = sum(MATCH_WEIGHTS[key] * parts[key] for key in MATCH_WEIGHTS)
+        eligible = self.visible.copy()
+        for user_id in exclude:
+            row = self.row_of.get(user_id)
+            if row is not None:
+                eligible[row] = False
+        return total, parts, distance, eligible
+
+    def top_matches(self, event, limit=20, min_score=MIN_MATCH_SCORE, exclude=(), now=None):
+        if not len(self):
+            return []
+        total, parts, distance, eligible = self.score(event, exclude=exclude, now=now)
+        candidates = np.flatnonzero(eligible & (total >= min_score))
+        if limit and len(candidates) > limit:
+            top = np.argpartition(-total[candidates], limit - 1)[:limit]
+            candidates = candidates[top]
+        order = candidates[np.argsort(-total[candidates], kind="stable")]
+
+        required = {s.lower() for s in event.get("requiredSkills") or [] if isinstance(s, str)}
+        event_causes = {c.lower() for c in event.get("causes") or [] if isinstance(c, str)}
+        event_id = str(event.get("_id", event.get("id", "")))
+        return [{
+            "volunteerId": self.user_ids[row],
+            "volunteerName": self.names[row],
+            "volunteerEmail": self.emails[row],
+            "eventId": event_id,
+            "eventName": event.get("name"),
+            "matchScore": round(float(total[row]), 4),
+            "skillMatchPercentage": float(parts["skills"][row]),
+            "locationMatchPercentage": float(parts["location"][row]),
+            "availabilityMatchPercentage": float(parts["availability"][row]),
+            "causesMatchPercentage": float(parts["causes"][row]),
+            "preferencesMatchPercentage": float(parts["preferences"][row]),
+            "matchDetails": {
+                "matchedSkills": [s for s in self.skill_labels[row] if s.lower() in required] if required else self.skill_labels[row],
+                "distance": float(distance[row]) if np.isfinite(distance[row]) else None,
+                "matchedCauses": [c for c in self.cause_labels[row] if c.lower() in event_causes],
+            },
+        } for row in order]
+
+
+# A snapshot invalidated by profile writes is rebuilt at most this often
+MATRIX_MAX_AGE_SECONDS = 60
+
+_matrix = None
+_matrix_stale = False
+_matrix_lock = threading.Lock()
+
+# Load every volunteer once; later calls reuse the snapshot until it is rebuilt
+def get_matrix(rebuild=False):
+    global _matrix, _matrix_stale
+    with _matrix_lock:
+        expired = _matrix_stale and _matrix is not None and \
+            (datetime.utcnow() - _matrix.built_at).total_seconds() >= MATRIX_MAX_AGE_SECONDS
+        if _matrix is None or rebuild or expired:
+            _matrix = VolunteerMatrix(user_collection.find({}, USER_PROJECTION))
+            _matrix_stale = False
+        return _matrix
+
+def mark_stale():
+    global _matrix_stale
+    _matrix_stale = True
+
+def reset_matrix():
+    global _matrix, _matrix_stale
+    with _matrix_lock:
+        _matrix = None
+        _matrix_stale = False
+
+# One query for everyone already signed up, instead of one lookup per volunteer
+def registered_user_ids(event_id):
+    return participation_collection.distinct(
+        "userId", {"eventId": event_id, "status": {"$ne": "Cancelled"}}
+    )
+
+def find_matches_for_event(event, limit=20, min_score=MIN_MATCH_SCORE):
+    matrix = get_matrix()
+    exclude = registered_user_ids(str(event["_id"]))
+    return matrix.top_matches(event, limit=limit, min_score=min_score, exclude=exclude)
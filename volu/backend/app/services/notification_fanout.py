@@ -0,0 +1,136 @@
+import uuid
+from datetime import datetime
+from bson import ObjectId
+from pymongo import UpdateOne
+from app.services import delivery
+from app.services.notification_hub import get_hub
+from app.database import (
+    notifications_collection, notification_counters_collection,
+    participation_collection, event_collection
+)
+
+# Per-user notifications. Each user has a counter document in
+# notification_counters ({userId, unread}) kept in step with every write, so
+# the unread badge is a single indexed lookup instead of a count over the inbox.
+
+FANOUT_BATCH_SIZE = 1000
+
+DEFAULT_PRIORITY = {
+    "EVENT_UPDATE": "MEDIUM",
+    "EVENT_REMINDER": "HIGH",
+    "EVENT_CANCELLATION": "URGENT",
+}
+
+
+# Fan-out notifications use string UUID ids; older ones were stored as native UUIDs
+def id_filter(notification_id):
+    try:
+        return {"_id": {"$in": [notification_id, uuid.UUID(notification_id)]}}
+    except ValueError:
+        return {"_id": notification_id}
+
+def adjust_unread(deltas):
+    """Apply {userId: delta} to the unread counters in one bulk write.
+
+    Only increments create a counter; a decrement for a user without one
+    (notifications from before counters, until the backfill migration runs)
+    would otherwise seed a negative count.
+    """
+    ops = [
+        UpdateOne({"userId": user_id}, {"$inc": {"unread": delta}}, upsert=delta > 0)
+        for user_id, delta in deltas.items()
+        if user_id and delta
+    ]
+    if ops:
+        notification_counters_collection.bulk_write(ops, ordered=False)
+        publish_unread(deltas)
+
+def publish_unread(user_ids):
+    # Only connected users cost a counter read
+    hub = get_hub()
+    for user_id in user_ids:
+        if user_id and hub.has_subscribers(user_id):
+            hub.publish(user_id, "unread", {"count": unread_count(user_id)})
+
+def unread_count(user_id):
+    counter = notification_counters_collection.find_one({"userId": user_id}, {"unread": 1})
+    return max(counter.get("unread", 0), 0) if counter else 0
+
+def reset_unread(user_id, database=None):
+    """Recount a user's unread notifications and store the exact value."""
+    notifications = database["notifications"] if database is not None else notifications_collection
+    counters = database["notification_counters"] if database is not None else notification_counters_collection
+    count = notifications.count_documents({"userId": user_id, "isRead": False})
+    counters.update_one({"userId": user_id}, {"$set": {"unread": count}}, upsert=True)
+    return count
+
+
+def build_notification(user_id, title, message, type="GENERAL_ANNOUNCEMENT", priority=None, metadata=None, now=None):
+    return {
+        "_id": str(uuid.uuid4()),
+        "userId": user_id,
+        "title": title,
+        "message": message,
+        "type": type,
+        "priority": priority or DEFAULT_PRIORITY.get(type, "MEDIUM"),
+        "metadata": metadata or {},
+        "isRead": False,
+        "createdAt": now or datetime.utcnow(),
+    }
+
+def notify_users(user_ids, title, message, type="GENERAL_ANNOUNCEMENT", priority=None, metadata=None):
+    """Create one notification per user with batched insert_many calls; returns the documents."""
+    now = datetime.utcnow()
+    recipients = list(dict.fromkeys(u for u in user_ids if u))
+    docs = [build_notification(u, title, message, type, priority, metadata, now) for u in recipients]
+    insert_notifications(docs)
+    return docs
+
+def insert_notifications(docs):
+    """Write prepared notifications (any mix of users and messages) in FANOUT_BATCH_SIZE batches.
+
+    Email/SMS copies go to the delivery outbox; nothing is sent from the caller's thread.
+    """
+    for start in range(0, len(docs), FANOUT_BATCH_SIZE):
+        batch = docs[start:start + FANOUT_BATCH_SIZE]
+        notifications_collection.insert_many(batch, ordered=False)
+        publish_notifications(batch)
+        deltas = {}
+        for doc in batch:
+            deltas[doc["userId"]] = deltas.get(doc["userId"], 0) + 1
+        adjust_unread(deltas)
+        delivery.enqueue(batch)
+
+def publish_notifications(docs):
+    # Published even without subscribers so a reconnecting client can replay them
+    hub = get_hub()
+    for doc in docs:
+        hub.publish(doc["userId"], "notification", doc)
+
+
+def event_recipients(event_id, event=None):
+    """Users signed up for an event: registeredVolunteers plus active participation records."""
+    if event is None and ObjectId.is_valid(str(event_id)):
+        event = event_collection.find_one({"_id": ObjectId(str(event_id))}, {"registeredVolunteers": 1})
+    user_ids = list((event or {}).get("registeredVolunteers") or [])
+    user_ids += participation_collection.distinct(
+        "userId", {"eventId": str(event_id), "status": {"$ne": "Cancelled"}}
+    )
+    return list(dict.fromkeys(user_ids))
+
+def recipients_by_event(events):
+    """event_recipients for many loaded events with one participation query: {eventId: [userId]}."""
+    recipients = {str(e["_id"]): list(e.get("registeredVolunteers") or []) for e in events}
+    if recipients:
+        records = participation_collection.find(
+            {"eventId": {"$in": list(recipients)}, "status": {"$ne": "Cancelled"}}, {"userId": 1, "eventId": 1}
+        )
+        for record in records:
+            recipients[record["eventId"]].append(record["userId"])
+    return {event_id: list(dict.fromkeys(u for u in users if u)) for event_id, users in recipients.items()}
+
+def notify_event_volunteers(event_id, type, title, message, event=None, priority=None):
+    """Fan a notification out to every volunteer signed up for the event."""
+    recipients = event_recipients(event_id, event)
+    metadata = {"eventId": str(event_id)}
+    return notify_users(recipients, title, message, type, priority, metadata)
@@ -0,0 +1,121 @@
+import itertools
+import os
+import queue
+import threading
+import time
+from collections import deque
+
+# In-process pub/sub for the notification stream. Each SSE connection holds a
+# Subscription; the notification write paths publish to the user's
+# subscriptions. Event ids are "<epoch>-<seq>": the epoch changes with every
+# process, so a Last-Event-ID from another worker or a restart is detected
+# and the client is told to resync instead of silently missing events.
+
+MAX_CONNECTIONS = int(os.getenv("NOTIFICATION_STREAM_MAX_CONNECTIONS", "500"))
+REPLAY_BUFFER_SIZE = 2000
+SUBSCRIPTION_QUEUE_SIZE = 100
+
+
+class HubFull(Exception):
+    pass
+
+
+class Subscription:
+    def __init__(self, user_id):
+        self.user_id = user_id
+        self.queue = queue.Queue(maxsize=SUBSCRIPTION_QUEUE_SIZE)
+        self.overflowed = False
+        # Optional callback for consumers that wait on an event loop instead of the queue
+        self.waker = None
+
+    def push(self, event):
+        try:
+            self.queue.put_nowait(event)
+        except queue.Full:
+            # Slow consumer: drop events and tell it to resync on its next read
+            self.overflowed = True
+        if self.waker:
+            self.waker()
+
+    def next_event(self, timeout):
+        """Return the next (id, type, data) event, ("", "reset", {}) after an overflow, or None on timeout."""
+        if self.overflowed:
+            self.overflowed = False
+            with self.queue.mutex:
+                self.queue.queue.clear()
+            return ("", "reset", {})
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class NotificationHub:
+    def __init__(self, max_connections=MAX_CONNECTIONS, buffer_size=REPLAY_BUFFER_SIZE):
+        self.max_connections = max_connections
+        self.epoch = format(int(time.time() * 1000), "x")
+        self._lock = threading.Lock()
+        self._seq = itertools.count(1)
+        self._subscribers = {}
+        self._connections = 0
+        self._recent = deque(maxlen=buffer_size)
+
+    def subscribe(self, user_id):
+        with self._lock:
+            if self._connections >= self.max_connections:
+                raise HubFull()
+            subscription = Subscription(user_id)
+            self._subscribers.setdefault(user_id, set()).add(subscription)
+            self._connections += 1
+            return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.user_id)
+            if subscribers and subscription in subscribers:
+                subscribers.discard(subscription)
+                self._connections -= 1
+                if not subscribers:
+                    del self._subscribers[subscription.user_id]
+
+    def has_subscribers(self, user_id):
+        return user_id in self._subscribers
+
+    def publish(self, user_id, event_type, data):
+        with self._lock:
+            event = (f"{self.epoch}-{next(self._seq)}", event_type, data)
+            self._recent.append((user_id, event))
+            subscribers = list(self._subscribers.get(user_id, ()))
+        for subscription in subscribers:
+            subscription.push(event)
+
+    def replay(self, user_id, last_event_id):
+        """Events for ``user_id`` after ``last_event_id``, or None if they are no longer buffered."""
+        epoch, _, seq = (last_event_id or "").partition("-")
+        if epoch != self.epoch or not seq.isdigit():
+            return None
+        seq = int(seq)
+        with self._lock:
+            recent = list(self._recent)
+        if not recent or int(recent[0][1][0].split("-")[1]) > seq + 1:
+            return None
+        return [event for uid, event in recent if uid == user_id and int(event[0].split("-")[1]) > seq]
+
+    def stats(self):
+        with self._lock:
+            return {
+                "connections": self._connections,
+                "users": len(self._subscribers),
+                "maxConnections": self.max_connections,
+            }
+
+
+_hub = NotificationHub()
+
+def get_hub():
+    return _hub
+
+def reset_hub(**kwargs):
+    global _hub
+    _hub = NotificationHub(**kwargs)
+    return _hub
@@ -0,0 +1,340 @@
+import heapq
+import logging
+import re
+import threading
+import time
+from datetime import datetime
+from pymongo import ReplaceOne
+from app.database import event_collection, org_stats_collection, participation_collection, participation_stats_collection
+from app.services import participation_stats
+from app.services.participation_stats import (
+    HOURS_EXPRESSION, MONTH_EXPRESSION, VERIFIED_HOURS_EXPRESSION, month_key, record_month
+)
+
+# Organization-wide impact numbers for the admin dashboard, kept in a single
+# precomputed org_stats document:
+#   {_id: "org", statusCounts: {status: n}, attendedHours, verifiedHours, events, capacity,
+#    months: {"YYYY-MM": {signups, attended, noShows, hours, verifiedHours, events, capacity}},
+#    leaderboard: [{userId, verifiedHours}], leaderboardVersion, rebuiltAt, updatedAt}
+# Participation and event writes $inc it with record_delta()/event_delta(), so
+# reads never touch participation. The leaderboard is the top LEADERBOARD_SIZE
+# volunteers by verified hours, kept sorted and merged as totals change.
+# reconcile() recomputes everything, per-user rollups included, from scratch.
+#
+# Signups are records that are not Cancelled; fill rate is signups over the
+# summed maxVolunteers of the month's events (events without one add no capacity).
+
+logger = logging.getLogger("app.org_stats")
+
+ORG_ID = "org"
+LEADERBOARD_SIZE = 100
+LEADERBOARD_RETRIES = 3
+RECONCILE_BATCH_SIZE = 1000
+NOT_SIGNUPS = ("Cancelled",)
+MONTH_PATTERN = re.compile(r"\d{4}-\d{2}")
+
+
+def _contribution(status, month, count=1, hours=0, verified_hours=0):
+    fields = {f"statusCounts.{status}": count}
+    monthly = {}
+    if status not in NOT_SIGNUPS:
+        monthly["signups"] = count
+    if status == "Attended":
+        fields["attendedHours"] = monthly["hours"] = hours
+        fields["verifiedHours"] = monthly["verifiedHours"] = verified_hours
+        monthly["attended"] = count
+    elif status == "No-Show":
+        monthly["noShows"] = count
+    if month and MONTH_PATTERN.fullmatch(month):
+        fields.update({f"months.{month}.{name}": value for name, value in monthly.items()})
+    return fields
+
+def _record_contribution(record):
+    if not record:
+        return {}
+    hours = record.get("hoursLogged") or 0
+    return _contribution(record.get("status") or "Unknown", record_month(record), 1, hours,
+                         hours if record.get("hoursVerified") else 0)
+
+def capacity(event):
+    try:
+        return max(int(float(event.get("maxVolunteers") or 0)), 0)
+    except (TypeError, ValueError):
+        return 0
+
+def _event_contribution(event):
+    if not event:
+        return {}
+    fields = {"events": 1, "capacity": capacity(event)}
+    month = month_key(event.get("startDate"))
+    if month:
+        fields[f"months.{month}.events"] = 1
+        fields[f"months.{month}.capacity"] = fields["capacity"]
+    return fields
+
+def _difference(before, after):
+    delta = dict(after)
+    for path, value in before.items():
+        delta[path] = delta.get(path, 0) - value
+    return {path: value for path, value in delta.items() if value}
+
+def record_delta(before, after):
+    """$inc document that moves the org totals from counting participation ``before`` to ``after``."""
+    return _difference(_record_contribution(before), _record_contribution(after))
+
+def event_delta(before, after):
+    """$inc document for an event created (before=None), edited or deleted (after=None)."""
+    return _difference(_event_contribution(before), _event_contribution(after))
+
+def org_update(delta):
+    return {"$inc": delta, "$set": {"updatedAt": datetime.utcnow()}}
+
+
+# Like the per-user rollups, only an existing document is patched; a missing
+# one is built by reconcile() on first read and includes these changes anyway
+def apply_delta(delta):
+    if delta:
+        org_stats_collection.update_one({"_id": ORG_ID}, org_update(delta))
+
+def records_delta(changes):
+    """Summed record_delta() of (user_id, before, after) changes, and the users whose verified hours moved."""
+    total = {}
+    verified = set()
+    for user_id, before, after in changes:
+        delta = record_delta(before, after)
+        for path, value in delta.items():
+            total[path] = total.get(path, 0) + value
+        if "verifiedHours" in delta:
+            verified.add(user_id)
+    return {path: value for path, value in total.items() if value}, verified
+
+def apply_record_changes(changes):
+    """Apply (user_id, before, after) participation changes; call after the per-user rollups are patched."""
+    delta, verified = records_delta(changes)
+    apply_delta(delta)
+    if verified:
+        update_leaderboard(verified)
+
+def apply_event_change(before, after):
+    apply_delta(event_delta(before, after))
+    # A new month moves the event's signups along with its capacity
+    if participation_stats.rescheduled(before, after):
+        apply_record_changes(participation_stats.move_event_month(after["_id"], month_key(after.get("startDate"))))
+
+
+def _rank(entry):
+    return -entry["verifiedHours"], entry["userId"]
+
+def merge_leaderboard(board, totals, size=LEADERBOARD_SIZE):
+    """Top ``size`` after the users in ``totals`` ({userId: verifiedHours}) changed.
+
+    Returns (board, complete). complete is False when a member of a full
+    board went down, since someone outside it may now rank higher.
+    """
+    previous = {entry["userId"]: entry["verifiedHours"] for entry in board}
+    complete = len(board) < size or not any(
+        user_id in previous and hours < previous[user_id] for user_id, hours in totals.items()
+    )
+    entries = [entry for entry in board if entry["userId"] not in totals]
+    entries += [{"userId": user_id, "verifiedHours": round(hours, 2)} for user_id, hours in totals.items() if hours > 0]
+    return heapq.nsmallest(size, entries, key=_rank), complete
+
+def top_volunteers(size=LEADERBOARD_SIZE):
+    """Leaderboard straight from the per-user rollups (a walk of their verifiedHours index)."""
+    cursor = participation_stats_collection.find(
+        {"verifiedHours": {"$gt": 0}}, {"_id": 0, "userId": 1, "verifiedHours": 1}
+    ).sort([("verifiedHours", -1), ("userId", 1)]).limit(size)
+    return [{"userId": r["userId"], "verifiedHours": round(r["verifiedHours"], 2)} for r in cursor]
+
+def update_leaderboard(user_ids):
+    """Merge the current verified hours of ``user_ids`` into the stored leaderboard."""
+    user_ids = set(user_ids)
+    totals = {
+        r["userId"]: r.get("verifiedHours", 0)
+        for r in participation_stats_collection.find({"userId": {"$in": list(user_ids)}}, {"userId": 1, "verifiedHours": 1})
+    }
+    for user_id in user_ids - set(totals):
+        totals[user_id] = participation_stats.rebuild_rollup(user_id)["verifiedHours"]
+
+    # Optimistic concurrency: a concurrent merge bumps the version and this one re-reads
+    for _ in range(LEADERBOARD_RETRIES):
+        org = org_stats_collection.find_one({"_id": ORG_ID}, {"leaderboard": 1, "leaderboardVersion": 1})
+        if org is None:
+            return None
+        board, complete = merge_leaderboard(org.get("leaderboard") or [], totals)
+        if not complete:
+            board = top_volunteers()
+        version = org.get("leaderboardVersion", 0)
+        result = org_stats_collection.update_one(
+            {"_id": ORG_ID, "leaderboardVersion": version},
+            {"$set": {"leaderboard": board, "leaderboardVersion": version + 1}}
+        )
+        if result.matched_count:
+            return board
+    logger.warning("Leaderboard update for %d users lost %d races; the next reconcile settles it",
+                   len(user_ids), LEADERBOARD_RETRIES)
+    return None
+
+
+def _nested(fields):
+    doc = {}
+    for path, value in fields.items():
+        *parents, name = path.split(".")
+        target = doc
+        for parent in parents:
+            target = target.setdefault(parent, {})
+        target[name] = target.get(name, 0) + value
+    return doc
+
+def reconcile():
+    """Rebuild every per-user rollup and the org document from participation and events."""
+    started = time.perf_counter()
+    rows = participation_collection.aggregate([
+        {"$group": {
+            "_id": {"userId": "$userId", "status": {"$ifNull": ["$status", "Unknown"]}, "month": MONTH_EXPRESSION},
+            "count": {"$sum": 1},
+            "hours": {"$sum": HOURS_EXPRESSION},
+            "verifiedHours": {"$sum": VERIFIED_HOURS_EXPRESSION},
+        }}
+    ], allowDiskUse=True)
+
+    totals = {}
+    facets = {}
+    records = 0
+    for row in rows:
+        key = row["_id"]
+        records += row["count"]
+        for path, value in _contribution(key["status"], key["month"], row["count"], row["hours"],
+                                         row["verifiedHours"]).items():
+            totals[path] = totals.get(path, 0) + value
+        # The same rows, shaped like the per-user $facet result
+        user = facets.setdefault(key["userId"], {"byStatus": {}, "byMonth": {}})
+        status = user["byStatus"].setdefault(key["status"], {"_id": key["status"], "count": 0, "hours": 0, "verifiedHours": 0})
+        status["count"] += row["count"]
+        status["hours"] += row["hours"]
+        status["verifiedHours"] += row["verifiedHours"]
+        if key["month"] and MONTH_PATTERN.fullmatch(key["month"]):
+            month = user["byMonth"].setdefault(key["month"], {"_id": key["month"], "count": 0, "hours": 0})
+            month["count"] += row["count"]
+            month["hours"] += row["hours"]
+
+    events = 0
+    for event in event_collection.find({}, {"startDate": 1, "maxVolunteers": 1}):
+        events += 1
+        for path, value in _event_contribution(event).items():
+            totals[path] = totals.get(path, 0) + value
+
+    now = datetime.utcnow()
+    rollups = []
+    ops = []
+    for user_id, result in facets.items():
+        rollup = participation_stats.rollup_from_facets(
+            user_id, {"byStatus": list(result["byStatus"].values()), "byMonth": list(result["byMonth"].values())}
+        )
+        rollups.append(rollup)
+        ops.append(ReplaceOne({"userId": user_id}, {**rollup, "rebuiltAt": now, "updatedAt": now}, upsert=True))
+        if len(ops) == RECONCILE_BATCH_SIZE:
+            participation_stats_collection.bulk_write(ops, ordered=False)
+            ops = []
+    if ops:
+        participation_stats_collection.bulk_write(ops, ordered=False)
+
+    board = heapq.nsmallest(LEADERBOARD_SIZE, (
+        {"userId": r["userId"], "verifiedHours": round(r["verifiedHours"], 2)} for r in rollups if r["verifiedHours"] > 0
+    ), key=_rank)
+    org = {"statusCounts": {}, "attendedHours": 0, "verifiedHours": 0, "events": 0, "capacity": 0, "months": {},
+           **_nested({path: value for path, value in totals.items() if value})}
+    org_stats_collection.update_one(
+        {"_id": ORG_ID},
+        {"$set": {**org, "leaderboard": board, "rebuiltAt": now, "updatedAt": now},
+         "$inc": {"leaderboardVersion": 1}},
+        upsert=True
+    )
+    return {"users": len(rollups), "records": records, "events": events,
+            "seconds": round(time.perf_counter() - started, 2)}
+
+def get_org_stats():
+    org = org_stats_collection.find_one({"_id": ORG_ID})
+    if org is None:
+        reconcile()
+        org = org_stats_collection.find_one({"_id": ORG_ID})
+    return org
+
+
+def _rate(part, whole):
+    return round(part / whole, 4) if whole else None
+
+def _summary(signups, attended, no_shows, hours, verified_hours, events, capacity_total):
+    return {
+        "signups": signups, "attended": attended, "noShows": no_shows,
+        "noShowRate": _rate(no_shows, attended + no_shows),
+        "hours": round(hours, 1), "verifiedHours": round(verified_hours, 1),
+        "events": events, "capacity": capacity_total, "fillRate": _rate(signups, capacity_total),
+    }
+
+def format_dashboard(org, months=None, top=10):
+    """Dashboard payload from the org document; ``months`` keeps only the latest N months."""
+    by_month = [
+        {"month": key, **_summary(m.get("signups", 0), m.get("attended", 0), m.get("noShows", 0), m.get("hours", 0),
+                                  m.get("verifiedHours", 0), m.get("events", 0), m.get("capacity", 0))}
+        for key, m in sorted((org.get("months") or {}).items())
+        if any(m.values())
+    ]
+    if months:
+        by_month = by_month[-months:]
+    counts = {status: n for status, n in (org.get("statusCounts") or {}).items() if n}
+    signups = sum(n for status, n in counts.items() if status not in NOT_SIGNUPS)
+    return {
+        **_summary(signups, counts.get("Attended", 0), counts.get("No-Show", 0), org.get("attendedHours", 0),
+                   org.get("verifiedHours", 0), org.get("events", 0), org.get("capacity", 0)),
+        "statusCounts": counts,
+        "byMonth": by_month,
+        "topVolunteers": (org.get("leaderboard") or [])[:top],
+        "rebuiltAt": org.get("rebuiltAt"),
+        "updatedAt": org.get("updatedAt"),
+    }
+
+
+class Reconciler:
+    """Runs reconcile() every ``interval_seconds`` on a daemon thread."""
+
+    def __init__(self, interval_seconds):
+        self.interval_seconds = interval_seconds
+        self._stop = threading.Event()
+        self._thread = None
+
+    def run_forever(self):
+        while not self._stop.wait(self.interval_seconds):
+            try:
+                summary = reconcile()
+                logger.info("Reconciled impact rollups: %s", summary)
+            except Exception:
+                logger.exception("Rollup reconciliation failed")
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self.run_forever, name="rollup-reconciler", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout=5):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+
+_reconciler = None
+
+def start_reconciler(interval_seconds):
+    global _reconciler
+    if _reconciler is None:
+        _reconciler = Reconciler(interval_seconds)
+    return _reconciler.start()
+
+def stop_reconciler():
+    global _reconciler
+    if _reconciler is not None:
+        _reconciler.stop()
+        _reconciler = None
@@ -0,0 +1,122 @@
+import math
+from datetime import datetime
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+from app.database import participation_collection
+from app.services import org_stats, participation_stats
+from app.utils.dates import parse_date
+
+MAX_BULK_ENTRIES = 1000
+
+# Fields an entry may set on a participation record
+UPDATABLE_FIELDS = ("status", "hoursLogged", "hoursVerified", "feedback", "adminNotes", "role", "checkInTime",
+                    "checkOutTime")
+
+
+def _hours_logged(value):
+    try:
+        hours = None if isinstance(value, bool) else float(value)
+    except (TypeError, ValueError):
+        hours = None
+    if hours is None or not math.isfinite(hours):
+        raise ValueError("hoursLogged must be a number")
+    return hours
+
+def _hours_verified(value):
+    # JSON booleans, or the strings "true"/"false"; bool("false") would be True
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, str) and value.strip().lower() in ("true", "false"):
+        return value.strip().lower() == "true"
+    raise ValueError("hoursVerified must be true or false")
+
+def _updates(entry):
+    """The fields an entry sets, coerced to their stored types; raises ValueError on bad values."""
+    updates = {}
+    for field in UPDATABLE_FIELDS:
+        if entry.get(field) is not None:
+            updates[field] = entry[field]
+    if "hoursLogged" in updates:
+        updates["hoursLogged"] = _hours_logged(updates["hoursLogged"])
+    if "hoursVerified" in updates:
+        updates["hoursVerified"] = _hours_verified(updates["hoursVerified"])
+    for field in ("checkInTime", "checkOutTime"):
+        if field in updates:
+            updates[field] = parse_date(updates[field])
+    return updates
+
+
+def apply_bulk(entries, ordered=False):
+    """Apply many attendance/hours/feedback entries with a single bulk_write of upserts.
+
+    Returns one result per entry, in request order: ``inserted``, ``updated``,
+    ``notFound`` (no status given and no existing record), ``invalid``,
+    ``error`` (write failed) or ``skipped`` (after an error in ordered mode).
+    """
+    results = [None] * len(entries)
+    keys, parsed = {}, {}
+    for i, entry in enumerate(entries):
+        if not isinstance(entry, dict) or not entry.get("userId") or not entry.get("eventId"):
+            results[i] = {"index": i, "result": "invalid", "error": "Missing userId or eventId"}
+            continue
+        try:
+            parsed[i] = _updates(entry)
+        except ValueError as e:
+            results[i] = {"index": i, "result": "invalid", "error": str(e)}
+            continue
+        if not parsed[i]:
+            results[i] = {"index": i, "result": "invalid", "error": "Nothing to update"}
+        else:
+            keys[i] = (str(entry["userId"]), str(entry["eventId"]))
+
+    # One read for every existing record the batch touches, for rollup BEFORE images
+    existing = {}
+    if keys:
+        user_ids = list({k[0] for k in keys.values()})
+        event_ids = list({k[1] for k in keys.values()})
+        for record in participation_collection.find({"userId": {"$in": user_ids}, "eventId": {"$in": event_ids}}):
+            existing[(record["userId"], record["eventId"])] = record
+    months = participation_stats.event_months({k[1] for k in keys.values()})
+
+    now = datetime.utcnow()
+    ops, op_entries, changes = [], [], []
+    state = dict(existing)
+    for i, (user_id, event_id) in keys.items():
+        updates = {**parsed[i], "updatedAt": now}
+        before = state.get((user_id, event_id))
+        if before is None and "status" not in updates:
+            results[i] = {"index": i, "result": "notFound", "error": "Participation record not found"}
+            continue
+
+        inserted = {"createdAt": now, "eventMonth": months.get(event_id)}
+        after = {**(before or {"userId": user_id, "eventId": event_id, **inserted}), **updates}
+        state[(user_id, event_id)] = after
+        ops.append(UpdateOne(
+            {"userId": user_id, "eventId": event_id},
+            {"$set": updates, "$setOnInsert": inserted},
+            upsert=True
+        ))
+        op_entries.append(i)
+        changes.append((user_id, before, after))
+        results[i] = {"index": i, "result": "updated" if before else "inserted", "userId": user_id, "eventId": event_id}
+
+    failed = set()
+    if ops:
+        try:
+            participation_collection.bulk_write(ops, ordered=ordered)
+        except BulkWriteError as e:
+            for error in e.details.get("writeErrors", []):
+                failed.add(error["index"])
+                entry_index = op_entries[error["index"]]
+                results[entry_index] = {**results[entry_index], "result": "error", "error": error.get("errmsg")}
+            if ordered and failed:
+                # An ordered bulk write stops at the first failure
+                for op_index in range(min(failed) + 1, len(ops)):
+                    entry_index = op_entries[op_index]
+                    results[entry_index] = {**results[entry_index], "result": "skipped"}
+                    failed.add(op_index)
+
+    applied = [c for op_index, c in enumerate(changes) if op_index not in failed]
+    participation_stats.apply_changes(applied)
+    org_stats.apply_record_changes(applied)
+    return results
@@ -0,0 +1,101 @@
+from bson import ObjectId
+from flask import g
+from app.database import event_collection, user_collection
+from app.utils.loaders import AsyncBatchLoader, BatchLoader
+
+# ?include=event,user on participation lists: each record gets the event and
+# user summaries the frontend's ParticipationRecord expects, resolved per page
+# with one $in query per collection through request-scoped loaders.
+
+INCLUDES = ("event", "user")
+
+EVENT_FIELDS = {"name": 1, "description": 1, "location": 1, "city": 1, "startDate": 1, "endDate": 1,
+                "startTime": 1, "endTime": 1, "status": 1}
+USER_FIELDS = {"userId": 1, "personalInfo.fullName": 1, "personalInfo.email": 1, "personalInfo.phone": 1, "email": 1}
+
+
+def parse_include(value, default=""):
+    """The requested includes as a tuple; raises ValueError for unknown names."""
+    names = [n.strip() for n in (default if value is None else value).split(",") if n.strip()]
+    unknown = [n for n in names if n not in INCLUDES]
+    if unknown:
+        raise ValueError(f"Unknown include: {', '.join(unknown)}")
+    return tuple(n for n in INCLUDES if n in names)
+
+def event_summary(event):
+    return {
+        "id": str(event["_id"]),
+        "name": event.get("name"),
+        "description": event.get("description"),
+        "location": event.get("location") or event.get("city"),
+        "startDate": event.get("startDate"),
+        "endDate": event.get("endDate") or event.get("startDate"),
+        "startTime": event.get("startTime"),
+        "endTime": event.get("endTime"),
+        "status": event.get("status"),
+    }
+
+def user_summary(user):
+    info = user.get("personalInfo") if isinstance(user.get("personalInfo"), dict) else {}
+    full_name = info.get("fullName")
+    return {
+        "id": user["userId"],
+        "name": full_name,
+        "email": info.get("email") or user.get("email"),
+        "profile": {"fullName": full_name, "phone": info.get("phone")},
+    }
+
+def event_query(event_ids):
+    oids = [ObjectId(e) for e in event_ids if ObjectId.is_valid(e)]
+    return {"_id": {"$in": oids}}
+
+def load_events(event_ids):
+    return {str(e["_id"]): event_summary(e) for e in event_collection.find(event_query(event_ids), EVENT_FIELDS)}
+
+def load_users(user_ids):
+    return {u["userId"]: user_summary(u) for u in user_collection.find({"userId": {"$in": user_ids}}, USER_FIELDS)}
+
+def request_loaders():
+    loaders = g.get("loaders")
+    if loaders is None:
+        loaders = g.loaders = {"event": BatchLoader(load_events), "user": BatchLoader(load_users)}
+    return loaders
+
+def async_loaders(request):
+    loaders = getattr(request.state, "loaders", None)
+    if loaders is None:
+        db = request.app.state.db
+
+        async def events(event_ids):
+            docs = await db["events"].find(event_query(event_ids), EVENT_FIELDS).to_list(None)
+            return {str(e["_id"]): event_summary(e) for e in docs}
+
+        async def users(user_ids):
+            docs = await db["users"].find({"userId": {"$in": user_ids}}, USER_FIELDS).to_list(None)
+            return {u["userId"]: user_summary(u) for u in docs}
+
+        loaders = request.state.loaders = {"event": AsyncBatchLoader(events), "user": AsyncBatchLoader(users)}
+    return loaders
+
+
+def _key(record, name):
+    value = record.get(f"{name}Id")
+    return str(value) if value is not None else None
+
+def embed(records, include, loaders=None):
+    """Set record["event"]/record["user"] on every record; unknown ids embed None."""
+    if not include:
+        return records
+    loaders = loaders or request_loaders()
+    for name in include:
+        found = loaders[name].load_many(_key(r, name) for r in records)
+        for record in records:
+            record[name] = found.get(_key(record, name))
+    return records
+
+async def embed_async(records, include, loaders):
+    for name in include:
+        found = await loaders[name].load_many(_key(r, name) for r in records)
+        for record in records:
+            record[name] = found.get(_key(record, name))
+    return records
@@ -0,0 +1,184 @@
+from datetime import datetime
+from bson import ObjectId
+from pymongo import UpdateOne
+from app.database import participation_collection, participation_stats_collection, event_collection
+from app.utils.dates import parse_date
+
+# Rollup documents in participation_stats, one per user:
+#   {userId, statusCounts: {status: n}, attendedHours, verifiedHours,
+#    eventsByMonth: {"YYYY-MM": n}, hoursByMonth: {"YYYY-MM": hours}, rebuiltAt, updatedAt}
+
+
+def month_key(value):
+    parsed = parse_date(value)
+    return parsed.strftime("%Y-%m") if parsed else None
+
+# Month bucket for a participation record: stored eventMonth, else the legacy embedded event
+def record_month(record):
+    return record.get("eventMonth") or month_key((record.get("event") or {}).get("startDate"))
+
+def event_month(event_id):
+    if not ObjectId.is_valid(str(event_id)):
+        return None
+    event = event_collection.find_one({"_id": ObjectId(str(event_id))}, {"startDate": 1})
+    return month_key(event.get("startDate")) if event else None
+
+# Batched event_month: one $in query for every event in a bulk request
+def event_months(event_ids):
+    oids = {ObjectId(str(e)) for e in event_ids if ObjectId.is_valid(str(e))}
+    if not oids:
+        return {}
+    events = event_collection.find({"_id": {"$in": list(oids)}}, {"startDate": 1})
+    return {str(e["_id"]): month_key(e.get("startDate")) for e in events}
+
+
+def _contribution(record):
+    if not record:
+        return {}
+    status = record.get("status") or "Unknown"
+    hours = record.get("hoursLogged") or 0
+    fields = {f"statusCounts.{status}": 1}
+    if status == "Attended":
+        fields["attendedHours"] = hours
+        if record.get("hoursVerified"):
+            fields["verifiedHours"] = hours
+    month = record_month(record)
+    if month:
+        fields[f"eventsByMonth.{month}"] = 1
+        fields[f"hoursByMonth.{month}"] = hours
+    return fields
+
+def rollup_delta(before, after):
+    """$inc document that moves a rollup from counting ``before`` to counting ``after``."""
+    delta = dict(_contribution(after))
+    for path, value in _contribution(before).items():
+        delta[path] = delta.get(path, 0) - value
+    return {path: value for path, value in delta.items() if value}
+
+def apply_change(user_id, before, after):
+    apply_changes([(user_id, before, after)])
+
+def rollup_updates(changes):
+    """UpdateOne ops that patch the rollups for (user_id, before, after) record changes."""
+    # Only patch rollups that already exist; a missing one is rebuilt from
+    # the pipeline on first read and will include these changes anyway
+    per_user = {}
+    for user_id, before, after in changes:
+        totals = per_user.setdefault(user_id, {})
+        for path, value in rollup_delta(before, after).items():
+            totals[path] = totals.get(path, 0) + value
+    now = datetime.utcnow()
+    return [
+        UpdateOne({"userId": user_id}, {"$inc": delta, "$set": {"updatedAt": now}})
+        for user_id, delta in per_user.items()
+        if any(delta.values())
+    ]
+
+def apply_changes(changes):
+    """Apply (user_id, before, after) record changes to the rollups in one bulk write."""
+    ops = rollup_updates(changes)
+    if ops:
+        participation_stats_collection.bulk_write(ops, ordered=False)
+
+
+# eventMonth is copied onto participation records, so moving an event to
+# another month re-buckets its records and the rollups that count them
+MONTH_FIELDS = {"userId": 1, "status": 1, "hoursLogged": 1, "hoursVerified": 1, "eventMonth": 1, "event.startDate": 1}
+
+def rescheduled(before, after):
+    """Whether an event edit moved its startDate to another month."""
+    return bool(before and after) and month_key(before.get("startDate")) != month_key(after.get("startDate"))
+
+def stale_month_query(event_id, month):
+    return {"eventId": str(event_id), "eventMonth": {"$ne": month}}
+
+def month_moves(records, month):
+    """(user_id, before, after) changes that move ``records`` into ``month``."""
+    return [(record.get("userId"), record, {**record, "eventMonth": month}) for record in records]
+
+def move_event_month(event_id, month):
+    """Set eventMonth on an event's records and patch their rollups; returns the changes."""
+    records = list(participation_collection.find(stale_month_query(event_id, month), MONTH_FIELDS))
+    if not records:
+        return []
+    participation_collection.update_many(
+        {"_id": {"$in": [record["_id"] for record in records]}}, {"$set": {"eventMonth": month}}
+    )
+    changes = month_moves(records, month)
+    apply_changes(changes)
+    return changes
+
+
+# Server-side record_month(), for pipelines that bucket records by month
+MONTH_EXPRESSION = {"$ifNull": ["$eventMonth", {"$substr": [{"$ifNull": ["$event.startDate", ""]}, 0, 7]}]}
+HOURS_EXPRESSION = {"$ifNull": ["$hoursLogged", 0]}
+VERIFIED_HOURS_EXPRESSION = {"$cond": [{"$eq": ["$hoursVerified", True]}, HOURS_EXPRESSION, 0]}
+
+def _pipeline(user_id):
+    hours = HOURS_EXPRESSION
+    return [
+        {"$match": {"userId": user_id}},
+        {"$addFields": {"_month": MONTH_EXPRESSION}},
+        {"$facet": {
+            "byStatus": [
+                {"$group": {
+                    "_id": {"$ifNull": ["$status", "Unknown"]},
+                    "count": {"$sum": 1},
+                    "hours": {"$sum": hours},
+                    "verifiedHours": {"$sum": VERIFIED_HOURS_EXPRESSION}
+                }}
+            ],
+            "byMonth": [
+                {"$match": {"_month": {"$regex": r"^\d{4}-\d{2}$"}}},
+                {"$group": {"_id": "$_month", "count": {"$sum": 1}, "hours": {"$sum": hours}}}
+            ]
+        }}
+    ]
+
+def aggregate_rollup(user_id):
+    """Compute a user's rollup server-side in one $facet aggregation."""
+    result = next(participation_collection.aggregate(_pipeline(user_id)), None)
+    return rollup_from_facets(user_id, result)
+
+def rollup_from_facets(user_id, result):
+    result = result or {"byStatus": [], "byMonth": []}
+    return {
+        "userId": user_id,
+        "statusCounts": {row["_id"]: row["count"] for row in result["byStatus"]},
+        "attendedHours": sum(row["hours"] for row in result["byStatus"] if row["_id"] == "Attended"),
+        "verifiedHours": sum(row.get("verifiedHours", 0) for row in result["byStatus"] if row["_id"] == "Attended"),
+        "eventsByMonth": {row["_id"]: row["count"] for row in result["byMonth"]},
+        "hoursByMonth": {row["_id"]: row["hours"] for row in result["byMonth"]},
+    }
+
+def rebuild_rollup(user_id):
+    rollup = aggregate_rollup(user_id)
+    now = datetime.utcnow()
+    participation_stats_collection.replace_one(
+        {"userId": user_id},
+        {**rollup, "rebuiltAt": now, "updatedAt": now},
+        upsert=True
+    )
+    return rollup
+
+def get_rollup(user_id):
+    rollup = participation_stats_collection.find_one({"userId": user_id}, {"_id": 0})
+    return rollup if rollup is not None else rebuild_rollup(user_id)
+
+
+def _month_label(key):
+    return datetime.strptime(key, "%Y-%m").strftime("%b %Y")  # e.g., 'Mar 2025'
+
+def format_statistics(rollup):
+    status_counts = {k: v for k, v in (rollup.get("statusCounts") or {}).items() if v}
+    events_by_month = rollup.get("eventsByMonth") or {}
+    hours_by_month = rollup.get("hoursByMonth") or {}
+    months = sorted(k for k, v in events_by_month.items() if v)
+    return {
+        "totalHours": rollup.get("attendedHours", 0),
+        "eventsAttended": status_counts.get("Attended", 0),
+        "upcomingEvents": status_counts.get("Confirmed", 0),
+        "statusCounts": status_counts,
+        "eventsByMonth": {_month_label(m): events_by_month[m] for m in months},
+        "hoursByMonth": {_month_label(m): hours_by_month.get(m, 0) for m in months},
+    }
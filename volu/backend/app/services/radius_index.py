@@ -0,0 +1,59 @@
+import math
+import numpy as np
+from app.utils.geo import haversine_miles
+
+MILES_PER_DEGREE_LAT = 69.0
+
+
+class RadiusIndex:
+    """Uniform lat/lon grid over a set of points for "within N miles" queries.
+
+    Points are sorted by cell key (lat row major, lon minor), so the cells a
+    query circle overlaps in one latitude row form a single contiguous slice
+    found with two binary searches; haversine only runs on those candidates.
+    """
+
+    CELL_DEGREES = 0.25
+    _LON_CELLS = 2000
+
+    def __init__(self, lats, lons):
+        self.lats = np.asarray(lats, dtype=np.float64)
+        self.lons = np.asarray(lons, dtype=np.float64)
+        known = np.flatnonzero(~np.isnan(self.lats) & ~np.isnan(self.lons))
+        keys = self._key(self._cell(self.lats[known]), self._cell(self.lons[known]))
+        order = np.argsort(keys, kind="stable")
+        self.rows = known[order]
+        self.keys = keys[order]
+
+    def __len__(self):
+        return len(self.rows)
+
+    def _cell(self, degrees):
+        return np.floor(np.asarray(degrees) / self.CELL_DEGREES).astype(np.int64)
+
+    def _key(self, lat_cell, lon_cell):
+        return (lat_cell + self._LON_CELLS) * self._LON_CELLS * 2 + (lon_cell + self._LON_CELLS)
+
+    def within(self, lat, lon, radius_miles):
+        """Return (rows, distances) of points within ``radius_miles``, nearest first."""
+        if not len(self.rows) or radius_miles < 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0)
+        dlat = radius_miles / MILES_PER_DEGREE_LAT
+        dlon = radius_miles / (MILES_PER_DEGREE_LAT * max(math.cos(math.radians(lat)), 0.01))
+        lon_lo, lon_hi = self._cell(lon - dlon), self._cell(lon + dlon)
+
+        slices = []
+        for lat_cell in range(int(self._cell(lat - dlat)), int(self._cell(lat + dlat)) + 1):
+            start = np.searchsorted(self.keys, self._key(lat_cell, lon_lo), side="left")
+            end = np.searchsorted(self.keys, self._key(lat_cell, lon_hi), side="right")
+            if end > start:
+                slices.append(self.rows[start:end])
+        if not slices:
+            return np.zeros(0, dtype=np.int64), np.zeros(0)
+
+        rows = np.concatenate(slices)
+        distances = haversine_miles(lat, lon, self.lats[rows], self.lons[rows])
+        inside = distances <= radius_miles
+        rows, distances = rows[inside], distances[inside]
+        order = np.argsort(distances, kind="stable")
+        return rows[order], distances[order]
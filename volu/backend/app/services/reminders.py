@@ -0,0 +1,327 @@
+import heapq
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from bson import ObjectId
+from pymongo import UpdateMany, UpdateOne
+from app.database import scheduled_task_collection, event_collection
+from app.services import notification_fanout
+from app.utils.dates import parse_date, parse_time
+
+# Event reminders, 7 days and 1 day before each event starts. Every reminder
+# is a document in scheduled_tasks:
+#   {_id: "reminder:<eventId>:<offset>", type, eventId, offset, scheduledFor,
+#    status: pending|claimed|done|skipped|cancelled|failed, claimedBy, claimedUntil, attempts}
+# written when an event is created or moved. ReminderScheduler reads only the
+# next few minutes of the (status, scheduledFor) index into a min-heap and
+# sleeps until the earliest task is due. Tasks are claimed with a conditional
+# update_many, so any number of workers can share the collection; a claim
+# that is not completed within LEASE (worker died) is picked up again.
+
+logger = logging.getLogger("app.reminders")
+
+REMINDER_OFFSETS = {"7d": timedelta(days=7), "1d": timedelta(days=1)}
+LOOKAHEAD = timedelta(minutes=10)
+REFRESH_SECONDS = 60
+LEASE = timedelta(minutes=5)
+CLAIM_BATCH_SIZE = 500
+MAX_ATTEMPTS = 5
+RETRY_DELAY = timedelta(minutes=1)
+
+EVENT_FIELDS = {"name": 1, "startDate": 1, "startTime": 1, "status": 1, "registeredVolunteers": 1}
+
+
+def event_start(event):
+    start = parse_date(event.get("startDate"))
+    if start is None:
+        return None
+    minutes = parse_time(event.get("startTime"))
+    if minutes is not None and start.hour == 0 and start.minute == 0:
+        start += timedelta(minutes=minutes)
+    return start
+
+def task_id(event_id, offset):
+    return f"reminder:{event_id}:{offset}"
+
+def reminder_tasks(event, now=None):
+    """Reminder tasks for ``event``; reminders whose time has already passed are left out."""
+    now = now or datetime.utcnow()
+    start = event_start(event)
+    if start is None or start <= now:
+        return []
+    event_id = str(event["_id"])
+    return [
+        {"_id": task_id(event_id, offset), "type": "EVENT_REMINDER", "eventId": event_id,
+         "offset": offset, "scheduledFor": start - before}
+        for offset, before in REMINDER_OFFSETS.items()
+        if start - before > now
+    ]
+
+def schedule_writes(event, now=None):
+    """bulk_write operations that (re)schedule an event's reminders.
+
+    A reminder is only reset to pending when its time changed, so saving an
+    event without moving it never re-sends a reminder that already went out.
+    """
+    now = now or datetime.utcnow()
+    tasks = reminder_tasks(event, now)
+    ops = []
+    for task in tasks:
+        ops.append(UpdateOne(
+            {"_id": task["_id"]},
+            {"$setOnInsert": {**task, "status": "pending", "attempts": 0, "createdAt": now}},
+            upsert=True
+        ))
+        ops.append(UpdateOne(
+            {"_id": task["_id"], "scheduledFor": {"$ne": task["scheduledFor"]}},
+            {"$set": {"scheduledFor": task["scheduledFor"], "status": "pending", "attempts": 0, "updatedAt": now}}
+        ))
+    # Offsets that no longer fit (the event moved closer) are dropped
+    ops.append(UpdateMany(
+        {"eventId": str(event["_id"]), "status": "pending", "_id": {"$nin": [t["_id"] for t in tasks]}},
+        {"$set": {"status": "skipped", "updatedAt": now}}
+    ))
+    return ops, tasks
+
+def schedule_event_reminders(event):
+    ops, tasks = schedule_writes(event)
+    scheduled_task_collection.bulk_write(ops, ordered=True)
+    wake(tasks)
+    return tasks
+
+def cancellation(event_id):
+    """(filter, update) that cancels an event's outstanding reminders."""
+    return ({"eventId": str(event_id), "status": {"$in": ["pending", "claimed"]}},
+            {"$set": {"status": "cancelled", "updatedAt": datetime.utcnow()}})
+
+def cancel_event_reminders(event_id):
+    return scheduled_task_collection.update_many(*cancellation(event_id)).modified_count
+
+def backfill(now=None):
+    """Schedule reminders for every upcoming event, e.g. for events created before reminders existed."""
+    now = now or datetime.utcnow()
+    # startDate is stored as an ISO string or a datetime; range-match both on the startDate index
+    events = event_collection.find(
+        {"$or": [{"startDate": {"$gte": now.strftime("%Y-%m-%d")}}, {"startDate": {"$gte": now}}]},
+        {"startDate": 1, "startTime": 1}
+    )
+    scheduled = 0
+    for event in events:
+        scheduled += len(schedule_event_reminders(event))
+    return scheduled
+
+
+def reminder_message(event, start, now):
+    days = round((start - now) / timedelta(days=1))
+    when = "tomorrow" if days <= 1 else f"in {days} days"
+    time_text = f" at {event['startTime']}" if event.get("startTime") else ""
+    return f"{event.get('name', 'An event')} starts {when} ({start:%Y-%m-%d}{time_text})."
+
+
+class ReminderScheduler:
+    def __init__(self, worker_id=None, lookahead=LOOKAHEAD, refresh_seconds=REFRESH_SECONDS,
+                 batch_size=CLAIM_BATCH_SIZE, clock=datetime.utcnow):
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self.lookahead = lookahead
+        self.refresh_seconds = refresh_seconds
+        self.batch_size = batch_size
+        self.clock = clock
+        self.stats = {"claimed": 0, "sent": 0, "notifications": 0, "skipped": 0, "retried": 0, "failed": 0}
+        self._lock = threading.Lock()
+        self._heap = []
+        self._queued = {}  # task id -> scheduledFor of its live heap entry
+        self._loaded_until = None
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def add(self, task):
+        """Queue a task written after the last load if it falls inside the loaded window."""
+        with self._lock:
+            if self._loaded_until is None or task["scheduledFor"] > self._loaded_until:
+                return False
+            # A rescheduled task's entry at its old time stays in the heap and is ignored when popped
+            heapq.heappush(self._heap, (task["scheduledFor"], task["_id"]))
+            self._queued[task["_id"]] = task["scheduledFor"]
+        self._wake.set()
+        return True
+
+    def load(self, now=None):
+        """Queue every task due before now + lookahead: one range read on the status_scheduledFor index."""
+        now = now or self.clock()
+        until = now + self.lookahead
+        cursor = scheduled_task_collection.find(
+            {"status": {"$in": ["pending", "claimed"]}, "scheduledFor": {"$lte": until}},
+            {"scheduledFor": 1, "status": 1, "claimedUntil": 1}
+        ).sort("scheduledFor", 1)
+        tasks = list(cursor)
+        loaded = 0
+        with self._lock:
+            for task in tasks:
+                if task["status"] == "claimed" and task.get("claimedUntil") and task["claimedUntil"] > now:
+                    continue  # another worker holds a live lease
+                if self._queued.get(task["_id"]) != task["scheduledFor"]:
+                    heapq.heappush(self._heap, (task["scheduledFor"], task["_id"]))
+                    self._queued[task["_id"]] = task["scheduledFor"]
+                    loaded += 1
+            self._loaded_until = until
+        return loaded
+
+    def next_due(self):
+        with self._lock:
+            return self._heap[0][0] if self._heap else None
+
+    def run_due(self, now=None):
+        """Claim and deliver up to batch_size due tasks; returns how many were taken off the heap."""
+        now = now or self.clock()
+        ids = []
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now and len(ids) < self.batch_size:
+                when, tid = heapq.heappop(self._heap)
+                if self._queued.get(tid) == when:
+                    del self._queued[tid]
+                    ids.append(tid)
+        if ids:
+            tasks = self.claim(ids, now)
+            if tasks:
+                self.deliver(tasks, now)
+        return len(ids)
+
+    def claim(self, ids, now):
+        token = uuid.uuid4().hex
+        scheduled_task_collection.update_many(
+            {"_id": {"$in": ids}, "scheduledFor": {"$lte": now},
+             "$or": [{"status": "pending"}, {"status": "claimed", "claimedUntil": {"$lt": now}}]},
+            {"$set": {"status": "claimed", "claimedBy": self.worker_id, "claimToken": token,
+                      "claimedUntil": now + LEASE},
+             "$inc": {"attempts": 1}}
+        )
+        # Only the tasks this worker won carry its token
+        tasks = list(scheduled_task_collection.find({"_id": {"$in": ids}, "claimToken": token}))
+        self.stats["claimed"] += len(tasks)
+        return tasks
+
+    def deliver(self, tasks, now):
+        """Send one reminder per event for the claimed tasks, with batched reads and writes."""
+        by_event = {}
+        for task in tasks:
+            by_event.setdefault(task["eventId"], []).append(task)
+        oids = [ObjectId(e) for e in by_event if ObjectId.is_valid(e)]
+        events = list(event_collection.find({"_id": {"$in": oids}}, EVENT_FIELDS))
+        recipients = notification_fanout.recipients_by_event(events)
+
+        docs, sent, skipped = [], [], []
+        for event in events:
+            event_id = str(event["_id"])
+            start = event_start(event)
+            event_tasks = by_event.pop(event_id)
+            if start is None or start <= now or event.get("status") == "Cancelled":
+                skipped += event_tasks
+                continue
+            # After downtime both reminders can be due at once; one message covers them
+            message = reminder_message(event, start, now)
+            metadata = {"eventId": event_id, "reminder": max(event_tasks, key=lambda t: t["scheduledFor"])["offset"]}
+            docs += [notification_fanout.build_notification(u, "Event reminder", message, "EVENT_REMINDER",
+                                                            metadata=metadata, now=now)
+                     for u in recipients.get(event_id, [])]
+            sent += event_tasks
+        for event_tasks in by_event.values():
+            skipped += event_tasks  # event no longer exists
+
+        try:
+            notification_fanout.insert_notifications(docs)
+        except Exception:
+            logger.exception("Reminder delivery failed for %d tasks", len(sent))
+            self.retry(sent, now)
+            sent = []
+        self.finish(sent, "done", now)
+        self.finish(skipped, "skipped", now)
+        self.stats["sent"] += len(sent)
+        self.stats["skipped"] += len(skipped)
+        if sent:
+            self.stats["notifications"] += len(docs)
+
+    def finish(self, tasks, status, now):
+        if tasks:
+            scheduled_task_collection.update_many(
+                {"_id": {"$in": [t["_id"] for t in tasks]}, "claimedBy": self.worker_id},
+                {"$set": {"status": status, "completedAt": now}, "$unset": {"claimToken": "", "claimedUntil": ""}}
+            )
+
+    def retry(self, tasks, now):
+        ops = []
+        for task in tasks:
+            if task.get("attempts", 1) >= MAX_ATTEMPTS:
+                update = {"status": "failed", "completedAt": now}
+                self.stats["failed"] += 1
+            else:
+                retry_at = now + RETRY_DELAY * task.get("attempts", 1)
+                update = {"status": "pending", "scheduledFor": retry_at}
+                self.stats["retried"] += 1
+                self.add({"_id": task["_id"], "scheduledFor": retry_at})
+            ops.append(UpdateOne({"_id": task["_id"], "claimedBy": self.worker_id},
+                                 {"$set": update, "$unset": {"claimToken": "", "claimedUntil": ""}}))
+        if ops:
+            scheduled_task_collection.bulk_write(ops, ordered=False)
+
+    def run_forever(self):
+        next_refresh = 0
+        while not self._stop.is_set():
+            try:
+                if time.monotonic() >= next_refresh:
+                    self.load()
+                    next_refresh = time.monotonic() + self.refresh_seconds
+                while self.run_due():
+                    pass
+            except Exception:
+                # Popped tasks are still pending or leased in Mongo; the next load picks them up
+                logger.exception("Reminder scheduler iteration failed")
+            timeout = next_refresh - time.monotonic()
+            due = self.next_due()
+            if due is not None:
+                timeout = min(timeout, (due - self.clock()).total_seconds())
+            self._wake.wait(max(timeout, 0.05))
+            self._wake.clear()
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self.run_forever, name="reminder-scheduler", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout=5):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+
+_scheduler = None
+
+def get_scheduler():
+    return _scheduler
+
+def start_scheduler(**kwargs):
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = ReminderScheduler(**kwargs)
+    return _scheduler.start()
+
+def stop_scheduler():
+    global _scheduler
+    if _scheduler is not None:
+        _scheduler.stop()
+        _scheduler = None
+
+def wake(tasks):
+    """Hand freshly scheduled tasks to this process's scheduler, if one is running."""
+    scheduler = _scheduler
+    if scheduler is not None:
+        for task in tasks:
+            scheduler.add(task)
@@ -0,0 +1,239 @@
+import hashlib
+import logging
+import threading
+from datetime import datetime, timedelta
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+from app.database import scan_collection
+from app.services import participation_bulk
+from app.utils.dates import parse_date
+
+# Check-in/check-out scans. The request path only appends to the scans
+# collection:
+#   {_id: idempotency key, userId, eventId, kind: "in"|"out", at, receivedAt, compacted}
+# so a retried or re-synced scan is a duplicate-key no-op. ScanCompactor later
+# pairs each volunteer's scans per event into hours and writes them to the
+# participation record with participation_bulk.apply_bulk, which keeps the
+# per-user and org rollups in step. Scans are never rewritten apart from
+# the compacted marker.
+
+logger = logging.getLogger("app.scans")
+
+KINDS = ("in", "out")
+MAX_SCANS_PER_BATCH = 5000
+COMPACT_BATCH_SIZE = 5000
+# A check-in left open longer than this (a forgotten check-out) earns no hours
+MAX_SHIFT = timedelta(hours=16)
+
+
+def scan_key(user_id, event_id, kind, at):
+    # Without a client key, the same scan re-sent with the same timestamp still dedupes
+    return hashlib.sha1(f"{user_id}|{event_id}|{kind}|{at.isoformat()}".encode()).hexdigest()
+
+def scan_document(data, kind, key=None, now=None):
+    """Validated scan from a request body; raises ValueError."""
+    if not isinstance(data, dict) or not data.get("userId") or not data.get("eventId"):
+        raise ValueError("Missing userId or eventId")
+    if kind not in KINDS:
+        raise ValueError(f"Unknown scan kind: {kind}")
+    now = now or datetime.utcnow()
+    raw_at = data.get("at") or data.get("checkInTime" if kind == "in" else "checkOutTime")
+    at = parse_date(raw_at) if raw_at else now
+    if at is None:
+        raise ValueError(f"Invalid scan time: {raw_at}")
+    user_id, event_id = str(data["userId"]), str(data["eventId"])
+    return {
+        "_id": str(data.get("scanId") or key or scan_key(user_id, event_id, kind, at)),
+        "userId": user_id,
+        "eventId": event_id,
+        "kind": kind,
+        "at": at,
+        "receivedAt": now,
+        "compacted": False,
+    }
+
+def batch_documents(items, now=None):
+    """(docs, results) for an offline-synced list; invalid items are reported, not raised."""
+    now = now or datetime.utcnow()
+    docs, results = [], []
+    for i, item in enumerate(items):
+        try:
+            kind = item.get("kind") if isinstance(item, dict) else None
+            doc = scan_document(item, kind, now=now)
+        except ValueError as e:
+            results.append({"index": i, "result": "invalid", "error": str(e)})
+            continue
+        docs.append(doc)
+        results.append({"index": i, "result": "accepted", "scanId": doc["_id"]})
+    return docs, results
+
+def duplicate_indexes(error):
+    """Positions in an unordered insert_many that failed only because the scan was already logged."""
+    duplicates, failed = set(), {}
+    for write_error in error.details.get("writeErrors", []):
+        if write_error.get("code") == 11000:
+            duplicates.add(write_error["index"])
+        else:
+            failed[write_error["index"]] = write_error.get("errmsg")
+    return duplicates, failed
+
+def mark_inserted(results, duplicates, failed):
+    """Relabel the accepted results whose insert failed; indexes count only the valid scans."""
+    positions = [r for r in results if r["result"] == "accepted"]
+    for doc_index, result in enumerate(positions):
+        if doc_index in duplicates:
+            result["result"] = "duplicate"
+        elif doc_index in failed:
+            result.update(result="error", error=failed[doc_index])
+    return results
+
+def record_scan(doc):
+    """Append one scan; False when it was already logged."""
+    try:
+        scan_collection.insert_one(doc)
+    except DuplicateKeyError:
+        return False
+    wake()
+    return True
+
+def record_scans(items):
+    docs, results = batch_documents(items)
+    duplicates, failed = set(), {}
+    if docs:
+        try:
+            scan_collection.insert_many(docs, ordered=False)
+        except BulkWriteError as e:
+            duplicates, failed = duplicate_indexes(e)
+        wake()
+    return mark_inserted(results, duplicates, failed)
+
+
+def pair_hours(scans, max_shift=MAX_SHIFT):
+    """(hours, first check-in, last check-out) from one volunteer's scans at one event.
+
+    Scans are paired in time order: repeated check-ins keep the earliest open
+    one, and a check-out with nothing open is ignored.
+    """
+    hours = 0.0
+    opened = first_in = last_out = None
+    for scan in sorted(scans, key=lambda s: (s["at"], s["kind"] != "in")):
+        if scan["kind"] == "in":
+            first_in = first_in or scan["at"]
+            opened = opened or scan["at"]
+        elif opened is not None:
+            shift = scan["at"] - opened
+            if shift <= max_shift:
+                hours += shift.total_seconds() / 3600
+            last_out = scan["at"]
+            opened = None
+    return round(hours, 2), first_in, last_out
+
+def compaction_entries(scans):
+    """participation_bulk entries for every (userId, eventId) in ``scans``."""
+    by_key = {}
+    for scan in scans:
+        by_key.setdefault((scan["userId"], scan["eventId"]), []).append(scan)
+    entries = []
+    for (user_id, event_id), key_scans in by_key.items():
+        hours, first_in, last_out = pair_hours(key_scans)
+        entry = {"userId": user_id, "eventId": event_id, "status": "Attended", "checkInTime": first_in}
+        # Until a shift is closed, hours logged by hand are left alone
+        if last_out is not None:
+            entry.update(hoursLogged=hours, checkOutTime=last_out)
+        entries.append(entry)
+    return entries
+
+def compact(limit=COMPACT_BATCH_SIZE):
+    """Fold up to ``limit`` pending scans into participation; returns how many were compacted."""
+    pending = list(scan_collection.find({"compacted": False}, {"userId": 1, "eventId": 1}).sort("at", 1).limit(limit))
+    if not pending:
+        return 0
+    keys = {(s["userId"], s["eventId"]) for s in pending}
+    # Every scan of a touched pair, so hours are recomputed from the whole log and reruns are harmless
+    scans = [
+        s for s in scan_collection.find(
+            {"userId": {"$in": list({k[0] for k in keys})}, "eventId": {"$in": list({k[1] for k in keys})}},
+            {"userId": 1, "eventId": 1, "kind": 1, "at": 1}
+        )
+        if (s["userId"], s["eventId"]) in keys
+    ]
+    entries = compaction_entries(scans)
+    for start in range(0, len(entries), participation_bulk.MAX_BULK_ENTRIES):
+        results = participation_bulk.apply_bulk(entries[start:start + participation_bulk.MAX_BULK_ENTRIES])
+        for result in results:
+            if result["result"] not in ("inserted", "updated"):
+                logger.warning("Scan compaction for %s failed: %s", entries[start + result["index"]], result)
+    # Scans logged after the read above stay pending for the next round
+    scan_collection.update_many({"_id": {"$in": [s["_id"] for s in pending]}},
+                                {"$set": {"compacted": True, "compactedAt": datetime.utcnow()}})
+    return len(pending)
+
+
+class ScanCompactor:
+    """Compacts pending scans on a daemon thread; wake() after a write starts a round early."""
+
+    def __init__(self, batch_size=COMPACT_BATCH_SIZE, poll_seconds=30, settle_seconds=1):
+        self.batch_size = batch_size
+        self.poll_seconds = poll_seconds
+        # After a wake-up, let a burst of arrivals accumulate into one round
+        self.settle_seconds = settle_seconds
+        self.stats = {"rounds": 0, "scans": 0}
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def run_once(self):
+        compacted = compact(self.batch_size)
+        self.stats["rounds"] += 1
+        self.stats["scans"] += compacted
+        return compacted
+
+    def run_forever(self):
+        while not self._stop.is_set():
+            try:
+                if self.run_once() == self.batch_size:
+                    continue
+            except Exception:
+                logger.exception("Scan compaction failed")
+            self._wake.wait(self.poll_seconds)
+            self._wake.clear()
+            self._stop.wait(self.settle_seconds)
+
+    def wake(self):
+        self._wake.set()
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self.run_forever, name="scan-compactor", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout=5):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+
+_compactor = None
+
+def get_compactor():
+    return _compactor
+
+def start_compactor(**kwargs):
+    global _compactor
+    if _compactor is None:
+        _compactor = ScanCompactor(**kwargs)
+    return _compactor.start()
+
+def stop_compactor():
+    global _compactor
+    if _compactor is not None:
+        _compactor.stop()
+        _compactor = None
+
+def wake():
+    compactor = _compactor
+    if compactor is not None:
+        compactor.wake()
@@ -0,0 +1,461 @@
+import os
+import threading
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+import numpy as np
+from app.database import event_collection, user_collection
+from app.utils.dates import parse_date, parse_time
+from app.services.interval_tree import IntervalTree
+from app.services.matching import DAYS_OF_WEEK, TIME_SLOTS
+
+# Schedule conflicts and "who is free" lookups. Each volunteer's confirmed
+# events are kept as UTC windows in an interval tree, loaded on first use with
+# one query per batch of volunteers. Weekly availability is a 168-bit
+# hour-of-week mask (bit day * 24 + hour, Monday first, in the event's local
+# time) saved next to the profile's availability section, so checking whether
+# someone can make an event is a subset test over three 64-bit words.
+
+SCHEDULE_INDEX_MAX_AGE_SECONDS = int(os.getenv("SCHEDULE_INDEX_MAX_AGE_SECONDS", "600"))
+
+# Events with a start time but no end time are assumed to run this long
+DEFAULT_SESSION_HOURS = 3
+# Longer date ranges are treated as their first month of daily sessions
+MAX_SESSION_DAYS = 31
+
+HOURS_PER_WEEK = 7 * 24
+MASK_WORDS = 3
+MASK_VERSION = 1
+DAY_HOURS = (1 << 24) - 1
+FULL_WEEK = (1 << HOURS_PER_WEEK) - 1
+
+WINDOW_FIELDS = ("name", "startDate", "endDate", "startTime", "endTime", "timezone")
+WINDOW_PROJECTION = {field: 1 for field in WINDOW_FIELDS}
+USER_PROJECTION = {"userId": 1, "availability": 1, "availabilityMask": 1}
+
+
+def _zone(name):
+    try:
+        return ZoneInfo(name) if isinstance(name, str) and name else timezone.utc
+    except (ZoneInfoNotFoundError, ValueError):
+        return timezone.utc
+
+def event_sessions(event):
+    """[(start, end)] in the event's local wall-clock time, one session per day of the event."""
+    start = parse_date(event.get("startDate"))
+    if start is None:
+        return []
+    end = parse_date(event.get("endDate"))
+    days = (end.date() - start.date()).days + 1 if end else 1
+    start_minutes = parse_time(event.get("startTime"))
+    end_minutes = parse_time(event.get("endTime"))
+    first = datetime(start.year, start.month, start.day)
+
+    sessions = []
+    for offset in range(max(1, min(days, MAX_SESSION_DAYS))):
+        day = first + timedelta(days=offset)
+        if start_minutes is None:
+            sessions.append((day, day + timedelta(days=1)))
+            continue
+        session_start = day + timedelta(minutes=start_minutes)
+        if end_minutes is None:
+            session_end = session_start + timedelta(hours=DEFAULT_SESSION_HOURS)
+        else:
+            session_end = day + timedelta(minutes=end_minutes)
+            if session_end <= session_start:
+                session_end += timedelta(days=1)
+        sessions.append((session_start, session_end))
+    return sessions
+
+def event_windows(event):
+    """The event's sessions as naive UTC datetimes, for comparing events in different time zones."""
+    zone = _zone(event.get("timezone"))
+
+    def to_utc(moment):
+        return moment.replace(tzinfo=zone).astimezone(timezone.utc).replace(tzinfo=None)
+
+    return [(to_utc(start), to_utc(end)) for start, end in event_sessions(event)]
+
+
+# --- weekly availability masks ---
+
+def hour_bit(moment):
+    return 1 << (moment.weekday() * 24 + moment.hour)
+
+def availability_mask(availability):
+    """Hour-of-week bitmask for an availability section; 0 when no days or time slots are given.
+
+    Days without time slots mean the whole day, and time slots without days
+    mean those hours on every day.
+    """
+    if not isinstance(availability, dict):
+        return 0
+    days = {d.lower() for d in availability.get("availableDays") or [] if isinstance(d, str)}
+    slots = {s.lower() for s in availability.get("availableTimeSlots") or [] if isinstance(s, str)}
+    day_indexes = [i for i, day in enumerate(DAYS_OF_WEEK) if day in days]
+    hours = 0
+    for slot in slots:
+        if slot in TIME_SLOTS:
+            low, high = TIME_SLOTS[slot]
+            hours |= ((1 << (high - low)) - 1) << low
+    if not day_indexes and not hours:
+        return 0
+    if not day_indexes:
+        day_indexes = range(len(DAYS_OF_WEEK))
+    hours = hours or DAY_HOURS
+    mask = 0
+    for day in day_indexes:
+        mask |= hours << (day * 24)
+    return mask
+
+def _date_keys(values):
+    keys = {parse_date(v).date().isoformat() for v in values or [] if parse_date(v)}
+    return sorted(keys)
+
+def availability_document(availability):
+    """The availabilityMask field saved with an availability section."""
+    availability = availability if isinstance(availability, dict) else {}
+    return {
+        "weekly": f"{availability_mask(availability):0{HOURS_PER_WEEK // 4}x}",
+        "specificDates": _date_keys(availability.get("specificDates")),
+        "blackoutDates": _date_keys(availability.get("blackoutDates")),
+        "version": MASK_VERSION,
+    }
+
+def user_mask_document(user):
+    """A profile's stored availabilityMask, or one derived from its availability for older profiles."""
+    stored = user.get("availabilityMask")
+    if isinstance(stored, dict) and stored.get("version") == MASK_VERSION:
+        return stored
+    return availability_document(user.get("availability"))
+
+def mask_words(mask):
+    return [(mask >> (64 * i)) & 0xFFFFFFFFFFFFFFFF for i in range(MASK_WORDS)]
+
+def required_hours(event):
+    """{date: hour-of-week bits the event occupies on that date}; None for untimed (all-day) dates.
+
+    Sessions running past midnight put their later hours on the next date.
+    """
+    required = {}
+    timed = parse_time(event.get("startTime")) is not None
+    for start, end in event_sessions(event):
+        if not timed:
+            required[start.date()] = None
+            continue
+        hour = start.replace(minute=0, second=0, microsecond=0)
+        while hour < end:
+            required[hour.date()] = (required.get(hour.date()) or 0) | hour_bit(hour)
+            hour += timedelta(hours=1)
+    return required
+
+
+class AvailabilityMatrix:
+    """Every volunteer's weekly availability mask as rows of three uint64 words.
+
+    Blackout and specific dates are sparse, so they are kept as
+    date -> rows maps; a specific date makes the volunteer available that day
+    whatever the weekly mask says, and a blackout rules the day out.
+    """
+
+    def __init__(self, users=()):
+        self._lock = threading.Lock()
+        self.user_ids = []
+        self.row_of = {}
+        self.weekly = np.zeros((0, MASK_WORDS), dtype=np.uint64)
+        self.present = np.zeros(0, dtype=bool)
+        self.specific = {}
+        self.blackouts = {}
+        self._dates = {}
+        for user in users:
+            if user.get("userId"):
+                self._set(user["userId"], user_mask_document(user))
+        self.built_at = datetime.utcnow()
+
+    def __len__(self):
+        return int(self.present.sum())
+
+    def _row(self, user_id):
+        row = self.row_of.get(user_id)
+        if row is None:
+            row = len(self.user_ids)
+            self.row_of[user_id] = row
+            self.user_ids.append(user_id)
+            if row >= len(self.present):
+                grow = max(len(self.present), 64)
+                self.weekly = np.vstack([self.weekly, np.zeros((grow, MASK_WORDS), dtype=np.uint64)])
+                self.present = np.concatenate([self.present, np.zeros(grow, dtype=bool)])
+        return row
+
+    def _clear_dates(self, row):
+        for kind, dates in self._dates.pop(row, {}).items():
+            table = self.specific if kind == "specific" else self.blackouts
+            for day in dates:
+                table[day].discard(row)
+
+    def _set(self, user_id, document):
+        row = self._row(user_id)
+        self._clear_dates(row)
+        weekly = int(document.get("weekly") or "0", 16)
+        # No weekly pattern means the volunteer never said, so only dates restrict them
+        self.weekly[row] = mask_words(weekly or FULL_WEEK)
+        self.present[row] = True
+        dates = {kind: [parse_date(v).date() for v in document.get(field) or [] if parse_date(v)]
+                 for kind, field in (("specific", "specificDates"), ("blackout", "blackoutDates"))}
+        for kind, days in dates.items():
+            table = self.specific if kind == "specific" else self.blackouts
+            for day in days:
+                table.setdefault(day, set()).add(row)
+        self._dates[row] = dates
+
+    def update(self, user_id, document):
+        with self._lock:
+            self._set(user_id, document)
+
+    def remove(self, user_id):
+        with self._lock:
+            row = self.row_of.get(user_id)
+            if row is not None:
+                self._clear_dates(row)
+                self.present[row] = False
+
+    def _rows(self, table, day):
+        mask = np.zeros(len(self.present), dtype=bool)
+        rows = list(table.get(day, ()))
+        mask[rows] = True
+        return mask
+
+    def free_ids(self, event):
+        """User ids whose availability covers every hour of the event."""
+        required = required_hours(event)
+        with self._lock:
+            free = self.present.copy()
+            for day, bits in required.items():
+                weekly_bits = bits if bits is not None else DAY_HOURS << (day.weekday() * 24)
+                words = np.array(mask_words(weekly_bits), dtype=np.uint64)
+                overlap = self.weekly & words
+                if bits is None:
+                    fits = overlap.any(axis=1)
+                else:
+                    fits = (overlap == words).all(axis=1)
+                fits |= self._rows(self.specific, day)
+                free &= fits & ~self._rows(self.blackouts, day)
+            return [self.user_ids[row] for row in np.flatnonzero(free)]
+
+
+def _insert(tree, event):
+    """Replace the event's windows in ``tree``; returns its id."""
+    event_id = str(event["_id"])
+    tree.discard(event_id)
+    summary = {"eventId": event_id, "name": event.get("name")}
+    for start, end in event_windows(event):
+        if start < end:
+            tree.add(start, end, event_id, summary)
+    return event_id
+
+
+class ScheduleIndex:
+    """Per-volunteer interval trees of the UTC windows of the events they are registered for.
+
+    Trees are loaded lazily; ``trees`` fetches every missing or expired
+    volunteer in one query, outside the lock, and only locks to swap the new
+    trees in. ``_attendees`` maps an event to the loaded volunteers holding it
+    so event edits only touch those trees, and ``_events`` is the reverse map
+    used to unload a volunteer.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._trees = {}
+        self._loaded_at = {}
+        self._attendees = {}
+        self._events = {}
+        # Bumped by every registration and event write; a load that overlapped one is kept but expires at once
+        self._writes = 0
+        self.lookups = 0
+
+    def _track(self, user_id, event_id):
+        self._attendees.setdefault(event_id, set()).add(user_id)
+        self._events.setdefault(user_id, set()).add(event_id)
+
+    def _add(self, user_id, event):
+        self._track(user_id, _insert(self._trees[user_id], event))
+
+    def _drop(self, user_id, event_id):
+        tree = self._trees.get(user_id)
+        if tree is not None:
+            tree.discard(event_id)
+        attendees = self._attendees.get(event_id)
+        if attendees is not None:
+            attendees.discard(user_id)
+            if not attendees:
+                del self._attendees[event_id]
+        events = self._events.get(user_id)
+        if events is not None:
+            events.discard(event_id)
+
+    def _unload(self, user_id):
+        for event_id in list(self._events.pop(user_id, ())):
+            self._drop(user_id, event_id)
+        self._trees.pop(user_id, None)
+        self._loaded_at.pop(user_id, None)
+
+    def trees(self, user_ids):
+        """{user_id: IntervalTree} for the given volunteers, loading any that are missing or expired."""
+        user_ids = [u for u in dict.fromkeys(user_ids) if u]
+        now = datetime.utcnow()
+        with self._lock:
+            missing = [u for u in user_ids if u not in self._trees or
+                       (now - self._loaded_at[u]).total_seconds() >= SCHEDULE_INDEX_MAX_AGE_SECONDS]
+            if not missing:
+                return {u: self._trees[u] for u in user_ids}
+            writes = self._writes
+
+        loaded = {user_id: (IntervalTree(), []) for user_id in missing}
+        projection = {**WINDOW_PROJECTION, "registeredVolunteers": 1}
+        for event in event_collection.find({"registeredVolunteers": {"$in": missing}}, projection):
+            for user_id in loaded.keys() & set(event.get("registeredVolunteers") or ()):
+                tree, event_ids = loaded[user_id]
+                event_ids.append(_insert(tree, event))
+
+        with self._lock:
+            # A write during the read may be missing from it, so those trees reload on the next lookup
+            loaded_at = now if writes == self._writes else datetime.min
+            for user_id, (tree, event_ids) in loaded.items():
+                self._unload(user_id)
+                self._trees[user_id] = tree
+                self._loaded_at[user_id] = loaded_at
+                for event_id in event_ids:
+                    self._track(user_id, event_id)
+            return {u: self._trees[u] for u in user_ids}
+
+    def conflicts(self, user_id, event):
+        """[{eventId, name, start, end}] for the volunteer's other events overlapping ``event``."""
+        windows = event_windows(event)
+        # Undated events cannot overlap anything, so there is no tree to load
+        if not windows or not user_id:
+            return []
+        tree = self.trees([user_id])[user_id]
+        event_id = str(event.get("_id"))
+        found = {}
+        with self._lock:
+            self.lookups += 1
+            for start, end in windows:
+                for item_start, item_end, key, summary in tree.overlapping(start, end):
+                    if key != event_id and key not in found:
+                        found[key] = {**summary, "start": item_start, "end": item_end}
+        return list(found.values())
+
+    def busy_ids(self, user_ids, event):
+        """The subset of ``user_ids`` already registered for something overlapping ``event``."""
+        windows = event_windows(event)
+        if not windows:
+            return set()
+        trees = self.trees(user_ids)
+        event_id = str(event.get("_id"))
+        busy = set()
+        with self._lock:
+            self.lookups += len(trees)
+            for user_id, tree in trees.items():
+                # The event itself is only in the tree if the volunteer already registered for it
+                if event_id in tree:
+                    continue
+                if any(tree.overlaps(start, end) for start, end in windows):
+                    busy.add(user_id)
+        return busy
+
+    def registered(self, user_id, event):
+        with self._lock:
+            self._writes += 1
+            if user_id in self._trees:
+                self._add(user_id, event)
+
+    def unregistered(self, user_id, event_id):
+        with self._lock:
+            self._writes += 1
+            self._drop(user_id, str(event_id))
+
+    def event_changed(self, event):
+        event_id = str(event["_id"])
+        with self._lock:
+            self._writes += 1
+            for user_id in list(self._attendees.get(event_id, ())):
+                self._drop(user_id, event_id)
+            for user_id in event.get("registeredVolunteers") or []:
+                if user_id in self._trees:
+                    self._add(user_id, event)
+
+    def event_deleted(self, event_id):
+        event_id = str(event_id)
+        with self._lock:
+            self._writes += 1
+            for user_id in list(self._attendees.get(event_id, ())):
+                self._drop(user_id, event_id)
+
+    def forget(self, user_id):
+        with self._lock:
+            self._writes += 1
+            self._unload(user_id)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "volunteers": len(self._trees),
+                "windows": sum(len(tree) for tree in self._trees.values()),
+                "events": len(self._attendees),
+                "lookups": self.lookups,
+            }
+
+
+_index = ScheduleIndex()
+_availability = None
+_availability_lock = threading.Lock()
+
+def get_index():
+    return _index
+
+def get_availability(rebuild=False):
+    global _availability
+    with _availability_lock:
+        expired = _availability is not None and \
+            (datetime.utcnow() - _availability.built_at).total_seconds() >= SCHEDULE_INDEX_MAX_AGE_SECONDS
+        if _availability is None or rebuild or expired:
+            _availability = AvailabilityMatrix(user_collection.find({}, USER_PROJECTION))
+        return _availability
+
+def reset_indexes():
+    global _index, _availability
+    with _availability_lock:
+        _index = ScheduleIndex()
+        _availability = None
+
+def free_volunteers(event):
+    """Volunteers whose availability covers the event and who have nothing else booked then."""
+    registered = set(event.get("registeredVolunteers") or ())
+    candidates = [u for u in get_availability().free_ids(event) if u not in registered]
+    busy = _index.busy_ids(candidates, event)
+    return [u for u in candidates if u not in busy]
+
+# Write hooks for the events and user_profile routes; unloaded volunteers have nothing to patch
+def on_registered(user_id, event):
+    if user_id and event:
+        _index.registered(user_id, event)
+
+def on_unregistered(user_id, event_id):
+    if user_id:
+        _index.unregistered(user_id, event_id)
+
+def on_event_changed(event):
+    if event:
+        _index.event_changed(event)
+
+def on_event_deleted(event_id):
+    _index.event_deleted(event_id)
+
+def on_availability_updated(user_id, data):
+    if _availability is not None:
+        _availability.update(user_id, availability_document(data))
+
+def on_user_deleted(user_id):
+    _index.forget(user_id)
+    if _availability is not None:
+        _availability.remove(user_id)
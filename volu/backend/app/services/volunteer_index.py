@@ -0,0 +1,162 @@
+import threading
+from array import array
+from bisect import bisect_left, insort
+import numpy as np
+from app.database import user_collection
+from app.services.matching import skill_names, cause_names
+
+SKILL = "skill"
+CAUSE = "cause"
+
+USER_PROJECTION = {"userId": 1, "skills": 1, "preferences.causes": 1}
+
+
+def _normalize(names):
+    return {n.strip().lower() for n in names if isinstance(n, str) and n.strip()}
+
+
+class VolunteerIndex:
+    """Inverted index from skill/cause names to sorted volunteer ids.
+
+    Volunteers get a dense integer id the first time they are seen; each
+    posting list is an ``array("I")`` of those ids kept in ascending order,
+    so lookups are a handful of sorted-array intersections or unions.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._ids = {}
+        self._user_ids = []
+        self._terms = {}
+        self._postings = {}
+        self.lookups = 0
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_documents(cls, users):
+        index = cls()
+        for user in users:
+            if user.get("userId"):
+                index.set_terms(user["userId"], SKILL, skill_names(user))
+                index.set_terms(user["userId"], CAUSE, cause_names(user))
+        return index
+
+    def __len__(self):
+        return len(self._terms)
+
+    def _doc_id(self, user_id):
+        doc_id = self._ids.get(user_id)
+        if doc_id is None:
+            doc_id = len(self._user_ids)
+            self._ids[user_id] = doc_id
+            self._user_ids.append(user_id)
+        if user_id not in self._terms:
+            self._terms[user_id] = {SKILL: set(), CAUSE: set()}
+        return doc_id
+
+    # Replace one kind of term for a user, touching only the postings that changed
+    def set_terms(self, user_id, kind, names):
+        new_terms = _normalize(names)
+        with self._lock:
+            doc_id = self._doc_id(user_id)
+            old_terms = self._terms[user_id][kind]
+            for term in old_terms - new_terms:
+                self._discard(kind, term, doc_id)
+            for term in new_terms - old_terms:
+                postings = self._postings.setdefault((kind, term), array("I"))
+                insort(postings, doc_id)
+            self._terms[user_id][kind] = new_terms
+
+    def remove(self, user_id):
+        with self._lock:
+            terms = self._terms.pop(user_id, None)
+            if terms is None:
+                return
+            doc_id = self._ids[user_id]
+            for kind, names in terms.items():
+                for term in names:
+                    self._discard(kind, term, doc_id)
+
+    def _discard(self, kind, term, doc_id):
+        postings = self._postings.get((kind, term))
+        if postings is None:
+            return
+        pos = bisect_left(postings, doc_id)
+        if pos < len(postings) and postings[pos] == doc_id:
+            del postings[pos]
+        if not postings:
+            del self._postings[(kind, term)]
+
+    def _lookup(self, kind, names):
+        lists = []
+        for term in _normalize(names):
+            self.lookups += 1
+            postings = self._postings.get((kind, term))
+            if postings:
+                self.hits += 1
+                lists.append(np.frombuffer(postings, dtype=np.uint32).copy())
+            else:
+                self.misses += 1
+                lists.append(np.zeros(0, dtype=np.uint32))
+        return lists
+
+    def candidate_ids(self, skills=(), causes=(), match="any"):
+        """Return volunteer ids having any (or all) of the given skills and causes."""
+        with self._lock:
+            lists = self._lookup(SKILL, skills) + self._lookup(CAUSE, causes)
+            if not lists:
+                return []
+            # Start from the shortest list so intersections shrink fast
+            lists.sort(key=len)
+            result = lists[0]
+            for postings in lists[1:]:
+                if match == "all":
+                    if not len(result):
+                        break
+                    result = np.intersect1d(result, postings, assume_unique=True)
+                else:
+                    result = np.union1d(result, postings)
+            return [self._user_ids[i] for i in result]
+
+    def stats(self):
+        with self._lock:
+            return {
+                "volunteers": len(self._terms),
+                "skillTerms": sum(1 for kind, _ in self._postings if kind == SKILL),
+                "causeTerms": sum(1 for kind, _ in self._postings if kind == CAUSE),
+                "postings": sum(len(p) for p in self._postings.values()),
+                "postingBytes": sum(p.itemsize * len(p) for p in self._postings.values()),
+                "lookups": self.lookups,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+_index = None
+_index_lock = threading.Lock()
+
+def get_index():
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = VolunteerIndex.from_documents(user_collection.find({}, USER_PROJECTION))
+        return _index
+
+def reset_index():
+    global _index
+    with _index_lock:
+        _index = None
+
+# Write hooks for the user_profile routes; a never-built index has nothing to patch
+def on_skills_updated(user_id, data):
+    if _index is not None:
+        _index.set_terms(user_id, SKILL, skill_names({"skills": data}))
+
+def on_preferences_updated(user_id, data):
+    if _index is not None:
+        _index.set_terms(user_id, CAUSE, cause_names({"preferences": data}))
+
+def on_user_deleted(user_id):
+    if _index is not None:
+        _index.remove(user_id)
@@ -1,9 +1,103 @@
 # tests/conftest.py
+import uuid
 import pytest
+import mongomock.collection
+from flask import Flask
+from mongomock import MongoClient
 from app import create_app
+from app.services import event_index, matching, schedule, volunteer_index
+from app.utils.json_provider import BSONJSONProvider
+from app.utils.pagination import CountCache
+
+# mongomock 4.3 predates the `sort` argument PyMongo >= 4.11 passes when
+# UpdateOne/ReplaceOne are added to a bulk; accept and ignore it
+def _ignoring_sort(add):
+    def add_ignoring_sort(self, *args, sort=None, **kwargs):
+        return add(self, *args, **kwargs)
+    return add_ignoring_sort
+
+for _name in ("add_update", "add_replace"):
+    setattr(mongomock.collection.BulkOperationBuilder, _name,
+            _ignoring_sort(getattr(mongomock.collection.BulkOperationBuilder, _name)))
+
+# Modules bind the app.database collections at import time, so the db fixture
+# patches every binding: collection name -> the module attributes holding it
+COLLECTION_PATCHES = {
+    "events": ["app.routes.events.event_collection", "app.routes.matching.event_collection",
+               "app.routes.participation.event_collection", "app.services.notification_fanout.event_collection",
+               "app.services.participation_stats.event_collection", "app.services.reminders.event_collection",
+               "app.services.org_stats.event_collection", "app.services.participation_includes.event_collection",
+               "app.services.certificates.event_collection", "app.services.event_index.event_collection",
+               "app.services.schedule.event_collection"],
+    "participation": ["app.routes.participation.participation_collection",
+                      "app.services.participation_stats.participation_collection",
+                      "app.services.participation_bulk.participation_collection",
+                      "app.services.notification_fanout.participation_collection",
+                      "app.services.matching.participation_collection",
+                      "app.services.org_stats.participation_collection",
+                      "app.services.certificates.participation_collection"],
+    "participation_stats": ["app.services.participation_stats.participation_stats_collection",
+                            "app.services.org_stats.participation_stats_collection"],
+    "org_stats": ["app.services.org_stats.org_stats_collection"],
+    "notifications": ["app.routes.notifications.notifications_collection",
+                      "app.services.notification_fanout.notifications_collection"],
+    "notification_counters": ["app.services.notification_fanout.notification_counters_collection"],
+    "scheduled_tasks": ["app.services.reminders.scheduled_task_collection"],
+    "outbox": ["app.services.delivery.outbox_collection"],
+    "scans": ["app.services.scans.scan_collection"],
+    "certificates": ["app.services.certificates.certificate_collection"],
+    "users": ["app.routes.user_profile.user_collection", "app.services.matching.user_collection",
+              "app.services.volunteer_index.user_collection", "app.services.delivery.user_collection",
+              "app.services.participation_includes.user_collection", "app.services.schedule.user_collection"],
+}
+
+# Where create_app() mounts each blueprint; the others use their own url_prefix
+BLUEPRINT_PREFIXES = {
+    "notifications": "/api/notifications",
+    "participation": "/api/participation",
+    "events": "/api/events",
+    "matching": "/api/matching",
+}
+
+def reset_indexes():
+    matching.reset_matrix()
+    volunteer_index.reset_index()
+    event_index.reset_index()
+    schedule.reset_indexes()
+
+@pytest.fixture
+def db(monkeypatch):
+    """A fresh mongomock database behind every collection binding, with empty in-memory indexes."""
+    db = MongoClient().get_database(f"test_{uuid.uuid4().hex}")
+    for name, targets in COLLECTION_PATCHES.items():
+        for target in targets:
+            monkeypatch.setattr(target, db[name])
+    monkeypatch.setattr("app.routes.participation.participation_counts", CountCache())
+    reset_indexes()
+    yield db
+    reset_indexes()
+
+@pytest.fixture
+def flask_client():
+    """flask_client(*blueprints): a test client for an app serving just those blueprints."""
+    def build(*blueprints):
+        app = Flask(__name__)
+        app.json = BSONJSONProvider(app)
+        app.config["TESTING"] = True
+        for blueprint in blueprints:
+            app.register_blueprint(blueprint, url_prefix=BLUEPRINT_PREFIXES.get(blueprint.name))
+        return app.test_client()
+    return build
 
 @pytest.fixture
 def client():
     app = create_app(testing=True)
     with app.test_client() as client:
         yield client
+
+@pytest.fixture(autouse=True)
+def fresh_cache():
+    # Cached responses must not leak between tests that reuse ids
+    from app.utils.cache import LRUCache, reset_cache
+    yield reset_cache(LRUCache())
+    reset_cache(None)
@@ -0,0 +1,100 @@
+import pytest
+from app.routes.events import events_bp
+from app.routes.participation import participation_bp
+from app.services import certificates
+
+@pytest.fixture
+def client(flask_client):
+    return flask_client(events_bp, participation_bp)
+
+@pytest.fixture
+def renders(monkeypatch):
+    rendered = []
+    render_many = certificates.render_many
+
+    def counting(fields):
+        rendered.extend(fields)
+        return render_many(fields)
+    monkeypatch.setattr(certificates, "render_many", counting)
+    yield rendered
+    certificates.shutdown_executor()
+
+def attend(client, event_id, user_id, hours, verified=True):
+    client.post("/api/participation/record/bulk", json={"entries": [
+        {"userId": user_id, "eventId": event_id, "status": "Attended", "hoursLogged": hours, "hoursVerified": verified}
+    ]})
+
+def test_bulk_generation_renders_each_certificate_once(client, db, renders):
+    event_id = client.post("/api/events/", json={"name": "River Cleanup", "startDate": "2030-04-12"}).get_json()["id"]
+    db.users.insert_one({"userId": "v0", "personalInfo": {"fullName": "Ada Lovelace"}})
+    for i in range(12):
+        attend(client, event_id, f"v{i}", 3)
+    attend(client, event_id, "unverified", 3, verified=False)
+
+    res = client.post(f"/api/participation/certificate/{event_id}", json={})
+    body = res.get_json()
+    assert res.status_code == 200 and body["summary"] == {"generated": 12, "cached": 0}
+    assert len(renders) == 12
+    assert next(f for f in renders if f["volunteerName"] == "Ada Lovelace")["eventDate"] == "April 12, 2030"
+
+    again = client.post(f"/api/participation/certificate/{event_id}", json={}).get_json()
+    assert again["summary"] == {"generated": 0, "cached": 12} and len(renders) == 12
+    assert [c["id"] for c in again["certificates"]] == [c["id"] for c in body["certificates"]]
+
+    pdf = client.get(body["certificates"][0]["imageUrl"])
+    assert pdf.status_code == 200 and pdf.mimetype == "application/pdf" and pdf.data.startswith(b"%PDF-1.4")
+    assert b"%%EOF" in pdf.data[-8:]
+
+def test_only_verified_hours_changes_invalidate(client, db, renders):
+    event_id = client.post("/api/events/", json={"name": "Food Bank"}).get_json()["id"]
+    attend(client, event_id, "v1", 2)
+    first = client.post(f"/api/participation/certificate/{event_id}", json={"userId": "v1"}).get_json()
+    assert first["metadata"]["hours"] == 2 and first["type"] == "certificate"
+
+    # Feedback and event edits keep the certificate; new verified hours replace it
+    client.post("/api/participation/log-feedback", json={"userId": "v1", "eventId": event_id, "feedback": "Great"})
+    client.put(f"/api/events/{event_id}?notify=false", json={"name": "Food Bank (Saturday)"})
+    assert client.post(f"/api/participation/certificate/{event_id}", json={"userId": "v1"}).get_json()["id"] == first["id"]
+    assert len(renders) == 1
+
+    attend(client, event_id, "v1", 5)
+    assert client.get("/api/participation/certificates?userId=v1").get_json() == []
+    second = client.post(f"/api/participation/certificate/{event_id}", json={"userId": "v1"}).get_json()
+    assert second["id"] != first["id"] and second["title"] == "Certificate of Service: Food Bank (Saturday)"
+    assert [c["id"] for c in client.get("/api/participation/certificates/v1").get_json()] == [second["id"]]
+    assert db.certificates.count_documents({}) == 1
+
+    attend(client, event_id, "v2", 1, verified=False)
+    assert client.post(f"/api/participation/certificate/{event_id}", json={"userId": "v2"}).status_code == 404
+
+def test_conditional_download(client, db, monkeypatch, renders):
+    monkeypatch.setattr(certificates, "CERTIFICATE_WORKERS", 0)
+    event_id = client.post("/api/events/", json={"name": "Tree Planting"}).get_json()["id"]
+    attend(client, event_id, "v1", 4)
+    url = client.post(f"/api/participation/certificate/{event_id}", json={"userId": "v1"}).get_json()["imageUrl"]
+
+    first = client.get(url)
+    assert "immutable" in first.headers["Cache-Control"]
+    db.certificates.drop()
+    cached = client.get(url, headers={"If-None-Match": first.headers["ETag"]})
+    assert cached.status_code == 304 and cached.data == b""
+    assert client.get(url).status_code == 404
+
+def test_template_version_changes_the_key(monkeypatch):
+    key = certificates.certificate_key("u", "e", 3)
+    assert certificates.certificate_key("u", "e", 3.0) == key
+    monkeypatch.setattr(certificates, "TEMPLATE_VERSION", "2")
+    assert certificates.certificate_key("u", "e", 3) != key
+
+def test_frontend_call_shapes(client, db, renders):
+    # participationService.ts: generateCertificate, generateEventCertificates and getVolunteerCertificates
+    event_id = client.post("/api/events/", json={"name": "Beach Sweep"}).get_json()["id"]
+    attend(client, event_id, "v1", 3)
+    attend(client, event_id, "v2", 2)
+
+    mine = client.post(f"/api/participation/certificate/{event_id}", json={"userId": "v1"}).get_json()
+    assert mine["userId"] == "v1" and mine["type"] == "certificate"
+    batch = client.post(f"/api/participation/certificate/{event_id}", json={}).get_json()
+    assert batch["summary"] == {"generated": 1, "cached": 1}
+    assert [c["id"] for c in client.get("/api/participation/certificates?userId=v1").get_json()] == [mine["id"]]
+    assert client.get("/api/participation/certificates").status_code == 400
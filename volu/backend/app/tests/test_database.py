@@ -0,0 +1,57 @@
+import pytest
+from flask import Flask
+from mongomock import MongoClient
+from pymongo import monitoring
+from app.database import ClientFactory, LazyCollection
+from app.utils.mongo_monitoring import PoolMetrics
+
+@pytest.fixture
+def factory(monkeypatch):
+    factory = ClientFactory()
+    monkeypatch.setattr("app.database.client_factory", factory)
+    yield factory
+    factory.close()
+
+def test_collections_resolve_lazily_through_the_factory(factory, monkeypatch):
+    monkeypatch.delenv("DATABASE_URL", raising=False)
+    collection = LazyCollection("events")
+    with pytest.raises(Exception, match="DATABASE_URL"):
+        collection.find_one({})
+
+    factory.use_client(MongoClient())
+    collection.insert_one({"name": "Lazy"})
+    assert collection.find_one({}, {"_id": 0}) == {"name": "Lazy"}
+    assert collection.full_name == "volu.events"
+
+def test_config_sets_pool_options_and_fork_drops_the_client(factory):
+    app = Flask(__name__)
+    app.config.update(DATABASE_URL="mongodb://db.example:27017", MONGO_MAX_POOL_SIZE="50",
+                      MONGO_WAIT_QUEUE_TIMEOUT_MS=2000, MONGO_DB_NAME="volu_test",
+                      MONGO_LIST_READ_PREFERENCE="secondaryPreferred")
+    factory.init_app(app)
+    options = factory.client_options()
+    assert options["maxPoolSize"] == 50 and options["waitQueueTimeoutMS"] == 2000
+    assert factory.list_read_preference().mode == 3  # secondaryPreferred
+
+    client = factory.get_client()  # no I/O until the first operation
+    assert factory.get_client() is client
+    assert client.options.pool_options.max_pool_size == 50
+    assert factory.get_database().name == "volu_test"
+
+    factory._forget()  # what the after-fork hook does in the child
+    assert factory.get_client() is not client
+
+def test_pool_metrics_track_checkouts():
+    metrics = PoolMetrics()
+    address = ("db.example", 27017)
+    metrics.connection_created(monitoring.ConnectionCreatedEvent(address, 1))
+    metrics.connection_checked_out(monitoring.ConnectionCheckedOutEvent(address, 1, 0.02))
+    metrics.connection_checked_out(monitoring.ConnectionCheckedOutEvent(address, 1, 0.0005))
+    metrics.connection_checked_in(monitoring.ConnectionCheckedInEvent(address, 1))
+    metrics.connection_check_out_failed(monitoring.ConnectionCheckOutFailedEvent(address, "timeout", 1.0))
+
+    pool = metrics.snapshot()["db.example:27017"]
+    assert (pool["open"], pool["inUse"], pool["maxInUse"], pool["checkouts"]) == (1, 1, 2, 2)
+    assert pool["checkoutFailures"] == {"timeout": 1}
+    assert pool["checkoutWait"]["max"] == 0.02
+    assert dict(pool["checkoutWait"]["buckets"])[0.001] == 1
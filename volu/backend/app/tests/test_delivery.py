@@ -0,0 +1,112 @@
+import random
+import time
+from datetime import datetime, timedelta
+import pytest
+from app.routes.notifications import notifications_bp
+from app.services import delivery
+from app.services.delivery import DeliveryWorker, LogChannel, SMTPChannel, backoff_seconds
+from app.services.notification_fanout import notify_event_volunteers
+from app.tests.smtp_stub import SMTPStub
+
+NOW = datetime(2030, 6, 1, 12, 0)
+
+@pytest.fixture
+def smtp():
+    with SMTPStub() as server:
+        yield server
+
+def worker(smtp, **kwargs):
+    channels = {"email": SMTPChannel("127.0.0.1", smtp.port), "sms": LogChannel("sms")}
+    return DeliveryWorker(channels, worker_id="test-worker", rng=random.Random(1), **kwargs)
+
+def queue(db, *addresses, now=NOW):
+    db.outbox.insert_many([
+        {"_id": f"m{i}", "notificationId": f"n{i}", "userId": f"u{i}", "channel": "email", "to": to,
+         "subject": "Reminder", "body": "See you there", "status": "pending", "attempts": 0,
+         "nextAttemptAt": now, "createdAt": now}
+        for i, to in enumerate(addresses)
+    ])
+
+def test_fanout_queues_messages_without_sending(db):
+    event_id = db.events.insert_one({"name": "Food Drive", "registeredVolunteers": []}).inserted_id
+    db.participation.insert_many([{"userId": f"v{i}", "eventId": str(event_id), "status": "Registered"}
+                                  for i in range(500)])
+    db.users.insert_many([
+        {"userId": f"v{i}", "personalInfo": {"email": f"v{i}@example.com", "phone": "555-0100"},
+         "accountSettings": {"emailNotifications": i % 10 != 0, "smsNotifications": i < 50}}
+        for i in range(500)
+    ])
+    started = time.perf_counter()
+    assert len(notify_event_volunteers(str(event_id), "EVENT_UPDATE", "Moved", "Now at noon")) == 500
+    assert time.perf_counter() - started < 5
+
+    assert db.outbox.count_documents({"channel": "email", "status": "pending"}) == 450
+    assert db.outbox.count_documents({"channel": "sms"}) == 50
+    # Opted out of this type entirely
+    db.users.update_one({"userId": "v1"}, {"$set": {"accountSettings.notificationTypes": ["EVENT_REMINDER"]}})
+    notify_event_volunteers(str(event_id), "EVENT_UPDATE", "Moved again", "Now at one")
+    assert db.outbox.count_documents({"subject": "Moved again", "userId": "v1"}) == 0
+
+def test_worker_batches_over_reused_connections(db, smtp):
+    queue(db, *[f"v{i}@example.com" for i in range(120)])
+    w = worker(smtp, threads=2, batch_size=20)
+    try:
+        while w.run_once(NOW):
+            pass
+    finally:
+        w.stop()
+    assert db.outbox.count_documents({"status": "sent"}) == 120
+    assert len(smtp.messages) == 120
+    assert smtp.connections <= 2
+
+def test_transient_failure_is_retried_with_backoff(db, smtp):
+    queue(db, "busy@example.com")
+    w = worker(smtp)
+    try:
+        w.run_once(NOW)
+        message = db.outbox.find_one({"_id": "m0"})
+        assert message["status"] == "pending" and message["attempts"] == 1
+        assert NOW <= message["nextAttemptAt"] <= NOW + timedelta(seconds=delivery.BACKOFF_BASE_SECONDS)
+        assert "451" in message["lastError"]
+        # Not due again until the backoff has passed
+        assert w.run_once(NOW) == 0
+
+        smtp.refuse.pop("busy")
+        w.run_once(message["nextAttemptAt"])
+    finally:
+        w.stop()
+    assert db.outbox.find_one({"_id": "m0"})["status"] == "sent"
+
+def test_attempts_are_capped():
+    rng = random.Random(7)
+    assert all(backoff_seconds(n, rng) <= delivery.BACKOFF_CAP_SECONDS for n in range(1, 40))
+
+def test_permanent_failure_is_dead_lettered_and_requeued(db, smtp, flask_client):
+    queue(db, "bounce@example.com", "ok@example.com")
+    w = worker(smtp)
+    try:
+        w.run_once(NOW)
+    finally:
+        w.stop()
+    assert db.outbox.find_one({"_id": "m0"})["status"] == "dead"
+    assert db.outbox.find_one({"_id": "m1"})["status"] == "sent"
+
+    client = flask_client(notifications_bp)
+    assert client.get("/api/notifications/outbox/stats").get_json() == {"email": {"dead": 1, "sent": 1}}
+    dead = client.get("/api/notifications/outbox/dead").get_json()
+    assert [m["id"] for m in dead] == ["m0"] and "550" in dead[0]["lastError"]
+
+    assert client.post("/api/notifications/outbox/dead/requeue", json={"ids": ["m0"]}).get_json() == {"requeued": 1}
+    message = db.outbox.find_one({"_id": "m0"})
+    assert message["status"] == "pending" and message["attempts"] == 0
+
+def test_expired_lease_is_reclaimed(db, smtp):
+    queue(db, "v1@example.com")
+    db.outbox.update_one({"_id": "m0"}, {"$set": {"status": "sending", "claimedBy": "crashed",
+                                                  "claimedUntil": NOW - timedelta(minutes=1)}})
+    w = worker(smtp)
+    try:
+        assert w.run_once(NOW) == 1
+    finally:
+        w.stop()
+    assert db.outbox.find_one({"_id": "m0"})["status"] == "sent"
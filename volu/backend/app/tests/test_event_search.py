@@ -0,0 +1,77 @@
+from datetime import datetime
+import pytest
+from app.routes.events import events_bp
+from app.services.event_index import EventIndex
+
+EVENTS = [
+    {"_id": "e1", "name": "Riverside Cleanup", "description": "Pick up litter along the river trail",
+     "location": "Buffalo Bayou Park", "city": "Houston", "startDate": "2030-03-05", "eventType": "Environmental",
+     "urgency": "High", "status": "Active", "requiredSkills": ["Physical Labor"]},
+    {"_id": "e2", "name": "Food Bank Sorting", "description": "Sort donations for the weekend cleanup crews",
+     "location": "Houston Food Bank", "city": "Houston", "startDate": "2030-03-20", "eventType": "Hunger",
+     "urgency": "Medium", "status": "Active", "requiredSkills": ["Organization", "Physical Labor"]},
+    {"_id": "e3", "name": "Park Cleanup", "description": "Spring planting and trash pickup",
+     "location": "Zilker Park", "city": "Austin", "startDate": datetime(2030, 4, 2), "eventType": "Environmental",
+     "urgency": "Low", "status": "Active", "requiredSkills": ["Gardening"]},
+    {"_id": "e4", "name": "Tutoring Night", "description": "Homework help for middle schoolers",
+     "location": "Central Library", "city": "Austin", "startDate": "2030-05-11", "eventType": "Education",
+     "urgency": "Medium", "status": "Completed", "requiredSkills": ["Teaching"]},
+]
+
+@pytest.fixture
+def index():
+    return EventIndex.from_documents(EVENTS)
+
+def ids(result):
+    return [r["_id"] for r in result["results"]]
+
+def test_text_ranking_prefix_and_typos(index):
+    # A name match outranks a description match
+    assert ids(index.search("cleanup")) == ["e1", "e3", "e2"]
+    assert ids(index.search("clean")) == ["e1", "e3", "e2"]
+    assert ids(index.search("cleenup park")) == ["e3", "e1"]
+    assert ids(index.search("tutorng")) == ["e4"]
+    assert index.search("xylophone")["total"] == 0
+
+def test_facets_dates_and_pagination(index):
+    result = index.search(filters={"eventType": ["environmental"], "city": ["Houston", "Austin"]})
+    assert ids(result) == ["e1", "e3"]
+    # Each facet's counts ignore its own filter
+    assert result["facets"]["eventType"] == {"Environmental": 2, "Hunger": 1, "Education": 1}
+    assert result["facets"]["requiredSkills"] == {"Physical Labor": 1, "Gardening": 1}
+
+    result = index.search(start=datetime(2030, 3, 6), end=datetime(2030, 4, 3), sort="date")
+    assert ids(result) == ["e2", "e3"]
+    page = index.search(limit=2, offset=2)
+    assert ids(page) == ["e3", "e4"] and page["total"] == 4
+
+def test_incremental_updates(index):
+    index.add({**EVENTS[3], "name": "Reading Buddies", "status": "Active"})
+    assert index.search("tutoring")["total"] == 0
+    assert ids(index.search("reading", filters={"status": ["Active"]})) == ["e4"]
+    index.remove("e1")
+    assert ids(index.search("cleanup")) == ["e3", "e2"]
+    assert "riverside" not in index._postings and index.search(filters={"urgency": ["High"]})["total"] == 0
+    assert index.stats()["events"] == 3
+
+@pytest.fixture
+def client(flask_client):
+    return flask_client(events_bp)
+
+def test_search_route_never_reads_mongo_after_the_build(client, db, monkeypatch):
+    db.events.insert_many([{k: v for k, v in e.items() if k != "_id"} for e in EVENTS])
+    assert client.get("/api/events/search?q=cleanup").get_json()["total"] == 3
+
+    created = client.post("/api/events/", json={"name": "Beach Cleanup", "city": "Galveston",
+                                                "startDate": "2030-06-01"}).get_json()
+    client.put(f"/api/events/{created['id']}?notify=false", json={"urgency": "High"})
+    riverside = next(e for e in db.events.find({"name": "Riverside Cleanup"}))
+    client.delete(f"/api/events/{riverside['_id']}?notify=false")
+
+    monkeypatch.setattr("app.services.event_index.event_collection", None)
+    body = client.get("/api/events/search?q=cleanup&urgency=high").get_json()
+    assert [r["name"] for r in body["results"]] == ["Beach Cleanup"]
+    body = client.get("/api/events/search?from=2030-04-02&to=2030-05-11&sort=date").get_json()
+    assert [r["name"] for r in body["results"]] == ["Park Cleanup", "Tutoring Night"]
+    assert "currentVolunteers" not in body["results"][0]
+    assert client.get("/api/events/search?limit=abc").status_code == 400
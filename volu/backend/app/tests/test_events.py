@@ -2,16 +2,12 @@ import pytest
 from datetime import datetime
 from bson import ObjectId
 from app.routes.events import events_bp
-from flask import Flask, json
+from flask import json
 from app.database import event_collection
 
 @pytest.fixture
-def client():
-    app = Flask(__name__)
-    app.register_blueprint(events_bp, url_prefix="/api/events")
-    app.config['TESTING'] = True
-    with app.test_client() as client:
-        yield client
+def client(flask_client):
+    return flask_client(events_bp)
 
 def test_create_event(client):
     response = client.post("/api/events/", json={
@@ -112,3 +108,105 @@ def test_get_events_created_by_user(client):
     assert response.status_code == 200
     events = response.get_json()
     assert any(e["createdBy"] == "user123" for e in events)
+
+@pytest.fixture
+def mock_events(db):
+    collection = db.events
+    collection.insert_many([
+        {"name": "Park Cleanup", "city": "Houston", "status": "Active", "startDate": "2025-04-01",
+         "description": "Long text", "images": ["a.png"], "createdBy": "admin1"},
+        {"name": "Food Drive", "city": "Houston", "status": "Active", "startDate": datetime(2025, 4, 20, 9),
+         "description": "Long text", "createdBy": "admin1"},
+        {"name": "Tutoring", "city": "Dallas", "status": "Completed", "startDate": "2025-05-02T15:00:00.000Z",
+         "description": "Long text", "createdBy": "admin2"},
+    ])
+    return collection
+
+def test_stream_events_json_with_projection(client, mock_events):
+    response = client.get("/api/events/?stream=json&fields=name,city")
+    assert response.status_code == 200
+    events = json.loads(response.get_data(as_text=True))
+    assert len(events) == 3
+    assert all(set(e) == {"id", "name", "city"} for e in events)
+
+def test_stream_events_ndjson_with_filters(client, mock_events):
+    response = client.get("/api/events/?stream=ndjson&city=Houston&from=2025-04-01&to=2025-04-20")
+    assert response.mimetype == "application/x-ndjson"
+    lines = response.get_data(as_text=True).splitlines()
+    assert sorted(json.loads(line)["name"] for line in lines) == ["Food Drive", "Park Cleanup"]
+
+def test_created_by_listing_filters(client, mock_events):
+    response = client.get("/api/events/created-by/admin1?status=Active&fields=name")
+    assert [e["name"] for e in response.get_json()] == ["Park Cleanup", "Food Drive"]
+
+def test_registration_respects_capacity_and_waitlist(client, db):
+    collection = db.events
+    event_id = collection.insert_one({"name": "Small Event", "currentVolunteers": 0, "maxVolunteers": 2}).inserted_id
+    register = lambda user: client.post(f"/api/events/{event_id}/register", json={"userId": user})
+
+    assert register("a").status_code == 200
+    assert register("b").get_json()["currentVolunteers"] == 2
+    waitlisted = register("c")
+    assert waitlisted.status_code == 202
+    assert waitlisted.get_json()["waitlistPosition"] == 1
+    assert register("d").get_json()["waitlistPosition"] == 2
+    assert register("a").status_code == 409
+    assert register("c").status_code == 409
+    assert client.post(f"/api/events/{event_id}/register").status_code == 409
+
+    res = client.post(f"/api/events/{event_id}/unregister", json={"userId": "a"})
+    assert res.status_code == 200
+    assert res.get_json()["promotedVolunteer"] == "c"
+    event = collection.find_one({"_id": event_id})
+    assert event["currentVolunteers"] == 2
+    assert event["registeredVolunteers"] == ["b", "c"]
+    assert [w["userId"] for w in event["waitlist"]] == ["d"]
+
+    res = client.post(f"/api/events/{event_id}/unregister", json={"userId": "d"})
+    assert res.get_json()["registrationStatus"] == "removed"
+    assert collection.find_one({"_id": event_id})["waitlist"] == []
+
+def test_event_reads_are_cached_with_etags(client, mock_events, fresh_cache):
+    event_id = str(mock_events.find_one({"name": "Tutoring"})["_id"])
+    first = client.get(f"/api/events/{event_id}")
+    etag = first.headers["ETag"]
+    assert first.status_code == 200 and first.get_json()["name"] == "Tutoring"
+
+    assert client.get(f"/api/events/{event_id}", headers={"If-None-Match": etag}).status_code == 304
+    assert fresh_cache.stats.snapshot()["hits"] == 1
+
+    client.put(f"/api/events/{event_id}?notify=false", json={"name": "Tutoring (online)"})
+    after = client.get(f"/api/events/{event_id}", headers={"If-None-Match": etag})
+    assert after.status_code == 200 and after.get_json()["name"] == "Tutoring (online)"
+    assert after.headers["ETag"] != etag
+
+def test_lru_cache_evicts_and_expires():
+    from app.utils.cache import LRUCache
+    cache = LRUCache(max_entries=2, ttl_seconds=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("b") is None and cache.get("a") == 1
+    assert cache.stats.snapshot()["evictions"] == 1
+
+    generation = cache.generation
+    cache.delete("a")
+    cache.set("a", "stale", generation)  # load overlapped an invalidation
+    assert cache.get("a") is None
+
+    cache.ttl_seconds = 0
+    cache.set("d", 4)
+    assert cache.get("d") is None and cache.stats.snapshot()["expirations"] == 1
+
+def test_json_provider_encodes_bson_types_without_mutation():
+    import uuid
+    from app.utils.json_provider import dumps
+    oid, uid = ObjectId(), uuid.uuid4()
+    doc = {"_id": oid, "when": datetime(2025, 4, 1, 9, 30), "ref": uid,
+           "nested": [{"_id": oid, "id": "kept"}], "createdBy": oid}
+    encoded = json.loads(dumps(doc))
+    assert encoded == {"id": str(oid), "when": "2025-04-01T09:30:00", "ref": str(uid),
+                       "nested": [{"_id": str(oid), "id": "kept"}], "createdBy": str(oid)}
+    assert doc["_id"] is oid  # the document itself is left alone
+    assert json.loads(dumps({1: "a"})) == {"1": "a"}
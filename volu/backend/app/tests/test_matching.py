@@ -0,0 +1,147 @@
+import pytest
+import numpy as np
+from app.routes.matching import matching_bp
+from app.routes.user_profile import user_profile_bp
+from app.services import matching, volunteer_index
+from app.services.radius_index import RadiusIndex
+from app.utils.geo import get_zip_centroids, haversine_miles
+
+@pytest.fixture
+def client(flask_client):
+    return flask_client(matching_bp, user_profile_bp)
+
+# Every test here runs over the shared mongomock database
+@pytest.fixture(autouse=True)
+def mock_db(db):
+    return db
+
+def make_user(user_id, skills, causes, zip_code="77002", **extra):
+    return {
+        "userId": user_id,
+        "personalInfo": {"fullName": user_id.title(), "city": "Houston", "state": "TX", "zip": zip_code},
+        "skills": {"skills": skills},
+        "preferences": {"causes": causes, "preferredDistance": "25", "frequency": "flexible", "remoteOpportunities": False},
+        **extra,
+    }
+
+EVENT = {
+    "name": "Food Drive",
+    "requiredSkills": ["Cooking", "Driving"],
+    "causes": ["Hunger"],
+    "zip": "77002",
+    "startDate": "2030-06-01",
+    "startTime": "09:00",
+    "eventType": "one_time",
+}
+
+def test_scores_follow_weights(mock_db):
+    mock_db.users.insert_many([
+        make_user("alice", ["cooking", "Driving"], ["Hunger"]),
+        make_user("bob", ["Cooking"], ["Animals"], zip_code="10001"),
+    ])
+    matches = matching.get_matrix().top_matches(EVENT, limit=10, min_score=0)
+    assert [m["volunteerId"] for m in matches] == ["alice", "bob"]
+    alice = matches[0]
+    assert alice["skillMatchPercentage"] == 1
+    assert alice["causesMatchPercentage"] == 1
+    # No availability data scores 0.5, so alice misses only 0.2 * 0.5
+    assert alice["matchScore"] == pytest.approx(1 - 0.2 * 0.5)
+    assert matches[1]["skillMatchPercentage"] == 0.5
+
+def test_top_k_and_exclusions(client, mock_db):
+    mock_db.users.insert_many([make_user(f"user{i}", ["Cooking", "Driving"], ["Hunger"]) for i in range(30)])
+    mock_db.users.insert_one(make_user("hidden", ["Cooking", "Driving"], ["Hunger"], accountSettings={"profileVisibility": False}))
+    event_id = mock_db.events.insert_one(dict(EVENT)).inserted_id
+    mock_db.participation.insert_one({"userId": "user0", "eventId": str(event_id), "status": "Confirmed"})
+
+    res = client.get(f"/api/matching/event/{event_id}?limit=5")
+    assert res.status_code == 200
+    ids = [m["volunteerId"] for m in res.get_json()]
+    assert len(ids) == 5
+    assert "user0" not in ids and "hidden" not in ids
+
+def test_availability_penalties(mock_db):
+    mock_db.users.insert_one(make_user("carol", ["Cooking", "Driving"], ["Hunger"], availability={
+        "availableDays": ["monday"],
+        "availableTimeSlots": ["evening"],
+        "blackoutDates": ["2030-06-01"],
+    }))
+    matches = matching.get_matrix().top_matches(EVENT, min_score=0)
+    # 2030-06-01 is a Saturday morning on a blackout date
+    assert matches[0]["availabilityMatchPercentage"] == 0
+
+def test_matches_for_missing_event(client):
+    res = client.get("/api/matching/event/000000000000000000000000")
+    assert res.status_code == 404
+
+def test_index_candidates_any_and_all(mock_db):
+    mock_db.users.insert_many([
+        make_user("alice", ["Cooking", "Driving"], ["Hunger"]),
+        make_user("bob", ["Cooking"], ["Animals"]),
+        make_user("carol", ["Tutoring"], ["Hunger"]),
+    ])
+    index = volunteer_index.get_index()
+    assert index.candidate_ids(skills=["cooking", "driving"], match="all") == ["alice"]
+    assert index.candidate_ids(skills=["Cooking"], causes=["Hunger"]) == ["alice", "bob", "carol"]
+    assert index.candidate_ids(skills=["Juggling"], match="all") == []
+
+def test_index_follows_profile_writes(client, mock_db):
+    mock_db.users.insert_one(make_user("alice", ["Cooking"], ["Hunger"]))
+    index = volunteer_index.get_index()
+
+    client.put("/api/user-profile/alice/skills", json={"skills": ["Driving"]})
+    client.put("/api/user-profile/dave/preferences", json={"causes": ["Hunger"]})
+    assert index.candidate_ids(skills=["Cooking"]) == []
+    assert index.candidate_ids(skills=["Driving"]) == ["alice"]
+    assert index.candidate_ids(causes=["hunger"]) == ["alice", "dave"]
+
+    client.delete("/api/user-profile/alice")
+    assert index.candidate_ids(skills=["Driving"], causes=["Hunger"]) == ["dave"]
+
+def test_candidates_endpoint_and_stats(client, mock_db):
+    mock_db.users.insert_many([
+        make_user("alice", ["Cooking", "Driving"], ["Hunger"]),
+        make_user("bob", ["Cooking"], ["Animals"]),
+    ])
+    event_id = mock_db.events.insert_one(dict(EVENT)).inserted_id
+
+    res = client.get(f"/api/matching/event/{event_id}/candidates?match=all")
+    assert res.status_code == 200
+    assert res.get_json()["volunteerIds"] == ["alice"]
+
+    stats = client.get("/api/matching/index/stats").get_json()
+    assert stats["volunteers"] == 2
+    assert stats["skillTerms"] == 2
+    assert stats["hits"] == 2
+
+def test_zip_centroids_and_haversine():
+    table = get_zip_centroids()
+    houston, dallas = table.lookup_zip("77002"), table.lookup_zip("75201-1234")
+    assert houston and dallas
+    assert haversine_miles(*houston, *dallas) == pytest.approx(226, abs=5)
+    assert table.lookup_city("houston", "tx") is not None
+    assert table.lookup_zip("00000") is None
+
+def test_radius_index_matches_brute_force():
+    rng = np.random.default_rng(7)
+    lats = rng.uniform(29, 31, 2000)
+    lons = rng.uniform(-96, -94, 2000)
+    lats[::50] = np.nan
+    index = RadiusIndex(lats, lons)
+
+    rows, distances = index.within(29.76, -95.37, 20)
+    expected = np.flatnonzero(haversine_miles(29.76, -95.37, lats, lons) <= 20)
+    assert sorted(rows.tolist()) == expected.tolist()
+    assert list(distances) == sorted(distances)
+
+def test_nearby_uses_preferred_distance(client, mock_db):
+    mock_db.users.insert_many([
+        make_user("downtown", ["Cooking"], ["Hunger"], zip_code="77002"),
+        make_user("dallas", ["Cooking"], ["Hunger"], zip_code="75201"),
+    ])
+    event_id = mock_db.events.insert_one(dict(EVENT)).inserted_id
+
+    nearby = client.get(f"/api/matching/event/{event_id}/nearby").get_json()
+    assert [v["volunteerId"] for v in nearby] == ["downtown"]
+    wide = client.get(f"/api/matching/event/{event_id}/nearby?radius=300").get_json()
+    assert [v["volunteerId"] for v in wide] == ["downtown", "dallas"]
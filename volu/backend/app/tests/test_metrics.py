@@ -0,0 +1,59 @@
+import logging
+from datetime import timedelta
+import pytest
+from flask import Flask
+from pymongo import monitoring
+from app.utils import metrics
+from app.utils.metrics import RequestTrace, registry, request_trace
+from app.utils.mongo_monitoring import CommandMetrics, N_PLUS_ONE_THRESHOLD
+
+ADDRESS = ("db.example", 27017)
+
+@pytest.fixture(autouse=True)
+def fresh_registry():
+    registry.reset()
+    yield
+    registry.reset()
+
+def run_find(listener, request_id, filter, micros=500):
+    command = {"find": "events", "filter": filter}
+    listener.started(monitoring.CommandStartedEvent(command, "volu", request_id, ADDRESS, None))
+    listener.succeeded(monitoring.CommandSucceededEvent(timedelta(microseconds=micros), {"ok": 1}, "find", request_id, ADDRESS, None))
+
+def test_commands_are_attributed_to_the_request_and_n_plus_one_is_logged(caplog):
+    listener = CommandMetrics()
+    trace = RequestTrace("participation.get_my_participation")
+    token = request_trace.set(trace)
+    try:
+        with caplog.at_level(logging.WARNING, logger="app.mongo"):
+            for i in range(N_PLUS_ONE_THRESHOLD + 2):
+                run_find(listener, i, {"_id": i})
+            run_find(listener, 99, {"status": "Open"}, micros=250_000)
+    finally:
+        request_trace.reset(token)
+
+    assert trace.commands == N_PLUS_ONE_THRESHOLD + 3
+    assert trace.by_command == {"find": N_PLUS_ONE_THRESHOLD + 3}
+    assert trace.collections == {"events"}
+    assert len(trace.n_plus_one) == 1  # logged once, not per repeat
+    messages = [r.getMessage() for r in caplog.records]
+    assert sum("Possible N+1" in m for m in messages) == 1
+    assert sum("Slow Mongo command" in m for m in messages) == 1
+
+    text = "\n".join(registry.render())
+    assert f'mongo_commands_total{{collection="events",command="find"}} {N_PLUS_ONE_THRESHOLD + 3}' in text
+    assert 'mongo_slow_commands_total{collection="events",command="find"} 1' in text
+
+def test_metrics_endpoint_renders_request_histograms():
+    app = Flask(__name__)
+    metrics.init_app(app)
+    app.add_url_rule("/ping", "ping", lambda: "pong")
+    client = app.test_client()
+
+    response = client.get("/ping")
+    assert "db;dur=" in response.headers["Server-Timing"]
+    text = client.get("/metrics").get_data(as_text=True)
+    assert 'http_requests_total{blueprint="",endpoint="ping",method="GET",status="200"} 1' in text
+    assert 'http_request_duration_seconds_bucket{blueprint="",endpoint="ping",method="GET",le="+Inf"} 1' in text
+    assert "# TYPE mongo_pool_connections gauge" in text
+    assert 'endpoint="metrics"' not in text
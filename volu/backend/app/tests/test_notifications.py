@@ -1,5 +1,4 @@
 import pytest
-from flask import Flask
 from datetime import datetime
 import uuid
 
@@ -7,13 +6,8 @@ from app.routes.notifications import notifications_bp
 from app.database import notifications_collection
 
 @pytest.fixture
-def client():
-    app = Flask(__name__)
-    app.register_blueprint(notifications_bp)
-    app.config["TESTING"] = True
-
-    with app.test_client() as client:
-        yield client
+def client(flask_client):
+    return flask_client(notifications_bp)
 
 def test_get_notifications(client):
     notifications_collection.insert_one({
@@ -27,14 +21,16 @@ def test_get_notifications(client):
     assert isinstance(res.get_json(), list)
 
 def test_get_unread_count(client):
-    res = client.get("/api/notifications/unread-count")
+    res = client.get("/api/notifications/unread-count?userId=nobody")
     assert res.status_code == 200
     assert isinstance(res.get_json(), int)
+    assert client.get("/api/notifications/unread-count").status_code == 400
 
 def test_mark_all_as_read(client):
-    res = client.post("/api/notifications/mark-all-as-read")
+    res = client.post("/api/notifications/mark-all-as-read?userId=nobody")
     assert res.status_code == 200
     assert res.get_json()["message"] == "All notifications marked as read"
+    assert client.post("/api/notifications/mark-all-as-read").status_code == 400
 
 def test_mark_as_read_and_delete(client):
     notif_id = uuid.uuid4()
@@ -52,3 +48,93 @@ def test_mark_as_read_and_delete(client):
     res_delete = client.delete(f"/api/notifications/delete/{notif_id}")
     assert res_delete.status_code == 200
     assert "Notification deleted" in res_delete.get_json()["message"]
+
+
+def test_event_fanout_and_unread_counters(client, db):
+    event_id = db.events.insert_one({"name": "Cleanup", "registeredVolunteers": ["u1", "u2"]}).inserted_id
+    db.participation.insert_many([
+        {"userId": "u2", "eventId": str(event_id), "status": "Registered"},
+        {"userId": "u3", "eventId": str(event_id), "status": "Confirmed"},
+        {"userId": "u4", "eventId": str(event_id), "status": "Cancelled"},
+    ])
+
+    res = client.post(f"/api/notifications/event/{event_id}", json={"message": "Moved to 10am"})
+    assert res.status_code == 201
+    assert res.get_json()["recipients"] == 3
+    assert client.get("/api/notifications/unread-count?userId=u2").get_json() == 1
+    assert client.get("/api/notifications/unread-count?userId=u4").get_json() == 0
+
+    inbox = client.get("/api/notifications/?userId=u1").get_json()
+    assert len(inbox) == 1 and inbox[0]["type"] == "EVENT_UPDATE"
+
+    client.post(f"/api/notifications/mark-as-read/{inbox[0]['id']}")
+    client.post(f"/api/notifications/mark-as-read/{inbox[0]['id']}")
+    assert client.get("/api/notifications/unread-count?userId=u1").get_json() == 0
+
+def test_mark_all_and_delete_are_per_user(client, db):
+    from app.services.notification_fanout import notify_users
+    notify_users(["a", "b"], "Hello", "First")
+    notify_users(["a"], "Hello", "Second")
+
+    res = client.post("/api/notifications/mark-all-as-read?userId=a")
+    assert res.get_json()["updated"] == 2
+    assert client.get("/api/notifications/unread-count?userId=a").get_json() == 0
+    assert client.get("/api/notifications/unread-count?userId=b").get_json() == 1
+
+    unread = client.get("/api/notifications/?userId=b&unreadOnly=true").get_json()
+    client.delete(f"/api/notifications/delete/{unread[0]['id']}")
+    assert client.get("/api/notifications/unread-count?userId=b").get_json() == 0
+
+def test_legacy_notifications_never_seed_negative_counters(client, db):
+    from app import database
+    db.notifications.insert_many([
+        {"_id": "old-1", "userId": "legacy", "isRead": False, "createdAt": datetime(2024, 1, 1)},
+        {"_id": "old-2", "userId": "legacy", "isRead": False, "createdAt": datetime(2024, 1, 2)},
+    ])
+    client.post("/api/notifications/mark-as-read/old-1")
+    assert db.notification_counters.count_documents({}) == 0
+
+    assert database._backfill_unread_counters(db) == 1
+    assert client.get("/api/notifications/unread-count?userId=legacy").get_json() == 1
+    client.post("/api/notifications/mark-all-as-read?userId=legacy")
+    assert db.notification_counters.find_one({"userId": "legacy"})["unread"] == 0
+
+def test_notification_hub_replay_and_connection_cap():
+    from app.services.notification_hub import NotificationHub, HubFull
+    hub = NotificationHub(max_connections=1, buffer_size=3)
+    subscription = hub.subscribe("a")
+    with pytest.raises(HubFull):
+        hub.subscribe("b")
+
+    hub.publish("a", "notification", {"n": 1})
+    first = subscription.next_event(0)
+    hub.publish("b", "notification", {"n": 2})
+    hub.publish("a", "notification", {"n": 3})
+    assert [e[2] for e in hub.replay("a", first[0])] == [{"n": 3}]
+    assert hub.replay("a", "other-epoch-1") is None
+
+    hub.publish("a", "notification", {"n": 4})
+    hub.publish("a", "notification", {"n": 5})
+    assert hub.replay("a", first[0]) is None  # fell out of the buffer
+
+    hub.unsubscribe(subscription)
+    assert hub.stats()["connections"] == 0
+
+def test_stream_pushes_new_notifications(client, db, monkeypatch):
+    from app.services import notification_hub
+    from app.services.notification_fanout import notify_users
+    monkeypatch.setattr("app.routes.notifications.HEARTBEAT_SECONDS", 0.01)
+    hub = notification_hub.reset_hub(max_connections=5)
+
+    res = client.get("/api/notifications/stream?userId=u1", buffered=False)
+    assert res.mimetype == "text/event-stream"
+    chunks = (chunk.decode() for chunk in res.response)
+    assert next(chunks).startswith("retry:")
+    assert "event: unread" in next(chunks)
+    assert next(chunks) == ": heartbeat\n\n"
+
+    notify_users(["u1"], "Hi", "Pushed")
+    assert "Pushed" in next(chunks)
+    assert '"count":1' in next(chunks)
+    res.close()
+    assert hub.stats()["connections"] == 0
@@ -0,0 +1,87 @@
+import pytest
+from app.routes.events import events_bp
+from app.routes.participation import participation_bp
+from app.services import org_stats
+from app.services.org_stats import merge_leaderboard
+
+@pytest.fixture
+def client(flask_client):
+    return flask_client(events_bp, participation_bp)
+
+# Increments leave zero counters behind where a rebuild has no key at all
+def nonzero(value):
+    if isinstance(value, dict):
+        return {k: nonzero(v) for k, v in value.items() if v != 0 and v != {}}
+    return value
+
+def org_totals(db):
+    org = db.org_stats.find_one({"_id": "org"})
+    return nonzero({k: v for k, v in org.items() if k not in ("updatedAt", "rebuiltAt", "leaderboardVersion")})
+
+def test_incremental_totals_match_a_full_rebuild(client, db):
+    # First read builds the (empty) org document; every later write patches it
+    assert client.get("/api/participation/dashboard").get_json()["signups"] == 0
+    march = client.post("/api/events/", json={"name": "Food Drive", "startDate": "2030-03-05",
+                                               "maxVolunteers": 4}).get_json()["id"]
+    april = client.post("/api/events/", json={"name": "Park Cleanup", "startDate": "2030-04-10",
+                                               "maxVolunteers": "10"}).get_json()["id"]
+    entries = [
+        {"userId": "a", "eventId": march, "status": "Attended", "hoursLogged": 5, "hoursVerified": True},
+        {"userId": "b", "eventId": march, "status": "Attended", "hoursLogged": 3, "hoursVerified": True},
+        {"userId": "c", "eventId": march, "status": "No-Show"},
+        {"userId": "d", "eventId": march, "status": "Cancelled"},
+        {"userId": "a", "eventId": april, "status": "Registered"},
+        {"userId": "c", "eventId": april, "status": "Attended", "hoursLogged": 2},
+    ]
+    assert client.post("/api/participation/record/bulk", json={"entries": entries}).status_code == 200
+    client.post("/api/participation/record", json={"userId": "b", "eventId": april, "status": "Attended",
+                                                   "hoursLogged": 4})
+    client.put(f"/api/events/{april}?notify=false", json={"maxVolunteers": 8})
+
+    dashboard = client.get("/api/participation/dashboard?top=2").get_json()
+    assert dashboard["signups"] == 6 and dashboard["noShows"] == 1 and dashboard["attended"] == 4
+    assert dashboard["verifiedHours"] == 8 and dashboard["hours"] == 14
+    assert dashboard["noShowRate"] == 0.2 and dashboard["capacity"] == 12 and dashboard["fillRate"] == 0.5
+    assert [(m["month"], m["signups"], m["capacity"]) for m in dashboard["byMonth"]] == [
+        ("2030-03", 3, 4), ("2030-04", 3, 8)
+    ]
+    assert dashboard["topVolunteers"] == [{"userId": "a", "verifiedHours": 5}, {"userId": "b", "verifiedHours": 3}]
+
+    incremental = org_totals(db)
+    org_stats.reconcile()
+    assert org_totals(db) == incremental
+
+def test_dashboard_reads_only_the_org_document(client, db):
+    db.participation.insert_many([
+        {"userId": f"u{i}", "eventId": "e1", "status": "Attended", "hoursLogged": 2, "hoursVerified": True,
+         "eventMonth": "2030-01"}
+        for i in range(30)
+    ])
+    first = client.get("/api/participation/dashboard").get_json()
+    assert first["attended"] == 30 and len(first["topVolunteers"]) == 10
+
+    db.participation.drop()
+    assert client.get("/api/participation/dashboard").get_json() == first
+
+def test_leaderboard_follows_hour_corrections(client, db):
+    org_stats.reconcile()
+    for user, hours in (("a", 6), ("b", 4), ("c", 2)):
+        client.post("/api/participation/record/bulk", json={"entries": [
+            {"userId": user, "eventId": "e1", "status": "Attended", "hoursLogged": hours, "hoursVerified": True}
+        ]})
+    board = client.get("/api/participation/leaderboard?limit=3").get_json()["leaderboard"]
+    assert [e["userId"] for e in board] == ["a", "b", "c"]
+
+    # Hours no longer verified drop a volunteer off the board
+    client.post("/api/participation/record/bulk", json={"entries": [
+        {"userId": "a", "eventId": "e1", "hoursVerified": False}
+    ]})
+    board = client.get("/api/participation/leaderboard").get_json()["leaderboard"]
+    assert [e["userId"] for e in board] == ["b", "c"]
+
+def test_merge_refills_a_full_board_when_a_member_drops():
+    board = [{"userId": "a", "verifiedHours": 9}, {"userId": "b", "verifiedHours": 5}]
+    merged, complete = merge_leaderboard(board, {"c": 7}, size=2)
+    assert [e["userId"] for e in merged] == ["a", "c"] and complete
+    merged, complete = merge_leaderboard(board, {"a": 1}, size=2)
+    assert not complete
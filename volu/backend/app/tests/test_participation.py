@@ -1,27 +1,18 @@
 import pytest
 from app.routes.participation import participation_bp
-from flask import Flask
 from mongomock import MongoClient
-from datetime import datetime
+from datetime import datetime, timedelta
+from app.utils.pagination import MAX_PAGE_SIZE, CountCache
+from app import database
 
 # Setup Flask app and test client
 @pytest.fixture
-def app():
-    app = Flask(__name__)
-    app.register_blueprint(participation_bp, url_prefix="/api/participation")
-    return app
-
-@pytest.fixture
-def client(app):
-    return app.test_client()
+def client(flask_client):
+    return flask_client(participation_bp)
 
 # Mock MongoDB
 @pytest.fixture(autouse=True)
-def mock_db(monkeypatch):
-    client = MongoClient()
-    db = client.testdb
-    monkeypatch.setattr("app.database.participation_collection", db.participation)
-    monkeypatch.setattr("app.database.event_collection", db.event)
+def mock_db(db):
     return db
 
 def test_get_all_participation(client, mock_db):
@@ -94,3 +85,215 @@ def test_statistics(client, mock_db):
     assert res.json["totalHours"] == 4
     assert res.json["eventsAttended"] == 1
     assert res.json["upcomingEvents"] == 1
+
+def test_statistics_rollup_follows_record(client, mock_db):
+    event_id = str(mock_db.events.insert_one({"name": "Cleanup", "startDate": "2025-03-15"}).inserted_id)
+    mock_db.participation.insert_one({
+        "userId": "u1", "eventId": "old", "status": "Attended", "hoursLogged": 2,
+        "event": {"startDate": "2025-02-01"}
+    })
+
+    # First read builds the rollup with the aggregation pipeline
+    res = client.get("/api/participation/statistics?userId=u1")
+    assert res.json["totalHours"] == 2
+    assert mock_db.participation_stats.count_documents({"userId": "u1"}) == 1
+
+    client.post("/api/participation/record", json={"userId": "u1", "eventId": event_id, "status": "Confirmed"})
+    client.post("/api/participation/record", json={
+        "userId": "u1", "eventId": event_id, "status": "Attended", "hoursLogged": 3
+    })
+
+    res = client.get("/api/participation/statistics?userId=u1")
+    assert res.json["totalHours"] == 5
+    assert res.json["eventsAttended"] == 2
+    assert res.json["upcomingEvents"] == 0
+    assert res.json["statusCounts"] == {"Attended": 2}
+    assert res.json["eventsByMonth"] == {"Feb 2025": 1, "Mar 2025": 1}
+    assert res.json["hoursByMonth"] == {"Feb 2025": 2, "Mar 2025": 3}
+
+    rebuilt = client.get("/api/participation/statistics?userId=u1&source=aggregate")
+    assert rebuilt.json == res.json
+
+def test_cursor_pagination_walks_every_record(client, mock_db):
+    start = datetime(2025, 1, 1)
+    # Pairs of records share a createdAt so the _id tiebreak is exercised
+    mock_db.participation.insert_many([
+        {"userId": "u1", "eventId": f"e{i}", "status": "Attended", "createdAt": start + timedelta(hours=i // 2)}
+        for i in range(25)
+    ])
+
+    seen = []
+    cursor = ""
+    pages = 0
+    while cursor is not None:
+        res = client.get(f"/api/participation/my?userId=u1&limit=10&cursor={cursor}")
+        assert res.status_code == 200
+        seen.extend(r["eventId"] for r in res.json["history"])
+        assert res.json["totalCount"] == 25
+        cursor = res.json["nextCursor"]
+        pages += 1
+
+    assert pages == 3
+    assert len(seen) == 25 and len(set(seen)) == 25
+    assert seen[0] == "e24"
+
+def test_cursor_pagination_options(client, mock_db):
+    mock_db.participation.insert_one({"userId": "u1", "eventId": "e1", "status": "Confirmed", "createdAt": datetime.utcnow()})
+    res = client.get("/api/participation/all?cursor=&total=none")
+    assert res.status_code == 200
+    assert "totalCount" not in res.json
+    assert res.json["hasMore"] is False
+
+    res = client.get("/api/participation/all?cursor=not-a-cursor")
+    assert res.status_code == 400
+
+    for bad in ("cursor=&limit=0", "limit=-5", "limit=ten", "offset=-1"):
+        assert client.get(f"/api/participation/all?{bad}").status_code == 400
+    assert client.get("/api/participation/all?cursor=&limit=100000").json["limit"] == MAX_PAGE_SIZE
+
+def test_count_cache_is_bounded():
+    cache = CountCache(max_entries=3)
+    db = MongoClient().testdb
+    for i in range(10):
+        assert cache.count(db.participation, {"userId": f"u{i}"}) == 0
+    assert len(cache) == 3
+
+def test_migrations_and_indexes_are_idempotent(mock_db):
+    mock_db.participation.insert_many([
+        {"userId": "u1", "eventId": "e1", "status": "Registered", "updatedAt": datetime(2025, 1, 1)},
+        {"userId": "u1", "eventId": "e1", "status": "Attended", "updatedAt": datetime(2025, 1, 2)},
+    ])
+    assert database.migrate(mock_db) == ["0001_dedupe_participation", "0002_dedupe_users",
+                                         "0003_backfill_event_month", "0004_availability_masks",
+                                         "0005_backfill_unread_counters"]
+    assert database.migrate(mock_db) == []
+    assert mock_db.participation.find_one({"userId": "u1"})["status"] == "Attended"
+    assert "userId_eventId_unique" in mock_db.participation.index_information()
+
+def test_dedupe_migrations_merge_and_archive_removed_rows(mock_db):
+    mock_db.participation.insert_many([
+        {"userId": "u1", "eventId": "e1", "status": "Attended", "hoursLogged": 3, "feedback": "Loved it",
+         "updatedAt": datetime(2025, 1, 1)},
+        {"userId": "u1", "eventId": "e1", "status": "Attended", "hoursLogged": 4, "updatedAt": datetime(2025, 1, 2)},
+    ])
+    mock_db.participation_stats.insert_one({"userId": "u1", "attendedHours": 7})
+    mock_db.org_stats.insert_one({"_id": "org", "attendedHours": 7})
+    first = mock_db.users.insert_one({"userId": "p1", "skills": ["Cooking"]}).inserted_id
+    mock_db.users.insert_one({"userId": "p1", "skills": ["Driving"], "personalInfo": {"fullName": "Pat"}})
+
+    assert database._dedupe_participation(mock_db) == 1
+    record = mock_db.participation.find_one({"userId": "u1"})
+    assert record["hoursLogged"] == 4 and record["feedback"] == "Loved it"
+    assert mock_db.participation_stats.count_documents({}) == 0 and mock_db.org_stats.count_documents({}) == 0
+
+    assert database._dedupe_users(mock_db) == 1
+    user = mock_db.users.find_one({"userId": "p1"})
+    assert user["_id"] == first and user["skills"] == ["Cooking"] and user["personalInfo"] == {"fullName": "Pat"}
+    archived = list(mock_db.migration_archive.find({}, {"_id": 0, "migration": 1, "document.hoursLogged": 1}))
+    assert archived == [{"migration": "0001_dedupe_participation", "document": {"hoursLogged": 3}},
+                        {"migration": "0002_dedupe_users", "document": {}}]
+
+def test_find_collscans():
+    plan = {"stage": "SORT", "inputStage": {"stage": "COLLSCAN"}}
+    assert database.find_collscans(plan) == ["COLLSCAN"]
+    assert database.find_collscans({"stage": "FETCH", "inputStage": {"stage": "IXSCAN"}}) == []
+
+def test_bulk_record_applies_batch_with_per_item_results(client, mock_db):
+    mock_db.participation.insert_one({"userId": "u1", "eventId": "e1", "status": "Confirmed"})
+    client.get("/api/participation/statistics?userId=u1")
+
+    res = client.post("/api/participation/record/bulk", json={"entries": [
+        {"userId": "u1", "eventId": "e1", "status": "Attended", "hoursLogged": 4, "hoursVerified": True},
+        {"userId": "u2", "eventId": "e1", "status": "No-Show"},
+        {"userId": "u3", "eventId": "e1", "feedback": "Great"},
+        {"eventId": "e1", "status": "Attended"},
+    ]})
+    assert res.status_code == 207
+    assert [r["result"] for r in res.json["results"]] == ["updated", "inserted", "notFound", "invalid"]
+    assert res.json["summary"] == {"updated": 1, "inserted": 1, "notFound": 1, "invalid": 1}
+
+    record = mock_db.participation.find_one({"userId": "u1"})
+    assert record["hoursLogged"] == 4 and record["hoursVerified"] is True
+    assert mock_db.participation.count_documents({}) == 2
+    stats = client.get("/api/participation/statistics?userId=u1").json
+    assert stats["totalHours"] == 4 and stats["statusCounts"] == {"Attended": 1}
+
+def test_bulk_record_reports_bad_values_per_item(client, mock_db):
+    res = client.post("/api/participation/record/bulk", json={"entries": [
+        {"userId": "u1", "eventId": "e1", "status": "Attended", "hoursLogged": "three"},
+        {"userId": "u2", "eventId": "e1", "status": "Attended", "hoursLogged": 2, "hoursVerified": "maybe"},
+        {"userId": "u3", "eventId": "e1", "status": "Attended", "hoursLogged": "2.5", "hoursVerified": "false"},
+    ]})
+    assert res.status_code == 207
+    assert [r["result"] for r in res.json["results"]] == ["invalid", "invalid", "inserted"]
+    assert res.json["results"][0]["error"] == "hoursLogged must be a number"
+    record = mock_db.participation.find_one({"userId": "u3"})
+    assert record["hoursLogged"] == 2.5 and record["hoursVerified"] is False
+    assert mock_db.participation.count_documents({}) == 1
+
+def test_bulk_feedback_only_updates_existing(client, mock_db):
+    mock_db.participation.insert_many([
+        {"userId": f"u{i}", "eventId": "e1", "status": "Attended"} for i in range(300)
+    ])
+    res = client.post("/api/participation/log-feedback/bulk", json={"entries": [
+        {"userId": f"u{i}", "eventId": "e1", "feedback": f"note {i}", "status": "Cancelled"} for i in range(300)
+    ]})
+    assert res.status_code == 200
+    assert res.json["summary"] == {"updated": 300}
+    assert mock_db.participation.count_documents({"feedback": {"$exists": True}, "status": "Attended"}) == 300
+
+
+class CountingCollection:
+    def __init__(self, collection):
+        self.collection = collection
+        self.finds = 0
+
+    def find(self, *args, **kwargs):
+        self.finds += 1
+        return self.collection.find(*args, **kwargs)
+
+def test_roster_embeds_event_and_users_with_one_query_each(client, mock_db, monkeypatch):
+    event_id = str(mock_db.events.insert_one({"name": "Food Drive", "startDate": "2025-05-01",
+                                             "location": "Houston"}).inserted_id)
+    mock_db.users.insert_many([
+        {"userId": f"u{i}", "personalInfo": {"fullName": f"Volunteer {i}", "email": f"u{i}@example.com"}}
+        for i in range(25)
+    ])
+    mock_db.participation.insert_many([
+        {"userId": f"u{i}", "eventId": event_id, "status": "Registered"} for i in range(30)
+    ])
+    events = CountingCollection(mock_db.events)
+    users = CountingCollection(mock_db.users)
+    monkeypatch.setattr("app.services.participation_includes.event_collection", events)
+    monkeypatch.setattr("app.services.participation_includes.user_collection", users)
+
+    res = client.get(f"/api/participation/event/{event_id}?limit=30")
+    assert res.status_code == 200 and len(res.json["history"]) == 30
+    assert (events.finds, users.finds) == (1, 1)
+    first = res.json["history"][0]
+    assert first["event"] == {"id": event_id, "name": "Food Drive", "description": None, "location": "Houston",
+                              "startDate": "2025-05-01", "endDate": "2025-05-01", "startTime": None,
+                              "endTime": None, "status": None}
+    assert first["user"]["name"] == "Volunteer 0" and first["user"]["email"] == "u0@example.com"
+    # Records whose volunteer has no profile embed null rather than failing
+    assert res.json["history"][-1]["user"] is None
+
+    bare = client.get(f"/api/participation/event/{event_id}?include=").json["history"][0]
+    assert "event" not in bare and "user" not in bare
+
+def test_history_include_is_opt_in(client, mock_db):
+    mock_db.participation.insert_one({"userId": "u1", "eventId": "not-an-id", "status": "Attended"})
+    assert "event" not in client.get("/api/participation/my?userId=u1").json["history"][0]
+    record = client.get("/api/participation/my?userId=u1&include=event").json["history"][0]
+    assert record["event"] is None and "user" not in record
+    assert client.get("/api/participation/all?include=venue").status_code == 400
+
+def test_backfill_event_month_migration(mock_db):
+    event_id = str(mock_db.events.insert_one({"startDate": "2025-04-20"}).inserted_id)
+    mock_db.participation.insert_many([
+        {"userId": "u1", "eventId": event_id, "status": "Attended"},
+        {"userId": "u2", "eventId": event_id, "status": "Attended", "eventMonth": "2025-04"},
+        {"userId": "u3", "eventId": "legacy", "status": "Attended"},
+    ])
+    assert database._backfill_event_month({"participation": mock_db.participation, "events": mock_db.events}) == 1
+    assert mock_db.participation.find_one({"userId": "u1"})["eventMonth"] == "2025-04"
@@ -0,0 +1,86 @@
+from datetime import datetime, timedelta
+import pytest
+from app.routes.events import events_bp
+from app.services import reminders
+from app.services.reminders import ReminderScheduler, task_id
+
+NOW = datetime(2030, 6, 1, 12, 0)
+
+@pytest.fixture
+def client(flask_client):
+    return flask_client(events_bp)
+
+def status(db, event_id):
+    return {t["offset"]: t["status"] for t in db.scheduled_tasks.find({"eventId": str(event_id)})}
+
+def test_routes_schedule_move_and_cancel_reminders(client, db):
+    start = (datetime.utcnow() + timedelta(days=10)).strftime("%Y-%m-%d")
+    event_id = client.post("/api/events/", json={"name": "Beach Cleanup", "startDate": start}).get_json()["id"]
+    assert status(db, event_id) == {"7d": "pending", "1d": "pending"}
+
+    # Saving the same start must not re-arm a reminder that was already sent
+    db.scheduled_tasks.update_one({"_id": task_id(event_id, "7d")}, {"$set": {"status": "done"}})
+    client.put(f"/api/events/{event_id}?notify=false", json={"startDate": start})
+    assert status(db, event_id) == {"7d": "done", "1d": "pending"}
+
+    # Moved to 3 days out: the 1-day reminder moves, the 7-day one no longer applies
+    db.scheduled_tasks.update_one({"_id": task_id(event_id, "7d")}, {"$set": {"status": "pending"}})
+    soon = (datetime.utcnow() + timedelta(days=3)).strftime("%Y-%m-%d")
+    client.put(f"/api/events/{event_id}?notify=false", json={"startDate": soon})
+    assert status(db, event_id) == {"7d": "skipped", "1d": "pending"}
+    assert db.scheduled_tasks.find_one({"_id": task_id(event_id, "1d")})["scheduledFor"] == \
+        datetime.strptime(soon, "%Y-%m-%d") - timedelta(days=1)
+
+    client.delete(f"/api/events/{event_id}?notify=false")
+    assert status(db, event_id) == {"7d": "skipped", "1d": "cancelled"}
+
+def test_due_reminders_are_claimed_once_and_sent_in_one_batch(db, monkeypatch):
+    event_ids = db.events.insert_many([
+        {"name": "Food Drive", "startDate": "2030-06-02", "startTime": "09:00", "registeredVolunteers": ["a", "b"]},
+        {"name": "Tutoring", "startDate": "2030-06-08", "startTime": "09:00", "registeredVolunteers": ["b"]},
+    ]).inserted_ids
+    db.participation.insert_many([
+        {"userId": "c", "eventId": str(event_ids[0]), "status": "Confirmed"},
+        {"userId": "d", "eventId": str(event_ids[0]), "status": "Cancelled"},
+    ])
+    for event in db.events.find():
+        ops, _ = reminders.schedule_writes(event, now=NOW - timedelta(days=30))
+        db.scheduled_tasks.bulk_write(ops)
+
+    inserts = []
+    original = reminders.notification_fanout.insert_notifications
+    monkeypatch.setattr(reminders.notification_fanout, "insert_notifications",
+                        lambda docs: (inserts.append(len(docs)), original(docs)))
+
+    first = ReminderScheduler(worker_id="w1", clock=lambda: NOW)
+    second = ReminderScheduler(worker_id="w2", clock=lambda: NOW)
+    first.load()
+    second.load()
+    # Both Food Drive reminders are overdue (as after downtime) and Tutoring's 7-day one is due;
+    # Tutoring's 1-day reminder is outside the window and stays in Mongo
+    assert first.next_due() == datetime(2030, 5, 26, 9)
+    assert len(first._heap) == 3
+
+    first.run_due()
+    second.run_due()
+    assert first.stats["sent"] == 3 and second.stats["claimed"] == 0
+    assert inserts == [4]  # a, b, c for the Food Drive and b for Tutoring, in one write
+
+    notified = sorted((n["userId"], n["metadata"]["reminder"]) for n in db.notifications.find())
+    assert notified == [("a", "1d"), ("b", "1d"), ("b", "7d"), ("c", "1d")]
+    message = db.notifications.find_one({"userId": "a"})["message"]
+    assert message == "Food Drive starts tomorrow (2030-06-02 at 09:00)."
+    assert db.notification_counters.find_one({"userId": "b"})["unread"] == 2
+    assert status(db, event_ids[0]) == {"7d": "done", "1d": "done"}
+    assert status(db, event_ids[1]) == {"7d": "done", "1d": "pending"}
+
+def test_expired_claims_are_retaken_and_missing_events_skipped(db):
+    db.scheduled_tasks.insert_one({
+        "_id": "reminder:deleted:1d", "eventId": "0" * 24, "offset": "1d", "scheduledFor": NOW - timedelta(hours=1),
+        "status": "claimed", "claimedBy": "crashed", "claimedUntil": NOW - timedelta(minutes=1), "attempts": 1,
+    })
+    scheduler = ReminderScheduler(worker_id="w1", clock=lambda: NOW)
+    assert scheduler.load() == 1
+    scheduler.run_due()
+    task = db.scheduled_tasks.find_one({"_id": "reminder:deleted:1d"})
+    assert task["status"] == "skipped" and task["claimedBy"] == "w1" and task["attempts"] == 2
@@ -0,0 +1,326 @@
+# Route contracts shared by the Flask app and the ASGI app: every test runs
+# against both implementations over the same mongomock database (the conftest db fixture).
+from datetime import datetime
+import pytest
+from flask import Flask
+from starlette.testclient import TestClient
+from app.asgi import create_asgi_app
+from app.routes.events import events_bp
+from app.routes.notifications import notifications_bp
+from app.routes.participation import participation_bp
+from app.routes.user_profile import user_profile_bp
+from app.services import certificates, scans
+from app.tests.async_mongo import AsyncDatabase
+from app.utils.json_provider import BSONJSONProvider
+
+
+class Result:
+    def __init__(self, status_code, body, headers):
+        self.status_code = status_code
+        self.body = body
+        self.headers = headers
+
+
+class FlaskApi:
+    def __init__(self):
+        app = Flask(__name__)
+        app.json = BSONJSONProvider(app)
+        app.url_map.strict_slashes = False
+        app.register_blueprint(notifications_bp, url_prefix="/api/notifications")
+        app.register_blueprint(participation_bp, url_prefix="/api/participation")
+        app.register_blueprint(user_profile_bp)
+        app.register_blueprint(events_bp, url_prefix="/api/events")
+        self.client = app.test_client()
+
+    def call(self, method, path, json=None, headers=None):
+        res = self.client.open(path, method=method, json=json, headers=headers)
+        return Result(res.status_code, res.get_json(silent=True), res.headers)
+
+
+class AsgiApi:
+    def __init__(self, db):
+        self.client = TestClient(create_asgi_app(db=AsyncDatabase(db)))
+
+    def call(self, method, path, json=None, headers=None):
+        res = self.client.request(method, path, json=json, headers=headers)
+        try:
+            body = res.json()
+        except ValueError:
+            body = None
+        return Result(res.status_code, body, res.headers)
+
+
+@pytest.fixture(params=["flask", "asgi"])
+def api(request, db):
+    return FlaskApi() if request.param == "flask" else AsgiApi(db)
+
+
+def test_event_crud_and_etags(api):
+    created = api.call("POST", "/api/events/", {"name": "Beach Cleanup", "city": "Galveston", "maxVolunteers": 1})
+    assert created.status_code == 201
+    event_id = created.body["id"]
+    assert "_id" not in created.body and created.body["currentVolunteers"] == 0
+
+    fetched = api.call("GET", f"/api/events/{event_id}")
+    assert fetched.status_code == 200 and fetched.body["name"] == "Beach Cleanup"
+    etag = fetched.headers["ETag"]
+    assert api.call("GET", f"/api/events/{event_id}", headers={"If-None-Match": etag}).status_code == 304
+
+    updated = api.call("PUT", f"/api/events/{event_id}?notify=false", {"name": "Beach Cleanup II"})
+    assert updated.status_code == 200 and updated.body["name"] == "Beach Cleanup II"
+    assert api.call("GET", f"/api/events/{event_id}", headers={"If-None-Match": etag}).status_code == 200
+
+    listed = api.call("GET", "/api/events/?fields=name")
+    assert listed.body == [{"id": event_id, "name": "Beach Cleanup II"}]
+    assert api.call("GET", "/api/events/created-by/admin").body[0]["id"] == event_id
+
+    assert api.call("DELETE", f"/api/events/{event_id}").body == {"message": "Event deleted"}
+    assert api.call("GET", f"/api/events/{event_id}").status_code == 404
+    assert api.call("DELETE", f"/api/events/{event_id}").status_code == 404
+
+def test_registration_waitlist_and_cancellation_notices(api):
+    event_id = api.call("POST", "/api/events/", {"name": "Food Drive", "maxVolunteers": 1}).body["id"]
+
+    first = api.call("POST", f"/api/events/{event_id}/register", {"userId": "a"})
+    assert first.status_code == 200 and first.body["registrationStatus"] == "registered"
+    second = api.call("POST", f"/api/events/{event_id}/register", {"userId": "b"})
+    assert second.status_code == 202 and second.body["waitlistPosition"] == 1
+    assert api.call("POST", f"/api/events/{event_id}/register", {"userId": "a"}).status_code == 409
+
+    left = api.call("POST", f"/api/events/{event_id}/unregister", {"userId": "a"})
+    assert left.body["promotedVolunteer"] == "b" and left.body["registeredVolunteers"] == ["b"]
+
+    api.call("DELETE", f"/api/events/{event_id}")
+    inbox = api.call("GET", "/api/notifications/?userId=b").body
+    assert [n["type"] for n in inbox] == ["EVENT_CANCELLATION"]
+    assert api.call("GET", "/api/notifications/unread-count?userId=b").body == 1
+
+    assert api.call("POST", f"/api/notifications/mark-as-read/{inbox[0]['id']}").status_code == 200
+    assert api.call("GET", "/api/notifications/unread-count?userId=b").body == 0
+    assert api.call("DELETE", f"/api/notifications/delete/{inbox[0]['id']}").status_code == 200
+    assert api.call("DELETE", f"/api/notifications/delete/{inbox[0]['id']}").status_code == 404
+
+def test_raising_capacity_promotes_the_waitlist(api, db):
+    event_id = api.call("POST", "/api/events/", {"name": "Soup Kitchen", "maxVolunteers": 1}).body["id"]
+    for user in ("a", "b", "c", "d"):
+        api.call("POST", f"/api/events/{event_id}/register", {"userId": user})
+
+    updated = api.call("PUT", f"/api/events/{event_id}?notify=false", {"maxVolunteers": 3})
+    assert updated.status_code == 200
+    assert updated.body["registeredVolunteers"] == ["a", "b", "c"] and updated.body["currentVolunteers"] == 3
+    assert [w["userId"] for w in updated.body["waitlist"]] == ["d"]
+    # Nobody waits once capacity is unlimited
+    assert api.call("PUT", f"/api/events/{event_id}?notify=false", {"maxVolunteers": None}).body["waitlist"] == []
+
+def test_participation_history_and_statistics(api, db):
+    event_id = str(db["events"].insert_one({"name": "Tutoring", "startDate": "2025-03-08"}).inserted_id)
+    for user, status in (("u1", "Registered"), ("u1", "Attended")):
+        res = api.call("POST", "/api/participation/record",
+                       {"userId": user, "eventId": event_id, "status": status, "hoursLogged": 3})
+        assert res.body == {"message": "Participation recorded"}
+    assert api.call("POST", "/api/participation/record", {"userId": "u1"}).status_code == 400
+
+    history = api.call("GET", "/api/participation/my?userId=u1&cursor=&limit=1").body
+    assert history["hasMore"] is False and history["history"][0]["status"] == "Attended"
+    assert history["totalCount"] == 1
+    assert api.call("GET", "/api/participation/all?cursor=bogus").status_code == 400
+
+    stats = api.call("GET", "/api/participation/statistics?userId=u1").body
+    assert stats["totalHours"] == 3 and stats["eventsByMonth"] == {"Mar 2025": 1}
+
+    feedback = api.call("POST", "/api/participation/log-feedback", {"userId": "u1", "eventId": event_id, "feedback": "Great"})
+    assert feedback.body == {"message": "Feedback logged"}
+
+    bulk = api.call("POST", "/api/participation/record/bulk", {"entries": [
+        {"userId": "u2", "eventId": event_id, "status": "Attended", "hoursLogged": 2},
+        {"userId": "u3", "eventId": event_id, "feedback": "no record"},
+    ]})
+    assert bulk.status_code == 207 and bulk.body["summary"] == {"inserted": 1, "notFound": 1}
+
+def test_user_profile_sections(api):
+    assert api.call("GET", "/api/user-profile/p1").body == {}
+    assert api.call("PUT", "/api/user-profile/p1/skills", {"skills": [{"name": "Cooking"}]}).body == {"message": "Skills updated"}
+    assert api.call("PUT", "/api/user-profile/p1/personal-info", {"fullName": "Pat"}).body == {"message": "Personal info updated"}
+    profile = api.call("GET", "/api/user-profile/p1").body
+    assert profile["personalInfo"] == {"fullName": "Pat"} and profile["userId"] == "p1" and "id" in profile
+    assert api.call("DELETE", "/api/user-profile/p1").body == {"message": "User deleted"}
+    assert api.call("GET", "/api/user-profile/p1").body == {}
+
+def test_event_roster_and_includes(api, db):
+    event_id = api.call("POST", "/api/events/", {"name": "Shelter Shift", "startDate": "2030-05-02"}).body["id"]
+    db["users"].insert_one({"userId": "r1", "personalInfo": {"fullName": "Rae", "email": "rae@example.com"}})
+    for user in ("r1", "r2"):
+        api.call("POST", "/api/participation/record", {"userId": user, "eventId": event_id, "status": "Registered"})
+
+    roster = api.call("GET", f"/api/participation/event/{event_id}?total=exact").body
+    assert roster["totalCount"] == 2
+    by_user = {r["userId"]: r for r in roster["history"]}
+    assert by_user["r1"]["user"]["profile"] == {"fullName": "Rae", "phone": None}
+    assert by_user["r2"]["user"] is None
+    assert {r["event"]["name"] for r in roster["history"]} == {"Shelter Shift"}
+
+    mine = api.call("GET", "/api/participation/my?userId=r1&include=event").body["history"]
+    assert mine[0]["event"]["id"] == event_id and "user" not in mine[0]
+    assert api.call("GET", "/api/participation/my?userId=r1&include=venue").status_code == 400
+
+def test_impact_dashboard(api):
+    assert api.call("GET", "/api/participation/dashboard").body["signups"] == 0
+    event_id = api.call("POST", "/api/events/", {"name": "Tutoring", "startDate": "2030-02-01",
+                                                 "maxVolunteers": 4}).body["id"]
+    api.call("POST", "/api/participation/record/bulk", {"entries": [
+        {"userId": "x", "eventId": event_id, "status": "Attended", "hoursLogged": 3, "hoursVerified": True},
+        {"userId": "y", "eventId": event_id, "status": "Attended", "hoursLogged": 2, "hoursVerified": True},
+    ]})
+    api.call("POST", "/api/participation/record", {"userId": "x", "eventId": event_id, "status": "No-Show"})
+
+    dashboard = api.call("GET", "/api/participation/dashboard?months=1").body
+    assert (dashboard["signups"], dashboard["noShowRate"], dashboard["fillRate"]) == (2, 0.5, 0.5)
+    assert [m["month"] for m in dashboard["byMonth"]] == ["2030-02"]
+    board = api.call("GET", "/api/participation/leaderboard").body["leaderboard"]
+    assert board == [{"userId": "y", "verifiedHours": 2}]
+
+def test_rescheduling_moves_participation_months(api, db):
+    event_id = api.call("POST", "/api/events/", {"name": "Tutoring", "startDate": "2030-02-01",
+                                                 "maxVolunteers": 4}).body["id"]
+    api.call("POST", "/api/participation/record/bulk", {"entries": [
+        {"userId": "x", "eventId": event_id, "status": "Attended", "hoursLogged": 3},
+        {"userId": "y", "eventId": event_id, "status": "Registered"},
+    ]})
+    # Build both rollups before the move so it has to patch them
+    assert api.call("GET", "/api/participation/statistics?userId=x").body["eventsByMonth"] == {"Feb 2030": 1}
+    assert api.call("GET", "/api/participation/dashboard").body["byMonth"][0]["month"] == "2030-02"
+
+    api.call("PUT", f"/api/events/{event_id}?notify=false", {"startDate": "2030-03-15"})
+    stats = api.call("GET", "/api/participation/statistics?userId=x").body
+    assert stats["eventsByMonth"] == {"Mar 2030": 1} and stats["hoursByMonth"] == {"Mar 2030": 3}
+    by_month = api.call("GET", "/api/participation/dashboard").body["byMonth"]
+    assert [(m["month"], m["signups"], m["capacity"], m["fillRate"]) for m in by_month] == [("2030-03", 2, 4, 0.5)]
+    assert {r["eventMonth"] for r in db["participation"].find()} == {"2030-03"}
+
+    # A same-month edit leaves the records alone
+    api.call("PUT", f"/api/events/{event_id}?notify=false", {"startDate": "2030-03-20"})
+    assert api.call("GET", "/api/participation/dashboard").body["byMonth"][0]["signups"] == 2
+
+def test_notification_outbox(api, db):
+    db["users"].insert_one({"userId": "o1", "personalInfo": {"email": "o1@example.com"}})
+    event_id = api.call("POST", "/api/events/", {"name": "Park Cleanup"}).body["id"]
+    api.call("POST", f"/api/events/{event_id}/register", {"userId": "o1"})
+    sent = api.call("POST", f"/api/notifications/event/{event_id}", {"message": "Bring gloves"})
+    assert sent.body["recipients"] == 1
+    assert api.call("GET", "/api/notifications/outbox/stats").body == {"email": {"pending": 1}}
+
+    db["outbox"].update_many({}, {"$set": {"status": "dead", "deadAt": datetime(2030, 1, 1), "lastError": "550"}})
+    dead = api.call("GET", "/api/notifications/outbox/dead?limit=5").body
+    assert [m["to"] for m in dead] == ["o1@example.com"]
+    assert api.call("POST", "/api/notifications/outbox/dead/requeue", {"ids": [dead[0]["id"]]}).body == {"requeued": 1}
+    assert api.call("GET", "/api/notifications/outbox/stats").body == {"email": {"pending": 1}}
+
+def test_scan_ingestion(api, db):
+    check_in = {"userId": "s1", "eventId": "e1", "checkInTime": "2030-07-01T09:00:00Z"}
+    first = api.call("POST", "/api/participation/check-in", check_in)
+    assert first.status_code == 202 and first.body["checkInTime"] == "2030-07-01T09:00:00"
+    again = api.call("POST", "/api/participation/check-in", check_in)
+    assert (again.status_code, again.body["duplicate"], again.body["scanId"]) == (200, True, first.body["scanId"])
+    assert api.call("POST", "/api/participation/check-out", {"userId": "s1"}).status_code == 400
+
+    batch = api.call("POST", "/api/participation/scans", {"scans": [
+        {"scanId": "k1", "userId": "s1", "eventId": "e1", "kind": "out", "at": "2030-07-01T12:00:00Z"},
+        {"scanId": "k1", "userId": "s1", "eventId": "e1", "kind": "out", "at": "2030-07-01T12:00:00Z"},
+        {"userId": "s1", "kind": "in"},
+    ]})
+    assert batch.status_code == 207
+    assert [r["result"] for r in batch.body["results"]] == ["accepted", "duplicate", "invalid"]
+
+    assert scans.compact() == 2
+    assert db["participation"].find_one({"userId": "s1"})["hoursLogged"] == 3
+
+def test_certificates(api, monkeypatch):
+    monkeypatch.setattr(certificates, "CERTIFICATE_WORKERS", 0)
+    event_id = api.call("POST", "/api/events/", {"name": "Beach Sweep", "startDate": "2030-08-03"}).body["id"]
+    api.call("POST", "/api/participation/record/bulk", {"entries": [
+        {"userId": "c1", "eventId": event_id, "status": "Attended", "hoursLogged": 3, "hoursVerified": True},
+        {"userId": "c2", "eventId": event_id, "status": "Attended", "hoursLogged": 2, "hoursVerified": True},
+    ]})
+    bulk = api.call("POST", f"/api/participation/certificate/{event_id}", {}).body
+    assert bulk["summary"] == {"generated": 2, "cached": 0}
+    mine = api.call("POST", f"/api/participation/certificate/{event_id}", {"userId": "c1"}).body
+    assert mine["title"] == "Certificate of Service: Beach Sweep" and mine["metadata"]["hours"] == 3
+    assert [c["id"] for c in api.call("GET", "/api/participation/certificates/c1").body] == [mine["id"]]
+    assert api.call("GET", "/api/participation/certificates").status_code == 400
+
+    pdf = api.call("GET", mine["imageUrl"])
+    assert pdf.status_code == 200 and pdf.headers["ETag"] == f'"{mine["id"]}"'
+    assert api.call("GET", mine["imageUrl"], headers={"If-None-Match": pdf.headers["ETag"]}).status_code == 304
+    assert api.call("POST", "/api/participation/certificate/missing", {"userId": "c1"}).status_code == 404
+
+def test_event_search(api):
+    for name, city, urgency in (("Harbor Cleanup", "Galveston", "High"), ("Trail Cleanup", "Austin", "Low"),
+                                ("Coat Drive", "Austin", "High")):
+        api.call("POST", "/api/events/", {"name": name, "city": city, "urgency": urgency, "startDate": "2030-09-01"})
+    result = api.call("GET", "/api/events/search?q=clenup&city=Austin").body
+    assert [r["name"] for r in result["results"]] == ["Trail Cleanup"]
+    assert result["facets"]["city"] == {"Galveston": 1, "Austin": 1}
+
+    coat = api.call("GET", "/api/events/search?q=coat").body["results"][0]
+    api.call("PUT", f"/api/events/{coat['id']}?notify=false", {"name": "Winter Coat Drive"})
+    assert api.call("GET", "/api/events/search?q=winter").body["total"] == 1
+    api.call("DELETE", f"/api/events/{coat['id']}?notify=false")
+    assert api.call("GET", "/api/events/search?urgency=high").body["total"] == 1
+    assert api.call("GET", "/api/events/search/stats").body["events"] == 2
+
+def test_schedule_conflicts_and_availability_masks(api, db):
+    first = api.call("POST", "/api/events/", {"name": "Food Drive", "startDate": "2030-09-03",
+                                              "startTime": "09:00", "endTime": "12:00"}).body["id"]
+    second = api.call("POST", "/api/events/", {"name": "Book Sale", "startDate": "2030-09-03",
+                                               "startTime": "10:00", "endTime": "11:00"}).body["id"]
+    assert api.call("POST", f"/api/events/{first}/register", {"userId": "s1"}).status_code == 200
+    clash = api.call("POST", f"/api/events/{second}/register", {"userId": "s1"})
+    assert clash.status_code == 409 and [c["eventId"] for c in clash.body["conflicts"]] == [first]
+    assert api.call("POST", f"/api/events/{second}/register", {"userId": "s1", "allowConflict": True}).status_code == 200
+
+    api.call("POST", f"/api/events/{second}/unregister", {"userId": "s1"})
+    api.call("PUT", f"/api/events/{first}?notify=false", {"startTime": "13:00", "endTime": "15:00"})
+    assert api.call("POST", f"/api/events/{second}/register", {"userId": "s1"}).status_code == 200
+
+    updated = api.call("PUT", "/api/user-profile/s1/availability", {"availableDays": ["Tuesday"],
+                                                                  "availableTimeSlots": ["morning"]})
+    assert updated.body == {"message": "Availability updated"}
+    assert db.users.find_one({"userId": "s1"})["availabilityMask"]["weekly"] == f"{0xF00 << 24:042x}"
+
+def test_asgi_stream_wakes_on_publish(db, monkeypatch):
+    import asyncio
+    import threading
+    from app.services import notification_hub
+    from app.services.notification_fanout import notify_users
+    monkeypatch.setattr("app.asgi.notifications.HEARTBEAT_SECONDS", 30)
+    hub = notification_hub.reset_hub(max_connections=5)
+    app = create_asgi_app(db=AsyncDatabase(db))
+
+    # TestClient waits for the whole body, so drive the endless stream directly
+    async def run():
+        chunks = asyncio.Queue()
+        disconnected = asyncio.Event()
+
+        async def receive():
+            await disconnected.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            if message["type"] == "http.response.body" and message.get("body"):
+                await chunks.put(message["body"].decode())
+
+        scope = {"type": "http", "method": "GET", "path": "/api/notifications/stream", "raw_path": b"",
+                 "query_string": b"userId=s1", "headers": [], "http_version": "1.1", "scheme": "http",
+                 "server": ("test", 80), "client": ("test", 1), "root_path": "", "app": app}
+        task = asyncio.create_task(app(scope, receive, send))
+        assert (await asyncio.wait_for(chunks.get(), 5)).startswith("retry:")
+        assert "event: unread" in await asyncio.wait_for(chunks.get(), 5)
+
+        # Publish from another thread; the stream must wake long before the heartbeat
+        threading.Thread(target=notify_users, args=(["s1"], "Hi", "Pushed")).start()
+        assert "Pushed" in await asyncio.wait_for(chunks.get(), 5)
+        disconnected.set()
+        task.cancel()
+
+    asyncio.run(run())
+    assert hub.stats()["connections"] == 0
@@ -0,0 +1,105 @@
+import time
+from datetime import datetime, timedelta
+import pytest
+from app.routes.participation import participation_bp
+from app.services import org_stats, scans
+from app.services.scans import pair_hours
+
+@pytest.fixture
+def client(flask_client):
+    return flask_client(participation_bp)
+
+def scan(kind, at, **extra):
+    return {"kind": kind, "at": at, **extra}
+
+def test_pairing_ignores_unmatched_and_overlong_shifts():
+    t = datetime(2030, 5, 1, 8)
+    history = [
+        scan("in", t), scan("in", t + timedelta(minutes=5)),  # double tap keeps the first
+        scan("out", t + timedelta(hours=3)),
+        scan("out", t + timedelta(hours=4)),  # nothing open
+        scan("in", t + timedelta(hours=5)), scan("out", t + timedelta(hours=6, minutes=30)),
+    ]
+    assert pair_hours(history) == (4.5, t, t + timedelta(hours=6, minutes=30))
+    # A forgotten check-out earns nothing; the next day's shift still counts
+    history = [scan("in", t), scan("in", t + timedelta(days=1)), scan("out", t + timedelta(days=1, hours=2))]
+    assert pair_hours(history)[0] == 0
+    assert pair_hours([scan("in", t), scan("out", t + timedelta(days=1, hours=2))])[0] == 0
+    assert pair_hours([scan("in", t)]) == (0, t, None)
+
+def test_check_in_and_out_are_logged_then_compacted(client, db):
+    res = client.post("/api/participation/check-in",
+                      json={"userId": "u1", "eventId": "e1", "checkInTime": "2030-05-01T08:00:00Z"})
+    assert res.status_code == 202 and res.get_json()["duplicate"] is False
+    # The same scan retried is acknowledged without a second log entry
+    retry = client.post("/api/participation/check-in",
+                        json={"userId": "u1", "eventId": "e1", "checkInTime": "2030-05-01T08:00:00Z"})
+    assert retry.status_code == 200 and retry.get_json()["scanId"] == res.get_json()["scanId"]
+    assert db.participation.count_documents({}) == 0
+
+    keyed = {"Idempotency-Key": "device-7:42"}
+    check_out = {"userId": "u1", "eventId": "e1", "checkOutTime": "2030-05-01T11:15:00Z"}
+    client.post("/api/participation/check-out", json=check_out, headers=keyed)
+    assert client.post("/api/participation/check-out", json=check_out, headers=keyed).get_json()["duplicate"]
+    assert db.scans.count_documents({}) == 2
+
+    assert scans.compact() == 2
+    record = db.participation.find_one({"userId": "u1", "eventId": "e1"})
+    assert record["status"] == "Attended" and record["hoursLogged"] == 3.25
+    assert (record["checkInTime"], record["checkOutTime"]) == (datetime(2030, 5, 1, 8), datetime(2030, 5, 1, 11, 15))
+    assert db.scans.count_documents({"compacted": False}) == 0
+    assert scans.compact() == 0
+
+def test_offline_sync_compacts_into_rollups(client, db):
+    org_stats.reconcile()
+    start = datetime(2030, 6, 1, 9)
+    items = []
+    for i in range(200):
+        items.append({"scanId": f"in-{i}", "userId": f"u{i}", "eventId": "e1", "kind": "in",
+                      "at": start.isoformat()})
+        items.append({"scanId": f"out-{i}", "userId": f"u{i}", "eventId": "e1", "kind": "out",
+                      "at": (start + timedelta(hours=2)).isoformat()})
+    items.append({"userId": "u0", "eventId": "e1", "kind": "lunch"})
+
+    res = client.post("/api/participation/scans", json={"scans": items})
+    assert res.status_code == 207
+    assert res.get_json()["summary"] == {"accepted": 400, "invalid": 1}
+    # A device re-syncing the same batch adds nothing
+    res = client.post("/api/participation/scans", json={"scans": items[:400]})
+    assert res.status_code == 202 and res.get_json()["summary"] == {"duplicate": 400}
+
+    assert scans.compact() == 400
+    assert db.participation.count_documents({"status": "Attended", "hoursLogged": 2}) == 200
+    assert client.get("/api/participation/statistics?userId=u3").get_json()["totalHours"] == 2
+    assert client.get("/api/participation/dashboard").get_json()["hours"] == 400
+
+    # A late check-out correction only reworks that volunteer's record
+    client.post("/api/participation/scans", json={"scans": [
+        {"userId": "u0", "eventId": "e1", "kind": "in", "at": (start + timedelta(hours=3)).isoformat()},
+        {"userId": "u0", "eventId": "e1", "kind": "out", "at": (start + timedelta(hours=4)).isoformat()},
+    ]})
+    assert scans.compact() == 2
+    assert db.participation.find_one({"userId": "u0"})["hoursLogged"] == 3
+    assert client.get("/api/participation/dashboard").get_json()["hours"] == 401
+
+def test_open_check_in_keeps_hours_logged_by_hand(client, db):
+    client.post("/api/participation/record", json={"userId": "u1", "eventId": "e1", "status": "Attended",
+                                                   "hoursLogged": 5})
+    client.post("/api/participation/check-in", json={"userId": "u1", "eventId": "e1"})
+    scans.compact()
+    assert db.participation.find_one({"userId": "u1"})["hoursLogged"] == 5
+
+def test_compactor_wakes_on_scan(client, db):
+    compactor = scans.start_compactor(poll_seconds=60, settle_seconds=0)
+    try:
+        client.post("/api/participation/check-in",
+                    json={"userId": "u1", "eventId": "e1", "checkInTime": "2030-05-01T08:00:00"})
+        client.post("/api/participation/check-out",
+                    json={"userId": "u1", "eventId": "e1", "checkOutTime": "2030-05-01T09:30:00"})
+        deadline = datetime.utcnow() + timedelta(seconds=5)
+        while db.scans.count_documents({"compacted": False}) and datetime.utcnow() < deadline:
+            time.sleep(0.01)
+        assert compactor.stats["scans"] >= 1
+    finally:
+        scans.stop_compactor()
+    assert db.participation.find_one({"userId": "u1"})["hoursLogged"] == 1.5
@@ -0,0 +1,159 @@
+import random
+from datetime import datetime
+import pytest
+from bson import ObjectId
+from app.routes.events import events_bp
+from app.routes.matching import matching_bp
+from app.routes.user_profile import user_profile_bp
+from app.services import schedule
+from app.services.interval_tree import IntervalTree
+
+def test_interval_tree_matches_brute_force():
+    rng = random.Random(7)
+    tree, intervals = IntervalTree(), {}
+    for i in range(400):
+        start = rng.randrange(1000)
+        intervals[i] = (start, start + rng.randrange(1, 40))
+        tree.add(*intervals[i], key=i)
+    for i in range(0, 400, 3):
+        assert tree.discard(i) == 1
+        del intervals[i]
+    assert len(tree) == len(intervals)
+
+    for _ in range(200):
+        start = rng.randrange(1050)
+        end = start + rng.randrange(1, 30)
+        expected = sorted(k for k, (s, e) in intervals.items() if s < end and e > start)
+        assert sorted(key for _, _, key, _ in tree.overlapping(start, end)) == expected
+        assert tree.overlaps(start, end) == bool(expected)
+
+def test_event_windows_use_the_event_time_zone():
+    event = {"startDate": "2030-03-05", "endDate": "2030-03-06", "startTime": "22:00", "endTime": "01:00",
+             "timezone": "America/Chicago"}
+    # Overnight sessions end the next day; Chicago is UTC-6 in early March
+    assert schedule.event_windows(event) == [
+        (datetime(2030, 3, 6, 4), datetime(2030, 3, 6, 7)),
+        (datetime(2030, 3, 7, 4), datetime(2030, 3, 7, 7)),
+    ]
+    assert schedule.event_windows({"startDate": "2030-03-05", "startTime": "09:00", "timezone": "Nowhere/Else"}) == \
+        [(datetime(2030, 3, 5, 9), datetime(2030, 3, 5, 12))]
+    assert schedule.event_sessions({"startDate": "2030-03-05"}) == [(datetime(2030, 3, 5), datetime(2030, 3, 6))]
+    assert schedule.event_windows({"name": "Undated"}) == []
+
+def test_availability_masks():
+    mask = schedule.availability_mask({"availableDays": ["Monday", "wednesday"], "availableTimeSlots": ["morning"]})
+    assert bin(mask).count("1") == 8
+    assert mask >> 8 & 1 and mask >> (2 * 24 + 11) & 1 and not mask >> (24 + 8) & 1
+    assert schedule.availability_mask({"availableTimeSlots": ["evening"]}) == sum(0b1111 << (17 + 24 * d) for d in range(7))
+    assert schedule.availability_mask({"availableDays": ["sunday"]}) == schedule.DAY_HOURS << 144
+    assert schedule.availability_mask({}) == 0
+
+    document = schedule.availability_document({"availableDays": ["monday"],
+                                               "blackoutDates": ["2030-03-04T06:00:00.000Z", "2030-03-04"]})
+    assert len(document["weekly"]) == 42 and document["blackoutDates"] == ["2030-03-04"]
+    assert document["specificDates"] == [] and document["version"] == schedule.MASK_VERSION
+
+def test_free_ids_is_a_subset_check_with_date_overrides():
+    matrix = schedule.AvailabilityMatrix([
+        {"userId": "mornings", "availability": {"availableDays": ["tuesday"], "availableTimeSlots": ["morning"]}},
+        {"userId": "all-day", "availability": {"availableDays": ["tuesday"], "blackoutDates": ["2030-03-12"]}},
+        {"userId": "weekends", "availability": {"availableDays": ["saturday"], "specificDates": ["2030-03-05"]}},
+        {"userId": "unset"},
+    ])
+    # 2030-03-05 and 2030-03-12 are Tuesdays
+    morning = {"startDate": "2030-03-05", "startTime": "09:00", "endTime": "11:30"}
+    assert matrix.free_ids(morning) == ["mornings", "all-day", "weekends", "unset"]
+    assert matrix.free_ids({**morning, "endTime": "12:30"}) == ["all-day", "weekends", "unset"]
+    assert matrix.free_ids({**morning, "startDate": "2030-03-12"}) == ["mornings", "unset"]
+    assert matrix.free_ids({"startDate": "2030-03-09"}) == ["weekends", "unset"]
+
+    matrix.update("mornings", schedule.availability_document({"availableDays": ["saturday"]}))
+    matrix.remove("unset")
+    assert matrix.free_ids({"startDate": "2030-03-09"}) == ["mornings", "weekends"]
+    assert len(matrix) == 3
+
+
+@pytest.fixture
+def client(flask_client):
+    return flask_client(events_bp, matching_bp, user_profile_bp)
+
+def add_event(db, **fields):
+    return str(db.events.insert_one({"name": "Shift", "currentVolunteers": 0, **fields}).inserted_id)
+
+def test_registration_refuses_overlapping_events(client, db):
+    morning = add_event(db, name="Morning Shift", startDate="2030-03-05", startTime="09:00", endTime="12:00")
+    overlap = add_event(db, startDate="2030-03-05", startTime="11:00", endTime="13:00")
+    # 12:00 Chicago is 18:00 UTC, after the morning shift ends
+    later = add_event(db, startDate="2030-03-05", startTime="12:00", endTime="14:00", timezone="America/Chicago")
+
+    assert client.post(f"/api/events/{morning}/register", json={"userId": "v1"}).status_code == 200
+    res = client.post(f"/api/events/{overlap}/register", json={"userId": "v1"})
+    assert res.status_code == 409
+    assert res.get_json()["conflicts"][0]["eventId"] == morning
+    assert res.get_json()["conflicts"][0]["name"] == "Morning Shift"
+    assert client.post(f"/api/events/{later}/register", json={"userId": "v1"}).status_code == 200
+
+    # Moving the morning shift, or leaving it, clears the conflict without reloading from Mongo
+    client.put(f"/api/events/{morning}?notify=false", json={"startTime": "07:00", "endTime": "10:00"})
+    assert client.post(f"/api/events/{overlap}/register", json={"userId": "v2"}).status_code == 200
+    assert schedule.get_index().conflicts("v1", db.events.find_one({"_id": ObjectId(overlap)})) == []
+    client.post(f"/api/events/{later}/unregister", json={"userId": "v1"})
+    assert schedule.get_index().stats()["windows"] == 2
+
+    overlap_late = add_event(db, startDate="2030-03-05", startTime="09:00", endTime="10:00")
+    assert client.post(f"/api/events/{overlap_late}/register", json={"userId": "v1"}).status_code == 409
+    forced = client.post(f"/api/events/{overlap_late}/register", json={"userId": "v1", "allowConflict": True})
+    assert forced.status_code == 200
+
+def test_available_volunteers(client, db):
+    for user_id, days in (("tue", ["tuesday"]), ("sat", ["saturday"]), ("busy", ["tuesday"]), ("new", [])):
+        client.put(f"/api/user-profile/{user_id}/availability",
+                   json={"availableDays": days, "availableTimeSlots": ["morning"]})
+    assert db.users.find_one({"userId": "tue"})["availabilityMask"]["weekly"] == f"{0xF00 << 24:042x}"
+
+    booked = add_event(db, startDate="2030-03-05", startTime="08:00", endTime="10:00")
+    client.post(f"/api/events/{booked}/register", json={"userId": "busy"})
+    event_id = add_event(db, startDate="2030-03-05", startTime="09:00", endTime="11:00")
+    client.post(f"/api/events/{event_id}/register", json={"userId": "new"})
+
+    body = client.get(f"/api/matching/event/{event_id}/available").get_json()
+    assert body == {"eventId": event_id, "count": 1, "volunteerIds": ["tue"]}
+
+    # Profile writes patch the built matrix in place
+    client.put("/api/user-profile/sat/availability", json={"availableDays": ["tuesday"]})
+    client.delete("/api/user-profile/tue")
+    assert client.get(f"/api/matching/event/{event_id}/available").get_json()["volunteerIds"] == ["sat"]
+    assert client.get(f"/api/matching/event/{ObjectId()}/available").status_code == 404
+
+def test_availability_mask_migration(db):
+    from app import database
+    db.users.insert_many([
+        {"userId": "old", "availability": {"availableDays": ["monday"]}},
+        {"userId": "none"},
+    ])
+    assert database._backfill_availability_masks({"users": db.users}) == 1
+    assert db.users.find_one({"userId": "old"})["availabilityMask"]["weekly"] == f"{schedule.DAY_HOURS:042x}"
+    assert "availabilityMask" not in db.users.find_one({"userId": "none"})
+
+def test_index_reloads_outside_the_lock(db, monkeypatch):
+    first = add_event(db, startDate="2030-03-05", registeredVolunteers=["v1", "v2"])
+    second = add_event(db, startDate="2030-03-06", registeredVolunteers=["v1"])
+    index = schedule.get_index()
+    index.trees(["v1", "v2"])
+    assert index.stats() == {"volunteers": 2, "windows": 3, "events": 2, "lookups": 0}
+
+    # An expired volunteer is unloaded through its own event set and read again
+    db.events.update_one({"_id": ObjectId(second)}, {"$pull": {"registeredVolunteers": "v1"}})
+    index._loaded_at["v1"] = datetime.min
+    assert len(index.trees(["v1"])["v1"]) == 1
+    assert index.stats()["events"] == 1 and index._events["v1"] == {first}
+
+    # A registration that lands while Mongo is read leaves the fresh tree already expired
+    db.events.update_one({"_id": ObjectId(first)}, {"$push": {"registeredVolunteers": "v3"}})
+    find = schedule.event_collection.find
+    def racing_find(*args, **kwargs):
+        index.registered("v3", {"_id": ObjectId(first)})
+        return find(*args, **kwargs)
+    monkeypatch.setattr(schedule.event_collection, "find", racing_find)
+    assert len(index.trees(["v3"])["v3"]) == 1
+    assert index._loaded_at["v3"] == datetime.min
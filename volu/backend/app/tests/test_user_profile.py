@@ -1,16 +1,10 @@
 import pytest
-from flask import Flask
 from app.routes.user_profile import user_profile_bp
 from app.database import user_collection
 
 @pytest.fixture
-def client():
-    app = Flask(__name__)
-    app.config["TESTING"] = True
-    app.register_blueprint(user_profile_bp)
-
-    with app.test_client() as client:
-        yield client
+def client(flask_client):
+    return flask_client(user_profile_bp)
 
 def test_get_user_profile(client):
     user_id = "test_user_123"
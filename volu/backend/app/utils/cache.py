@@ -0,0 +1,181 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from flask import Response, current_app, request
+
+try:
+    import redis
+except ImportError:  # optional backend
+    redis = None
+
+# Read-through cache for single-document reads (event and profile pages).
+# Entries hold the serialized response body and its strong ETag, so a hit
+# skips both the Mongo read and JSON encoding. Writers call invalidate().
+#
+# The default backend is an in-process LRU with TTL; with several workers an
+# entry can be stale for up to CACHE_TTL_SECONDS on the workers that did not
+# handle the write. Set CACHE_URL (e.g. unix:///var/run/redis/redis.sock) to
+# share one Redis-compatible cache between workers instead.
+
+DEFAULT_TTL_SECONDS = 60
+DEFAULT_MAX_ENTRIES = 10000
+
+
+class CacheStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counts = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0, "invalidations": 0}
+
+    def incr(self, name, n=1):
+        with self._lock:
+            self.counts[name] += n
+
+    def snapshot(self):
+        with self._lock:
+            counts = dict(self.counts)
+        lookups = counts["hits"] + counts["misses"]
+        counts["hitRatio"] = round(counts["hits"] / lookups, 4) if lookups else 0.0
+        return counts
+
+
+class LRUCache:
+    backend = "memory"
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, ttl_seconds=DEFAULT_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.stats = CacheStats()
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        # Bumped by every delete; a load that overlapped one is not stored
+        self.generation = 0
+
+    def get(self, key):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] <= now:
+                del self._entries[key]
+                self.stats.incr("expirations")
+                entry = None
+            if entry is None:
+                self.stats.incr("misses")
+                return None
+            self._entries.move_to_end(key)
+        self.stats.incr("hits")
+        return entry[0]
+
+    def set(self, key, value, generation=None):
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            self._entries[key] = (value, time.monotonic() + self.ttl_seconds)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats.incr("evictions")
+
+    def delete(self, *keys):
+        with self._lock:
+            self.generation += 1
+            removed = sum(self._entries.pop(key, None) is not None for key in keys)
+        self.stats.incr("invalidations", removed)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def size(self):
+        return len(self._entries)
+
+
+class RedisCache:
+    """Same interface over a Redis-compatible server; evictions are the server's (maxmemory policy)."""
+    backend = "redis"
+
+    def __init__(self, url, ttl_seconds=DEFAULT_TTL_SECONDS, prefix="volu:"):
+        self.client = redis.Redis.from_url(url)
+        self.ttl_seconds = ttl_seconds
+        self.prefix = prefix
+        self.stats = CacheStats()
+        self.generation = None
+
+    def get(self, key):
+        raw = self.client.get(self.prefix + key)
+        if raw is None:
+            self.stats.incr("misses")
+            return None
+        self.stats.incr("hits")
+        return tuple(json.loads(raw))
+
+    def set(self, key, value, generation=None):
+        self.client.set(self.prefix + key, json.dumps(value), ex=self.ttl_seconds)
+
+    def delete(self, *keys):
+        if keys:
+            self.stats.incr("invalidations", self.client.delete(*(self.prefix + k for k in keys)))
+
+    def clear(self):
+        keys = list(self.client.scan_iter(self.prefix + "*"))
+        if keys:
+            self.client.delete(*keys)
+
+    def size(self):
+        return sum(1 for _ in self.client.scan_iter(self.prefix + "*"))
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_cache():
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                ttl = int(os.getenv("CACHE_TTL_SECONDS", DEFAULT_TTL_SECONDS))
+                url = os.getenv("CACHE_URL")
+                if url and redis is not None:
+                    _cache = RedisCache(url, ttl)
+                else:
+                    _cache = LRUCache(int(os.getenv("CACHE_MAX_ENTRIES", DEFAULT_MAX_ENTRIES)), ttl)
+    return _cache
+
+def reset_cache(cache=None):
+    global _cache
+    _cache = cache
+    return cache
+
+def invalidate(*keys):
+    get_cache().delete(*keys)
+
+def cache_stats():
+    cache = get_cache()
+    return {**cache.stats.snapshot(), "backend": cache.backend, "entries": cache.size()}
+
+
+def make_etag(body):
+    return hashlib.sha256(body.encode()).hexdigest()[:32]
+
+def cached_json(key, loader):
+    """Read-through JSON response with a strong ETag; answers 304 when If-None-Match matches.
+
+    ``loader`` returns the payload, or None for a miss that should not be cached.
+    Returns None when the loader does.
+    """
+    cache = get_cache()
+    entry = cache.get(key)
+    if entry is None:
+        generation = cache.generation
+        payload = loader()
+        if payload is None:
+            return None
+        body = current_app.json.dumps(payload)
+        entry = (body, make_etag(body))
+        cache.set(key, entry, generation)
+    body, etag = entry
+    response = Response(body, mimetype="application/json", headers={"Cache-Control": "no-cache"})
+    response.set_etag(etag)
+    return response.make_conditional(request)
@@ -0,0 +1,34 @@
+from datetime import datetime, date
+
+# Event and availability dates arrive either as datetimes (written by the
+# backend) or as strings from the frontend ("2025-04-01" or full ISO with "Z")
+def parse_date(value):
+    if value is None or value == "":
+        return None
+    if isinstance(value, datetime):
+        return value.replace(tzinfo=None)
+    if isinstance(value, date):
+        return datetime(value.year, value.month, value.day)
+    if isinstance(value, str):
+        text = value.strip()
+        if text.endswith("Z"):
+            text = text[:-1] + "+00:00"
+        try:
+            return datetime.fromisoformat(text).replace(tzinfo=None)
+        except ValueError:
+            pass
+        try:
+            return datetime.strptime(text[:10], "%Y-%m-%d")
+        except ValueError:
+            return None
+    return None
+
+# Parse "HH:MM" into minutes after midnight
+def parse_time(value):
+    if not value or not isinstance(value, str):
+        return None
+    try:
+        hours, _, minutes = value.strip().partition(":")
+        return int(hours) * 60 + int(minutes or 0)
+    except ValueError:
+        return None
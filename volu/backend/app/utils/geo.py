@@ -0,0 +1,117 @@
+import hashlib
+import os
+import struct
+import threading
+import numpy as np
+
+EARTH_RADIUS_MILES = 3958.8
+
+DEFAULT_CENTROIDS_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "zip_centroids.bin")
+
+# File layout: header, then ZIP records sorted by zip, then city records sorted by key
+HEADER = struct.Struct("<4sHHII")
+MAGIC = b"VZIP"
+VERSION = 1
+ZIP_DTYPE = np.dtype([("zip", "<u4"), ("lat", "<f4"), ("lon", "<f4")])
+CITY_DTYPE = np.dtype([("key", "<u8"), ("lat", "<f4"), ("lon", "<f4")])
+
+
+def haversine_miles(lat1, lon1, lat2, lon2):
+    """Great-circle distance in miles; any argument may be a NumPy array."""
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(v, dtype=np.float64)) for v in (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_MILES * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+def zip_key(value):
+    digits = str(value or "").strip()[:5]
+    return int(digits) if len(digits) == 5 and digits.isdigit() else None
+
+def city_key(city, state):
+    if not city or not state:
+        return None
+    text = f"{str(city).strip().upper()}|{str(state).strip().upper()}"
+    return int.from_bytes(hashlib.blake2b(text.encode(), digest_size=8).digest(), "little")
+
+def write_centroids(path, zips, cities):
+    """Write ZIP and city centroid tables; ``zips``/``cities`` are arrays of ZIP_DTYPE/CITY_DTYPE."""
+    zips = np.sort(np.asarray(zips, dtype=ZIP_DTYPE), order="zip")
+    cities = np.sort(np.asarray(cities, dtype=CITY_DTYPE), order="key")
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, 0, len(zips), len(cities)))
+        f.write(zips.tobytes())
+        f.write(cities.tobytes())
+
+
+class ZipCentroids:
+    """Offline ZIP/city -> (lat, lon) table, memory-mapped from a binary file."""
+
+    def __init__(self, zips=None, cities=None):
+        self.zips = zips if zips is not None else np.zeros(0, dtype=ZIP_DTYPE)
+        self.cities = cities if cities is not None else np.zeros(0, dtype=CITY_DTYPE)
+
+    @classmethod
+    def load(cls, path=DEFAULT_CENTROIDS_PATH):
+        if not os.path.exists(path):
+            return cls()
+        with open(path, "rb") as f:
+            magic, version, _, zip_count, city_count = HEADER.unpack(f.read(HEADER.size))
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} ZIP centroid file")
+        zips = np.memmap(path, dtype=ZIP_DTYPE, mode="r", offset=HEADER.size, shape=(zip_count,)) \
+            if zip_count else None
+        cities = np.memmap(path, dtype=CITY_DTYPE, mode="r",
+                           offset=HEADER.size + zip_count * ZIP_DTYPE.itemsize, shape=(city_count,)) \
+            if city_count else None
+        return cls(zips, cities)
+
+    def __len__(self):
+        return len(self.zips)
+
+    @staticmethod
+    def _find(table, field, key):
+        if key is None or not len(table):
+            return None
+        pos = int(np.searchsorted(table[field], key))
+        if pos < len(table) and table[field][pos] == key:
+            return float(table["lat"][pos]), float(table["lon"][pos])
+        return None
+
+    def lookup_zip(self, value):
+        return self._find(self.zips, "zip", zip_key(value))
+
+    def lookup_city(self, city, state):
+        return self._find(self.cities, "key", city_key(city, state))
+
+    def locate(self, doc):
+        """Coordinates for a profile's personalInfo or an event: ZIP first, then city/state."""
+        if not doc:
+            return None
+        return self.lookup_zip(doc.get("zip")) or self.lookup_city(doc.get("city"), doc.get("state"))
+
+    def locate_many(self, docs):
+        """Vectorized ``locate`` returning (lats, lons) arrays with NaN where unknown."""
+        n = len(docs)
+        lats = np.full(n, np.nan)
+        lons = np.full(n, np.nan)
+        keys = np.array([zip_key((d or {}).get("zip")) or 0 for d in docs], dtype=np.uint32)
+        if len(self.zips) and n:
+            pos = np.minimum(np.searchsorted(self.zips["zip"], keys), len(self.zips) - 1)
+            found = (self.zips["zip"][pos] == keys) & (keys != 0)
+            lats[found] = self.zips["lat"][pos[found]]
+            lons[found] = self.zips["lon"][pos[found]]
+        for i in np.flatnonzero(np.isnan(lats)):
+            point = self.lookup_city((docs[i] or {}).get("city"), (docs[i] or {}).get("state"))
+            if point:
+                lats[i], lons[i] = point
+        return lats, lons
+
+
+_centroids = None
+_centroids_lock = threading.Lock()
+
+def get_zip_centroids():
+    global _centroids
+    with _centroids_lock:
+        if _centroids is None:
+            _centroids = ZipCentroids.load(os.getenv("ZIP_CENTROIDS_PATH", DEFAULT_CENTROIDS_PATH))
+        return _centroids
@@ -0,0 +1,72 @@
+import json
+import uuid
+from datetime import date, datetime
+from bson import ObjectId, Decimal128
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # optional faster backend
+    orjson = None
+
+# JSON encoding for Mongo documents. Routes return documents as read; the
+# encoder renames _id to id (unless the document already has an id) and
+# writes ObjectId/UUID as strings and datetimes as ISO 8601, so documents are
+# never mutated. orjson is used when installed, the stdlib json module otherwise.
+
+
+def _default(value):
+    if isinstance(value, (ObjectId, uuid.UUID)):
+        return str(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal128):
+        return str(value.to_decimal())
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+# Exact type checks are much cheaper than isinstance on this hot path; Mongo
+# documents are plain dicts and lists. ObjectIds are left to _default.
+_CONTAINERS = {dict, list, tuple}
+
+def prepare(value):
+    """Copy of ``value`` with every ``_id`` key renamed to ``id`` (unless an ``id`` is already present)."""
+    if type(value) is dict or isinstance(value, dict):
+        if "_id" in value and "id" not in value:
+            return {("id" if k == "_id" else k): (prepare(v) if type(v) in _CONTAINERS else v)
+                    for k, v in value.items()}
+        return {k: (prepare(v) if type(v) in _CONTAINERS else v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [prepare(v) if type(v) in _CONTAINERS else v for v in value]
+    return value
+
+def dumps_bytes(value):
+    value = prepare(value)
+    if orjson is not None:
+        try:
+            return orjson.dumps(value, default=_default)
+        except TypeError:
+            pass  # e.g. non-string dict keys; the stdlib encoder coerces them
+    return json.dumps(value, default=_default, separators=(",", ":")).encode()
+
+def dumps(value):
+    return dumps_bytes(value).decode()
+
+
+class BSONJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider for Mongo documents; install with ``app.json = BSONJSONProvider(app)``."""
+
+    def dumps(self, obj, **kwargs):
+        if not kwargs:
+            return dumps(obj)
+        kwargs.setdefault("default", _default)
+        return json.dumps(prepare(obj), **kwargs)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        if self._app.debug:
+            body = json.dumps(prepare(obj), default=_default, indent=2) + "\n"
+        else:
+            body = dumps_bytes(obj)
+        return self._app.response_class(body, mimetype=self.mimetype)
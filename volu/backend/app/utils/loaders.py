@@ -0,0 +1,47 @@
+# Batching loaders for related documents. A page of records asks for all of
+# its keys at once; each loader de-duplicates them, skips keys it already
+# resolved during this request and fetches the rest with one batch call
+# (typically a single $in query). Loaders live for one request only, so
+# nothing is cached across requests and writes are seen immediately.
+
+
+class BatchLoader:
+    """Resolves keys through ``batch_fn(keys) -> {key: value}``; missing keys resolve to None."""
+
+    def __init__(self, batch_fn):
+        self._batch_fn = batch_fn
+        self._values = {}
+        self.batches = 0
+
+    def _missing(self, keys):
+        return list(dict.fromkeys(k for k in keys if k is not None and k not in self._values))
+
+    def _store(self, keys, found):
+        for key in keys:
+            self._values[key] = found.get(key)
+
+    def load_many(self, keys):
+        keys = list(keys)
+        missing = self._missing(keys)
+        if missing:
+            self.batches += 1
+            self._store(missing, self._batch_fn(missing))
+        return {key: self._values.get(key) for key in keys if key is not None}
+
+    def load(self, key):
+        return self.load_many([key]).get(key)
+
+
+class AsyncBatchLoader(BatchLoader):
+    """BatchLoader for a coroutine ``batch_fn``."""
+
+    async def load_many(self, keys):
+        keys = list(keys)
+        missing = self._missing(keys)
+        if missing:
+            self.batches += 1
+            self._store(missing, await self._batch_fn(missing))
+        return {key: self._values.get(key) for key in keys if key is not None}
+
+    async def load(self, key):
+        return (await self.load_many([key])).get(key)
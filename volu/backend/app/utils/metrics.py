@@ -0,0 +1,201 @@
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from flask import Response, g, request
+
+# In-process metrics in Prometheus text format. Request timing is recorded
+# by init_app()'s hooks; Mongo commands are attributed to the current request
+# through the request_trace context variable (see mongo_monitoring.CommandMetrics).
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+        self.count = 0
+        self.max = 0.0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.total += value
+        self.count += 1
+        self.max = max(self.max, value)
+
+    def cumulative(self):
+        result, running = [], 0
+        for bound, n in zip((*self.buckets, float("inf")), self.counts):
+            running += n
+            result.append((bound, running))
+        return result
+
+    def snapshot(self):
+        return {
+            "count": self.count,
+            "sum": self.total,
+            "max": self.max,
+            "mean": self.total / self.count if self.count else 0.0,
+            "buckets": self.cumulative(),
+        }
+
+
+class Registry:
+    """Counters and histograms keyed by (metric name, sorted label pairs)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._help = {}
+        self._counters = {}
+        self._histograms = {}
+
+    def describe(self, name, kind, help_text, buckets=None):
+        self._help[name] = (kind, help_text, buckets)
+
+    def inc(self, name, labels, amount=1):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def observe(self, name, labels, value):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(self._help[name][2])
+            histogram.observe(value)
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    def render(self):
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted((k, h.cumulative(), h.total, h.count) for k, h in self._histograms.items())
+        lines, described = [], set()
+
+        def header(name):
+            if name not in described and name in self._help:
+                kind, help_text, _ = self._help[name]
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind}")
+                described.add(name)
+
+        for (name, labels), value in counters:
+            header(name)
+            lines.append(f"{name}{format_labels(labels)} {format_value(value)}")
+        for (name, labels), buckets, total, count in histograms:
+            header(name)
+            for bound, running in buckets:
+                le = "+Inf" if bound == float("inf") else format_value(bound)
+                lines.append(f"{name}_bucket{format_labels(labels + (('le', le),))} {running}")
+            lines.append(f"{name}_sum{format_labels(labels)} {format_value(total)}")
+            lines.append(f"{name}_count{format_labels(labels)} {count}")
+        return lines
+
+
+def escape_label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{escape_label(v)}"' for k, v in labels) + "}"
+
+def format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+registry = Registry()
+registry.describe("http_requests_total", "counter", "HTTP requests by endpoint and status.")
+registry.describe("http_request_duration_seconds", "histogram", "HTTP request latency.", LATENCY_BUCKETS)
+registry.describe("http_request_db_commands", "histogram", "Mongo commands issued per HTTP request.", COUNT_BUCKETS)
+registry.describe("http_request_db_seconds", "histogram", "Time spent in Mongo per HTTP request.", LATENCY_BUCKETS)
+registry.describe("mongo_commands_total", "counter", "Mongo commands by command name and collection.")
+registry.describe("mongo_command_failures_total", "counter", "Failed Mongo commands by command name and collection.")
+registry.describe("mongo_command_duration_seconds", "histogram", "Mongo command latency.", LATENCY_BUCKETS)
+registry.describe("mongo_slow_commands_total", "counter", "Mongo commands slower than the slow-command threshold.")
+registry.describe("mongo_n_plus_one_total", "counter", "Requests that repeated one query shape past the N+1 threshold.")
+
+
+class RequestTrace:
+    """Mongo activity of one request, filled in by the command listener."""
+
+    def __init__(self, endpoint):
+        self.endpoint = endpoint
+        self.started = time.perf_counter()
+        self.commands = 0
+        self.db_seconds = 0.0
+        self.by_command = {}
+        self.collections = set()
+        self.shapes = {}
+        self.n_plus_one = set()
+
+request_trace = ContextVar("request_trace", default=None)
+
+
+def init_app(app):
+    """Time every request by blueprint and endpoint and serve /metrics."""
+
+    @app.before_request
+    def start_trace():
+        g.metrics_token = request_trace.set(RequestTrace(request.endpoint or "unmatched"))
+
+    @app.after_request
+    def finish_trace(response):
+        trace = request_trace.get()
+        if trace is None or request.endpoint == "metrics":
+            return response
+        elapsed = time.perf_counter() - trace.started
+        labels = {"blueprint": request.blueprint or "", "endpoint": trace.endpoint, "method": request.method}
+        registry.inc("http_requests_total", {**labels, "status": str(response.status_code)})
+        registry.observe("http_request_duration_seconds", labels, elapsed)
+        registry.observe("http_request_db_commands", labels, trace.commands)
+        registry.observe("http_request_db_seconds", labels, trace.db_seconds)
+        response.headers["Server-Timing"] = (
+            f"db;dur={trace.db_seconds * 1000:.1f};desc=\"{trace.commands} commands\", app;dur={elapsed * 1000:.1f}"
+        )
+        return response
+
+    @app.teardown_request
+    def end_trace(exc):
+        token = g.pop("metrics_token", None)
+        if token is not None:
+            request_trace.reset(token)
+
+    @app.route("/metrics")
+    def metrics():
+        return Response("\n".join(render()) + "\n", mimetype="text/plain; version=0.0.4")
+
+def render():
+    from app.utils.mongo_monitoring import pool_metrics
+    from app.utils.cache import cache_stats
+    lines = registry.render()
+
+    lines += ["# HELP mongo_pool_connections Open and in-use pooled connections.",
+              "# TYPE mongo_pool_connections gauge"]
+    pools = pool_metrics.snapshot()
+    for address, pool in pools.items():
+        lines.append(f'mongo_pool_connections{format_labels((("address", address), ("state", "open")))} {pool["open"]}')
+        lines.append(f'mongo_pool_connections{format_labels((("address", address), ("state", "in_use")))} {pool["inUse"]}')
+    lines += ["# HELP mongo_pool_checkout_wait_seconds Time waiting to check out a pooled connection.",
+              "# TYPE mongo_pool_checkout_wait_seconds histogram"]
+    for address, pool in pools.items():
+        wait = pool["checkoutWait"]
+        for bound, running in wait["buckets"]:
+            le = "+Inf" if bound == float("inf") else format_value(bound)
+            lines.append(f'mongo_pool_checkout_wait_seconds_bucket{format_labels((("address", address), ("le", le)))} {running}')
+        lines.append(f'mongo_pool_checkout_wait_seconds_sum{format_labels((("address", address),))} {format_value(wait["sum"])}')
+        lines.append(f'mongo_pool_checkout_wait_seconds_count{format_labels((("address", address),))} {wait["count"]}')
+
+    stats = cache_stats()
+    lines += ["# HELP response_cache_events_total Response cache lookups and removals.",
+              "# TYPE response_cache_events_total counter"]
+    for event in ("hits", "misses", "evictions", "expirations", "invalidations"):
+        lines.append(f'response_cache_events_total{format_labels((("event", event),))} {stats[event]}')
+    return lines
@@ -0,0 +1,166 @@
+import logging
+import os
+import threading
+from pymongo import monitoring
+from app.utils.metrics import Histogram, registry, request_trace
+
+# PyMongo monitoring listeners, registered on every client the factory creates
+# (sync and async). pool_metrics keeps per-pool counters; command_metrics
+# records every command and attributes it to the current request.
+
+logger = logging.getLogger("app.mongo")
+
+# Upper bounds, in seconds, of the checkout wait-time histogram buckets
+WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+class PoolMetrics(monitoring.ConnectionPoolListener):
+    """Connection pool gauges and checkout wait times, keyed by server address."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pools = {}
+
+    def _pool(self, address):
+        key = "%s:%s" % address
+        pool = self._pools.get(key)
+        if pool is None:
+            pool = self._pools[key] = {
+                "open": 0, "inUse": 0, "maxInUse": 0, "checkouts": 0,
+                "checkoutFailures": {}, "cleared": 0, "wait": Histogram(WAIT_BUCKETS),
+            }
+        return pool
+
+    def connection_created(self, event):
+        with self._lock:
+            self._pool(event.address)["open"] += 1
+
+    def connection_closed(self, event):
+        with self._lock:
+            self._pool(event.address)["open"] -= 1
+
+    def connection_checked_out(self, event):
+        with self._lock:
+            pool = self._pool(event.address)
+            pool["inUse"] += 1
+            pool["checkouts"] += 1
+            pool["maxInUse"] = max(pool["maxInUse"], pool["inUse"])
+            pool["wait"].observe(event.duration)
+
+    def connection_check_out_failed(self, event):
+        with self._lock:
+            failures = self._pool(event.address)["checkoutFailures"]
+            failures[event.reason] = failures.get(event.reason, 0) + 1
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            self._pool(event.address)["inUse"] -= 1
+
+    def pool_cleared(self, event):
+        with self._lock:
+            self._pool(event.address)["cleared"] += 1
+
+    def pool_closed(self, event):
+        with self._lock:
+            self._pools.pop("%s:%s" % event.address, None)
+
+    # Events the stats do not need
+    def pool_created(self, event): pass
+    def pool_ready(self, event): pass
+    def connection_ready(self, event): pass
+    def connection_check_out_started(self, event): pass
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                address: {**{k: v for k, v in pool.items() if k != "wait"},
+                          "checkoutFailures": dict(pool["checkoutFailures"]),
+                          "checkoutWait": pool["wait"].snapshot()}
+                for address, pool in self._pools.items()
+            }
+
+    def reset(self):
+        with self._lock:
+            self._pools.clear()
+
+
+pool_metrics = PoolMetrics()
+
+
+SLOW_COMMAND_SECONDS = float(os.getenv("MONGO_SLOW_COMMAND_MS", "100")) / 1000
+N_PLUS_ONE_THRESHOLD = int(os.getenv("MONGO_N_PLUS_ONE_THRESHOLD", "10"))
+
+# Commands that carry no per-request signal
+IGNORED_COMMANDS = {"hello", "ismaster", "isMaster", "ping", "saslStart", "saslContinue", "endSessions", "buildInfo"}
+
+
+def query_shape(command_name, command):
+    """(command, collection, filter keys): repeated shapes within one request suggest N+1 lookups."""
+    collection = command.get(command_name)
+    query = command.get("filter") or command.get("query") or {}
+    if not isinstance(query, dict):
+        query = {}
+    return command_name, str(collection), tuple(sorted(query))
+
+
+class CommandMetrics(monitoring.CommandListener):
+    """Command counts and latency per command and collection, plus per-request totals."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = {}
+
+    def started(self, event):
+        if event.command_name in IGNORED_COMMANDS:
+            return
+        collection = event.command.get(event.command_name)
+        if not isinstance(collection, str):
+            collection = ""
+        trace = request_trace.get()
+        with self._lock:
+            self._pending[(event.request_id, event.connection_id)] = (
+                event.command_name, collection, trace,
+                query_shape(event.command_name, event.command) if trace is not None else None
+            )
+
+    def succeeded(self, event):
+        self._finish(event, failed=False)
+
+    def failed(self, event):
+        self._finish(event, failed=True)
+
+    def _finish(self, event, failed):
+        with self._lock:
+            pending = self._pending.pop((event.request_id, event.connection_id), None)
+        if pending is None:
+            return
+        command_name, collection, trace, shape = pending
+        seconds = event.duration_micros / 1e6
+        labels = {"command": command_name, "collection": collection}
+        registry.inc("mongo_commands_total", labels)
+        registry.observe("mongo_command_duration_seconds", labels, seconds)
+        if failed:
+            registry.inc("mongo_command_failures_total", labels)
+        if seconds >= SLOW_COMMAND_SECONDS:
+            registry.inc("mongo_slow_commands_total", labels)
+            logger.warning("Slow Mongo command: %s on %s took %.1f ms (endpoint %s)",
+                           command_name, collection or "-", seconds * 1000,
+                           trace.endpoint if trace else "-")
+        if trace is None:
+            return
+
+        # The trace belongs to one request, which runs its commands one at a time
+        trace.commands += 1
+        trace.db_seconds += seconds
+        trace.by_command[command_name] = trace.by_command.get(command_name, 0) + 1
+        if collection:
+            trace.collections.add(collection)
+        repeats = trace.shapes[shape] = trace.shapes.get(shape, 0) + 1
+        if repeats == N_PLUS_ONE_THRESHOLD and shape not in trace.n_plus_one:
+            trace.n_plus_one.add(shape)
+            registry.inc("mongo_n_plus_one_total", {"endpoint": trace.endpoint, "collection": collection})
+            logger.warning("Possible N+1: %s issued %s on %s with filter keys %s %d times",
+                           trace.endpoint, command_name, collection or "-", list(shape[2]), repeats)
+
+
+command_metrics = CommandMetrics()
@@ -0,0 +1,125 @@
+import base64
+import json
+from datetime import datetime
+from bson import ObjectId
+from app.utils.cache import LRUCache
+
+# Keyset pagination over (createdAt desc, _id desc). The continuation token is
+# an opaque base64 JSON blob of the last row's sort key.
+KEYSET_SORT = [("createdAt", -1), ("_id", -1)]
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+# Distinct queries whose totals are cached at once (one per userId and status on /my)
+MAX_CACHED_COUNTS = 10000
+
+
+def _non_negative_int(args, name, default):
+    try:
+        value = int(args.get(name, default))
+    except (TypeError, ValueError):
+        raise ValueError(f"{name} must be an integer")
+    if value < 0:
+        raise ValueError(f"{name} must not be negative")
+    return value
+
+def page_limit(args, default=DEFAULT_PAGE_SIZE):
+    """?limit= as an int in 1..MAX_PAGE_SIZE; larger values are capped, others raise ValueError."""
+    limit = _non_negative_int(args, "limit", default)
+    if limit < 1:
+        raise ValueError("limit must be at least 1")
+    return min(limit, MAX_PAGE_SIZE)
+
+def page_offset(args):
+    return _non_negative_int(args, "offset", 0)
+
+
+def encode_cursor(doc):
+    created_at = doc.get("createdAt")
+    doc_id = doc["_id"]
+    payload = {
+        "c": created_at.isoformat() if isinstance(created_at, datetime) else None,
+        "i": str(doc_id),
+        "o": isinstance(doc_id, ObjectId),
+    }
+    return base64.urlsafe_b64encode(json.dumps(payload, separators=(",", ":")).encode()).decode().rstrip("=")
+
+def decode_cursor(token):
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        created_at = datetime.fromisoformat(payload["c"]) if payload["c"] else None
+        doc_id = ObjectId(payload["i"]) if payload["o"] else payload["i"]
+        return created_at, doc_id
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+def keyset_filter(query, token):
+    """Restrict ``query`` to rows strictly after the cursor in KEYSET_SORT order."""
+    if not token:
+        return query
+    created_at, doc_id = decode_cursor(token)
+    if created_at is None:
+        # Rows without createdAt sort last, so only they can follow
+        after = {"createdAt": None, "_id": {"$lt": doc_id}}
+    else:
+        after = {"$or": [
+            {"createdAt": {"$lt": created_at}},
+            {"createdAt": created_at, "_id": {"$lt": doc_id}},
+            {"createdAt": None},
+        ]}
+    return {"$and": [query, after]} if query else after
+
+def fetch_page(collection, query, limit, token=None, projection=None):
+    """Return (docs, next_token) for one keyset page; reads one extra row to detect the end."""
+    if limit < 1:
+        raise ValueError("limit must be at least 1")
+    docs = list(
+        collection.find(keyset_filter(query, token), projection).sort(KEYSET_SORT).limit(limit + 1)
+    )
+    if len(docs) > limit:
+        docs = docs[:limit]
+        return docs, encode_cursor(docs[-1])
+    return docs, None
+
+
+class CountCache:
+    """Short-lived cache of count_documents results, keyed by collection and query.
+
+    Entries live in a bounded LRU, so one entry per distinct filter cannot grow without limit.
+    """
+
+    def __init__(self, ttl_seconds=30, max_entries=MAX_CACHED_COUNTS):
+        self.ttl_seconds = ttl_seconds
+        self._counts = LRUCache(max_entries=max_entries, ttl_seconds=ttl_seconds)
+
+    def __len__(self):
+        return self._counts.size()
+
+    def count(self, collection, query):
+        # No filter: the collection metadata count is O(1)
+        if not query:
+            return collection.estimated_document_count()
+        key = self._key(collection, query)
+        total = self._counts.get(key)
+        if total is None:
+            total = collection.count_documents(query)
+            self._counts.set(key, total)
+        return total
+
+    async def count_async(self, collection, query):
+        """count() for an AsyncMongoClient collection."""
+        if not query:
+            return await collection.estimated_document_count()
+        key = self._key(collection, query)
+        total = self._counts.get(key)
+        if total is None:
+            total = await collection.count_documents(query)
+            self._counts.set(key, total)
+        return total
+
+    def _key(self, collection, query):
+        return (collection.full_name, json.dumps(query, sort_keys=True, default=str))
+
+    def clear(self):
+        self._counts.clear()
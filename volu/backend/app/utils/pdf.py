@@ -0,0 +1,58 @@
+import zlib
+
+# A minimal single-page PDF writer for volunteer certificates: the standard
+# Helvetica fonts, text lines and a border, with a deflated content stream.
+# Pure functions of their input only, so they can run in a worker process.
+
+PAGE_WIDTH, PAGE_HEIGHT = 792, 612  # US Letter, landscape
+# Average Helvetica glyph width as a fraction of the font size, for centering
+AVERAGE_GLYPH_WIDTH = 0.5
+
+
+def escape(text):
+    return str(text).replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+def centered_line(text, size, y, bold=False):
+    x = max(36, (PAGE_WIDTH - len(text) * size * AVERAGE_GLYPH_WIDTH) / 2)
+    return f"BT /{'F2' if bold else 'F1'} {size} Tf {x:.1f} {y} Td ({escape(text)}) Tj ET"
+
+def document(content):
+    """Wrap a page content stream in a complete PDF file."""
+    stream = zlib.compress(content.encode("latin-1", "replace"), 9)
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        (f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {PAGE_WIDTH} {PAGE_HEIGHT}] "
+         f"/Resources << /Font << /F1 4 0 R /F2 5 0 R >> >> /Contents 6 0 R >>").encode(),
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold /Encoding /WinAnsiEncoding >>",
+        f"<< /Length {len(stream)} /Filter /FlateDecode >>\nstream\n".encode() + stream + b"\nendstream",
+    ]
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n".encode() + body + b"\nendobj\n"
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    for offset in offsets:
+        out += f"{offset:010d} 00000 n \n".encode()
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    return bytes(out)
+
+def render_certificate(fields):
+    """Certificate of service PDF for {volunteerName, eventName, eventDate, hours, organization}."""
+    hours = fields["hours"]
+    hours_text = f"{hours:g} verified hour{'' if hours == 1 else 's'}"
+    lines = [
+        "q 0.2 0.4 0.6 RG 6 w 30 30 732 552 re S 1 w 42 42 708 528 re S Q",
+        centered_line("Certificate of Service", 40, 470, bold=True),
+        centered_line("This certifies that", 16, 410),
+        centered_line(fields["volunteerName"], 32, 360, bold=True),
+        centered_line(f"contributed {hours_text} to", 16, 310),
+        centered_line(fields["eventName"], 24, 265, bold=True),
+    ]
+    if fields.get("eventDate"):
+        lines.append(centered_line(fields["eventDate"], 14, 235))
+    lines.append(centered_line(fields.get("organization") or "VolU", 14, 120))
+    return document("\n".join(lines))
@@ -0,0 +1,92 @@
+"""Serialization benchmark for list responses.
+
+Compares the previous path (per-document serialize_* helper + Flask's
+default provider) with BSONJSONProvider on N event-shaped documents:
+
+    python benchmarks/bench_json.py --docs 10000 --rounds 20
+
+Runs without a database.
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bson import ObjectId
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+from app.utils import json_provider
+
+
+def make_docs(n, seed=7):
+    rng = random.Random(seed)
+    start = datetime(2025, 1, 1)
+    return [{
+        "_id": ObjectId(),
+        "name": f"Event {i}",
+        "description": "Help out at the community garden. " * 4,
+        "city": rng.choice(["Houston", "Dallas", "Austin", "El Paso"]),
+        "status": rng.choice(["Active", "Completed"]),
+        "startDate": start + timedelta(hours=rng.randrange(24 * 365)),
+        "createdAt": start,
+        "updatedAt": start,
+        "createdBy": str(ObjectId()),
+        "requiredSkills": [{"name": "First Aid", "level": "Beginner"}, {"name": "Cooking"}],
+        "registeredVolunteers": [f"user-{rng.randrange(100000)}" for _ in range(5)],
+        "currentVolunteers": 5,
+        "maxVolunteers": 20,
+    } for i in range(n)]
+
+def old_path(app, docs):
+    # serialize_event mutated _id in place before jsonify re-encoded the list
+    for doc in docs:
+        doc["_id"] = str(doc["_id"])
+    return app.json.response(docs).get_data()
+
+def new_path(app, docs):
+    return app.json.response(docs).get_data()
+
+def timed(fn, app, n, rounds):
+    samples = []
+    for _ in range(rounds):
+        docs = make_docs(n)  # fresh documents: the old path mutates them
+        started = time.perf_counter()
+        size = len(fn(app, docs))
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples), size
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--docs", type=int, default=10000)
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    default_app = Flask("default")
+    default_app.json = DefaultJSONProvider(default_app)
+    bson_app = Flask("bson")
+    bson_app.json = json_provider.BSONJSONProvider(bson_app)
+
+    backend = "orjson" if json_provider.orjson is not None else "json"
+    rows = [
+        ("serialize_* + default provider", *timed(old_path, default_app, args.docs, args.rounds)),
+        (f"BSONJSONProvider ({backend})", *timed(new_path, bson_app, args.docs, args.rounds)),
+    ]
+    if json_provider.orjson is not None:
+        orjson, json_provider.orjson = json_provider.orjson, None
+        rows.append(("BSONJSONProvider (json)", *timed(new_path, bson_app, args.docs, args.rounds)))
+        json_provider.orjson = orjson
+
+    baseline = rows[0][1]
+    print(f"docs={args.docs} rounds={args.rounds} (median)")
+    for name, seconds, size in rows:
+        print(f"{name:34} {seconds * 1000:8.1f} ms  {size / 1024:8.0f} KiB  {baseline / seconds:5.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,369 @@
+"""Load benchmark for the API routes.
+
+Drives every route (except the SSE stream) against the dataset written by
+seed_data.py and reports p50/p95/p99 latency and throughput per scenario.
+Results are saved as JSON, tagged with the git commit, so runs on different
+commits can be compared:
+
+    DATABASE_URL=mongodb://localhost:27017 python benchmarks/seed_data.py
+    DATABASE_URL=mongodb://localhost:27017 python benchmarks/bench_load.py --concurrency 16
+    DATABASE_URL=mongodb://localhost:27017 python benchmarks/bench_load.py --only participation. \\
+        --compare benchmarks/results/<earlier run>.json
+
+--transport client (default) calls the app through Flask's test client in
+this process; --transport http serves it with a local threaded WSGI server,
+or targets --url (e.g. a gunicorn started against the same BENCH_DB).
+--mongomock seeds a small in-memory dataset instead of using DATABASE_URL,
+for trying the harness out without a mongod (the bulk-write scenarios
+and the dashboard's first rollup rebuild fail there, and its timings say
+nothing about a real server).
+"""
+import argparse
+import http.client
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from urllib.parse import urlsplit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import seed_data
+from seed_data import skewed, user_id
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+PERCENTILES = (50, 95, 99)
+
+
+class Dataset:
+    """Ids to build requests from, sampled from the seeded database."""
+
+    def __init__(self, database, sample_size=2000):
+        manifest = database["bench_meta"].find_one({"_id": "dataset"})
+        if manifest is None:
+            raise SystemExit(f"No dataset in {database.name}; run benchmarks/seed_data.py first")
+        manifest.pop("_id")
+        self.manifest = manifest
+        self.users = manifest["counts"].get("users", 0)
+        events = list(database["events"].find({}, {"status": 1, "createdBy": 1, "registeredVolunteers": 1})
+                      .limit(sample_size))
+        self.event_ids = [str(e["_id"]) for e in events]
+        self.active_event_ids = [str(e["_id"]) for e in events if e.get("status") == "Active"] or self.event_ids
+        self.organizers = sorted({e["createdBy"] for e in events if e.get("createdBy")})
+        # Existing (user, event) pairs, so feedback and unregister requests hit real records
+        self.registrations = [(u, str(e["_id"])) for e in events for u in e.get("registeredVolunteers") or []]
+        self.participations = [(p["userId"], p["eventId"]) for p in
+                               database["participation"].find({}, {"userId": 1, "eventId": 1}).limit(sample_size)]
+        # Events created by the create scenario, consumed by the delete one
+        self.created = []
+        self._lock = threading.Lock()
+
+    def user(self, rng):
+        return user_id(skewed(rng, self.users, 2))
+
+    def event(self, rng):
+        return rng.choice(self.event_ids)
+
+    def registration(self, rng):
+        return rng.choice(self.registrations) if self.registrations else (self.user(rng), self.event(rng))
+
+    def participation(self, rng):
+        return rng.choice(self.participations) if self.participations else (self.user(rng), self.event(rng))
+
+    def any_created(self, rng):
+        with self._lock:
+            return rng.choice(self.created) if self.created else None
+
+    def push_created(self, event_id):
+        with self._lock:
+            self.created.append(event_id)
+
+    def pop_created(self):
+        with self._lock:
+            return self.created.pop() if self.created else None
+
+
+def new_event(rng):
+    return {"name": "Benchmark event", "description": "Created by bench_load", "city": "Houston",
+            "state": "TX", "zip": "77002", "startDate": "2026-01-15", "startTime": "09:00",
+            "requiredSkills": ["Cooking"], "causes": ["Hunger"], "maxVolunteers": 20,
+            "currentVolunteers": 0, "status": "Active", "createdBy": "bench-organizer"}
+
+def bulk_entries(data, rng, n=50):
+    return [{"userId": data.user(rng), "eventId": data.event(rng), "status": "Attended",
+             "hoursLogged": round(rng.uniform(1, 8), 1)} for _ in range(n)]
+
+# name -> (method, builder(data, rng) -> (path, json body or None)); names are "<area>.<route>"
+SCENARIOS = {
+    "events.list": ("GET", lambda d, r: ("/api/events/?fields=name,startDate,city,status", None)),
+    "events.list_filtered": ("GET", lambda d, r: ("/api/events/?status=Active&city=Houston&from=2025-01-01&to=2025-12-31", None)),
+    "events.list_stream": ("GET", lambda d, r: ("/api/events/?stream=ndjson&fields=name,startDate", None)),
+    "events.get": ("GET", lambda d, r: (f"/api/events/{d.event(r)}", None)),
+    "events.created_by": ("GET", lambda d, r: (f"/api/events/created-by/{r.choice(d.organizers)}", None)),
+    "events.search": ("GET", lambda d, r: (f"/api/events/search?q={r.choice(seed_data.CAUSES)[:4].lower()}&limit=20", None)),
+    "events.create": ("POST", lambda d, r: ("/api/events/", new_event(r))),
+    "events.update": ("PUT", lambda d, r: (f"/api/events/{d.any_created(r) or d.event(r)}?notify=false",
+                                          {"description": f"Updated {r.random()}"})),
+    # Only deletes events made by events.create; 404s on a made-up id once they run out
+    "events.delete": ("DELETE", lambda d, r: (f"/api/events/{d.pop_created() or '0' * 24}?notify=false", None)),
+    "events.register": ("POST", lambda d, r: (f"/api/events/{r.choice(d.active_event_ids)}/register", {"userId": d.user(r)})),
+    "events.unregister": ("POST", lambda d, r: (lambda u, e: (f"/api/events/{e}/unregister", {"userId": u}))(*d.registration(r))),
+    "participation.all": ("GET", lambda d, r: (f"/api/participation/all?status=Attended&offset={r.randrange(0, 2000, 20)}", None)),
+    "participation.my": ("GET", lambda d, r: (f"/api/participation/my?userId={d.user(r)}", None)),
+    "participation.my_cursor": ("GET", lambda d, r: (f"/api/participation/my?userId={d.user(r)}&cursor=&total=none", None)),
+    "participation.my_deep_offset": ("GET", lambda d, r: (f"/api/participation/my?userId={user_id(r.randrange(10))}&offset=100", None)),
+    "participation.my_include": ("GET", lambda d, r: (f"/api/participation/my?userId={d.user(r)}&include=event,user", None)),
+    "participation.roster": ("GET", lambda d, r: (f"/api/participation/event/{d.event(r)}?limit=50", None)),
+    "participation.my_history": ("GET", lambda d, r: (f"/api/participation/my-history?userId={d.user(r)}", None)),
+    "participation.statistics": ("GET", lambda d, r: (f"/api/participation/statistics?userId={d.user(r)}", None)),
+    "participation.statistics_aggregate": ("GET", lambda d, r: (f"/api/participation/statistics?userId={d.user(r)}&source=aggregate", None)),
+    "participation.dashboard": ("GET", lambda d, r: ("/api/participation/dashboard?months=12", None)),
+    "participation.leaderboard": ("GET", lambda d, r: ("/api/participation/leaderboard?limit=25", None)),
+    "participation.record": ("POST", lambda d, r: ("/api/participation/record",
+                                                   {"userId": d.user(r), "eventId": d.event(r), "status": "Attended", "hoursLogged": 2})),
+    "participation.log_feedback": ("POST", lambda d, r: (lambda u, e: ("/api/participation/log-feedback",
+                                                         {"userId": u, "eventId": e, "feedback": f"Great {r.random()}"}))(*d.participation(r))),
+    "participation.record_bulk": ("POST", lambda d, r: ("/api/participation/record/bulk", {"entries": bulk_entries(d, r)})),
+    "participation.check_in": ("POST", lambda d, r: ("/api/participation/check-in", {"userId": d.user(r), "eventId": d.event(r)})),
+    "notifications.list": ("GET", lambda d, r: (f"/api/notifications/?userId={d.user(r)}", None)),
+    "notifications.unread_count": ("GET", lambda d, r: (f"/api/notifications/unread-count?userId={d.user(r)}", None)),
+    "notifications.mark_all_read": ("POST", lambda d, r: (f"/api/notifications/mark-all-as-read?userId={d.user(r)}", None)),
+    "notifications.stream_stats": ("GET", lambda d, r: ("/api/notifications/stream/stats", None)),
+    "profile.get": ("GET", lambda d, r: (f"/api/user-profile/{d.user(r)}", None)),
+    "profile.update_skills": ("PUT", lambda d, r: (f"/api/user-profile/{d.user(r)}/skills",
+                                                   {"skills": r.sample(seed_data.SKILLS, 3)})),
+    "profile.update_availability": ("PUT", lambda d, r: (f"/api/user-profile/{d.user(r)}/availability",
+                                                         {"availableDays": ["saturday"], "availableTimeSlots": ["morning"]})),
+    "matching.event": ("GET", lambda d, r: (f"/api/matching/event/{d.event(r)}?limit=20", None)),
+    "matching.candidates": ("GET", lambda d, r: (f"/api/matching/event/{d.event(r)}/candidates", None)),
+    "matching.nearby": ("GET", lambda d, r: (f"/api/matching/event/{d.event(r)}/nearby?radius=25", None)),
+    "matching.available": ("GET", lambda d, r: (f"/api/matching/event/{d.event(r)}/available", None)),
+    "matching.index_stats": ("GET", lambda d, r: ("/api/matching/index/stats", None)),
+    "ops.metrics": ("GET", lambda d, r: ("/metrics", None)),
+}
+
+
+class ClientTransport:
+    """Flask test client in this process; one client per worker thread."""
+
+    def __init__(self, app):
+        self.app = app
+        self.local = threading.local()
+
+    def request(self, method, path, body):
+        client = getattr(self.local, "client", None)
+        if client is None:
+            client = self.local.client = self.app.test_client()
+        res = client.open(path, method=method, json=body)
+        return res.status_code, res.get_data()  # get_data also drains streamed bodies
+
+
+class HTTPTransport:
+    """HTTP/1.1 against a server; each worker thread keeps one connection."""
+
+    def __init__(self, url):
+        parts = urlsplit(url)
+        self.host, self.port = parts.hostname, parts.port or 80
+        self.local = threading.local()
+
+    def request(self, method, path, body):
+        payload = json.dumps(body).encode() if body is not None else None
+        headers = {"Content-Type": "application/json"} if payload is not None else {}
+        for attempt in range(2):
+            conn = getattr(self.local, "conn", None)
+            if conn is None:
+                conn = self.local.conn = http.client.HTTPConnection(self.host, self.port, timeout=60)
+            try:
+                conn.request(method, path, payload, headers)
+                res = conn.getresponse()
+                content = res.read()
+                if res.getheader("Connection", "").lower() == "close" or res.version == 10:
+                    conn.close()
+                    self.local.conn = None
+                return res.status, content
+            except (http.client.HTTPException, ConnectionError):
+                conn.close()
+                self.local.conn = None
+                if attempt:
+                    raise
+
+def serve(app):
+    """Start a threaded WSGI server on a free local port and return its URL."""
+    from werkzeug.serving import make_server, WSGIRequestHandler
+
+    class QuietHandler(WSGIRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive
+
+        def log_request(self, *args, **kwargs):
+            pass
+
+    server = make_server("127.0.0.1", 0, app, threaded=True, request_handler=QuietHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{server.server_port}"
+
+
+def percentile(sorted_values, p):
+    """Nearest-rank percentile of an ascending list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, -(-len(sorted_values) * p // 100))
+    return sorted_values[int(rank) - 1]
+
+def run_scenario(name, transport, data, requests, concurrency, warmup, seed):
+    method, build = SCENARIOS[name]
+    rng_lock = threading.Lock()
+    rng = random.Random(f"{seed}:{name}")
+
+    def one(_):
+        with rng_lock:
+            path, body = build(data, rng)
+        started = time.perf_counter()
+        try:
+            status, content = transport.request(method, path, body)
+        except Exception:
+            return "error", time.perf_counter() - started
+        elapsed = time.perf_counter() - started
+        if name == "events.create" and status == 201:
+            data.push_created(json.loads(content)["id"])
+        return status, elapsed
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, range(warmup)))
+        started = time.perf_counter()
+        results = list(pool.map(one, range(requests)))
+        wall = time.perf_counter() - started
+
+    latencies = sorted(elapsed for _, elapsed in results)
+    statuses = {}
+    for status, _ in results:
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+    errors = sum(1 for status, _ in results if status == "error" or status >= 500)
+    summary = {
+        "requests": requests,
+        "errors": errors,
+        "statuses": statuses,
+        "rps": round(requests / wall, 1) if wall else 0.0,
+        "meanMs": round(sum(latencies) / len(latencies) * 1000, 2) if latencies else 0.0,
+        "maxMs": round(latencies[-1] * 1000, 2) if latencies else 0.0,
+    }
+    for p in PERCENTILES:
+        summary[f"p{p}Ms"] = round(percentile(latencies, p) * 1000, 2)
+    return summary
+
+
+def git_info():
+    def git(*args):
+        try:
+            return subprocess.run(["git", *args], capture_output=True, text=True, timeout=10).stdout.strip()
+        except (OSError, subprocess.SubprocessError):
+            return ""
+    return {"commit": git("rev-parse", "HEAD"), "branch": git("rev-parse", "--abbrev-ref", "HEAD"),
+            "dirty": bool(git("status", "--porcelain", "--untracked-files=no"))}
+
+def compare(results, baseline_path, threshold):
+    """Print p95 changes against an earlier run; return the scenarios that regressed."""
+    with open(baseline_path) as f:
+        baseline = json.load(f)["scenarios"]
+    regressed = []
+    print(f"\nvs {os.path.basename(baseline_path)} (p95, regression threshold x{threshold}):")
+    for name, current in results.items():
+        before = baseline.get(name)
+        if not before or not before["p95Ms"]:
+            continue
+        ratio = current["p95Ms"] / before["p95Ms"]
+        flag = "REGRESSED" if ratio > threshold else ""
+        print(f"  {name:38} {before['p95Ms']:9.2f} -> {current['p95Ms']:9.2f} ms  x{ratio:5.2f} {flag}")
+        if flag:
+            regressed.append(name)
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=500, help="measured requests per scenario")
+    parser.add_argument("--warmup", type=int, default=20, help="unmeasured requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--only", action="append", default=[], help="scenario name prefix; repeatable")
+    parser.add_argument("--reads-only", action="store_true", help="skip scenarios that write")
+    parser.add_argument("--transport", choices=["client", "http"], default="client")
+    parser.add_argument("--url", help="with --transport http: benchmark a running server instead of starting one")
+    parser.add_argument("--mongomock", action="store_true", help="seed a small in-memory dataset instead of using DATABASE_URL")
+    parser.add_argument("--seed", type=int, default=seed_data.DEFAULT_SEED)
+    parser.add_argument("--output", help="results file (default benchmarks/results/<time>-<commit>.json)")
+    parser.add_argument("--compare", help="earlier results file to compare p95 against")
+    parser.add_argument("--threshold", type=float, default=1.2, help="p95 ratio that counts as a regression")
+    parser.add_argument("--list", action="store_true", help="list scenarios and exit")
+    args = parser.parse_args()
+
+    if args.list:
+        for name, (method, _) in SCENARIOS.items():
+            print(f"{method:6} {name}")
+        return
+
+    from app import create_app
+    from app.database import client_factory
+    bench_db = os.getenv("BENCH_DB", "volu_bench")
+    app = create_app(testing=True)
+    client_factory.configure(MONGO_DB_NAME=bench_db)
+    if args.mongomock:
+        import mongomock
+        client_factory.use_client(mongomock.MongoClient())
+        seed_data.seed(client_factory.get_database(), 2000, 200, 20000, args.seed, log=lambda *a: None)
+    data = Dataset(client_factory.get_database())
+
+    names = [n for n in SCENARIOS if not args.only or any(n.startswith(p) for p in args.only)]
+    if args.reads_only:
+        names = [n for n in names if SCENARIOS[n][0] == "GET"]
+    if args.transport == "http":
+        transport = HTTPTransport(args.url or serve(app))
+    else:
+        transport = ClientTransport(app)
+
+    print(f"dataset {bench_db}: {data.manifest['counts']}")
+    print(f"{'scenario':38} {'rps':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'errors':>7}")
+    results = {}
+    for name in names:
+        summary = results[name] = run_scenario(name, transport, data, args.requests,
+                                               args.concurrency, args.warmup, args.seed)
+        print(f"{name:38} {summary['rps']:8.1f} {summary['p50Ms']:8.2f} {summary['p95Ms']:8.2f} "
+              f"{summary['p99Ms']:8.2f} {summary['errors']:7}")
+
+    git = git_info()
+    report = {
+        "meta": {
+            **git,
+            "startedAt": datetime.utcnow().isoformat(timespec="seconds") + "Z",
+            "python": platform.python_version(),
+            "host": platform.node(),
+            "transport": args.transport if not args.url else f"http {args.url}",
+            "concurrency": args.concurrency,
+            "requestsPerScenario": args.requests,
+            "warmup": args.warmup,
+            "seed": args.seed,
+            "backend": "mongomock" if args.mongomock else "mongodb",
+            "dataset": {k: v for k, v in data.manifest.items() if k != "createdAt"},
+        },
+        "scenarios": results,
+    }
+    output = args.output
+    if not output:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        stamp = datetime.utcnow().strftime("%Y%m%d-%H%M%S")
+        output = os.path.join(RESULTS_DIR, f"{stamp}-{(git['commit'] or 'nogit')[:8]}.json")
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nsaved {output}")
+
+    if args.compare and compare(results, args.compare, args.threshold):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
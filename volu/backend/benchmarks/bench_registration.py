@@ -0,0 +1,79 @@
+"""Concurrency benchmark for capacity-aware event registration.
+
+Fires N simultaneous registrations (distinct users) at one event through the
+Flask app and checks that the event is never overbooked and that everyone
+who did not get a spot is on the waitlist exactly once.
+
+    DATABASE_URL=mongodb://localhost:27017 python benchmarks/bench_registration.py --requests 5000 --capacity 300
+
+Runs against a separate database (BENCH_DB, default "volu_bench").
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+from app import database
+from app.routes import events
+from app.utils.json_provider import BSONJSONProvider
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--capacity", type=int, default=200)
+    parser.add_argument("--workers", type=int, default=64)
+    args = parser.parse_args()
+
+    collection = database.get_client()[os.getenv("BENCH_DB", "volu_bench")]["events"]
+    events.event_collection = collection
+    event_id = collection.insert_one({
+        "name": "Registration benchmark",
+        "currentVolunteers": 0,
+        "maxVolunteers": args.capacity,
+    }).inserted_id
+
+    app = Flask(__name__)
+    app.json = BSONJSONProvider(app)
+    app.register_blueprint(events.events_bp, url_prefix="/api/events")
+
+    def register(i):
+        with app.test_client() as client:
+            started = time.perf_counter()
+            res = client.post(f"/api/events/{event_id}/register", json={"userId": f"bench-user-{i}"})
+            return res.status_code, time.perf_counter() - started
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        results = list(pool.map(register, range(args.requests)))
+    elapsed = time.perf_counter() - started
+
+    event = collection.find_one({"_id": event_id})
+    collection.delete_one({"_id": event_id})
+
+    latencies = sorted(latency for _, latency in results)
+    statuses = {}
+    for status, _ in results:
+        statuses[status] = statuses.get(status, 0) + 1
+    registered = len(event.get("registeredVolunteers", []))
+    waitlisted = [w["userId"] for w in event.get("waitlist", [])]
+
+    print(f"requests={args.requests} workers={args.workers} elapsed={elapsed:.2f}s "
+          f"throughput={args.requests / elapsed:.0f} req/s")
+    print(f"p50={latencies[len(latencies) // 2] * 1000:.1f}ms "
+          f"p99={latencies[int(len(latencies) * 0.99) - 1] * 1000:.1f}ms statuses={statuses}")
+    print(f"capacity={args.capacity} currentVolunteers={event['currentVolunteers']} "
+          f"registered={registered} waitlisted={len(waitlisted)}")
+
+    ok = (event["currentVolunteers"] == registered == min(args.capacity, args.requests)
+          and len(set(waitlisted)) == len(waitlisted) == args.requests - registered)
+    print("OK" if ok else "FAILED: overbooked or lost registrations")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+"""Seeded synthetic dataset for the load benchmarks.
+
+Generates users (with skills, preferences and availability), events and
+participation records with realistic skew: a few busy volunteers, a long
+tail of occasional ones, and more sign-ups for popular events. The same
+--seed always produces the same documents, so results from different
+commits are comparable.
+
+    DATABASE_URL=mongodb://localhost:27017 python benchmarks/seed_data.py
+    DATABASE_URL=mongodb://localhost:27017 python benchmarks/seed_data.py --users 1000 --events 100 --participation 20000
+
+Writes to a separate database (BENCH_DB, default "volu_bench"), replacing
+its users, events, participation, rollup and notification collections, then creates the app's indexes.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bson import ObjectId
+
+DEFAULT_SEED = 42
+BATCH_SIZE = 10000
+
+CITIES = [
+    ("Houston", "TX", "77002"), ("Dallas", "TX", "75201"), ("Austin", "TX", "78701"),
+    ("San Antonio", "TX", "78205"), ("El Paso", "TX", "79901"), ("Fort Worth", "TX", "76102"),
+]
+SKILLS = ["Cooking", "Driving", "First Aid", "Teaching", "Construction", "Gardening",
+          "Event Planning", "Translation", "Photography", "Fundraising", "Tutoring", "Cleaning"]
+CAUSES = ["Hunger", "Education", "Environment", "Animals", "Health", "Housing", "Seniors", "Youth"]
+DAYS = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+SLOTS = ["morning", "afternoon", "evening"]
+FREQUENCIES = ["one_time", "recurring", "flexible"]
+START_TIMES = ["08:00", "09:00", "10:00", "13:00", "14:00", "18:00"]
+
+# Past events dominate, as in a site that has been running for a while
+STATUS_WEIGHTS = {"Attended": 55, "Confirmed": 15, "Registered": 15, "Cancelled": 10, "No-Show": 5}
+EPOCH = datetime(2023, 1, 1)
+DAYS_SPANNED = 3 * 365
+# Fixed "today" so the dataset does not change with the wall clock
+AS_OF = datetime(2025, 6, 1)
+
+
+def user_id(i):
+    return f"bench-user-{i}"
+
+def make_user(i, rng):
+    city, state, zip_code = rng.choice(CITIES)
+    return {
+        "userId": user_id(i),
+        "personalInfo": {"fullName": f"Volunteer {i}", "email": f"volunteer{i}@example.com",
+                         "city": city, "state": state, "zip": zip_code},
+        "skills": {"skills": rng.sample(SKILLS, rng.randint(1, 4))},
+        "preferences": {"causes": rng.sample(CAUSES, rng.randint(1, 3)),
+                        "preferredDistance": str(rng.choice([10, 25, 50, 100])),
+                        "frequency": rng.choice(FREQUENCIES),
+                        "remoteOpportunities": rng.random() < 0.1},
+        "availability": {"availableDays": rng.sample(DAYS, rng.randint(1, 7)),
+                         "availableTimeSlots": rng.sample(SLOTS, rng.randint(1, 3)),
+                         "minimumNoticePeriod": str(rng.choice([1, 3, 7]))},
+        "accountSettings": {"profileVisibility": rng.random() > 0.05},
+    }
+
+# Deterministic ObjectIds whose timestamps match createdAt
+def object_id(when, i):
+    return ObjectId(f"{int((when - datetime(1970, 1, 1)).total_seconds()):08x}{i:016x}")
+
+def make_event(i, rng, organizers):
+    city, state, zip_code = rng.choice(CITIES)
+    start = EPOCH + timedelta(days=rng.randrange(DAYS_SPANNED))
+    created = start - timedelta(days=rng.randint(7, 60))
+    return {
+        "_id": object_id(created, i),
+        "name": f"{rng.choice(CAUSES)} drive #{i}",
+        "description": "Help out at a community event near you. " * rng.randint(1, 6),
+        "city": city, "state": state, "zip": zip_code, "location": f"{i} Main St",
+        "startDate": start.strftime("%Y-%m-%d"),
+        "startTime": rng.choice(START_TIMES),
+        "requiredSkills": rng.sample(SKILLS, rng.randint(1, 3)),
+        "causes": rng.sample(CAUSES, rng.randint(1, 2)),
+        "eventType": rng.choice(FREQUENCIES),
+        "urgency": rng.choice(["low", "medium", "high"]),
+        "isVirtual": rng.random() < 0.05,
+        "maxVolunteers": rng.choice([10, 20, 50, 100, 250]),
+        "currentVolunteers": 0,
+        "registeredVolunteers": [],
+        "status": "Completed" if start < AS_OF else "Active",
+        "createdBy": rng.choice(organizers),
+        "createdAt": created,
+        "updatedAt": created,
+    }
+
+def skewed(rng, n, power):
+    """Index in [0, n) biased towards 0; with power=2 the first 1% get about 10% of the picks."""
+    return int(n * rng.random() ** power)
+
+def generate(users, events, participation, seed=DEFAULT_SEED):
+    """Yield (collection name, documents) batches for the whole dataset."""
+    rng = random.Random(seed)
+    organizers = [user_id(i) for i in range(min(users, 200))]
+
+    for start in range(0, users, BATCH_SIZE):
+        yield "users", [make_user(i, rng) for i in range(start, min(users, start + BATCH_SIZE))]
+
+    event_docs = [make_event(i, rng, organizers) for i in range(events)]
+    # Popular events are spread over the id range so they are not all the oldest ones
+    popularity = list(range(events))
+    rng.shuffle(popularity)
+
+    statuses, weights = list(STATUS_WEIGHTS), list(STATUS_WEIGHTS.values())
+    rollups = {}
+    seen = set()
+    batch = []
+    attempts = 0
+    while len(seen) < participation and attempts < participation * 3:
+        attempts += 1
+        user = user_id(skewed(rng, users, 2))
+        event = event_docs[popularity[skewed(rng, events, 3)]]
+        key = (user, event["_id"])
+        if key in seen:
+            continue
+        seen.add(key)
+
+        status = rng.choices(statuses, weights)[0]
+        hours = round(rng.uniform(1, 8), 1) if status == "Attended" else 0
+        # Four in five attended records have verified hours; derived without drawing from rng
+        # so the rest of the dataset is unchanged
+        verified = status == "Attended" and len(seen) % 5 != 0
+        month = event["startDate"][:7]
+        created = event["createdAt"] + timedelta(hours=rng.randint(1, 24 * 7))
+        batch.append({
+            "userId": user, "eventId": str(event["_id"]), "status": status,
+            "hoursLogged": hours, "hoursVerified": verified, "eventMonth": month, "createdAt": created, "updatedAt": created,
+        })
+        if status in ("Registered", "Confirmed") and event["currentVolunteers"] < event["maxVolunteers"]:
+            event["registeredVolunteers"].append(user)
+            event["currentVolunteers"] += 1
+
+        # Rollups are built here instead of re-aggregating 2M records afterwards
+        rollup = rollups.setdefault(user, {"userId": user, "statusCounts": {}, "attendedHours": 0,
+                                           "verifiedHours": 0, "eventsByMonth": {}, "hoursByMonth": {}})
+        rollup["statusCounts"][status] = rollup["statusCounts"].get(status, 0) + 1
+        rollup["eventsByMonth"][month] = rollup["eventsByMonth"].get(month, 0) + 1
+        rollup["hoursByMonth"][month] = round(rollup["hoursByMonth"].get(month, 0) + hours, 1)
+        if status == "Attended":
+            rollup["attendedHours"] = round(rollup["attendedHours"] + hours, 1)
+            if verified:
+                rollup["verifiedHours"] = round(rollup["verifiedHours"] + hours, 1)
+
+        if len(batch) == BATCH_SIZE:
+            yield "participation", batch
+            batch = []
+    if batch:
+        yield "participation", batch
+
+    for start in range(0, events, BATCH_SIZE):
+        yield "events", event_docs[start:start + BATCH_SIZE]
+
+    now = datetime.utcnow()
+    docs = list(rollups.values())
+    for rollup in docs:
+        rollup["rebuiltAt"] = rollup["updatedAt"] = now
+    for start in range(0, len(docs), BATCH_SIZE):
+        yield "participation_stats", docs[start:start + BATCH_SIZE]
+
+def seed(database, users, events, participation, seed=DEFAULT_SEED, log=print):
+    """Replace the benchmark collections in ``database`` and return a manifest of what was written."""
+    from app.database import ensure_indexes
+    started = time.perf_counter()
+    counts = {}
+    # org_stats is rebuilt from the seeded data on the first dashboard read
+    for name in ("users", "events", "participation", "participation_stats", "org_stats", "notifications",
+                 "notification_counters", "scans"):
+        database[name].drop()
+    for name, docs in generate(users, events, participation, seed):
+        database[name].insert_many(docs, ordered=False)
+        counts[name] = counts.get(name, 0) + len(docs)
+        if counts[name] % (BATCH_SIZE * 10) == 0:
+            log(f"  {name}: {counts[name]}")
+    ensure_indexes(database)
+
+    manifest = {"_id": "dataset", "seed": seed, "counts": counts,
+                "requested": {"users": users, "events": events, "participation": participation},
+                "seconds": round(time.perf_counter() - started, 1), "createdAt": datetime.utcnow()}
+    database["bench_meta"].replace_one({"_id": "dataset"}, manifest, upsert=True)
+    return manifest
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=100000)
+    parser.add_argument("--events", type=int, default=10000)
+    parser.add_argument("--participation", type=int, default=2000000)
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    args = parser.parse_args()
+
+    from app import database
+    db = database.get_client()[os.getenv("BENCH_DB", "volu_bench")]
+    manifest = seed(db, args.users, args.events, args.participation, args.seed)
+    print(f"seeded {db.name} in {manifest['seconds']}s: {manifest['counts']}")
+
+
+if __name__ == "__main__":
+    main()
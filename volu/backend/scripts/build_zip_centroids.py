@@ -0,0 +1,56 @@
+"""Build app/data/zip_centroids.bin from a ZIP code source file.
+
+Accepts either the ``zips.json.bz2`` shipped with the MIT-licensed ``zipcodes``
+package (fields zip_code/city/state/lat/long) or a CSV with
+zip,city,state,lat,lon columns.
+
+    python scripts/build_zip_centroids.py path/to/zips.json.bz2
+"""
+import bz2
+import csv
+import json
+import os
+import sys
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils.geo import CITY_DTYPE, DEFAULT_CENTROIDS_PATH, ZIP_DTYPE, city_key, write_centroids, zip_key
+
+
+def read_rows(path):
+    if path.endswith(".csv"):
+        with open(path, newline="") as f:
+            for row in csv.DictReader(f):
+                yield row["zip"], row["city"], row["state"], row["lat"], row["lon"]
+        return
+    opener = bz2.open if path.endswith(".bz2") else open
+    with opener(path, "rt") as f:
+        for row in json.load(f):
+            yield row["zip_code"], row["city"], row["state"], row["lat"], row["long"]
+
+
+def main(source, output=DEFAULT_CENTROIDS_PATH):
+    zips = {}
+    city_points = {}
+    for zip_code, city, state, lat, lon in read_rows(source):
+        key = zip_key(zip_code)
+        try:
+            lat, lon = float(lat), float(lon)
+        except (TypeError, ValueError):
+            continue
+        if key is None or (lat == 0 and lon == 0):
+            continue
+        zips[key] = (key, lat, lon)
+        city_points.setdefault(city_key(city, state), []).append((lat, lon))
+
+    # A city's centroid is the mean of its ZIP centroids
+    cities = [(key, *np.mean(points, axis=0)) for key, points in city_points.items() if key is not None]
+    write_centroids(output, np.array(list(zips.values()), dtype=ZIP_DTYPE), np.array(cities, dtype=CITY_DTYPE))
+    print(f"Wrote {len(zips)} ZIPs and {len(cities)} cities to {output}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        sys.exit(__doc__)
+    main(*sys.argv[1:3])
@@ -2,6 +2,7 @@
 
 import type React from "react"
 import { createContext, useContext, useState, useCallback, useEffect } from "react"
+import { useUser } from "@clerk/nextjs"
 import { v4 as uuidv4 } from "uuid"
 import { notificationService, type Notification } from "@/lib/api/notificationService"
 
@@ -41,6 +42,9 @@ export const NotificationProvider: React.FC<{ children: React.ReactNode }> = ({
   const [unreadCount, setUnreadCount] = useState(0)
   const [loading, setLoading] = useState(false)
   const [error, setError] = useState<string | null>(null)
+  // The unread badge and mark-all are per inbox, so they wait for a signed-in user
+  const { user } = useUser()
+  const userId = user?.id
 
   const addUINotification = useCallback((type: UINotificationType, message: string) => {
     const id = uuidv4()
@@ -58,15 +62,14 @@ export const NotificationProvider: React.FC<{ children: React.ReactNode }> = ({
     try {
       const fetched = await notificationService.getNotifications(options)
       setNotifications(fetched)
-      const count = await notificationService.getUnreadCount()
-      setUnreadCount(count)
+      if (userId) setUnreadCount(await notificationService.getUnreadCount(userId))
     } catch (err) {
       console.error(err)
       setError("Failed to fetch notifications")
     } finally {
       setLoading(false)
     }
-  }, [])
+  }, [userId])
 
   const markAsRead = useCallback(async (id: string) => {
     try {
@@ -82,15 +85,16 @@ export const NotificationProvider: React.FC<{ children: React.ReactNode }> = ({
   }, [addUINotification])
 
   const markAllAsRead = useCallback(async () => {
+    if (!userId) return
     try {
-      await notificationService.markAllAsRead()
+      await notificationService.markAllAsRead(userId)
       setNotifications((prev) => prev.map((n) => ({ ...n, isRead: true, readAt: new Date().toISOString() })))
       setUnreadCount(0)
     } catch (err) {
       console.error(err)
       addUINotification("error", "Failed to mark all as read")
     }
-  }, [addUINotification])
+  }, [userId, addUINotification])
 
   const deleteNotification = useCallback(async (id: string) => {
     try {
@@ -106,17 +110,20 @@ export const NotificationProvider: React.FC<{ children: React.ReactNode }> = ({
 
   useEffect(() => {
     fetchNotifications()
-    const interval = setInterval(() => {
-      notificationService.getUnreadCount().then((count: number) => {
-        if (count > unreadCount) {
-          fetchNotifications()
-          addUINotification("info", `You have ${count - unreadCount} new notification${count - unreadCount > 1 ? "s" : ""}`)
-        }
-      }).catch(console.error)
-    }, 30000)
-
-    return () => clearInterval(interval)
-  }, [fetchNotifications, unreadCount, addUINotification])
+  }, [fetchNotifications])
+
+  // The stream pushes every new notification and unread-count change, so nothing polls
+  useEffect(() => {
+    if (!userId) return
+    return notificationService.subscribe(userId, {
+      onNotification: (notification) => {
+        setNotifications((prev) => (prev.some((n) => n.id === notification.id) ? prev : [notification, ...prev]))
+        addUINotification("info", notification.title || "You have a new notification")
+      },
+      onUnread: setUnreadCount,
+      onReset: () => fetchNotifications(),
+    })
+  }, [userId, fetchNotifications, addUINotification])
 
   return (
     <NotificationContext.Provider
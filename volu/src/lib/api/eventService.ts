@@ -42,6 +42,28 @@ export type Event = EventFormData & {
   currentVolunteers: number
 }
 
+export interface EventSearchParams {
+  q?: string
+  eventType?: string[]
+  urgency?: string[]
+  status?: string[]
+  requiredSkills?: string[]
+  city?: string[]
+  from?: string
+  to?: string
+  sort?: "relevance" | "date"
+  limit?: number
+  offset?: number
+}
+
+export interface EventSearchResult {
+  results: (Partial<Event> & { id: string; score?: number })[]
+  total: number
+  limit: number
+  offset: number
+  facets: Record<string, Record<string, number>>
+}
+
 export const eventService = {
   // Get all events
   getAllEvents: async (): Promise<Event[]> => {
@@ -54,6 +76,22 @@ export const eventService = {
     }
   },
 
+  // Search events (text, facets, date range) on the server
+  searchEvents: async (search: EventSearchParams): Promise<EventSearchResult> => {
+    try {
+      const params = new URLSearchParams()
+      Object.entries(search).forEach(([key, value]) => {
+        if (value === undefined || value === "" || (Array.isArray(value) && value.length === 0)) return
+        params.append(key, Array.isArray(value) ? value.join(",") : String(value))
+      })
+      const response = await api.get(`/events/search?${params.toString()}`)
+      return response.data as EventSearchResult
+    } catch (error) {
+      console.error("Error searching events:", error)
+      throw error
+    }
+  },
+
   // Get event by ID
   getEventById: async (id: string): Promise<Event> => {
     const res = await fetch(`${process.env.NEXT_PUBLIC_API_URL}/events/${id}`);
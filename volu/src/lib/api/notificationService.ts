@@ -29,6 +29,12 @@ export enum NotificationType {
     }
   }
   
+  export interface NotificationStreamHandlers {
+    onNotification: (notification: Notification) => void
+    onUnread: (count: number) => void
+    onReset: () => void
+  }
+  
   const API_BASE = "http://localhost:3001/api/notifications"
   
   export const notificationService = {
@@ -46,8 +52,8 @@ export enum NotificationType {
       return await res.json()
     },
   
-    async getUnreadCount(): Promise<number> {
-      const res = await fetch(`${API_BASE}/unread-count`, {
+    async getUnreadCount(userId: string): Promise<number> {
+      const res = await fetch(`${API_BASE}/unread-count?userId=${encodeURIComponent(userId)}`, {
         credentials: "include",
       })
   
@@ -56,6 +62,19 @@ export enum NotificationType {
       return data.count
     },
   
+    // Server-Sent Events for one inbox: new notifications, unread-count changes, and
+    // "reset" when the server cannot replay what was missed. EventSource reconnects on
+    // its own and resumes from Last-Event-ID. Returns a function that closes the stream.
+    subscribe(userId: string, handlers: NotificationStreamHandlers): () => void {
+      const source = new EventSource(`${API_BASE}/stream?userId=${encodeURIComponent(userId)}`, {
+        withCredentials: true,
+      })
+      source.addEventListener("notification", (e) => handlers.onNotification(JSON.parse((e as MessageEvent).data)))
+      source.addEventListener("unread", (e) => handlers.onUnread(JSON.parse((e as MessageEvent).data).count))
+      source.addEventListener("reset", () => handlers.onReset())
+      return () => source.close()
+    },
+  
     async markAsRead(notificationId: string): Promise<void> {
       const res = await fetch(`${API_BASE}/${notificationId}/mark-read`, {
         method: "POST",
@@ -65,8 +84,8 @@ export enum NotificationType {
       if (!res.ok) throw new Error("Failed to mark notification as read")
     },
   
-    async markAllAsRead(): Promise<void> {
-      const res = await fetch(`${API_BASE}/mark-all-read`, {
+    async markAllAsRead(userId: string): Promise<void> {
+      const res = await fetch(`${API_BASE}/mark-all-as-read?userId=${encodeURIComponent(userId)}`, {
         method: "POST",
         credentials: "include",
       })
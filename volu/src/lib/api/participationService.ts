@@ -78,6 +78,14 @@ export interface VolunteerAchievement {
   updatedAt: string
 }
 
+export interface CertificateBatch {
+  certificates: VolunteerAchievement[]
+  summary: {
+    generated: number
+    cached: number
+  }
+}
+
 export interface VolunteerStatistics {
   totalHours: number
   statusCounts: Record<string, number>
@@ -117,6 +125,8 @@ export const participationService = {
       if (sortBy) params.append("sortBy", sortBy)
       if (sortOrder) params.append("sortOrder", sortOrder)
   
+      params.append("include", "event,user")
+
       const response = await api.get(`/participation/my?${params.toString()}`)
       return response.data as { history: ParticipationRecord[]; totalCount: number; limit: number; offset: number }
     } catch (error) {
@@ -192,6 +202,8 @@ export const participationService = {
       if (sortBy) params.append("sortBy", sortBy)
       if (sortOrder) params.append("sortOrder", sortOrder)
 
+      params.append("include", "event,user")
+
       const response = await api.get(`/participation/all?${params.toString()}`)
       return response.data as { history: ParticipationRecord[]; totalCount: number; limit: number; offset: number }
     } catch (error) {
@@ -303,7 +315,7 @@ export const participationService = {
   },
 
   // Generate a volunteer certificate
-  generateCertificate: async (eventId: string, userId?: string): Promise<VolunteerAchievement> => {
+  generateCertificate: async (eventId: string, userId: string): Promise<VolunteerAchievement> => {
     try {
       const response = await api.post(`/participation/certificate/${eventId}`, { userId })
       return response.data as VolunteerAchievement
@@ -313,10 +325,23 @@ export const participationService = {
     }
   },
 
+  // Generate certificates for every volunteer with verified hours at an event (admin only)
+  generateEventCertificates: async (eventId: string): Promise<CertificateBatch> => {
+    try {
+      const response = await api.post(`/participation/certificate/${eventId}`, {})
+      return response.data as CertificateBatch
+    } catch (error) {
+      console.error("Error generating certificates:", error)
+      throw error
+    }
+  },
+
   // Get volunteer certificates
-  getVolunteerCertificates: async (): Promise<VolunteerAchievement[]> => {
+  getVolunteerCertificates: async (userId: string): Promise<VolunteerAchievement[]> => {
     try {
-      const response = await api.get("/participation/certificates")
+      const response = await api.get("/participation/certificates", {
+        params: { userId }
+      })
       return response.data as VolunteerAchievement[]
     } catch (error) {
       console.error("Error fetching certificates:", error)